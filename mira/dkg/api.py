@@ -1,11 +1,12 @@
 """API endpoints."""
 
+import dataclasses
 import itertools as itt
 import os
 from typing import Any, List, Mapping, Optional, Union
 
 import pydantic
-from fastapi import APIRouter, Body, HTTPException, Path, Query, Request
+from fastapi import APIRouter, Body, HTTPException, Path, Query, Request, Response
 from neo4j.graph import Relationship
 from pydantic import BaseModel, Field
 from scipy.spatial import distance
@@ -620,3 +621,73 @@ def entity_similarity(
             )
         )
     return rv
+
+
+class ComponentReadiness(BaseModel):
+    """The loading status of a component of the app state"""
+
+    loaded: bool = Field(..., description="True if the component is loaded")
+    seconds: Optional[float] = Field(
+        None, description="The time it took to load the component, in seconds"
+    )
+    memory_mb: Optional[float] = Field(
+        None,
+        description="The increase of the peak memory usage of the service "
+        "while loading the component, in MB. Not measured if other components "
+        "were loading at the same time.",
+    )
+    error: Optional[str] = Field(
+        None, description="The error raised while loading the component"
+    )
+
+
+class Readiness(BaseModel):
+    """Readiness of the service and its components"""
+
+    ready: bool = Field(
+        ..., description="True if all requested components are loaded"
+    )
+    components: Mapping[str, ComponentReadiness] = Field(
+        ..., description="The loading status of each component"
+    )
+
+
+@api_blueprint.get(
+    "/ready",
+    response_model=Readiness,
+    tags=["meta"],
+    responses={503: {"model": Readiness}},
+)
+def ready(
+    request: Request,
+    response: Response,
+    components: Optional[List[str]] = Query(
+        None,
+        description="The components that need to be loaded for the service "
+        "to be considered ready. By default, all components are required.",
+        examples=[["grounder"]],
+    ),
+):
+    """Report which components of the service are loaded.
+
+    Responds with status code 503 if any of the requested components is not
+    loaded yet, which makes this endpoint usable as a readiness probe, e.g.,
+    ``/api/ready?components=grounder`` for a deployment that only grounds.
+    """
+    status = request.app.state.get_status()
+    required = components or list(status)
+    unknown = set(required) - set(status)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown components: {sorted(unknown)}"
+        )
+    rv = Readiness(
+        ready=all(status[name].loaded for name in required),
+        components={
+            name: ComponentReadiness(**dataclasses.asdict(component_status))
+            for name, component_status in status.items()
+        },
+    )
+    if not rv.ready:
+        response.status_code = 503
+    return rv
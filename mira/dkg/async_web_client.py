@@ -0,0 +1,383 @@
+"""An asynchronous client for the MIRA DKG REST API.
+
+The :class:`AsyncDkgWebClient` mirrors :mod:`mira.dkg.web_client` but
+allows many lookups to run concurrently, e.g.,
+
+.. code-block:: python
+
+    import asyncio
+    from mira.dkg.async_web_client import AsyncDkgWebClient
+
+    async def annotate(texts):
+        async with AsyncDkgWebClient() as client:
+            return await client.ground_batch(texts)
+
+    results = asyncio.run(annotate(["infected population", "susceptible"]))
+"""
+
+import asyncio
+import logging
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple, Union
+
+import httpx
+
+from mira.dkg import api, grounding
+from mira.dkg.client import AskemEntity, Entity
+from mira.dkg.utils import DKG_REFINER_RELS
+from mira.dkg.web_client import DEFAULT_CACHE_TTL, WebCache, get_base_url
+
+__all__ = [
+    "AsyncDkgWebClient",
+]
+
+logger = logging.getLogger(__name__)
+
+#: Response status codes on which a request is retried
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AsyncDkgWebClient:
+    """An asyncio-based client for the MIRA DKG REST API
+
+    Requests are limited to a bounded number of concurrent connections,
+    transient failures are retried with exponential backoff, and
+    identical requests that are in flight at the same time are coalesced
+    into a single request.
+
+    Parameters
+    ----------
+    api_url :
+        The base URL of the REST API. If not given, the URL is looked up in
+        the MIRA_REST_URL environment variable or the rest_url entry of the
+        mira pystow config at the time of each request.
+    cache_dir :
+        A directory in which responses are cached. If None, responses are
+        not cached. The cache format is shared with
+        :class:`mira.dkg.web_client.DkgWebClient`.
+    ttl :
+        The number of seconds after which a cached response is considered
+        stale. If None, cached responses never expire.
+    max_concurrency :
+        The maximum number of requests sent at the same time.
+    max_retries :
+        The number of times a request is retried on connection errors and
+        on 429 and 5xx responses.
+    backoff_factor :
+        The base delay in seconds of the exponential backoff between
+        retries.
+    timeout :
+        The timeout of each request, in seconds.
+    transport :
+        An optional httpx transport to send requests with.
+    """
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        cache_dir: Union[None, str, Path] = None,
+        ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        max_concurrency: int = 20,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: float = 30,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_url = api_url
+        self.cache = WebCache(cache_dir, ttl=ttl) if cache_dir is not None else None
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def __aenter__(self) -> "AsyncDkgWebClient":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying connections"""
+        await self.client.aclose()
+
+    async def request(
+        self,
+        endpoint: str,
+        method: Literal["get", "post"],
+        query_json: Optional[Union[Dict[str, Any], List[Tuple[str, Any]]]] = None,
+        api_url: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Any:
+        """Send a request to the REST API and return the results
+
+        Parameters
+        ----------
+        endpoint :
+            The endpoint to send the request to.
+        method :
+            Which method to use. Must be one of 'post' and 'get'.
+        query_json :
+            The data to send with the request, see
+            :func:`mira.dkg.web_client.web_client`.
+        api_url :
+            Provide the base URL to the REST API. Use this argument to override
+            the default set in MIRA_REST_URL or rest_url from the config file.
+        use_cache :
+            If True (default), the response is looked up in and stored to the
+            on-disk cache, if the client has one.
+
+        Returns
+        -------
+        :
+            The data sent back from the endpoint as a json.
+        """
+        base_url = get_base_url(api_url or self.api_url)
+        endpoint = endpoint if endpoint.startswith("/") else "/" + endpoint
+        endpoint_url = base_url + endpoint
+
+        if method == "post":
+            if query_json is None:
+                raise ValueError(f"POST request to endpoint {endpoint} requires query data")
+        elif method != "get":
+            raise ValueError("Method must be one of 'get' and 'post'")
+
+        key = WebCache.get_key(method, endpoint_url, query_json)
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            # Cache entries are files, which are read and written in a
+            # thread to not block the event loop
+            hit, data = await asyncio.to_thread(cache.get, key)
+            if hit:
+                return data
+
+        # Coalesce identical requests that are already in flight
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._send(method, endpoint_url, query_json)
+            )
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        data = await asyncio.shield(future)
+
+        if cache is not None:
+            await asyncio.to_thread(cache.set, key, data)
+        return data
+
+    async def _send(self, method: str, endpoint_url: str, query_json: Any) -> Any:
+        if method == "post":
+            kwargs: Dict[str, Any] = {"json": query_json}
+        else:
+            kwargs = {} if query_json is None else {"params": query_json}
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    res = await self.client.request(method.upper(), endpoint_url,
+                                                    **kwargs)
+            except httpx.TransportError as exc:
+                if attempt == self.max_retries:
+                    raise
+                logger.debug("Retrying %s after error: %s", endpoint_url, exc)
+            else:
+                if res.status_code not in RETRY_STATUS_CODES \
+                        or attempt == self.max_retries:
+                    res.raise_for_status()
+                    return res.json()
+                logger.debug("Retrying %s after status %s", endpoint_url,
+                             res.status_code)
+            # Exponential backoff with jitter
+            await asyncio.sleep(self.backoff_factor * 2 ** attempt
+                                * (1 + random.random()))
+
+    async def get_relations(
+        self,
+        relations_model: api.RelationQuery,
+        api_url: Optional[str] = None,
+    ) -> Union[List[api.RelationResponse], List[api.FullRelationResponse], None]:
+        """Get relations based on a RelationQuery, see
+        :func:`mira.dkg.web_client.get_relations_web`"""
+        query_json = relations_model.model_dump(exclude_unset=True,
+                                                exclude_defaults=True)
+        res_json = await self.request(
+            endpoint="/relations", method="post", query_json=query_json, api_url=api_url
+        )
+        if res_json is not None:
+            if relations_model.full:
+                return [api.FullRelationResponse(**r) for r in res_json]
+            else:
+                return [api.RelationResponse(**r) for r in res_json]
+        return None
+
+    async def get_entity(self, curie: str, api_url: Optional[str] = None) -> Optional[api.Entity]:
+        """Get an entity by its CURIE, see
+        :func:`mira.dkg.web_client.get_entity_web`"""
+        res_json = await self.request(endpoint=f"/entity/{curie}", method="get",
+                                      api_url=api_url)
+        if res_json is not None:
+            return api.Entity(**res_json)
+        return None
+
+    async def get_entities(
+        self, curies: List[str], api_url: Optional[str] = None
+    ) -> Optional[List[Union[AskemEntity, Entity]]]:
+        """Get multiple entities by their CURIEs, see
+        :func:`mira.dkg.web_client.get_entities_web`"""
+        res_json = await self.request(endpoint=f"/entities/{','.join(curies)}",
+                                      method="get", api_url=api_url)
+        if res_json is not None:
+            return [Entity(**record) for record in res_json]
+        return None
+
+    async def get_lexical(self, api_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get lexical information for all entities, see
+        :func:`mira.dkg.web_client.get_lexical_web`"""
+        return await self.request(endpoint="/lexical", method="get", api_url=api_url)
+
+    async def ground(
+        self,
+        text: str,
+        namespaces: Optional[List[str]] = None,
+        api_url: Optional[str] = None,
+    ) -> Optional[grounding.GroundResults]:
+        """Ground text with Gilda, see :func:`mira.dkg.web_client.ground_web`"""
+        query_json: Dict[str, Any] = {"text": text}
+        if namespaces is not None:
+            query_json["namespaces"] = namespaces
+        res_json = await self.request(endpoint="/ground", method="post",
+                                      query_json=query_json, api_url=api_url)
+        if res_json is not None:
+            return grounding.GroundResults(**res_json)
+        return None
+
+    async def search(
+        self, term: str, limit: int = 25, offset: int = 0, api_url: Optional[str] = None
+    ) -> List[api.Entity]:
+        """Search nodes by their name/synonyms, see
+        :func:`mira.dkg.web_client.search_web`"""
+        res_json = await self.request(
+            endpoint="/search", method="get",
+            query_json={"q": term, "limit": limit, "offset": offset},
+            api_url=api_url
+        )
+        return [api.Entity(**e) for e in res_json]
+
+    async def get_transitive_closure(
+        self,
+        relation_types: Optional[List[str]] = None,
+        api_url: Optional[str] = None
+    ) -> Set[Tuple[str, str]]:
+        """Get a transitive closure, see
+        :func:`mira.dkg.web_client.get_transitive_closure_web`"""
+        if not relation_types:
+            relation_types = DKG_REFINER_RELS
+        res_json = await self.request(
+            "/transitive_closure",
+            method="get",
+            query_json=[("relation_types", rt) for rt in relation_types],
+            api_url=api_url
+        )
+        return {tuple(pair) for pair in res_json}
+
+    async def is_ontological_child(
+        self, child_curie: str, parent_curie: str, api_url: Optional[str] = None
+    ) -> bool:
+        """Check if one CURIE is a child term of another, see
+        :func:`mira.dkg.web_client.is_ontological_child_web`"""
+        res_json = await self.request(
+            "/is_ontological_child",
+            method="post",
+            query_json={"child_curie": child_curie, "parent_curie": parent_curie},
+            api_url=api_url
+        )
+        return res_json["is_child"]
+
+    async def ground_batch(
+        self,
+        texts: List[str],
+        namespaces: Optional[List[str]] = None,
+        api_url: Optional[str] = None,
+    ) -> List[Optional[grounding.GroundResults]]:
+        """Ground a list of texts concurrently
+
+        Parameters
+        ----------
+        texts :
+            The texts to be grounded.
+        namespaces :
+            A list of namespaces to filter groundings to. Optional.
+        api_url :
+            Use this parameter to specify the REST API base url or to override
+            the url set in the environment or the config.
+
+        Returns
+        -------
+        :
+            A list of GroundResults in the same order as the input texts.
+        """
+        return list(await asyncio.gather(*(
+            self.ground(text, namespaces=namespaces, api_url=api_url)
+            for text in texts
+        )))
+
+    async def get_entities_batch(
+        self, curies: List[str], api_url: Optional[str] = None
+    ) -> List[Optional[api.Entity]]:
+        """Get entities for a list of CURIEs concurrently
+
+        Parameters
+        ----------
+        curies :
+            A list of CURIEs for entities to get information about.
+        api_url :
+            Use this parameter to specify the REST API base url or to override
+            the url set in the environment or the config.
+
+        Returns
+        -------
+        :
+            A list of Entity models in the same order as the input CURIEs,
+            with None for CURIEs that could not be found in the graph.
+        """
+        return list(await asyncio.gather(*(
+            self._get_entity_or_none(curie, api_url) for curie in curies
+        )))
+
+    async def _get_entity_or_none(
+        self, curie: str, api_url: Optional[str]
+    ) -> Optional[api.Entity]:
+        try:
+            return await self.get_entity(curie, api_url=api_url)
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code != 404:
+                raise
+            return None
+
+    async def is_ontological_child_batch(
+        self, pairs: List[Tuple[str, str]], api_url: Optional[str] = None
+    ) -> List[bool]:
+        """Check a list of (child, parent) CURIE pairs for refinement concurrently
+
+        Parameters
+        ----------
+        pairs :
+            A list of (child CURIE, parent CURIE) tuples.
+        api_url :
+            Use this parameter to specify the REST API base url or to override
+            the url set in the environment or the config
+
+        Returns
+        -------
+        :
+            A list of booleans in the same order as the input pairs, each True
+            if the child is an ontological child of the parent.
+        """
+        return list(await asyncio.gather(*(
+            self.is_ontological_child(child, parent, api_url=api_url)
+            for child, parent in pairs
+        )))
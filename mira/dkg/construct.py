@@ -142,6 +142,8 @@ class UseCasePaths:
         self.NODES_PATH = self.module.join(name="nodes.tsv.gz")
         self.EDGES_PATH = self.module.join(name="edges.tsv.gz")
         self.EMBEDDINGS_PATH = self.module.join(name="embeddings.tsv.gz")
+        self.GILDA_TERMS_PATH = self.module.join(name="gilda_terms.tsv.gz")
+        self.GROUNDER_PATH = self.module.join(name="grounder.pkl")
 
         prefixes = list(self.prefixes)
         if self.askemo_prefix:
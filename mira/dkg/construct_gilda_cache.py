@@ -1,8 +1,14 @@
-"""Construct a Gilda grounding cache for all terms in the graph."""
+"""Construct a Gilda grounding cache for all terms in the graph.
+
+This writes a TSV file of all Gilda terms derived from the nodes of the
+graph as well as a prebuilt grounder for the DKG service's grounding
+prefixes, which the service loads on startup instead of querying Neo4j.
+"""
 
 import csv
 import gzip
-from typing import Iterable
+from pathlib import Path
+from typing import Iterable, Optional
 
 import click
 import pandas as pd
@@ -10,17 +16,48 @@ from gilda.process import normalize
 from gilda.term import Term, filter_out_duplicates
 from tqdm import tqdm
 
-from mira.dkg.construct import GILDA_TERMS_PATH, NODES_PATH, upload_s3
+from mira.dkg.grounder_cache import dump_grounder
+from mira.dkg.utils import PREFIXES
 
 
 @click.command()
-@click.option("--upload")
-def main(upload):
-    _main(upload=upload)
+@click.option("--use-case", default="epi", show_default=True)
+@click.option("--nodes-path", type=Path,
+              help="Nodes file to read, defaults to the use case's build")
+@click.option("--terms-path", type=Path,
+              help="Terms file to write, defaults to the use case's build")
+@click.option("--grounder-path", type=Path,
+              help="Grounder file to write, defaults to the use case's build")
+@click.option("--version", help="The version of the graph")
+@click.option("--upload", is_flag=True)
+def main(use_case, nodes_path, terms_path, grounder_path, version, upload):
+    _main(
+        use_case=use_case,
+        nodes_path=nodes_path,
+        terms_path=terms_path,
+        grounder_path=grounder_path,
+        version=version,
+        upload=upload,
+    )
+
 
+def _main(
+    use_case: str = "epi",
+    nodes_path: Optional[Path] = None,
+    terms_path: Optional[Path] = None,
+    grounder_path: Optional[Path] = None,
+    version: Optional[str] = None,
+    upload: bool = False,
+):
+    if upload or not (nodes_path and terms_path and grounder_path):
+        from mira.dkg.construct import UseCasePaths, upload_s3
 
-def _main(upload: bool):
-    terms = filter_out_duplicates(list(_iter_terms()))
+        use_case_paths = UseCasePaths(use_case)
+        nodes_path = nodes_path or use_case_paths.NODES_PATH
+        terms_path = terms_path or use_case_paths.GILDA_TERMS_PATH
+        grounder_path = grounder_path or use_case_paths.GROUNDER_PATH
+
+    terms = filter_out_duplicates(list(_iter_terms(nodes_path)))
     header = [
         "norm_text",
         "text",
@@ -33,23 +70,25 @@ def _main(upload: bool):
         "source_db",
         "source_id",
     ]
-    with gzip.open(GILDA_TERMS_PATH, "wt", encoding="utf-8") as fh:
+    with gzip.open(terms_path, "wt", encoding="utf-8") as fh:
         writer = csv.writer(fh, delimiter="\t")
         writer.writerow(header)
         writer.writerows(t.to_list() for t in terms)
+    dump_grounder(terms, grounder_path, prefixes=PREFIXES, graph_version=version)
     if upload:
-        upload_s3(GILDA_TERMS_PATH)
+        upload_s3(terms_path, use_case=use_case)
+        upload_s3(grounder_path, use_case=use_case)
 
 
-def _iter_terms() -> Iterable[Term]:
-    df = pd.read_csv(NODES_PATH, sep="\t")
+def _iter_terms(nodes_path: Path) -> Iterable[Term]:
+    df = pd.read_csv(nodes_path, sep="\t")
     it = tqdm(df.values, unit_scale=True, unit="node")
     for (
         curie,
         _,
         name,
         synonyms,
-        _obsolete,
+        obsolete,
         _type,
         _description,
         xrefs,
@@ -63,6 +102,9 @@ def _iter_terms() -> Iterable[Term]:
     ) in it:
         if not name or pd.isna(name):
             continue
+        # Obsolete terms are not used for grounding by the DKG service
+        if str(obsolete).lower() == "true":
+            continue
         prefix, identifier = curie.split(":", 1)
         yield Term(
             norm_text=normalize(name),
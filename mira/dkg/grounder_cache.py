@@ -0,0 +1,142 @@
+"""Serialization of prebuilt Gilda grounders for fast DKG service startup.
+
+Building a :class:`gilda.grounder.Grounder` from the graph requires
+querying every node of the grounding prefixes and normalizing each name
+and synonym. Instead, the grounder's lookup index can be built once along
+with the graph and loaded directly when the service starts.
+"""
+
+import csv
+import gzip
+import logging
+import pickle
+from pathlib import Path
+from typing import Collection, Dict, Iterable, List, Optional, Union
+
+from gilda.grounder import Grounder
+from gilda.term import Term
+
+__all__ = [
+    "dump_grounder",
+    "load_grounder",
+    "iter_terms_file",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The version of the serialized grounder format, bumped when it changes
+GROUNDER_FORMAT_VERSION = 1
+
+
+def dump_grounder(
+    terms: Iterable[Term],
+    path: Union[str, Path],
+    *,
+    prefixes: Optional[Collection[str]] = None,
+    graph_version: Optional[str] = None,
+) -> None:
+    """Write the grounding index for the given terms to a file
+
+    Parameters
+    ----------
+    terms :
+        The terms to index.
+    path :
+        The path of the file to write.
+    prefixes :
+        If given, only terms from these prefixes are indexed. The prefixes
+        are recorded in the file so that a grounder built for a different
+        set of prefixes is not used by mistake.
+    graph_version :
+        The version of the graph the terms were derived from.
+    """
+    prefix_set = set(prefixes) if prefixes is not None else None
+    entries: Dict[str, List[Term]] = {}
+    for term in terms:
+        if not term.norm_text:
+            continue
+        if prefix_set is not None and term.db not in prefix_set:
+            continue
+        entries.setdefault(term.norm_text, []).append(term)
+    data = {
+        "format_version": GROUNDER_FORMAT_VERSION,
+        "graph_version": graph_version,
+        "prefixes": sorted(prefix_set) if prefix_set is not None else None,
+        "entries": entries,
+    }
+    with open(path, "wb") as file:
+        pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_grounder(
+    path: Union[str, Path],
+    *,
+    prefixes: Optional[Collection[str]] = None,
+    graph_version: Optional[str] = None,
+) -> Optional[Grounder]:
+    """Load a grounder written by :func:`dump_grounder`
+
+    Parameters
+    ----------
+    path :
+        The path of the serialized grounder.
+    prefixes :
+        If given, the grounder is only returned if it was built for exactly
+        these prefixes.
+    graph_version :
+        If given, the grounder is only returned if it was built from this
+        version of the graph.
+
+    Returns
+    -------
+    :
+        The grounder, or None if the file is missing or doesn't match the
+        requested prefixes or graph version.
+    """
+    path = Path(path)
+    if not path.is_file():
+        return None
+    with open(path, "rb") as file:
+        data = pickle.load(file)
+    if data.get("format_version") != GROUNDER_FORMAT_VERSION:
+        logger.warning("Grounder at %s has an unsupported format, ignoring", path)
+        return None
+    if graph_version is not None and data["graph_version"] != graph_version:
+        logger.warning(
+            "Grounder at %s was built for graph version %s, not %s, ignoring",
+            path, data["graph_version"], graph_version,
+        )
+        return None
+    if prefixes is not None and data["prefixes"] != sorted(set(prefixes)):
+        logger.warning("Grounder at %s was built for different prefixes, "
+                       "ignoring", path)
+        return None
+    return Grounder(data["entries"])
+
+
+def iter_terms_file(
+    path: Union[str, Path], prefixes: Optional[Collection[str]] = None
+) -> Iterable[Term]:
+    """Iterate over the terms in a Gilda terms TSV file
+
+    Parameters
+    ----------
+    path :
+        The path of a gzipped TSV file of terms, as written by
+        :mod:`mira.dkg.construct_gilda_cache`.
+    prefixes :
+        If given, only terms from these prefixes are returned.
+
+    Yields
+    ------
+    :
+        Gilda terms.
+    """
+    prefix_set = set(prefixes) if prefixes is not None else None
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        reader = csv.reader(file, delimiter="\t")
+        next(reader)  # skip header
+        for row in reader:
+            if prefix_set is not None and row[2] not in prefix_set:
+                continue
+            yield Term(*[value or None for value in row])
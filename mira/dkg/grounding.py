@@ -1,19 +1,37 @@
 """Gilda grounding blueprint."""
 
-from typing import List, Optional
+import multiprocessing
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from fastapi import APIRouter, Body, Path, Request
-from gilda.grounder import ScoredMatch
+from fastapi.responses import StreamingResponse
+from gilda.grounder import Grounder, ScoredMatch
 from pydantic import BaseModel, Field
 
 __all__ = [
     "grounding_blueprint",
+    "ground_batch",
 ]
 
 grounding_blueprint = APIRouter()
 
 BR_BASE = "https://bioregistry.io"
 
+#: The number of worker processes used to ground large batches. If 0,
+#: batches are grounded in the server process.
+GROUNDING_WORKERS = int(os.getenv("MIRA_GROUNDING_WORKERS", "0"))
+#: The minimum number of unique texts in a batch for it to be distributed
+#: across worker processes
+GROUNDING_PARALLEL_MIN = 200
+#: The number of requests grounded per chunk of a streamed response
+GROUNDING_STREAM_CHUNK = 100
+
 
 class GroundRequest(BaseModel):
     """A model representing the parameters to be passed to :func:`gilda.ground` for grounding."""
@@ -210,22 +228,209 @@ def ground_list(
     Returns a list of grounding results. Each element corresponds to the result for the corresponding
     input text. The results for each input text are returned in the same format as for the 'ground' endpoint.
     """
-    return [_ground(request=request, ground_request=gr) for gr in ground_requests]
+    return ground_batch(request.app.state.grounder, ground_requests)
+
+
+@grounding_blueprint.post(
+    "/ground_list_stream",
+    response_class=StreamingResponse,
+    response_description="Successful grounding returns newline-delimited JSON, "
+    "with one line of grounding results per input text.",
+    tags=["grounding"],
+)
+def ground_list_stream(
+    request: Request,
+    ground_requests: List[GroundRequest] = Body(
+        ...,
+        examples=[[{"text": "Infected Population"}, {"text": "Breast Cancer"}]],
+    ),
+):
+    """
+    Ground a list of texts with Gilda and stream the results.
+
+    The response is newline-delimited JSON (NDJSON) where each line
+    corresponds to the result for the corresponding input text, in the same
+    format as for the 'ground' endpoint. This is suitable for very large
+    lists since results are sent as they become available.
+    """
+    grounder = request.app.state.grounder
+
+    def _iter_lines() -> Iterator[str]:
+        for start in range(0, len(ground_requests), GROUNDING_STREAM_CHUNK):
+            chunk = ground_requests[start:start + GROUNDING_STREAM_CHUNK]
+            for results in ground_batch(grounder, chunk):
+                yield results.model_dump_json(exclude_unset=True) + "\n"
+
+    return StreamingResponse(_iter_lines(), media_type="application/x-ndjson")
+
+
+def ground_batch(
+    grounder: Grounder,
+    ground_requests: List[GroundRequest],
+    workers: Optional[int] = None,
+) -> List[GroundResults]:
+    """Ground a list of requests, grounding each distinct request only once
+
+    Identical requests are deduplicated and results are cached across calls.
+    Large batches are distributed across a pool of worker processes, each
+    with a copy of the grounder.
+
+    Parameters
+    ----------
+    grounder :
+        The Gilda grounder to use.
+    ground_requests :
+        A list of grounding requests.
+    workers :
+        The number of worker processes to use for large batches. Defaults
+        to the MIRA_GROUNDING_WORKERS environment variable.
+
+    Returns
+    -------
+    :
+        A list of grounding results, one for each request.
+    """
+    keys = [_get_request_key(gr) for gr in ground_requests]
+    unique_keys = list(dict.fromkeys(keys))
+    workers = GROUNDING_WORKERS if workers is None else workers
+    if workers > 1 and len(unique_keys) >= GROUNDING_PARALLEL_MIN:
+        cache = _get_cache(grounder)
+        uncached = [key for key in unique_keys if cache.get(key) is None]
+        for key, results in zip(uncached,
+                                _ground_parallel(grounder, uncached, workers)):
+            cache.put(key, results)
+    results_by_key = {key: _ground_cached(grounder, key) for key in unique_keys}
+    return [
+        GroundResults(request=gr, results=list(results_by_key[key]))
+        for gr, key in zip(ground_requests, keys)
+    ]
+
+
+#: The type of hashable keys of grounding requests: text, context, namespaces
+RequestKey = Tuple[str, Optional[str], Optional[Tuple[str, ...]]]
+
+
+def _get_request_key(ground_request: GroundRequest) -> RequestKey:
+    return (
+        ground_request.text,
+        ground_request.context,
+        tuple(ground_request.namespaces)
+        if ground_request.namespaces is not None else None,
+    )
+
+
+class _LRUCache:
+    """A minimal thread-safe LRU cache that can be filled from outside the
+    cached call"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.data: "OrderedDict[RequestKey, Tuple[GroundResult, ...]]" = \
+            OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self.data.get(key)
+            if value is not None:
+                self.data.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+
+#: The maximum number of grounding results cached per grounder
+GROUNDING_CACHE_SIZE = 100_000
+
+#: Caches of grounding results by grounder. Grounders are weakly referenced
+#: so that a replaced grounder and its cache can be garbage collected.
+_CACHES: "weakref.WeakKeyDictionary[Grounder, _LRUCache]" = \
+    weakref.WeakKeyDictionary()
+_CACHES_LOCK = threading.Lock()
+
+
+def _get_cache(grounder: Grounder) -> _LRUCache:
+    with _CACHES_LOCK:
+        cache = _CACHES.get(grounder)
+        if cache is None:
+            cache = _CACHES[grounder] = _LRUCache(maxsize=GROUNDING_CACHE_SIZE)
+        return cache
+
 
+def _ground_cached(grounder: Grounder, key: RequestKey) -> Tuple[GroundResult, ...]:
+    cache = _get_cache(grounder)
+    results = cache.get(key)
+    if results is None:
+        results = _ground_key(grounder, key)
+        cache.put(key, results)
+    return results
 
 
+def _ground_key(grounder: Grounder, key: RequestKey) -> Tuple[GroundResult, ...]:
+    text, context, namespaces = key
+    scored_matches = grounder.ground(
+        text,
+        context=context,
+        namespaces=list(namespaces) if namespaces is not None else None,
+    )
+    return tuple(GroundResult.from_scored_match(sm) for sm in scored_matches)
+
+
+#: The grounder of a worker process, set by the pool's initializer
+_WORKER_GROUNDER: Optional[Grounder] = None
+#: The worker pool, with the grounder and the number of workers it was
+#: created for
+_POOL: Optional[Tuple["weakref.ref[Grounder]", int, ProcessPoolExecutor]] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _ground_parallel(
+    grounder: Grounder, keys: List[RequestKey], workers: int
+) -> Iterable[Tuple[GroundResult, ...]]:
+    global _POOL
+    # The pool is created once per grounder and reused across requests.
+    # The server process runs threads, so rather than being forked from it,
+    # the workers are started by a fork server where available, and each
+    # receives a copy of the grounder once when it starts.
+    with _POOL_LOCK:
+        if _POOL is None or _POOL[0]() is not grounder or _POOL[1] != workers:
+            if _POOL is not None:
+                _POOL[2].shutdown(wait=False)
+            context: BaseContext
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+            else:
+                context = multiprocessing.get_context("spawn")
+            _POOL = (weakref.ref(grounder), workers, ProcessPoolExecutor(
+                max_workers=workers, mp_context=context,
+                initializer=_init_worker, initargs=(grounder,),
+            ))
+        pool = _POOL[2]
+    chunksize = max(1, len(keys) // (4 * workers))
+    return pool.map(_ground_worker, keys, chunksize=chunksize)
+
+
+def _init_worker(grounder: Grounder) -> None:
+    global _WORKER_GROUNDER
+    _WORKER_GROUNDER = grounder
+
+
+def _ground_worker(key: RequestKey) -> Tuple[GroundResult, ...]:
+    # The grounder is set by _init_worker when the worker process starts
+    assert _WORKER_GROUNDER is not None
+    return _ground_key(_WORKER_GROUNDER, key)
+
 
 def _ground(
     *,
     request: Request,
     ground_request: GroundRequest,
 ) -> GroundResults:
-    results = request.app.state.grounder.ground(
-        ground_request.text,
-        context=ground_request.context,
-        namespaces=ground_request.namespaces,
-    )
-    return GroundResults(
-        request=ground_request,
-        results=[GroundResult.from_scored_match(scored_match) for scored_match in results],
-    )
+    results = _ground_cached(request.app.state.grounder,
+                             _get_request_key(ground_request))
+    return GroundResults(request=ground_request, results=list(results))
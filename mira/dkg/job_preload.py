@@ -0,0 +1,20 @@
+"""Load the data of modeling jobs in the fork server of their processes.
+
+This module is imported by the fork server of
+:data:`mira.dkg.model.job_manager` when it starts. Processes for jobs are
+forked from the fork server, so they share what is loaded here instead of
+each loading it again.
+"""
+
+import logging
+
+from mira.dkg.model import get_job_refinement_closure
+
+logger = logging.getLogger(__name__)
+
+try:
+    get_job_refinement_closure()
+except Exception:
+    # Jobs that need the closure try to load it again in their own process
+    logger.warning("Could not preload the refinement closure for jobs",
+                   exc_info=True)
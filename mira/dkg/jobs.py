@@ -0,0 +1,307 @@
+"""Run CPU-heavy operations in worker processes and track them as jobs.
+
+Some modeling operations, e.g., stratification and model comparison, can
+take seconds to minutes of pure Python work. Run in the service process,
+they hold the GIL and slow down all other requests. The
+:class:`JobManager` instead runs each job in a separate process, with a
+bounded number of jobs running at the same time. Since each job has its
+own process, running jobs can be cancelled and time out reliably.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from multiprocessing.process import BaseProcess
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional, Tuple, Union,
+    get_args,
+)
+
+if TYPE_CHECKING:
+    # The fork server context is not available on Windows
+    from multiprocessing.context import ForkServerContext, SpawnContext
+
+__all__ = [
+    "Job",
+    "JobManager",
+    "JOB_STATUSES",
+    "JobStatusName",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The status of a job
+JobStatusName = Literal["queued", "running", "succeeded", "failed",
+                        "cancelled", "timed_out"]
+#: The statuses of jobs, of which the last four are final
+JOB_STATUSES: Tuple[str, ...] = get_args(JobStatusName)
+FINAL_STATUSES = frozenset(JOB_STATUSES[2:])
+
+
+@dataclass
+class Job:
+    """A job submitted to a :class:`JobManager`"""
+
+    #: The unique identifier of the job
+    job_id: str
+    #: The name of the operation the job runs
+    operation: str
+    #: The maximum number of seconds the job may run for
+    timeout: float
+    #: One of :data:`JOB_STATUSES`
+    status: JobStatusName = "queued"
+    #: The time at which the job was submitted, as a UNIX timestamp
+    submitted_at: float = field(default_factory=time.time)
+    #: The time at which the job started running
+    started_at: Optional[float] = None
+    #: The time at which the job finished
+    finished_at: Optional[float] = None
+    #: The result of the job, if it succeeded
+    result: Any = None
+    #: A description of the error, if the job failed
+    error: Optional[str] = None
+    func: Optional[Callable] = field(default=None, repr=False)
+    args: Tuple = field(default=(), repr=False)
+    process: Optional[BaseProcess] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        """Whether the job has finished, successfully or not"""
+        return self.status in FINAL_STATUSES
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return a JSON-compatible description of the job's status"""
+        return {
+            "job_id": self.job_id,
+            "operation": self.operation,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Run functions as jobs in worker processes
+
+    Submitted jobs are queued and run in first-in-first-out order, each in
+    a new process. The service process runs threads, e.g., those of the web
+    server, and forking it could copy locks held by other threads into the
+    new process, so processes are instead started by a fork server where
+    available, and spawned otherwise. Functions and their arguments are
+    therefore pickled and must be importable in the new process.
+
+    Parameters
+    ----------
+    max_workers :
+        The maximum number of jobs running at the same time.
+    timeout :
+        The maximum number of seconds a job may run for. Jobs can be
+        submitted with a shorter timeout.
+    max_finished :
+        The number of finished jobs whose results are kept. When more jobs
+        finish, the results of the oldest ones are discarded.
+    preload :
+        Names of modules the fork server imports once, so that processes
+        for jobs are forked with them already imported.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 600,
+                 max_finished: int = 1000,
+                 preload: Optional[List[str]] = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_finished = max_finished
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: "queue.Queue[Job]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._context: Union["ForkServerContext", "SpawnContext"]
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            if preload:
+                context.set_forkserver_preload(preload)
+            self._context = context
+        else:
+            self._context = multiprocessing.get_context("spawn")
+
+    def submit(self, operation: str, func: Callable, *args,
+               timeout: Optional[float] = None) -> Job:
+        """Submit a function to be run as a job
+
+        Parameters
+        ----------
+        operation :
+            The name of the operation, for reporting.
+        func :
+            The function to run. It must be defined at the top level of a
+            module, and its arguments and return value must be picklable.
+        args :
+            Arguments to pass to the function.
+        timeout :
+            The maximum number of seconds the job may run for. Defaults to
+            the manager's timeout, and can't exceed it.
+
+        Returns
+        -------
+        :
+            The submitted job.
+        """
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        job = Job(job_id=uuid.uuid4().hex, operation=operation,
+                  timeout=timeout, func=func, args=args)
+        with self._lock:
+            self.jobs[job.job_id] = job
+            self._start_workers()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with the given ID, or None if it's not known"""
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a job, terminating its process if it is running
+
+        Parameters
+        ----------
+        job_id :
+            The ID of the job.
+
+        Returns
+        -------
+        :
+            The job, or None if it's not known. Jobs that are already
+            finished are not changed.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            if job.done:
+                return job
+            process = job.process
+            self._finish(job, "cancelled")
+        if process is not None and process.is_alive():
+            process.terminate()
+        return job
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return the number of jobs by status and the queue depth
+
+        Returns
+        -------
+        :
+            A dict with the number of queued jobs (the queue depth), the
+            number of running jobs, the maximum number of workers, and the
+            number of known jobs by status.
+        """
+        with self._lock:
+            counts = {status: 0 for status in JOB_STATUSES}
+            for job in self.jobs.values():
+                counts[job.status] += 1
+        return {
+            "queue_depth": counts["queued"],
+            "running": counts["running"],
+            "max_workers": self.max_workers,
+            "jobs": counts,
+        }
+
+    def _start_workers(self) -> None:
+        # Worker threads are started on first use
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            except Exception:
+                logger.exception("Error running job %s", job.job_id)
+                with self._lock:
+                    if not job.done:
+                        self._finish(job, "failed", error="Internal error")
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            if job.done:
+                # Cancelled while queued
+                return
+            job.status = "running"
+            job.started_at = time.time()
+            func, args = job.func, job.args
+        # Starting the process pickles the function and its arguments, which
+        # can take a while, so it's done without holding the lock
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_run_in_process, args=(sender, func, args), daemon=True,
+        )
+        process.start()
+        sender.close()
+        with self._lock:
+            cancelled = job.done
+            if not cancelled:
+                job.process = process
+        if cancelled:
+            # Cancelled while the process was starting
+            receiver.close()
+            process.terminate()
+            process.join()
+            return
+        try:
+            if receiver.poll(job.timeout):
+                outcome, value = receiver.recv()
+            else:
+                outcome, value = "timed_out", None
+        except EOFError:
+            # The process exited without a result, e.g., it was terminated
+            outcome, value = "failed", "The job's process exited unexpectedly"
+        finally:
+            receiver.close()
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        with self._lock:
+            if job.done:
+                # Cancelled while running
+                return
+            if outcome == "ok":
+                self._finish(job, "succeeded", result=value)
+            elif outcome == "timed_out":
+                self._finish(job, "timed_out",
+                             error=f"The job did not finish in {job.timeout}s")
+            else:
+                self._finish(job, "failed", error=value)
+
+    def _finish(self, job: Job, status: JobStatusName, result: Any = None,
+                error: Optional[str] = None) -> None:
+        # Must be called with the lock held
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.func, job.args, job.process = None, (), None
+        finished = [j for j in self.jobs.values() if j.done]
+        for old_job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[old_job.job_id]
+
+
+def _run_in_process(sender, func: Callable, args: Tuple) -> None:
+    try:
+        outcome = ("ok", func(*args))
+    except Exception as exc:
+        outcome = ("error", f"{exc.__class__.__name__}: {exc}")
+    try:
+        sender.send(outcome)
+    except Exception as exc:
+        sender.send(("error", f"The result could not be returned: {exc}"))
+    sender.close()
@@ -3,6 +3,7 @@
 This submodule serves as an API for modeling
 """
 import json
+import os
 import uuid
 from pathlib import Path
 from textwrap import dedent
@@ -21,14 +22,18 @@ from fastapi import (
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field
 
+from mira import __version__
 from mira.examples.sir import sir_bilayer, sir, sir_parameterized_init, sir_2_city
 from mira.metamodel import (
     NaturalConversion, Template, ControlledConversion,
     stratify, Concept, ModelComparisonGraphdata, TemplateModelDelta,
     TemplateModel, Parameter, simplify_rate_laws, aggregate_parameters,
-    counts_to_dimensionless
+    counts_to_dimensionless, RefinementClosure
 )
+from mira.dkg.jobs import JobManager, JobStatusName
+from mira.dkg.model_cache import ConversionCache
 from mira.modeling import Model
+from mira.modeling.amr.ops import apply_ops
 from mira.modeling.amr.petrinet import AMRPetriNetModel
 from mira.modeling.bilayer import BilayerModel
 from mira.modeling.acsets.petri import PetriNetModel
@@ -49,6 +54,57 @@ viz_temp = pystow.module("mira", "tmp")
 
 model_blueprint = APIRouter()
 
+#: The maximum number of modeling results cached in memory
+CONVERSION_CACHE_SIZE = int(os.getenv("MIRA_CONVERSION_CACHE_SIZE", "256"))
+#: A directory in which modeling results are also cached on disk, if set
+CONVERSION_CACHE_DIR = os.getenv("MIRA_CONVERSION_CACHE_DIR")
+
+#: The cache of results of modeling endpoints, keyed by the request content
+#: and the versions of MIRA and the DKG so that results cached on disk
+#: aren't reused after an upgrade
+conversion_cache = ConversionCache(
+    maxsize=CONVERSION_CACHE_SIZE,
+    cache_dir=CONVERSION_CACHE_DIR,
+    version=f"mira-{__version__}/dkg-{os.getenv('MIRA_DKG_VERSION', '')}",
+)
+
+#: The maximum number of modeling jobs running in worker processes at a time
+JOB_WORKERS = int(os.getenv("MIRA_JOB_WORKERS", "2"))
+#: The maximum number of seconds a modeling job may run for
+JOB_TIMEOUT = float(os.getenv("MIRA_JOB_TIMEOUT", "600"))
+
+#: Runs CPU-heavy modeling operations submitted to the /jobs endpoints
+job_manager = JobManager(max_workers=JOB_WORKERS, timeout=JOB_TIMEOUT,
+                         preload=["mira.dkg.model", "mira.dkg.job_preload"])
+
+#: The refinement closure of model comparison jobs, loaded from the DKG on
+#: first use in a job's process, see :func:`get_job_refinement_closure`
+_job_refinement_closure: Optional[RefinementClosure] = None
+
+
+def get_job_refinement_closure() -> RefinementClosure:
+    """Return the refinement closure for model comparison jobs
+
+    The closure is too large to be passed to each job, so it is instead
+    loaded from the DKG once per process. The fork server of
+    :data:`job_manager` loads it when it starts (see
+    :mod:`mira.dkg.job_preload`), so processes for jobs are forked with it
+    already loaded.
+
+    Returns
+    -------
+    :
+        The refinement closure of the DKG.
+    """
+    global _job_refinement_closure
+    if _job_refinement_closure is None:
+        from mira.dkg.client import Neo4jClient
+
+        _job_refinement_closure = RefinementClosure(
+            Neo4jClient().get_transitive_closure()
+        )
+    return _job_refinement_closure
+
 # TemplateModel example
 template_model_example = {
     "templates": [
@@ -113,10 +169,14 @@ def model_to_petri(template_model: Dict[str, Any] = Body(...,
                                                          examples=[
                                                              template_model_example])):
     """Create a PetriNet model from a TemplateModel"""
-    tm = TemplateModel.from_json(template_model)
-    model = Model(tm)
-    petri_net = PetriNetModel(model)
-    return petri_net.to_json()
+    def _compute():
+        tm = TemplateModel.from_json(template_model)
+        model = Model(tm)
+        petri_net = PetriNetModel(model)
+        return petri_net.to_json()
+
+    return conversion_cache.get_or_compute("to_petrinet_acsets",
+                                           template_model, _compute)
 
 
 # From PetriNetJson
@@ -137,7 +197,10 @@ def model_to_petri(template_model: Dict[str, Any] = Body(...,
 def petri_to_model(petri_json: Dict[str, Any] = Body(...,
                                                      examples=[petrinet_json])):
     """Create a TemplateModel from a PetriNet model"""
-    return template_model_from_petri_json(petri_json).to_json()
+    return conversion_cache.get_or_compute(
+        "from_petrinet_acsets", petri_json,
+        lambda: template_model_from_petri_json(petri_json).to_json(),
+    )
 
 
 @model_blueprint.post(
@@ -154,10 +217,14 @@ def petri_to_model(petri_json: Dict[str, Any] = Body(...,
 def model_to_amr(template_model: Dict[str, Any] = Body(...,
                                                        examples=[template_model_example])):
     """Create an AMR Petri model from a TemplateModel."""
-    tm = TemplateModel.from_json(template_model)
-    model = Model(tm)
-    amr_petrinet_model = AMRPetriNetModel(model)
-    return amr_petrinet_model.to_json()
+    def _compute():
+        tm = TemplateModel.from_json(template_model)
+        model = Model(tm)
+        amr_petrinet_model = AMRPetriNetModel(model)
+        return amr_petrinet_model.to_json()
+
+    return conversion_cache.get_or_compute("to_petrinet", template_model,
+                                           _compute)
 
 
 @model_blueprint.post(
@@ -174,7 +241,10 @@ def model_to_amr(template_model: Dict[str, Any] = Body(...,
 def amr_to_model(amr_json: Dict[str, Any] = Body(...,
                                                  examples=[amr_petrinet_json])):
     """Create a TemplateModel from an AMR model."""
-    return template_model_from_amr_json(amr_json).to_json()
+    return conversion_cache.get_or_compute(
+        "from_petrinet", amr_json,
+        lambda: template_model_from_amr_json(amr_json).to_json(),
+    )
 
 
 # Model stratification
@@ -310,9 +380,20 @@ def model_stratification(
     )
 ):
     """Stratify a model according to the specified stratification"""
-    strata = stratification_query.strata
-    tm = TemplateModel.from_json(stratification_query.template_model)
+    return conversion_cache.get_or_compute(
+        "stratify",
+        stratification_query.model_dump(mode="json"),
+        lambda: _stratify(stratification_query,
+                          _get_strata_name_map(request, stratification_query)),
+        # Names looked up in the DKG may change when the DKG is updated
+        disk=not stratification_query.strata_name_lookup,
+    )
 
+
+def _get_strata_name_map(
+    request: Request, stratification_query: StratificationQuery
+) -> Optional[Dict[str, str]]:
+    strata = stratification_query.strata
     if (stratification_query.strata_name_map is None and
             stratification_query.strata_name_lookup):
         strata_name_map = {}
@@ -327,11 +408,18 @@ def model_stratification(
         strata_name_map = stratification_query.strata_name_map
     else:
         strata_name_map = None
+    return strata_name_map
 
+
+def _stratify(
+    stratification_query: StratificationQuery,
+    strata_name_map: Optional[Dict[str, str]],
+) -> Dict[str, Any]:
+    tm = TemplateModel.from_json(stratification_query.template_model)
     template_model = stratify(
         template_model=tm,
         key=stratification_query.key,
-        strata=strata,
+        strata=stratification_query.strata,
         strata_curie_to_name=strata_name_map,
         structure=stratification_query.structure,
         directed=stratification_query.directed,
@@ -394,6 +482,40 @@ def dimension_transform(
     return AMRPetriNetModel(Model(dimless_model)).to_json()
 
 
+class AmrEditQuery(BaseModel):
+    model: Dict[str, Any] = Field(
+        ..., description="The model to edit as an AMR JSON",
+        examples=[amr_petrinet_json]
+    )
+    ops: List[Dict[str, Any]] = Field(
+        ...,
+        description="The edits to apply in order. Each edit is an object "
+                    "with the name of a function in mira.modeling.amr.ops "
+                    "under the 'op' key and its arguments under the other "
+                    "keys.",
+        examples=[[
+            {"op": "replace_state_id", "old_id": "S", "new_id": "Susceptible"},
+            {"op": "add_parameter", "parameter_id": "delta", "value": 0.01},
+        ]]
+    )
+
+
+@model_blueprint.post("/amr_edit", response_model=Dict[str, Any],
+                      tags=["modeling"])
+def amr_edit(
+    query: AmrEditQuery = Body(..., description="A model and edits to apply")
+):
+    """Apply a list of edits to an AMR model in a single request
+
+    The model is converted once, all edits are applied, and the edited model
+    is returned. If any of the edits fails, the request fails.
+    """
+    try:
+        return apply_ops(query.model, query.ops)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 @model_blueprint.get("/biomodels/{model_id}",
     tags=["modeling"],
     status_code=200,
@@ -695,15 +817,53 @@ def model_comparison(
         query: ModelComparisonQuery
 ):
     """Compare a list of models to each other"""
-    template_models = [TemplateModel.from_json(m) for m in query.template_models]
+    return conversion_cache.get_or_compute(
+        "model_comparison", query.model_dump(mode="json"),
+        lambda: _compare_template_model_jsons(
+            query.template_models, request.app.state.refinement_closure
+        ),
+        # The refinement closure is loaded from the DKG
+        disk=False,
+    )
+
+
+def _compare_models(
+    template_models: List[TemplateModel],
+    refinement_closure: RefinementClosure,
+) -> Dict[str, Any]:
     graph_comparison_data = ModelComparisonGraphdata.from_template_models(
-        template_models, refinement_func=request.app.state.refinement_closure.is_ontological_child
+        template_models, refinement_func=refinement_closure.is_ontological_child
     )
     resp = ModelComparisonResponse(
         graph_comparison_data=graph_comparison_data.to_json(),
         similarity_scores=graph_comparison_data.get_similarity_scores(),
     )
-    return resp
+    return resp.model_dump(mode="json")
+
+
+def _compare_template_model_jsons(
+    template_models: List[Dict[str, Any]],
+    refinement_closure: Optional[RefinementClosure] = None,
+) -> Dict[str, Any]:
+    # Jobs are run without a closure and load it in their own process
+    if refinement_closure is None:
+        refinement_closure = get_job_refinement_closure()
+    return _compare_models(
+        [TemplateModel.from_json(m) for m in template_models],
+        refinement_closure,
+    )
+
+
+def _compare_amr_jsons(
+    petrinet_models: List[Dict[str, Any]],
+    refinement_closure: Optional[RefinementClosure] = None,
+) -> Dict[str, Any]:
+    if refinement_closure is None:
+        refinement_closure = get_job_refinement_closure()
+    return _compare_models(
+        [template_model_from_amr_json(m) for m in petrinet_models],
+        refinement_closure,
+    )
 
 
 class AMRComparisonQuery(BaseModel):
@@ -724,19 +884,13 @@ def askepetrinet_model_comparison(
         query: AMRComparisonQuery
 ):
     """Compare a list of models to each other"""
-    template_models = [
-        template_model_from_amr_json(m) for m in query.petrinet_models
-    ]
-    graph_comparison_data = ModelComparisonGraphdata.from_template_models(
-        template_models,
-        refinement_func=request.
-            app.state.refinement_closure.is_ontological_child
-    )
-    resp = ModelComparisonResponse(
-        graph_comparison_data=graph_comparison_data.to_json(),
-        similarity_scores=graph_comparison_data.get_similarity_scores(),
+    return conversion_cache.get_or_compute(
+        "askenet_model_comparison", query.model_dump(mode="json"),
+        lambda: _compare_amr_jsons(query.petrinet_models,
+                                   request.app.state.refinement_closure),
+        # The refinement closure is loaded from the DKG
+        disk=False,
     )
-    return resp
 
 
 if docker_test_file_path.exists():
@@ -764,6 +918,156 @@ def reproduce_ode_semantics_endpoint(
         )
 ):
     """Reproduce ODE semantics from a stratified model (flux span)."""
-    tm = reproduce_ode_semantics(query.model)
-    am = AMRPetriNetModel(Model(tm))
-    return am.to_json()
+    def _compute():
+        tm = reproduce_ode_semantics(query.model)
+        am = AMRPetriNetModel(Model(tm))
+        return am.to_json()
+
+    return conversion_cache.get_or_compute(
+        "reconstruct_ode_semantics", query.model, _compute
+    )
+
+
+@model_blueprint.get("/conversion_cache_metrics", response_model=Dict[str, Any],
+                     tags=["meta"])
+def get_conversion_cache_metrics():
+    """Get the hit and miss counts of the cache of modeling results
+
+    Counts are given in total and for each endpoint. Memory hits are
+    requests answered from the in-memory cache, disk hits from the on-disk
+    cache (if one is configured with MIRA_CONVERSION_CACHE_DIR), and misses
+    are requests that were computed.
+    """
+    return conversion_cache.get_metrics()
+
+
+class JobStatus(BaseModel):
+    """The status of a modeling job."""
+
+    job_id: str = Field(..., description="The ID of the job")
+    operation: str = Field(..., description="The operation the job runs",
+                           examples=["model_comparison"])
+    status: JobStatusName = Field(
+        ..., description="The status of the job", examples=["running"]
+    )
+    submitted_at: float = Field(
+        ..., description="The time the job was submitted as a UNIX timestamp"
+    )
+    started_at: Optional[float] = Field(
+        None, description="The time the job started running"
+    )
+    finished_at: Optional[float] = Field(
+        None, description="The time the job finished"
+    )
+    error: Optional[str] = Field(
+        None, description="The error, if the job failed or timed out"
+    )
+
+
+JOB_TIMEOUT_QUERY = Query(
+    None,
+    description="The maximum number of seconds the job may run for. Can't "
+                "exceed the service's maximum, which is also the default.",
+    gt=0,
+)
+
+
+@model_blueprint.post("/jobs/stratify", response_model=JobStatus,
+                      status_code=202, tags=["jobs"])
+def submit_stratification_job(
+    request: Request,
+    stratification_query: StratificationQuery = Body(
+        ..., description="The same query as for the /stratify endpoint"
+    ),
+    timeout: Optional[float] = JOB_TIMEOUT_QUERY,
+):
+    """Submit a stratification job to run in a worker process
+
+    The result, once available from /jobs/{job_id}/result, is the same as
+    the response of the /stratify endpoint.
+    """
+    strata_name_map = _get_strata_name_map(request, stratification_query)
+    job = job_manager.submit("stratify", _stratify, stratification_query,
+                             strata_name_map, timeout=timeout)
+    return job.get_status()
+
+
+@model_blueprint.post("/jobs/model_comparison", response_model=JobStatus,
+                      status_code=202, tags=["jobs"])
+def submit_model_comparison_job(
+    query: ModelComparisonQuery,
+    timeout: Optional[float] = JOB_TIMEOUT_QUERY,
+):
+    """Submit a template model comparison job to run in a worker process
+
+    The result, once available from /jobs/{job_id}/result, is the same as
+    the response of the /model_comparison endpoint.
+    """
+    job = job_manager.submit(
+        "model_comparison", _compare_template_model_jsons,
+        query.template_models, timeout=timeout,
+    )
+    return job.get_status()
+
+
+@model_blueprint.post("/jobs/askenet_model_comparison",
+                      response_model=JobStatus, status_code=202,
+                      tags=["jobs"])
+def submit_askenet_model_comparison_job(
+    query: AMRComparisonQuery,
+    timeout: Optional[float] = JOB_TIMEOUT_QUERY,
+):
+    """Submit an AMR model comparison job to run in a worker process
+
+    The result, once available from /jobs/{job_id}/result, is the same as
+    the response of the /askenet_model_comparison endpoint.
+    """
+    job = job_manager.submit(
+        "askenet_model_comparison", _compare_amr_jsons,
+        query.petrinet_models, timeout=timeout,
+    )
+    return job.get_status()
+
+
+@model_blueprint.get("/jobs/metrics", response_model=Dict[str, Any],
+                     tags=["jobs"])
+def get_job_metrics():
+    """Get the queue depth and the number of modeling jobs by status"""
+    return job_manager.get_metrics()
+
+
+@model_blueprint.get("/jobs/{job_id}", response_model=JobStatus,
+                     tags=["jobs"])
+def get_job_status(job_id: str = FastPath(..., description="The ID of the job")):
+    """Get the status of a modeling job"""
+    return _get_job(job_id).get_status()
+
+
+@model_blueprint.get("/jobs/{job_id}/result", response_model=Dict[str, Any],
+                     tags=["jobs"])
+def get_job_result(job_id: str = FastPath(..., description="The ID of the job")):
+    """Get the result of a modeling job
+
+    Returns 409 with the status of the job if it hasn't succeeded (yet).
+    """
+    job = _get_job(job_id)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=job.get_status())
+    return job.result
+
+
+@model_blueprint.delete("/jobs/{job_id}", response_model=JobStatus,
+                        tags=["jobs"])
+def cancel_job(job_id: str = FastPath(..., description="The ID of the job")):
+    """Cancel a modeling job, stopping it if it is running"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.get_status()
+
+
+def _get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
@@ -0,0 +1,196 @@
+"""A content-addressed cache for the results of the modeling API.
+
+Clients often send the same model to the same endpoint repeatedly, e.g.,
+each time a model is viewed. Results are cached under a hash of the
+endpoint and a canonical JSON serialization of the request, so identical
+requests are only computed once. Entries are kept in a bounded in-memory
+LRU tier and optionally in an on-disk tier shared across workers and
+restarts. Since the disk tier outlives the process, keys also include a
+version string, e.g., of MIRA and the DKG, so that upgrades don't serve
+stale results, and results that depend on the state of the running
+server can be kept out of the disk tier.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from mira.dkg.web_client import WebCache
+
+__all__ = [
+    "ConversionCache",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class ConversionCache:
+    """A two-tier cache of JSON results keyed by the content of requests
+
+    Parameters
+    ----------
+    maxsize :
+        The maximum number of entries kept in memory. If 0, entries are
+        not kept in memory.
+    cache_dir :
+        A directory in which entries are also stored on disk. If None,
+        there is no disk tier.
+    ttl :
+        The number of seconds after which an entry on disk is considered
+        stale. If None, entries on disk never expire.
+    version :
+        A string included in all keys that identifies the code and data
+        results are computed with, e.g., the versions of MIRA and the DKG.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        cache_dir: Union[None, str, Path] = None,
+        ttl: Optional[float] = None,
+        version: str = "",
+    ):
+        self.maxsize = maxsize
+        self.version = version
+        self.disk = WebCache(cache_dir, ttl=ttl) if cache_dir is not None else None
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        )
+
+    @staticmethod
+    def get_key(namespace: str, data: Any, version: str = "") -> str:
+        """Return the cache key of a request
+
+        Parameters
+        ----------
+        namespace :
+            The name of the operation, e.g., the endpoint.
+        data :
+            The JSON-compatible content of the request, including all
+            parameters that the result depends on.
+        version :
+            The version of the code and data the result is computed with.
+
+        Returns
+        -------
+        :
+            The SHA-256 digest of the canonical JSON serialization of the
+            version, namespace and data.
+        """
+        payload = json.dumps([version, namespace, data], sort_keys=True,
+                             separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(
+        self, key: str, namespace: str = "default", disk: bool = True
+    ) -> Tuple[bool, Any]:
+        """Return a (hit, data) tuple for the given cache key"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats[namespace]["memory_hits"] += 1
+                return True, self._memory[key]
+        if disk and self.disk is not None:
+            hit, data = self.disk.get(key)
+            if hit:
+                with self._lock:
+                    self._stats[namespace]["disk_hits"] += 1
+                self._set_memory(key, data)
+                return True, data
+        with self._lock:
+            self._stats[namespace]["misses"] += 1
+        return False, None
+
+    def set(self, key: str, data: Any, disk: bool = True) -> None:
+        """Store JSON-compatible data under the given cache key"""
+        self._set_memory(key, data)
+        if disk and self.disk is not None:
+            self.disk.set(key, data)
+
+    def _set_memory(self, key: str, data: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        data: Any,
+        compute: Callable[[], Any],
+        disk: bool = True,
+    ) -> Any:
+        """Return the cached result of a request, computing it on a miss
+
+        Parameters
+        ----------
+        namespace :
+            The name of the operation, e.g., the endpoint.
+        data :
+            The JSON-compatible content of the request, including all
+            parameters that the result depends on.
+        compute :
+            A function without arguments that returns the JSON-compatible
+            result of the request.
+        disk :
+            If False, the result is only cached in memory. This is for
+            results that also depend on the state of the running server,
+            e.g., on the DKG it is connected to, so they must not be reused
+            after a restart.
+
+        Returns
+        -------
+        :
+            The result of the request. It is shared with other callers and
+            must not be modified.
+        """
+        key = self.get_key(namespace, data, version=self.version)
+        hit, result = self.get(key, namespace=namespace, disk=disk)
+        if not hit:
+            result = compute()
+            self.set(key, result, disk=disk)
+        return result
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return the hit and miss counts of the cache
+
+        Returns
+        -------
+        :
+            A dict with the number of entries in memory, whether there is a
+            disk tier, the total counts, and the counts per namespace.
+        """
+        with self._lock:
+            namespaces = {ns: dict(stats) for ns, stats in self._stats.items()}
+            size = len(self._memory)
+        totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        for stats in namespaces.values():
+            for key, value in stats.items():
+                totals[key] += value
+        requests = sum(totals.values())
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "disk": self.disk is not None,
+            **totals,
+            "hit_rate": (requests - totals["misses"]) / requests
+            if requests else None,
+            "namespaces": namespaces,
+        }
+
+    def clear(self) -> None:
+        """Remove all entries from the cache and reset its metrics"""
+        with self._lock:
+            self._memory.clear()
+            self._stats.clear()
+        if self.disk is not None:
+            self.disk.clear()
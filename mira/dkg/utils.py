@@ -1,8 +1,15 @@
 """Utilities and constants for the MIRA app."""
 
+import logging
+import sys
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List
+from typing import (
+    Any, Callable, Dict, Generic, Iterable, List, Optional, Set, Tuple,
+    TypeVar, overload,
+)
 
 import numpy as np
 from gilda.grounder import Grounder
@@ -12,21 +19,221 @@ from mira.metamodel import RefinementClosure
 
 __all__ = [
     "MiraState",
+    "ComponentStatus",
     "PREFIXES",
     "DKG_REFINER_RELS",
     "DOCKER_FILES_ROOT",
 ]
 
 
+logger = logging.getLogger(__name__)
+
+
 @dataclass
+class ComponentStatus:
+    """The loading status of a component of the MIRA app state."""
+
+    loaded: bool = False
+    #: The time it took to load the component, in seconds
+    seconds: Optional[float] = None
+    #: The increase of the process' peak memory usage while loading, in MB.
+    #: This is only measured if no other component was loading at the same
+    #: time, since the peak memory usage is that of the whole process.
+    memory_mb: Optional[float] = None
+    #: The error raised while loading the component, if any
+    error: Optional[str] = None
+
+
+_T = TypeVar("_T")
+
+
+class _Component(Generic[_T]):
+    """A descriptor for a component of the MIRA app state."""
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    @overload
+    def __get__(self, obj: None, objtype=None) -> "_Component[_T]": ...
+
+    @overload
+    def __get__(self, obj: "MiraState", objtype=None) -> _T: ...
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj.get_component(self.name)
+
+    def __set__(self, obj: "MiraState", value: _T) -> None:
+        obj._values[self.name] = value
+        obj._status[self.name] = ComponentStatus(loaded=True)
+
+
 class MiraState:
-    """Represents the state associated with the MIRA app."""
+    """Represents the state associated with the MIRA app.
+
+    Each component can either be given directly or as a loader function in
+    ``loaders``, in which case it is loaded on first access or when warmed
+    with :meth:`warm`. Loading times and memory usage are logged and can be
+    inspected with :meth:`get_status`. States are equal if their components
+    are equal, with loader functions standing in for components that aren't
+    loaded yet.
+    """
+
+    client: _Component[Neo4jClient] = _Component()
+    grounder: _Component[Grounder] = _Component()
+    refinement_closure: _Component[RefinementClosure] = _Component()
+    lexical_dump: _Component[List[Entity]] = _Component()
+    vectors: _Component[Dict[str, np.ndarray]] = _Component()
+
+    COMPONENTS = (
+        "client", "grounder", "refinement_closure", "lexical_dump", "vectors",
+    )
+
+    def __init__(
+        self,
+        client: Optional[Neo4jClient] = None,
+        grounder: Optional[Grounder] = None,
+        refinement_closure: Optional[RefinementClosure] = None,
+        lexical_dump: Optional[List[Entity]] = None,
+        vectors: Optional[Dict[str, np.ndarray]] = None,
+        *,
+        loaders: Optional[Dict[str, Callable[[], Any]]] = None,
+    ):
+        self._values: Dict[str, Any] = {}
+        self._status: Dict[str, ComponentStatus] = {
+            name: ComponentStatus() for name in self.COMPONENTS
+        }
+        self._loaders = dict(loaders or {})
+        self._locks = {name: threading.Lock() for name in self.COMPONENTS}
+        # The components being loaded, and those of them whose loading
+        # overlapped with that of another component
+        self._loading_lock = threading.Lock()
+        self._loading: Set[str] = set()
+        self._overlapping: Set[str] = set()
+        for name, value in [
+            ("client", client),
+            ("grounder", grounder),
+            ("refinement_closure", refinement_closure),
+            ("lexical_dump", lexical_dump),
+            ("vectors", vectors),
+        ]:
+            if value is not None:
+                setattr(self, name, value)
+
+    def _get_fields(self) -> Tuple[Any, ...]:
+        return tuple(
+            self._values[name] if name in self._values
+            else self._loaders.get(name)
+            for name in self.COMPONENTS
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._get_fields() == other._get_fields()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={self._values[name]!r}" if name in self._values
+            else f"{name}=<not loaded>"
+            for name in self.COMPONENTS
+        )
+        return f"{self.__class__.__name__}({fields})"
+
+    def get_component(self, name: str) -> Any:
+        """Return a component, loading it first if necessary."""
+        if name in self._values:
+            return self._values[name]
+        if name not in self._loaders:
+            raise AttributeError(f"MiraState has no {name} component")
+        with self._locks[name]:
+            # Another thread may have loaded the component in the meantime
+            if name not in self._values:
+                self._load(name)
+        return self._values[name]
+
+    def _load(self, name: str) -> None:
+        logger.info("Loading %s", name)
+        with self._loading_lock:
+            self._loading.add(name)
+            if len(self._loading) > 1:
+                self._overlapping.update(self._loading)
+        start_time = time.time()
+        start_memory = _get_peak_memory_mb()
+        try:
+            value = self._loaders[name]()
+        except Exception as exc:
+            self._status[name] = ComponentStatus(error=str(exc))
+            raise
+        finally:
+            end_memory = _get_peak_memory_mb()
+            with self._loading_lock:
+                self._loading.discard(name)
+                serial = name not in self._overlapping
+                self._overlapping.discard(name)
+        status = ComponentStatus(
+            loaded=True,
+            seconds=time.time() - start_time,
+            memory_mb=end_memory - start_memory if serial else None,
+        )
+        if serial:
+            logger.info("Loaded %s in %.2f s (peak memory +%.1f MB)", name,
+                        status.seconds, status.memory_mb)
+        else:
+            logger.info("Loaded %s in %.2f s", name, status.seconds)
+        self._values[name] = value
+        self._status[name] = status
+
+    def is_loaded(self, name: str) -> bool:
+        """Return if the given component is loaded."""
+        return name in self._values
+
+    def get_status(self) -> Dict[str, ComponentStatus]:
+        """Return the loading status of each component."""
+        return dict(self._status)
+
+    def warm(self, names: Optional[Iterable[str]] = None) -> List[threading.Thread]:
+        """Load components in background threads.
+
+        Parameters
+        ----------
+        names :
+            The names of the components to load. By default, all components
+            that have a loader are loaded.
+
+        Returns
+        -------
+        :
+            The started threads.
+        """
+        threads = []
+        for name in names if names is not None else self._loaders:
+            if self.is_loaded(name):
+                continue
+            thread = threading.Thread(
+                target=self._warm, args=(name,), name=f"warm-{name}", daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def _warm(self, name: str) -> None:
+        try:
+            self.get_component(name)
+        except Exception:
+            logger.exception("Failed to load %s", name)
+
 
-    client: Neo4jClient
-    grounder: Grounder
-    refinement_closure: RefinementClosure
-    lexical_dump: List[Entity]
-    vectors: Dict[str, np.array]
+def _get_peak_memory_mb() -> float:
+    """Return the peak resident memory of the process in MB."""
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # The peak is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
 
 
 #: A list of all prefixes used in MIRA
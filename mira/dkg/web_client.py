@@ -1,14 +1,25 @@
+import hashlib
+import json
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Optional, Literal, Dict, Any, List, Union, Tuple, Set
 
 import pystow
 import requests
+from requests.adapters import HTTPAdapter
 
 from mira.dkg import api, grounding
 from mira.dkg.client import Entity, AskemEntity
 from mira.dkg.utils import DKG_REFINER_RELS
+from mira.utils import write_atomic
 
 __all__ = [
+    "DkgWebClient",
+    "WebCache",
+    "get_default_client",
     "web_client",
     "get_relations_web",
     "get_entity_web",
@@ -18,20 +29,489 @@ __all__ = [
     "search_web",
     "get_transitive_closure_web",
     "is_ontological_child_web",
+    "is_ontological_child_batch_web",
+    "get_entities_batch_web",
     "MissingBaseUrlError",
 ]
 
+logger = logging.getLogger(__name__)
+
+#: The default time-to-live of entries in the on-disk cache, in seconds
+DEFAULT_CACHE_TTL = 24 * 60 * 60
+
 
 class MissingBaseUrlError(ValueError):
     """Raised when the base url for the REST API is missing"""
 
 
+class WebCache:
+    """An on-disk cache of REST API responses
+
+    Entries are stored as JSON files named by the SHA-256 digest of the
+    request method, URL and payload.
+
+    Parameters
+    ----------
+    cache_dir :
+        The directory in which responses are cached.
+    ttl :
+        The number of seconds after which a cached response is considered
+        stale. If None, cached responses never expire.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path],
+                 ttl: Optional[float] = DEFAULT_CACHE_TTL):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+
+    @staticmethod
+    def get_key(method: str, endpoint_url: str, query_json: Any) -> str:
+        """Return the cache key of a request"""
+        payload = json.dumps([method, endpoint_url, query_json],
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _get_path(self, key: str) -> Path:
+        return self.cache_dir.joinpath(key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return a (hit, data) tuple for the given cache key"""
+        path = self._get_path(key)
+        try:
+            with open(path) as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return False, None
+        if self.ttl is not None and time.time() - entry["timestamp"] > self.ttl:
+            return False, None
+        return True, entry["data"]
+
+    def set(self, key: str, data: Any) -> None:
+        """Store data under the given cache key"""
+        try:
+            write_atomic(self._get_path(key),
+                         json.dumps({"timestamp": time.time(), "data": data}))
+        except OSError as exc:
+            logger.warning("Could not write to web client cache: %s", exc)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+        for path in self.cache_dir.glob("*/*.json"):
+            path.unlink(missing_ok=True)
+
+
+def get_base_url(api_url: Optional[str] = None) -> str:
+    """Return the base URL of the REST API, ending with /api
+
+    Parameters
+    ----------
+    api_url :
+        The base URL to use. If not given, the URL is looked up in the
+        MIRA_REST_URL environment variable or the rest_url entry of the mira
+        pystow config.
+
+    Returns
+    -------
+    :
+        The base URL of the REST API.
+    """
+    base_url = (
+        api_url
+        or os.environ.get("MIRA_REST_URL")
+        or pystow.get_config("mira", "rest_url")
+    )
+    if not base_url:
+        raise MissingBaseUrlError(
+            "The base url for the REST API needs to either be set in the "
+            "environment using the variable 'MIRA_REST_URL', be set in the "
+            "pystow config 'mira'->'rest_url' or by passing it the 'api_url' "
+            "parameter to the web client function used."
+        )
+    return base_url.rstrip("/") + "/api" if not base_url.endswith("/api") else base_url
+
+
+class DkgWebClient:
+    """A client for the MIRA DKG REST API
+
+    The client keeps a pooled :class:`requests.Session` so that consecutive
+    requests reuse connections, and optionally stores successful responses
+    in an on-disk cache keyed by the endpoint URL and the request payload.
+
+    Parameters
+    ----------
+    api_url :
+        The base URL of the REST API. If not given, the URL is looked up in
+        the MIRA_REST_URL environment variable or the rest_url entry of the
+        mira pystow config at the time of each request.
+    cache_dir :
+        A directory in which responses are cached. If None, responses are
+        not cached.
+    ttl :
+        The number of seconds after which a cached response is considered
+        stale. If None, cached responses never expire.
+    pool_maxsize :
+        The maximum number of pooled connections per host. This also
+        bounds the number of concurrent requests made by the batch methods.
+    timeout :
+        The timeout of each request, in seconds.
+    """
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        cache_dir: Union[None, str, Path] = None,
+        ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        pool_maxsize: int = 10,
+        timeout: float = 30,
+    ):
+        self.api_url = api_url
+        self.cache = WebCache(cache_dir, ttl=ttl) if cache_dir is not None else None
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize,
+                              pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_base_url(self, api_url: Optional[str] = None) -> str:
+        """Return the base URL of the REST API, ending with /api"""
+        return get_base_url(api_url or self.api_url)
+
+    def request(
+        self,
+        endpoint: str,
+        method: Literal["get", "post"],
+        query_json: Optional[Union[Dict[str, Any], List[Tuple[str, Any]]]] = None,
+        api_url: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Any:
+        """A wrapper for sending requests to the REST API and returning the results
+
+        Parameters
+        ----------
+        endpoint :
+            The endpoint to send the request to.
+        method :
+            Which method to use. Must be one of 'post' and 'get'.
+        query_json :
+            The data to send with the request. This parameter must be filled if
+            method is 'post'. If method is 'get', and the endpoint expects a
+            list, this parameter needs to be a list of tuples of key-value
+            pairs, i.e. [(key, value)], as per the requests api:
+            https://requests.readthedocs.io/en/latest/api/#requests.get
+            To provide a list for one parameter, repeat the key with each value
+            of the list.
+
+            Example:
+            If the endpoint expect key1 to be a list and key2 to be parameter,
+            sending [(key1, value1), (key1, value2), (key2, value3)] as
+            query_json will result in the endpoint receiving the variables
+            key1=[value1, value2], key2=value3
+        api_url :
+            Provide the base URL to the REST API. Use this argument to override
+            the default set in MIRA_REST_URL or rest_url from the config file.
+        use_cache :
+            If True (default), the response is looked up in and stored to the
+            on-disk cache, if the client has one.
+
+        Returns
+        -------
+        :
+            The data sent back from the endpoint as a json, unless the response
+            is empty, in which case None is returned.
+        """
+        base_url = self.get_base_url(api_url)
+        endpoint = endpoint if endpoint.startswith("/") else "/" + endpoint
+        endpoint_url = base_url + endpoint
+
+        if method == "post":
+            if query_json is None:
+                raise ValueError(f"POST request to endpoint {endpoint} requires query data")
+        elif method != "get":
+            raise ValueError("Method must be one of 'get' and 'post'")
+
+        key = WebCache.get_key(method, endpoint_url, query_json)
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            hit, data = cache.get(key)
+            if hit:
+                return data
+
+        if method == "post":
+            res = self.session.post(endpoint_url, json=query_json,
+                                    timeout=self.timeout)
+        else:
+            # Add query_json as params if present
+            kw: Dict[str, Any] = dict() if query_json is None \
+                else {"params": query_json}
+            res = self.session.get(endpoint_url, timeout=self.timeout, **kw)
+
+        res.raise_for_status()
+        data = res.json()
+
+        if cache is not None:
+            cache.set(key, data)
+        return data
+
+    def clear_cache(self) -> None:
+        """Remove all entries from the on-disk cache"""
+        if self.cache is not None:
+            self.cache.clear()
+
+    def get_relations(
+        self,
+        relations_model: api.RelationQuery,
+        api_url: Optional[str] = None,
+    ) -> Union[List[api.RelationResponse], List[api.FullRelationResponse], None]:
+        """Get relations based on a RelationQuery, see :func:`get_relations_web`"""
+        query_json = relations_model.model_dump(exclude_unset=True,
+                                                exclude_defaults=True)
+        res_json = self.request(
+            endpoint="/relations", method="post", query_json=query_json, api_url=api_url
+        )
+        if res_json is not None:
+            if relations_model.full:
+                return [api.FullRelationResponse(**r) for r in res_json]
+            else:
+                return [api.RelationResponse(**r) for r in res_json]
+        return None
+
+    def get_entity(self, curie: str, api_url: Optional[str] = None) -> Optional[api.Entity]:
+        """Get an entity by its CURIE, see :func:`get_entity_web`"""
+        res_json = self.request(endpoint=f"/entity/{curie}", method="get", api_url=api_url)
+        if res_json is not None:
+            return api.Entity(**res_json)
+        return None
+
+    def get_entities(
+        self, curies: List[str], api_url: Optional[str] = None
+    ) -> Optional[List[Union[AskemEntity, Entity]]]:
+        """Get multiple entities by their CURIEs, see :func:`get_entities_web`"""
+        # Endpoint expects '<prefix>:<local unique identifier>,...',
+        # e.g.: "ido:0000511,ido:0000512"
+        curies_str = ",".join(curies)
+        res_json = self.request(endpoint=f"/entities/{curies_str}", method="get",
+                                api_url=api_url)
+        if res_json is not None:
+            return [Entity(**record) for record in res_json]
+        return None
+
+    def get_entities_batch(
+        self,
+        curies: List[str],
+        chunk_size: int = 100,
+        api_url: Optional[str] = None,
+    ) -> List[Optional[Entity]]:
+        """Get entities for a potentially large list of CURIEs
+
+        Unique CURIEs are requested in chunks from the entities endpoint,
+        with each entity being cached individually so that later lookups
+        of the same CURIE, either in a batch or via :meth:`get_entity`,
+        don't require a request.
+
+        Parameters
+        ----------
+        curies :
+            A list of CURIEs for entities to get information about.
+        chunk_size :
+            The maximum number of CURIEs to send in one request.
+        api_url :
+            Use this parameter to specify the REST API base url or to override
+            the url set in the environment or the config.
+
+        Returns
+        -------
+        :
+            A list of Entity models in the same order as the input CURIEs,
+            with None for CURIEs that could not be found in the graph.
+        """
+        base_url = self.get_base_url(api_url)
+        records: Dict[str, Optional[Dict[str, Any]]] = {}
+        missing = []
+        for curie in dict.fromkeys(curies):
+            hit, record = self._entity_cache_get(base_url, curie)
+            if hit:
+                records[curie] = record
+            else:
+                missing.append(curie)
+
+        chunks = [missing[i:i + chunk_size]
+                  for i in range(0, len(missing), chunk_size)]
+        for chunk, chunk_records in zip(
+            chunks, self._map(self._get_entity_chunk, chunks, api_url)
+        ):
+            for curie, record in zip(chunk, chunk_records):
+                records[curie] = record
+                if record is not None and self.cache is not None:
+                    self.cache.set(
+                        self.cache.get_key("get", f"{base_url}/entity/{curie}", None),
+                        record,
+                    )
+        entities: List[Optional[Entity]] = []
+        for curie in curies:
+            record = records[curie]
+            entities.append(Entity(**record) if record is not None else None)
+        return entities
+
+    def _entity_cache_get(self, base_url: str, curie: str) -> Tuple[bool, Any]:
+        if self.cache is None:
+            return False, None
+        return self.cache.get(
+            self.cache.get_key("get", f"{base_url}/entity/{curie}", None)
+        )
+
+    def _get_entity_chunk(
+        self, chunk: List[str], api_url: Optional[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        try:
+            return self.request(endpoint=f"/entities/{','.join(chunk)}",
+                                method="get", api_url=api_url, use_cache=False)
+        except requests.HTTPError as exc:
+            # The endpoint fails as a whole if any of the CURIEs is missing,
+            # in which case we fall back to looking the CURIEs up one by one
+            if exc.response is None or exc.response.status_code != 404:
+                raise
+        records = []
+        for curie in chunk:
+            try:
+                records.append(self.request(endpoint=f"/entity/{curie}",
+                                            method="get", api_url=api_url))
+            except requests.HTTPError as exc:
+                if exc.response is None or exc.response.status_code != 404:
+                    raise
+                records.append(None)
+        return records
+
+    def get_lexical(self, api_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get lexical information for all entities, see :func:`get_lexical_web`"""
+        return self.request(endpoint="/lexical", method="get", api_url=api_url)
+
+    def ground(
+        self,
+        text: str,
+        namespaces: Optional[List[str]] = None,
+        api_url: Optional[str] = None,
+    ) -> Optional[grounding.GroundResults]:
+        """Ground text with Gilda, see :func:`ground_web`"""
+        query_json: Dict[str, Any] = {"text": text}
+        if namespaces is not None:
+            query_json["namespaces"] = namespaces
+        res_json = self.request(endpoint="/ground", method="post",
+                                query_json=query_json, api_url=api_url)
+        if res_json is not None:
+            return grounding.GroundResults(**res_json)
+        return None
+
+    def search(
+        self, term: str, limit: int = 25, offset: int = 0, api_url: Optional[str] = None
+    ) -> List[api.Entity]:
+        """Search nodes by their name/synonyms, see :func:`search_web`"""
+        res_json = self.request(
+            endpoint="/search", method="get",
+            query_json={"q": term, "limit": limit, "offset": offset},
+            api_url=api_url
+        )
+        return [api.Entity(**e) for e in res_json]
+
+    def get_transitive_closure(
+        self,
+        relation_types: Optional[List[str]] = None,
+        api_url: Optional[str] = None
+    ) -> Set[Tuple[str, str]]:
+        """Get a transitive closure, see :func:`get_transitive_closure_web`"""
+        if not relation_types:
+            relation_types = DKG_REFINER_RELS
+
+        res_json = self.request(
+            "/transitive_closure",
+            method="get",
+            query_json=[("relation_types", rt) for rt in relation_types],
+            api_url=api_url
+        )
+        return {tuple(pair) for pair in res_json}
+
+    def is_ontological_child(
+        self, child_curie: str, parent_curie: str, api_url: Optional[str] = None
+    ) -> bool:
+        """Check if one CURIE is a child term of another, see
+        :func:`is_ontological_child_web`"""
+        res_json = self.request(
+            "/is_ontological_child",
+            method="post",
+            query_json={"child_curie": child_curie, "parent_curie": parent_curie},
+            api_url=api_url
+        )
+        return res_json["is_child"]
+
+    def is_ontological_child_batch(
+        self,
+        pairs: List[Tuple[str, str]],
+        api_url: Optional[str] = None,
+    ) -> List[bool]:
+        """Check a list of (child, parent) CURIE pairs for refinement
+
+        Duplicate pairs are only checked once and the unique pairs are
+        checked concurrently over the pooled connections.
+
+        Parameters
+        ----------
+        pairs :
+            A list of (child CURIE, parent CURIE) tuples.
+        api_url :
+            Use this parameter to specify the REST API base url or to override
+            the url set in the environment or the config
+
+        Returns
+        -------
+        :
+            A list of booleans in the same order as the input pairs, each
+            True if the child is an ontological child of the parent.
+        """
+        unique_pairs = list(dict.fromkeys(tuple(pair) for pair in pairs))
+        results = dict(zip(
+            unique_pairs,
+            self._map(lambda pair, url: self.is_ontological_child(
+                pair[0], pair[1], api_url=url), unique_pairs, api_url)
+        ))
+        return [results[tuple(pair)] for pair in pairs]
+
+    def _map(self, func, items, api_url):
+        if len(items) <= 1:
+            return [func(item, api_url) for item in items]
+        with ThreadPoolExecutor(max_workers=self.pool_maxsize) as executor:
+            return list(executor.map(lambda item: func(item, api_url), items))
+
+
+_default_client: Optional[DkgWebClient] = None
+
+
+def get_default_client() -> DkgWebClient:
+    """Return the default web client used by the module level functions
+
+    Responses are not cached on disk by default since the DKG behind the
+    REST API can change. To cache them under the mira pystow directory,
+    set the cache's time-to-live in seconds in the MIRA_WEB_CACHE_TTL
+    environment variable or the pystow config 'mira'->'web_cache_ttl',
+    e.g., to 86400 for a day.
+    """
+    global _default_client
+    if _default_client is None:
+        ttl = pystow.get_config("mira", "web_cache_ttl", dtype=int, default=0)
+        _default_client = DkgWebClient(
+            cache_dir=pystow.join("mira", "web_cache") if ttl else None,
+            ttl=ttl,
+        )
+    return _default_client
+
+
 def web_client(
     endpoint: str,
     method: Literal["get", "post"],
     query_json: Optional[Union[Dict[str, Any], List[Tuple[str, Any]]]] = None,
     api_url: Optional[str] = None,
-) -> Union[List[Dict[str, Any]], Dict[str, Any], None]:
+) -> Any:
     """A wrapper for sending requests to the REST API and returning the results
 
     Parameters
@@ -64,41 +544,15 @@ def web_client(
         The data sent back from the endpoint as a json, unless the response
         is empty, in which case None is returned.
     """
-    base_url = api_url or os.environ.get("MIRA_REST_URL") or pystow.get_config("mira", "rest_url")
-
-    if not base_url:
-        raise MissingBaseUrlError(
-            "The base url for the REST API needs to either be set in the "
-            "environment using the variable 'MIRA_REST_URL', be set in the "
-            "pystow config 'mira'->'rest_url' or by passing it the 'api_url' "
-            "parameter to the web client function used."
-        )
-
-    # Clean base url and endpoint
-    base_url = base_url.rstrip("/") + "/api" if not base_url.endswith("/api") else base_url
-    endpoint = endpoint if endpoint.startswith("/") else "/" + endpoint
-    endpoint_url = base_url + endpoint
-
-    if method == "post":
-        if query_json is None:
-            raise ValueError(f"POST request to endpoint {endpoint} requires query data")
-        res = requests.post(endpoint_url, json=query_json, timeout=30)
-    elif method == "get":
-        # Add query_json as params if present
-        kw = dict() if query_json is None else {"params": query_json}
-        res = requests.get(endpoint_url, timeout=30, **kw)
-    else:
-        raise ValueError("Method must be one of 'get' and 'post'")
-
-    res.raise_for_status()
-
-    return res.json()
+    return get_default_client().request(
+        endpoint=endpoint, method=method, query_json=query_json, api_url=api_url
+    )
 
 
 def get_relations_web(
     relations_model: api.RelationQuery,
     api_url: Optional[str] = None,
-) -> Union[List[api.RelationResponse], List[api.FullRelationResponse]]:
+) -> Union[List[api.RelationResponse], List[api.FullRelationResponse], None]:
     """Get relations based on the query contained in the RelationQuery model
 
     A wrapper that call the REST API's get_relations endpoint.
@@ -130,16 +584,7 @@ def get_relations_web(
         print(relations[:5])
 
     """
-    query_json = relations_model.model_dump(exclude_unset=True,
-                                       exclude_defaults=True)
-    res_json = web_client(
-        endpoint="/relations", method="post", query_json=query_json, api_url=api_url
-    )
-    if res_json is not None:
-        if relations_model.full:
-            return [api.FullRelationResponse(**r) for r in res_json]
-        else:
-            return [api.RelationResponse(**r) for r in res_json]
+    return get_default_client().get_relations(relations_model, api_url=api_url)
 
 
 def get_entity_web(curie: str, api_url: Optional[str] = None) -> Optional[api.Entity]:
@@ -161,12 +606,10 @@ def get_entity_web(curie: str, api_url: Optional[str] = None) -> Optional[api.En
     :
         Returns an Entity model, if the entity exists in the graph.
     """
-    res_json = web_client(endpoint=f"/entity/{curie}", method="get", api_url=api_url)
-    if res_json is not None:
-        return api.Entity(**res_json)
+    return get_default_client().get_entity(curie, api_url=api_url)
 
 
-def get_entities_web(curies: List[str]) -> List[Union[AskemEntity, Entity]]:
+def get_entities_web(curies: List[str]) -> Optional[List[Union[AskemEntity, Entity]]]:
     """Get information about multiple entities (e.g., their names,
     description synonyms, alternative identifiers, database
     cross-references, etc.) based on their respective compact URIs (CURIEs).
@@ -183,12 +626,7 @@ def get_entities_web(curies: List[str]) -> List[Union[AskemEntity, Entity]]:
     :
         Returns a list of Entity models, if the entities exist in the graph.
     """
-    # Endpoint expects '<prefix>:<local unique identifier>,...',
-    # e.g.: "ido:0000511,ido:0000512"
-    curies_str = ",".join(curies)
-    res_json = web_client(endpoint=f"/entities/{curies_str}", method="get")
-    if res_json is not None:
-        return [Entity(**record) for record in res_json]
+    return get_default_client().get_entities(curies)
 
 
 def get_lexical_web(api_url: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -207,7 +645,7 @@ def get_lexical_web(api_url: Optional[str] = None) -> List[Dict[str, Any]]:
     :
         A list of all entities in the graph.
     """
-    return web_client(endpoint="/lexical", method="get", api_url=api_url)
+    return get_default_client().get_lexical(api_url=api_url)
 
 
 def ground_web(
@@ -235,12 +673,7 @@ def ground_web(
         If the query results in at least one grounding, a GroundResults
         model is returned with all the results.
     """
-    query_json = {"text": text}
-    if namespaces is not None:
-        query_json["namespaces"] = namespaces
-    res_json = web_client(endpoint="/ground", method="post", query_json=query_json, api_url=api_url)
-    if res_json is not None:
-        return grounding.GroundResults(**res_json)
+    return get_default_client().ground(text, namespaces=namespaces, api_url=api_url)
 
 
 def search_web(
@@ -267,10 +700,7 @@ def search_web(
     :
         A list of the matching entities.
     """
-    res_json = web_client(
-        endpoint="/search", method="get", query_json={"q": term, "limit": limit, "offset": offset}, api_url=api_url
-    )
-    return [api.Entity(**e) for e in res_json]
+    return get_default_client().search(term, limit=limit, offset=offset, api_url=api_url)
 
 
 def get_transitive_closure_web(
@@ -297,16 +727,9 @@ def get_transitive_closure_web(
         point towards taxonomical parents (e.g., subclassof, part_of), then
         the pairs are interpreted as (taxonomical child, taxonomical ancestor).
     """
-    if not relation_types:
-        relation_types = DKG_REFINER_RELS
-
-    res_json = web_client(
-        "/transitive_closure",
-        method="get",
-        query_json=[("relation_types", rt) for rt in relation_types],
-        api_url=api_url
+    return get_default_client().get_transitive_closure(
+        relation_types, api_url=api_url
     )
-    return {tuple(pair) for pair in res_json}
 
 
 def is_ontological_child_web(
@@ -330,10 +753,54 @@ def is_ontological_child_web(
         True if the assumption that `child_curie` is an ontological child of
         `parent_curie` holds
     """
-    res_json = web_client(
-        "/is_ontological_child",
-        method="post",
-        query_json={"child_curie": child_curie, "parent_curie": parent_curie},
-        api_url=api_url
+    return get_default_client().is_ontological_child(
+        child_curie, parent_curie, api_url=api_url
+    )
+
+
+def is_ontological_child_batch_web(
+    pairs: List[Tuple[str, str]], api_url: Optional[str] = None
+) -> List[bool]:
+    """Check a list of (child, parent) CURIE pairs for refinement
+
+    Parameters
+    ----------
+    pairs :
+        A list of (child CURIE, parent CURIE) tuples.
+    api_url :
+        Use this parameter to specify the REST API base url or to override
+        the url set in the environment or the config
+
+    Returns
+    -------
+    :
+        A list of booleans in the same order as the input pairs, each True
+        if the child is an ontological child of the parent.
+    """
+    return get_default_client().is_ontological_child_batch(pairs, api_url=api_url)
+
+
+def get_entities_batch_web(
+    curies: List[str], chunk_size: int = 100, api_url: Optional[str] = None
+) -> List[Optional[Entity]]:
+    """Get information about a potentially large list of entities
+
+    Parameters
+    ----------
+    curies :
+        A list of curies for entities to get information about.
+    chunk_size :
+        The maximum number of CURIEs to send in one request.
+    api_url :
+        Use this parameter to specify the REST API base url or to override
+        the url set in the environment or the config.
+
+    Returns
+    -------
+    :
+        A list of Entity models in the same order as the input CURIEs,
+        with None for CURIEs that could not be found in the graph.
+    """
+    return get_default_client().get_entities_batch(
+        curies, chunk_size=chunk_size, api_url=api_url
     )
-    return res_json["is_child"]
@@ -6,15 +6,18 @@ import logging
 import os
 from pathlib import Path
 from textwrap import dedent
+from typing import Dict
 
 import flask
 import numpy as np
 from fastapi import FastAPI
 from fastapi.middleware.wsgi import WSGIMiddleware
 from flask_bootstrap import Bootstrap5
+from gilda.grounder import Grounder
 
 from mira.dkg.api import api_blueprint
 from mira.dkg.client import Neo4jClient
+from mira.dkg.grounder_cache import iter_terms_file, load_grounder
 from mira.dkg.grounding import grounding_blueprint
 from mira.dkg.ui import ui_blueprint
 from mira.dkg.utils import PREFIXES, MiraState, DOCKER_FILES_ROOT
@@ -30,7 +33,17 @@ logger = logging.getLogger(__name__)
 EMBEDDINGS_PATH_DOCKER = Path(
     os.getenv("EMBEDDINGS_PATH", DOCKER_FILES_ROOT / "embeddings.tsv.gz")
 )
+GROUNDER_PATH_DOCKER = Path(
+    os.getenv("GROUNDER_PATH", DOCKER_FILES_ROOT / "grounder.pkl")
+)
+GILDA_TERMS_PATH_DOCKER = Path(
+    os.getenv("GILDA_TERMS_PATH", DOCKER_FILES_ROOT / "gilda_terms.tsv.gz")
+)
 DOMAIN = os.getenv("MIRA_DOMAIN")
+DKG_VERSION = os.getenv("MIRA_DKG_VERSION")
+WARM_COMPONENTS = os.getenv(
+    "MIRA_WARM_COMPONENTS", "grounder,refinement_closure,lexical_dump,vectors"
+)
 
 tags_metadata = [
     {
@@ -53,6 +66,14 @@ tags_metadata = [
         "name": "relations",
         "description": "Query relation data",
     },
+    {
+        "name": "jobs",
+        "description": "Run CPU-heavy modeling operations in the background",
+    },
+    {
+        "name": "meta",
+        "description": "Service status",
+    },
 ]
 
 
@@ -93,21 +114,6 @@ def startup_event():
     logger.info("Running app startup function")
     Bootstrap5(flask_app)
 
-    if not EMBEDDINGS_PATH_DOCKER.is_file():
-        logger.warning(
-            f"Embeddings file {EMBEDDINGS_PATH_DOCKER} not found, skipping "
-            f"loading of embeddings"
-        )
-        vectors = {}
-    else:
-        with gzip.open(EMBEDDINGS_PATH_DOCKER, "rt") as file:
-            reader = csv.reader(file, delimiter="\t")
-            next(reader)  # skip header
-            vectors = {
-                curie: np.array([float(p) for p in parts])
-                for curie, *parts in reader
-            }
-
     # If the OpenAI API key is set, enable the LLM UI
     if api_key := os.environ.get("OPENAI_API_KEY"):
         from mira.openai_utility import OpenAIClient
@@ -124,14 +130,54 @@ def startup_event():
     # Set MIRA_NEO4J_URL in the environment
     # to point this somewhere specific
     client = Neo4jClient()
+    # Components are loaded on first use, and those listed in
+    # MIRA_WARM_COMPONENTS are loaded in the background right away
     app.state = flask_app.config["mira"] = MiraState(
         client=client,
-        grounder=client.get_grounder(PREFIXES),
-        refinement_closure=RefinementClosure(client.get_transitive_closure()),
-        lexical_dump=client.get_lexical(),
-        vectors=vectors,
+        loaders={
+            "grounder": lambda: _get_grounder(client),
+            "refinement_closure": lambda: RefinementClosure(
+                client.get_transitive_closure()
+            ),
+            "lexical_dump": client.get_lexical,
+            "vectors": _get_vectors,
+        },
     )
+    app.state.warm(name.strip() for name in WARM_COMPONENTS.split(",")
+                   if name.strip())
 
     flask_app.register_blueprint(ui_blueprint)
 
     app.mount("/", WSGIMiddleware(flask_app))
+
+
+def _get_vectors() -> Dict[str, np.ndarray]:
+    """Load the entity embeddings, if available"""
+    if not EMBEDDINGS_PATH_DOCKER.is_file():
+        logger.warning(
+            f"Embeddings file {EMBEDDINGS_PATH_DOCKER} not found, skipping "
+            f"loading of embeddings"
+        )
+        return {}
+    with gzip.open(EMBEDDINGS_PATH_DOCKER, "rt") as file:
+        reader = csv.reader(file, delimiter="\t")
+        next(reader)  # skip header
+        return {
+            curie: np.array([float(p) for p in parts])
+            for curie, *parts in reader
+        }
+
+
+def _get_grounder(client: Neo4jClient) -> Grounder:
+    """Load the prebuilt grounder, falling back to building it from Neo4j"""
+    grounder = load_grounder(
+        GROUNDER_PATH_DOCKER, prefixes=PREFIXES, graph_version=DKG_VERSION
+    )
+    if grounder is not None:
+        logger.info(f"Loaded prebuilt grounder from {GROUNDER_PATH_DOCKER}")
+        return grounder
+    if GILDA_TERMS_PATH_DOCKER.is_file():
+        logger.info(f"Building grounder from {GILDA_TERMS_PATH_DOCKER}")
+        return Grounder(list(iter_terms_file(GILDA_TERMS_PATH_DOCKER, PREFIXES)))
+    logger.info("Building grounder from the graph database")
+    return client.get_grounder(PREFIXES)
@@ -16,19 +16,87 @@ from typing import List, Mapping
 import sympy
 
 
-def expand_variable(variable, var_produced_map):
+def expand_variable(variable, var_produced_map, cache=None):
+    """Return the expression of a variable in terms of the variables that
+    aren't produced by an operation.
+
+    The operations producing the variable and its inputs are expanded in a
+    single pass in topological order. The expression of each variable is
+    built once and stored in the cache, so that expressions shared by
+    several variables are expanded only once and share the same sympy
+    objects.
+
+    Parameters
+    ----------
+    variable : Variable
+        The variable to expand.
+    var_produced_map : Dict[int, Union[Op1, Op2, Summation]]
+        The operation producing each variable, keyed by variable id.
+    cache : Dict[int, sympy.Expr]
+        The expressions of the variables expanded before with the same
+        ``var_produced_map``, keyed by variable id, to which the expressions
+        of this expansion are added.
+
+    Returns
+    -------
+    :
+        The expression of the variable.
+    """
+    if cache is None:
+        cache = {}
+    # Variables on the stack with a flag whether their inputs were pushed
+    stack = [(variable, False)]
+    in_progress = set()
+    while stack:
+        var, inputs_pushed = stack.pop()
+        if var.expression or var.id in cache:
+            continue
+        var_prod = var_produced_map.get(var.id)
+        inputs = _get_operation_inputs(var_prod)
+        if not inputs_pushed:
+            if var.id in in_progress:
+                raise ValueError(
+                    f"Variable {var.name} depends on its own value"
+                )
+            in_progress.add(var.id)
+            stack.append((var, True))
+            stack.extend((input_var, False) for input_var in inputs)
+        else:
+            in_progress.discard(var.id)
+            cache[var.id] = _apply_operation(
+                var_prod,
+                [_get_expanded(input_var, cache) for input_var in inputs],
+                var,
+            )
+    return _get_expanded(variable, cache)
+
+
+def _get_expanded(variable, cache):
     if variable.expression:
         return variable.expression
-    var_prod = var_produced_map.get(variable.id)
+    return cache[variable.id]
+
+
+def _get_operation_inputs(var_prod):
+    """Return the input variables of an operation."""
+    if isinstance(var_prod, Op1):
+        return [var_prod.src]
+    elif isinstance(var_prod, Op2):
+        return [var_prod.proj1, var_prod.proj2]
+    elif isinstance(var_prod, Summation):
+        return var_prod.summands
+    return []
+
+
+def _apply_operation(var_prod, args, variable):
+    """Return the expression of an operation applied to its expanded inputs,
+    or the symbol of the variable if it isn't produced by an operation."""
     if not var_prod:
         return sympy.Symbol(variable.name)
     elif isinstance(var_prod, Op1):
-        return sympy.Function(var_prod.function_str)(
-            expand_variable(var_prod.src, var_produced_map)
-        )
+        return sympy.Function(var_prod.function_str)(args[0])
     elif isinstance(var_prod, Op2):
-        arg1 = expand_variable(var_prod.proj1, var_produced_map)
-        arg2 = expand_variable(var_prod.proj2, var_produced_map)
+        arg1, arg2 = args
         if var_prod.function_str == "/" or var_prod.function_str == "./":
             return arg1 / arg2
         elif var_prod.function_str == "*" or var_prod.function_str == ".*":
@@ -42,10 +110,6 @@ def expand_variable(variable, var_produced_map):
         else:
             return sympy.Function(var_prod.function_str)(arg1, arg2)
     elif isinstance(var_prod, Summation):
-        args = [
-            expand_variable(summand, var_produced_map)
-            for summand in var_prod.summands
-        ]
         return sympy.Add(*args)
 
 
@@ -94,23 +158,28 @@ class Decapode:
                     one_op = var_produced_map.pop(produced_var.id)
                     root_variable_map[produced_var.id] = [one_op, op]
 
+        # The expressions of all variables are expanded with a shared cache,
+        # such that each variable is expanded only once
+        cache = {}
         new_vars = {}
         for var_id, var in copy.deepcopy(self.variables).items():
             if var_id not in root_variable_map:
-                var.expression = expand_variable(var, var_produced_map)
+                var.expression = expand_variable(var, var_produced_map, cache)
                 new_vars[var_id] = var
             else:
                 var = RootVariable(var_id, var.type, var.name, var.identifiers)
-                temp_var_map = copy.deepcopy(var_produced_map)
-                temp_var_map[var_id] = root_variable_map[var_id][0]
-                var.expression[0] = expand_variable(
-                    var.get_variable(), temp_var_map
-                )
-                temp_var_map = copy.deepcopy(var_produced_map)
-                temp_var_map[var_id] = root_variable_map[var_id][1]
-                var.expression[1] = expand_variable(
-                    var.get_variable(), temp_var_map
-                )
+                # Each expression is the operation producing the variable
+                # applied to its expanded inputs. Since the inputs can't
+                # depend on the variable itself, they are the same as for
+                # the other variables.
+                for idx, var_prod in enumerate(root_variable_map[var_id]):
+                    args = [
+                        expand_variable(input_var, var_produced_map, cache)
+                        for input_var in _get_operation_inputs(var_prod)
+                    ]
+                    var.expression[idx] = _apply_operation(
+                        var_prod, args, var
+                    )
                 new_vars[var_id] = var
         self.update_vars(new_vars)
 
@@ -1,48 +1,506 @@
-"""Input/output functions for metamodels."""
+"""Input/output functions for metamodels.
+
+Template models can be written to and read from JSON files, as well as
+from a compact binary msgpack format that is suitable for caching and
+storage. Templates are written one at a time, and can be read one at a
+time, so that very large (e.g., stratified) models don't need to be held
+as a complete JSON document in memory. If orjson is installed, it is used
+to decode JSON, and to encode indented JSON, see :func:`dumps_json`.
+"""
 __all__ = ["model_from_json_file", "model_to_json_file",
+           "iter_templates_from_json_file",
+           "model_from_msgpack_file", "model_to_msgpack_file",
+           "dumps_json", "dump_json_file",
            "expression_to_mathml", "mathml_to_expression"]
 
+import copy
 import json
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, Mapping, Tuple
+
 import sympy
+from sympy.printing.mathml import MathMLContentPrinter
+
+from . import templates as _templates
 from .template_model import TemplateModel
+from .templates import Template
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
 
 
-def model_from_json_file(fname) -> TemplateModel:
+def model_from_json_file(fname, lazy=False, stream=False) -> TemplateModel:
     """Return a TemplateModel from a JSON file.
 
     Parameters
     ----------
     fname : str or Path
         A file path.
+    lazy : bool
+        If True, rate laws are parsed only when they are first accessed,
+        see :meth:`TemplateModel.from_json`. Default: False.
+    stream : bool
+        If True, the file is read in two passes, first collecting the
+        symbols of rate laws, and then building each template as soon as it
+        is read, so that neither the complete JSON document nor all template
+        dicts are held in memory at once. This reduces peak memory use for
+        very large models, at the cost of reading the file twice. Requires
+        the ijson package, which doesn't support NaN and infinite values.
+        Default: False.
 
     Returns
     -------
     :
         A TemplateModel deserialized from the JSON file.
     """
-    with open(fname, 'r') as fh:
-        return TemplateModel.from_json(json.load(fh))
+    if stream:
+        import ijson
 
+        with open(fname, 'rb') as fh:
+            rate_symbols = _get_json_file_symbols(ijson.parse(fh))
+        with open(fname, 'rb') as fh:
+            return _model_from_members(_iter_json_members(fh), rate_symbols,
+                                       lazy=lazy)
+    with open(fname, 'rb') as fh:
+        data = _decode_json(fh.read())
+    return TemplateModel.from_json(data, lazy=lazy)
 
-def model_to_json_file(model: TemplateModel, fname):
+
+def model_to_json_file(model: TemplateModel, fname, indent=1):
     """Dump a TemplateModel into a JSON file.
 
+    Templates are serialized and written one at a time.
+
     Parameters
     ----------
     model : TemplateModel
         A template model to dump to a JSON file.
     fname : str or Path
         A file path to dump the model into.
+    indent : int or None
+        The number of spaces to indent nested values by. If None, the JSON
+        is written on a single line. Default: 1
+    """
+    # Everything except the templates is small, so it is serialized at once
+    model_shell = copy.copy(model)
+    model_shell.templates = []
+    members = model_shell.to_json()
+    members["templates"] = (template.to_json() for template in model.templates)
+    with open(fname, 'wb') as fh:
+        for chunk in _iter_json_object_chunks(members, indent=indent):
+            fh.write(chunk)
+
+
+def iter_templates_from_json_file(fname, lazy=False) -> Iterator[Template]:
+    """Iterate over the templates of a template model JSON file.
+
+    Only one template at a time is loaded from the file. Requires the ijson
+    package.
+
+    Parameters
+    ----------
+    fname : str or Path
+        A file path.
+    lazy : bool
+        If True, rate laws are parsed only when they are first accessed.
+        Default: False.
+
+    Yields
+    ------
+    :
+        The templates of the model, in order.
+    """
+    import ijson
+
+    # Rate laws are parsed with symbols for all parameters and concepts of
+    # the model, which are collected without loading the file first
+    with open(fname, 'rb') as fh:
+        rate_symbols = _get_json_file_symbols(ijson.parse(fh))
+    with open(fname, 'rb') as fh:
+        for template_json in ijson.items(fh, 'templates.item', use_float=True):
+            yield Template.from_json(template_json, rate_symbols=rate_symbols,
+                                     lazy=lazy)
+
+
+def model_from_msgpack_file(fname, lazy=False) -> TemplateModel:
+    """Return a TemplateModel from a msgpack file.
+
+    The file is read in two passes, first collecting the symbols of rate
+    laws, and then building each template as soon as it is read. Requires
+    the msgpack package.
+
+    Parameters
+    ----------
+    fname : str or Path
+        A file path of a model written by :func:`model_to_msgpack_file`.
+    lazy : bool
+        If True, rate laws are parsed only when they are first accessed.
+        Default: False.
+
+    Returns
+    -------
+    :
+        A TemplateModel deserialized from the msgpack file.
+    """
+    with open(fname, 'rb') as fh:
+        rate_symbols = _get_member_symbols(_iter_msgpack_members(fh))
+    with open(fname, 'rb') as fh:
+        return _model_from_members(_iter_msgpack_members(fh), rate_symbols,
+                                   lazy=lazy)
+
+
+def model_to_msgpack_file(model: TemplateModel, fname):
+    """Dump a TemplateModel into a msgpack file.
+
+    The file contains the same data as the JSON representation of the
+    model in a more compact binary format. Templates are serialized and
+    written one at a time. Requires the msgpack package.
+
+    Parameters
+    ----------
+    model : TemplateModel
+        A template model to dump.
+    fname : str or Path
+        A file path to dump the model into.
+    """
+    import msgpack
+
+    packer = msgpack.Packer(use_bin_type=True)
+    model_shell = copy.copy(model)
+    model_shell.templates = []
+    members = model_shell.to_json()
+    with open(fname, 'wb') as fh:
+        fh.write(packer.pack_map_header(len(members)))
+        for key, value in members.items():
+            fh.write(packer.pack(key))
+            if key == "templates":
+                fh.write(packer.pack_array_header(len(model.templates)))
+                for template in model.templates:
+                    fh.write(packer.pack(template.to_json()))
+            else:
+                fh.write(packer.pack(value))
+
+
+def dumps_json(obj: Any, indent=None, **kwargs) -> str:
+    """Return the JSON string of an object, using orjson if available.
+
+    Without indentation, the output is the same as that of
+    :func:`json.dumps`. With indentation, orjson is used if it is installed
+    and the object doesn't contain NaN or infinite values. Its output
+    parses to the same values as that of :func:`json.dumps`, but may write
+    numbers differently (e.g., ``0.00001`` instead of ``1e-05``) and
+    non-ASCII characters unescaped.
+
+    Parameters
+    ----------
+    obj :
+        A JSON-compatible object.
+    indent : int or None
+        The number of spaces to indent nested values by. If None, the JSON
+        is returned on a single line.
+    kwargs :
+        Additional keyword arguments to pass to :func:`json.dumps`. If
+        given, :mod:`json` is always used for encoding.
+
+    Returns
+    -------
+    :
+        The JSON string.
+    """
+    if kwargs:
+        return json.dumps(obj, indent=indent, **kwargs)
+    return _encode_json(obj, indent=indent).decode('utf-8')
+
+
+def dump_json_file(obj: Any, fname, indent=None, **kwargs):
+    """Write an object to a JSON file, using orjson if available.
+
+    The output is formatted as described in :func:`dumps_json`.
+
+    Parameters
+    ----------
+    obj :
+        A JSON-compatible object.
+    fname : str or Path
+        A file path to write to.
+    indent : int or None
+        The number of spaces to indent nested values by. If None, the JSON
+        is written on a single line.
+    kwargs :
+        Additional keyword arguments to pass to :func:`json.dump`. If
+        given, :mod:`json` is always used for encoding.
+    """
+    if kwargs:
+        with open(fname, 'w') as fh:
+            json.dump(obj, fh, indent=indent, **kwargs)
+        return
+    with open(fname, 'wb') as fh:
+        fh.write(_encode_json(obj, indent=indent))
+
+
+# Matches orjson's two-space indentation at the start of each line
+re_indent = re.compile(rb'^(?:  )+', re.MULTILINE)
+
+
+def _encode_json(obj: Any, indent=None) -> bytes:
+    """Encode an object as UTF-8 JSON, see :func:`dumps_json`."""
+    # orjson has no option for json's default separators, and writes NaN
+    # and infinite values as null
+    if _HAS_ORJSON and indent and not _has_non_finite_float(obj):
+        try:
+            encoded = orjson.dumps(
+                obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2)
+        except TypeError:
+            # E.g., values that orjson doesn't support but json does, such
+            # as integers over 64 bits
+            pass
+        else:
+            if indent != 2:
+                # Since JSON strings can't contain line breaks, indentation
+                # is only ever at the start of lines
+                encoded = re_indent.sub(
+                    lambda m: b' ' * (len(m.group()) // 2 * indent), encoded)
+            return encoded
+    if indent:
+        return json.dumps(obj, indent=indent, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj).encode('utf-8')
+
+
+def _decode_json(data: bytes) -> Any:
+    """Decode UTF-8 JSON, using orjson if available."""
+    if _HAS_ORJSON:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # E.g., NaN and infinite values, which orjson rejects
+            pass
+    return json.loads(data)
+
+
+def _has_non_finite_float(obj: Any) -> bool:
+    """Return True if a JSON-compatible object contains NaN or infinity."""
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+def _iter_json_object_chunks(members: Mapping[str, Any],
+                             indent=None) -> Iterator[bytes]:
+    """Encode a JSON object, streaming values that are iterators as arrays."""
+    if indent:
+        item_sep = b',\n' + b' ' * (2 * indent)
+        member_sep = b',\n' + b' ' * indent
+        open_members = b'{\n' + b' ' * indent
+        close_members = b'\n}'
+    else:
+        item_sep = member_sep = b', '
+        open_members, close_members = b'{', b'}'
+
+    def _nested(value, level):
+        encoded = _encode_json(value, indent=indent)
+        if indent:
+            encoded = encoded.replace(b'\n', b'\n' + b' ' * (level * indent))
+        return encoded
+
+    yield open_members
+    for idx, (key, value) in enumerate(members.items()):
+        if idx:
+            yield member_sep
+        yield _encode_json(key) + b': '
+        if not isinstance(value, Iterator):
+            yield _nested(value, 1)
+            continue
+        item_idx = None
+        for item_idx, item in enumerate(value):
+            if item_idx:
+                yield item_sep
+            else:
+                yield b'[\n' + b' ' * (2 * indent) if indent else b'['
+            yield _nested(item, 2)
+        if item_idx is None:
+            yield b'[]'
+        else:
+            yield b'\n' + b' ' * indent + b']' if indent else b']'
+    yield close_members
+
+
+#: The keys of template JSON objects whose values are concepts
+CONCEPT_KEYS = sorted({
+    key for value in vars(_templates).values()
+    if isinstance(value, type) and issubclass(value, Template)
+    for key in getattr(value, 'concept_keys', [])
+})
+re_concept_name_prefix = re.compile(
+    r'^templates\.item\.(?:%s)(?:\.item)?\.name$' % '|'.join(CONCEPT_KEYS)
+)
+
+
+def _get_json_file_symbols(events: Iterable[Tuple[str, str, Any]]) \
+        -> Mapping[str, sympy.Symbol]:
+    """Return the rate law symbols of a model from its ijson parse events."""
+    symbols = {}
+    for prefix, event, value in events:
+        if prefix == 'parameters' and event == 'map_key':
+            symbols[value] = sympy.Symbol(value)
+        elif event == 'string' and value and value not in symbols \
+                and re_concept_name_prefix.match(prefix):
+            symbols[value] = sympy.Symbol(value)
+    return symbols
+
+
+def _iter_json_members(fh) -> Iterator[Tuple[str, Any]]:
+    """Iterate over the members of a template model JSON file.
+
+    Each template is yielded separately under the key 'templates.item'
+    as soon as it is read.
     """
-    with open(fname, 'w') as fh:
-        json.dump(model.to_json(), fh, indent=1)
+    import ijson
+    from ijson.common import ObjectBuilder
+
+    builder = None
+    for prefix, event, value in ijson.parse(fh, use_float=True):
+        if builder is None:
+            if event in {'map_key', 'end_map', 'end_array'} \
+                    or prefix in {'', 'templates'}:
+                continue
+            if event not in {'start_map', 'start_array'}:
+                yield prefix, value
+                continue
+            builder = ObjectBuilder()
+            member_key = prefix
+            depth = 0
+        builder.event(event, value)
+        if event in {'start_map', 'start_array'}:
+            depth += 1
+        elif event in {'end_map', 'end_array'}:
+            depth -= 1
+            if depth == 0:
+                yield member_key, builder.value
+                builder = None
+
+
+def _iter_msgpack_members(fh) -> Iterator[Tuple[str, Any]]:
+    """Iterate over the members of a template model msgpack file.
+
+    Each template is yielded separately under the key 'templates.item'
+    as soon as it is read.
+    """
+    import msgpack
+
+    unpacker = msgpack.Unpacker(fh, raw=False, strict_map_key=False)
+    for _ in range(unpacker.read_map_header()):
+        key = unpacker.unpack()
+        if key == 'templates':
+            for _ in range(unpacker.read_array_header()):
+                yield 'templates.item', unpacker.unpack()
+        else:
+            yield key, unpacker.unpack()
+
+
+def _get_member_symbols(members: Iterable[Tuple[str, Any]]) \
+        -> Mapping[str, sympy.Symbol]:
+    """Return the rate law symbols of a model from its members."""
+    symbols: Dict[str, sympy.Symbol] = {}
+    for key, value in members:
+        if key == 'parameters':
+            symbols.update((name, sympy.Symbol(name)) for name in value)
+        elif key == 'templates.item':
+            for concept_key in CONCEPT_KEYS:
+                concepts = value.get(concept_key)
+                if not concepts:
+                    continue
+                if not isinstance(concepts, list):
+                    concepts = [concepts]
+                for concept in concepts:
+                    name = concept.get('name')
+                    if name and name not in symbols:
+                        symbols[name] = sympy.Symbol(name)
+    return symbols
+
+
+def _model_from_members(members: Iterable[Tuple[str, Any]],
+                        rate_symbols: Mapping[str, sympy.Symbol],
+                        lazy=False) -> TemplateModel:
+    """Build a TemplateModel from its members, reading templates one by one.
+
+    Each template is built as soon as it is read, using the symbols of all
+    rate laws of the model, so only one template dict is held at a time.
+    """
+    templates = []
+    data = {}
+    for key, value in members:
+        if key == 'templates.item':
+            templates.append(Template.from_json(
+                value, rate_symbols=rate_symbols, lazy=lazy))
+        else:
+            data[key] = value
+    data['templates'] = templates
+    return TemplateModel.from_json(data, lazy=lazy)
+
+
+class _MathMLContentPrinter(MathMLContentPrinter):
+    """A content MathML printer that prints symbol names verbatim.
+
+    Sympy's printer interprets underscores and numeric suffixes in symbol
+    names as sub- and superscripts, and translates Greek letter names into
+    Unicode characters. Model symbols are identifiers, so here they are
+    printed as they are.
+    """
+
+    def _print_Symbol(self, sym):
+        ci = self.dom.createElement(self.mathml_tag(sym))
+        ci.appendChild(self.dom.createTextNode(sym.name))
+        return ci
+
+    def doprint(self, expr):
+        # Unlike the base class, don't replace non-ASCII characters in
+        # symbol names with XML character references
+        return self._print(expr).toxml()
+
+
+def _rebuild(expression: sympy.Basic) -> Tuple[sympy.Basic, bool]:
+    """Rebuild the parts of an expression that contain symbols.
+
+    This evaluates those parts, the same way substituting their symbols
+    would. Returns the rebuilt expression and whether it contains symbols.
+    """
+    if expression.is_Symbol:
+        return expression, True
+    if not expression.args:
+        return expression, False
+    args, has_symbols = zip(*(_rebuild(arg) for arg in expression.args))
+    if any(has_symbols):
+        return expression.func(*args), True
+    return expression, False
+
+
+@lru_cache(maxsize=100000)
+def _expression_to_mathml_cached(expression: sympy.Expr, settings) -> str:
+    # Parts of expressions with symbols are printed in evaluated form
+    expression, _ = _rebuild(expression)
+    return _MathMLContentPrinter(dict(settings)).doprint(expression)
 
 
 def expression_to_mathml(expression: sympy.Expr, *args, **kwargs) -> str:
     """Convert a sympy expression to MathML string.
 
     Here we pay attention to not style underscores and numeric suffixes
-    in special ways.
+    in special ways. Results are cached by expression, which makes
+    repeated conversion of the same expressions, e.g., units in
+    stratified models, cheap.
 
     Parameters
     ----------
@@ -58,6 +516,19 @@ def expression_to_mathml(expression: sympy.Expr, *args, **kwargs) -> str:
     :
         A MathML string representing the sympy expression.
     """
+    if args or kwargs.get('printer', 'content') != 'content':
+        return _expression_to_mathml_substituted(expression, *args, **kwargs)
+    kwargs.pop('printer', None)
+    try:
+        return _expression_to_mathml_cached(expression,
+                                            tuple(sorted(kwargs.items())))
+    except TypeError:
+        # Unhashable settings
+        return _expression_to_mathml_substituted(expression, **kwargs)
+
+
+def _expression_to_mathml_substituted(expression: sympy.Expr, *args,
+                                      **kwargs) -> str:
     mappings = {}
     for sym in expression.atoms(sympy.Symbol):
         name = '|' + str(sym).replace('_', 'QQQ') + '|'
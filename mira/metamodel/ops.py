@@ -3,8 +3,8 @@ import logging
 from copy import deepcopy
 from collections import defaultdict
 import itertools as itt
-from typing import Callable, Collection, Iterable, List, Mapping, Optional, \
-    Tuple, Type, Union
+from typing import Any, Callable, Collection, Dict, Iterable, List, Mapping, \
+    Optional, Tuple, Type, Union
 
 import sympy
 
@@ -111,12 +111,14 @@ def stratify(
     Returns
     -------
     :
-        A stratified template model
+        A stratified template model. Its concepts are interned and shared
+        by templates and initials, so they can't be modified, see
+        :class:`ConceptStore`.
     """
     if strata_name_lookup and strata_curie_to_name is None:
         from mira.dkg.web_client import get_entities_web, MissingBaseUrlError
         try:
-            entity_map = {e.id: e.name for e in get_entities_web(strata)}
+            entity_map = {e.id: e.name for e in get_entities_web(strata) or []}
             # Update the mapping with the strata values that are missing from
             # the map
             strata_curie_to_name = {s: entity_map.get(s, s) for s in strata}
@@ -155,6 +157,11 @@ def stratify(
 
     stratum_index_map = {stratum: i for i, stratum in enumerate(strata)}
 
+    # Stratified templates refer to the same concepts many times, e.g.,
+    # each infection template to the infected concept of each stratum, so
+    # the concepts of the new model are interned and shared
+    store = ConceptStore()
+
     keep_unstratified_parameters = set()
     all_param_mappings = defaultdict(set)
     for template in template_model.templates:
@@ -164,7 +171,7 @@ def stratify(
             original_params = template.get_parameter_names()
             for param in original_params:
                 keep_unstratified_parameters.add(param)
-            templates.append(deepcopy(template))
+            templates.append(store.intern_template(deepcopy(template)))
             continue
 
         # Check if we will have any controllers in the template
@@ -177,29 +184,46 @@ def stratify(
         # we will stratify controllers separately
         stratify_controllers = (ncontrollers > 0) and cartesian_control
 
+        # The rate law of each derived template is the original one with
+        # renamed symbols, so we find the symbols to rename only once
+        rewrite = _compile_rate_law_rewrite(
+            template_model, template,
+            params_to_stratify=params_to_stratify,
+            params_to_preserve=params_to_preserve,
+        )
+
+        # A copy of the template with interned concepts from which the
+        # derived templates are copied
+        base_template = store.intern_template(deepcopy(template))
+
         # Generate a derived template for each stratum
         for stratum, stratum_idx in stratum_index_map.items():
             template_strata = []
-            new_template = deepcopy(template)
+            new_template = _copy_template(base_template)
             new_template.name = \
                 f"{template.name if template.name else 't'}_{stratum}"
             # We have to make sure that we only add the stratum to the
             # list of template strata if we stratified any of the non-controllers
             # in this first for loop
-            any_noncontrollers_stratified = False
+            any_noncontrollers_stratified = any(
+                concept.name not in exclude_concepts for concept in
+                new_template.get_concepts_flat(
+                    exclude_controllers=stratify_controllers)
+            )
+
             # We apply this stratum to each concept except for controllers
             # in case we will separately stratify those
-            for concept in new_template.get_concepts_flat(
-                    exclude_controllers=stratify_controllers,
-                    refresh=True):
+            def stratify_concept(concept):
                 if concept.name in exclude_concepts:
-                    continue
-                concept.with_context(
+                    return concept
+                return store.with_context(
+                    concept,
                     do_rename=modify_names,
                     curie_to_name_map=strata_curie_to_name,
-                    inplace=True,
                     **{key: stratum})
-                any_noncontrollers_stratified = True
+
+            _replace_concepts(new_template, stratify_concept,
+                              exclude_controllers=stratify_controllers)
 
             # If we don't stratify controllers then we are done and can just
             # make the new rate law, then append this new template
@@ -208,12 +232,7 @@ def stratify(
                 if any_noncontrollers_stratified:
                     template_strata = [stratum if
                                        param_renaming_uses_strata_names else stratum_idx]
-                    param_mappings = rewrite_rate_law(template_model=template_model,
-                                                      old_template=template,
-                                                      new_template=new_template,
-                                                      template_strata=template_strata,
-                                                      params_to_stratify=params_to_stratify,
-                                                      params_to_preserve=params_to_preserve)
+                    param_mappings = rewrite(new_template, template_strata)
                     for old_param, new_param in param_mappings.items():
                         all_param_mappings[old_param].add(new_param)
                 templates.append(new_template)
@@ -227,32 +246,32 @@ def stratify(
                 #    (A_middle, B_old), (A_middle, B_middle), (A_middle, B_young),
                 #    (A_young, B_old), (A_young, B_middle), (A_young, B_young)
                 for c_strata_tuple in itt.product(strata, repeat=ncontrollers):
-                    stratified_template = deepcopy(new_template)
-                    stratified_controllers = stratified_template.get_controllers()
-                    # Filter to make sure we skip controllers that are excluded
-                    stratified_controllers = [c for c in stratified_controllers
-                                              if c.name not in exclude_concepts]
+                    stratified_template = _copy_template(new_template)
                     template_strata = [stratum if param_renaming_uses_strata_names
                                        else stratum_idx]
-                    # We now apply the stratum assigned to each controller in this particular
-                    # tuple to the controller
-                    for controller, c_stratum in zip(stratified_controllers, c_strata_tuple):
+                    # We now apply the stratum assigned to each controller in
+                    # this particular tuple to the controller, skipping
+                    # controllers that are excluded
+                    c_strata = iter(c_strata_tuple)
+
+                    def stratify_controller(controller):
                         if controller.name in exclude_concepts:
-                            continue
+                            return controller
+                        c_stratum = next(c_strata)
                         stratified_template.name += f"_{c_stratum}"
-                        controller.with_context(do_rename=modify_names, inplace=True,
-                                                **{key: c_stratum})
                         template_strata.append(c_stratum if param_renaming_uses_strata_names
                                                else stratum_index_map[c_stratum])
+                        return store.with_context(controller,
+                                                  do_rename=modify_names,
+                                                  **{key: c_stratum})
+
+                    _replace_concepts(stratified_template, stratify_controller,
+                                      only_controllers=True)
 
                     # Wew can now rewrite the rate law for this stratified template,
                     # then append the new template
-                    param_mappings = rewrite_rate_law(template_model=template_model,
-                                                      old_template=template,
-                                                      new_template=stratified_template,
-                                                      template_strata=template_strata,
-                                                      params_to_stratify=params_to_stratify,
-                                                      params_to_preserve=params_to_preserve)
+                    param_mappings = rewrite(stratified_template,
+                                             template_strata)
                     for old_param, new_param in param_mappings.items():
                         all_param_mappings[old_param].add(new_param)
                     templates.append(stratified_template)
@@ -267,22 +286,23 @@ def stratify(
         # replaced by multiple stratified parameters
         any_param_stratified = False
         param_replacements = defaultdict(set)
+        initial_concept = store.intern(deepcopy(initial.concept))
 
         for stratum_idx, stratum in enumerate(strata):
             # Figure out if the concept for this initial is one that we
             # need to stratify or not
             if (exclude_concepts and initial.concept.name in exclude_concepts) or \
                     (concepts_to_preserve and initial.concept.name in concepts_to_preserve):
-                # Just make a copy of the original initial concept
-                new_concept = deepcopy(initial.concept)
+                # Just use a copy of the original initial concept
+                new_concept = initial_concept
                 concept_stratified = False
             else:
                 # We create a new concept for the given stratum
-                new_concept = initial.concept.with_context(
+                new_concept = store.intern(initial_concept.with_context(
                     do_rename=modify_names,
                     curie_to_name_map=strata_curie_to_name,
                     **{key: stratum},
-                )
+                ))
                 concept_stratified = True
             # Now we may have to rewrite the expression so that we can
             # update for stratified parameters so we make a copy and figure
@@ -345,8 +365,10 @@ def stratify(
                 else:
                     new_initial = new_expression
 
+            # Initials get their own copy of the concept, so that it can be
+            # modified without affecting the templates sharing it
             initials[new_concept.name] = \
-                Initial(concept=new_concept, expression=new_initial)
+                Initial(concept=deepcopy(new_concept), expression=new_initial)
 
     parameters = {}
 
@@ -400,12 +422,14 @@ def stratify(
         param_name = f"p_{source_stratum_name}_{target_stratum_name}"
         if param_name not in parameters:
             parameters[param_name] = Parameter(name=param_name, value=0.1)
-        subject = concept.with_context(do_rename=modify_names,
-                                       curie_to_name_map=strata_curie_to_name,
-                                       **{key: source_stratum})
-        outcome = concept.with_context(do_rename=modify_names,
-                                       curie_to_name_map=strata_curie_to_name,
-                                       **{key: target_stratum})
+        subject = store.intern(concept.with_context(
+            do_rename=modify_names,
+            curie_to_name_map=strata_curie_to_name,
+            **{key: source_stratum}))
+        outcome = store.intern(concept.with_context(
+            do_rename=modify_names,
+            curie_to_name_map=strata_curie_to_name,
+            **{key: target_stratum}))
         # todo will need to generalize for different kwargs for different conversions
         template = conversion_cls(subject=subject, outcome=outcome,
                                   name=f't_conv_{idx}_{source_stratum_name}_{target_stratum_name}')
@@ -450,6 +474,38 @@ def stratify(
     return new_model
 
 
+def _copy_template(template: Template) -> Template:
+    """Return a copy of a template that shares its concepts and rate law.
+
+    This is used for templates with interned concepts, which aren't
+    modified in place, and rate laws are immutable.
+    """
+    memo: Dict[int, Any] = {id(concept): concept
+                            for concept in template.get_concepts_flat()}
+    rate_law = template.rate_law
+    memo[id(rate_law)] = rate_law
+    return deepcopy(template, memo)
+
+
+def _replace_concepts(
+    template: Template,
+    replace: Callable[[Concept], Concept],
+    exclude_controllers: bool = False,
+    only_controllers: bool = False,
+):
+    """Replace the concepts of a template in place, by role."""
+    for role in template.concept_keys:
+        is_controller = role in {'controller', 'controllers'}
+        if (exclude_controllers and is_controller) or \
+                (only_controllers and not is_controller):
+            continue
+        value = getattr(template, role)
+        if isinstance(value, list):
+            setattr(template, role, [replace(v) for v in value])
+        else:
+            setattr(template, role, replace(value))
+
+
 def rewrite_rate_law(
     template_model: TemplateModel,
     old_template: Template,
@@ -558,6 +614,120 @@ def rewrite_rate_law(
     return param_mappings
 
 
+def _get_rate_law_concepts(template: Template) -> List[Concept]:
+    """Return the concepts of a template in the order rate laws are rewritten"""
+    concepts = list(template.get_controllers())
+    concepts_by_role = template.get_concepts_by_role()
+    for role in ["subject", "outcome"]:
+        if role in concepts_by_role:
+            concepts.append(concepts_by_role[role])
+    return concepts
+
+
+def _compile_rate_law_rewrite(
+    template_model: TemplateModel,
+    old_template: Template,
+    params_to_stratify: Optional[Collection[str]] = None,
+    params_to_preserve: Optional[Collection[str]] = None,
+) -> Callable[[Template, List], Mapping[str, str]]:
+    """Prepare rewriting the rate law of a template for each of its strata.
+
+    All templates derived from a template by stratification have the same
+    rate law up to the names of the concepts and parameters in it. The
+    symbols to rename are therefore found once, and the rate law of each
+    derived template is then created with a single ``xreplace``, instead of
+    a ``subs`` for each concept and parameter as in
+    :func:`rewrite_rate_law`.
+
+    Parameters
+    ----------
+    template_model :
+        The unstratified template model containing the template.
+    old_template :
+        The original template.
+    params_to_stratify :
+        A list of parameters to stratify. If none given, will stratify all
+        parameters.
+    params_to_preserve :
+        A list of parameters to preserve. If none given, will stratify all
+        parameters.
+
+    Returns
+    -------
+    :
+        A function that takes a template derived from ``old_template`` and
+        the strata applied to it, sets the rate law of the derived template
+        and returns the mapping of original to new parameter names, with
+        the same results as :func:`rewrite_rate_law`.
+    """
+    def rewrite_slow(new_template, template_strata):
+        return rewrite_rate_law(template_model=template_model,
+                                old_template=old_template,
+                                new_template=new_template,
+                                template_strata=template_strata,
+                                params_to_stratify=params_to_stratify,
+                                params_to_preserve=params_to_preserve)
+
+    rate_law = old_template.rate_law
+    if not rate_law:
+        return lambda new_template, template_strata: {}
+    # If a controller is also the subject, only one of the factors of the
+    # rate law is renamed for the controller, which isn't a substitution
+    if has_controller(old_template) and has_subject(old_template) and \
+            old_template.subject.name in {c.name for c in
+                                          old_template.get_controllers()}:
+        return rewrite_slow
+
+    old_names = [c.name for c in _get_rate_law_concepts(old_template)]
+    old_name_set = set(old_names)
+    parameters = [
+        parameter for parameter
+        in template_model.get_parameters_from_rate_law(rate_law)
+        if not (params_to_preserve is not None
+                and parameter in params_to_preserve)
+        and not (params_to_stratify is not None
+                 and parameter not in params_to_stratify)
+    ]
+    parameter_symbols = [(parameter, sympy.Symbol(parameter))
+                         for parameter in parameters]
+
+    def rewrite(new_template, template_strata):
+        # Concepts are renamed in order, so a symbol that appears in more
+        # than one role is renamed according to the first one
+        mapping = {}
+        for old_name, new_concept in zip(
+            old_names, _get_rate_law_concepts(new_template)
+        ):
+            if old_name in mapping:
+                continue
+            if new_concept.name != old_name and (
+                new_concept.name in old_name_set
+                or new_concept.name in template_model.parameters
+            ):
+                # A new name that is itself renamed in a later step, or that
+                # is taken for a parameter, can't be renamed all at once
+                return rewrite_slow(new_template, template_strata)
+            mapping[old_name] = new_concept.name
+        symbol_mapping = {
+            sympy.Symbol(old_name): sympy.Symbol(new_name)
+            for old_name, new_name in mapping.items() if old_name != new_name
+        }
+        param_suffix = '_'.join([str(s) for s in template_strata])
+        param_mappings = {}
+        for parameter, symbol in parameter_symbols:
+            # A parameter sharing its name with a renamed concept has been
+            # renamed as that concept
+            if symbol in symbol_mapping:
+                continue
+            new_param = f'{parameter}_{param_suffix}'
+            param_mappings[parameter] = new_param
+            symbol_mapping[symbol] = sympy.Symbol(new_param)
+        new_template.rate_law = rate_law.xreplace(symbol_mapping)
+        return param_mappings
+
+    return rewrite
+
+
 def simplify_rate_laws(template_model: TemplateModel):
     """Return a template model after rewriting templates by simplifying rate laws.
 
@@ -863,20 +1033,23 @@ def counts_to_dimensionless(tm: TemplateModel,
     counts_unit_symbol = sympy.Symbol(counts_unit)
 
     initials_normalized = set()
+    # Concepts can be shared by several templates and initials, so we keep
+    # track of the ones already normalized to normalize each only once
+    concepts_normalized = set()
     # First we normalize concepts and their initials
     for template in tm.templates:
         # Since concepts can be distributed across templates, we have to go
         # template by template
-        for concept in template.get_concepts():
-            if concept.units:
+        for concept in template.get_concepts_flat():
+            if concept.units and id(concept) not in concepts_normalized:
+                concepts_normalized.add(id(concept))
                 # We figure out what the exponent of the counts unit is
                 # if it appears in the units of the concept
                 (coeff, exponent) = \
                     concept.units.expression.as_coeff_exponent(counts_unit_symbol)
                 # If the exponent is other than zero then normalization is needed
                 if exponent:
-                    concept.units.expression = \
-                        concept.units.expression / (counts_unit_symbol ** exponent)
+                    _divide_units(concept, counts_unit_symbol ** exponent)
                     # We now try to see if there is a corresponding initial condition
                     # for the concept and if so, we normalize it as well
                     if concept.name in tm.initials and concept.name not in initials_normalized:
@@ -884,10 +1057,11 @@ def counts_to_dimensionless(tm: TemplateModel,
                         if init.expression is not None:
                             init.expression = \
                                 init.expression / (norm_factor ** exponent)
-                            if init.concept.units:
-                                init.concept.units.expression = \
-                                    (init.concept.units.expression /
-                                     (counts_unit_symbol ** exponent))
+                            if init.concept.units and \
+                                    id(init.concept) not in concepts_normalized:
+                                concepts_normalized.add(id(init.concept))
+                                _divide_units(init.concept,
+                                              counts_unit_symbol ** exponent)
                             initials_normalized.add(concept.name)
     # Now we do the same for parameters
     for p_name, p in tm.parameters.items():
@@ -897,13 +1071,18 @@ def counts_to_dimensionless(tm: TemplateModel,
             if isinstance(exponent, sympy.core.numbers.One):
                 exponent = 1
             if exponent:
-                p.units.expression = \
-                    p.units.expression / (counts_unit_symbol ** exponent)
+                _divide_units(p, counts_unit_symbol ** exponent)
                 p.value /= (norm_factor ** exponent)
                 p.value = float(p.value)
     return tm
 
 
+def _divide_units(element, divisor):
+    """Divide the units of a concept or parameter, replacing rather than
+    modifying its units, which may be shared with other elements."""
+    element.units = Unit(expression=element.units.expression / divisor)
+
+
 def deactivate_templates(
     template_model: TemplateModel,
     condition: Callable[[Template], bool]
@@ -1,5 +1,3 @@
-import copy
-
 __all__ = [
     "Annotations",
     "TemplateModel",
@@ -21,6 +19,7 @@ import networkx as nx
 import sympy
 import mira.metamodel.io
 from .templates import *
+from .templates import _get_concept_kwargs
 from .units import Unit
 from .utils import safe_parse_expr
 
@@ -36,6 +35,8 @@ class Initial:
         The expression for the initial.
     """
 
+    __slots__ = ("concept", "expression")
+
     def __init__(self, concept, expression):
         self.concept = concept
         if isinstance(expression, int):
@@ -78,10 +79,8 @@ class Initial:
         :
             The newly created initial.
         """
-        expression_str = data.pop("expression")
-        concept_json = data.pop("concept")
-        concept = Concept.from_json(concept_json)
-        expression = safe_parse_expr(expression_str, local_dict=locals_dict)
+        concept = Concept.from_json(data["concept"])
+        expression = safe_parse_expr(data["expression"], local_dict=locals_dict)
         return cls(concept=concept, expression=expression)
 
     def substitute_parameter(self, name, value):
@@ -212,6 +211,8 @@ class Parameter(Concept):
         The units of the parameter.
     """
 
+    __slots__ = ("value", "distribution")
+
     def __init__(self, name, value=None, distribution=None, display_name=None,
                  description=None, identifiers=None, context=None,
                  units=None):
@@ -239,12 +240,12 @@ class Parameter(Concept):
     @classmethod
     def from_json(cls, data):
         """Return a Parameter from a dictionary."""
-        data = dict(data)
-        if data.get('units'):
-            data['units'] = Unit.from_json(data['units'])
+        data = _get_concept_kwargs(data)
         if data.get('distribution'):
-            data['distribution'] = \
-                Distribution(**data['distribution'])
+            data['distribution'] = Distribution(
+                type=data['distribution']['type'],
+                parameters=dict(data['distribution']['parameters']),
+            )
         return cls(**data)
 
     def to_json(self):
@@ -282,6 +283,8 @@ class Observable(Concept):
         The units of the observable.
     """
 
+    __slots__ = ("expression",)
+
     def __init__(self, name, expression, display_name=None, description=None,
                  identifiers=None, context=None, units=None):
         super().__init__(name=name, display_name=display_name,
@@ -746,24 +749,35 @@ class TemplateModel:
         self.parameters.pop(redundant_parameter)
 
     @classmethod
-    def from_json(cls, data) -> "TemplateModel":
+    def from_json(cls, data, lazy=False) -> "TemplateModel":
         """
         Return a template model from a dictionary
 
+        The input is not modified and no part of it is shared with the
+        returned template model.
+
         Parameters
         ----------
         data : Dict[str,Any]
             Mapping of template model attributes to their values.
+        lazy : bool
+            If True, rate laws are kept as strings and only parsed when they
+            are first accessed, see :meth:`Template.from_json`. This makes
+            loading models that are only inspected structurally, e.g., for
+            their concepts or parameters, much faster. Default: False.
 
         Returns
         -------
         :
             Returns the newly created template model.
         """
-        # Do a copy just to make sure we don't modify the original data
-        data = copy.deepcopy(data)
+        # The symbol table of parameters and concepts, built once and shared
+        # by all rate laws
         local_symbols = {p: sympy.Symbol(p) for p in data.get("parameters", [])}
         for template_dict in data.get("templates", []):
+            # Templates that are already deserialized have their own symbols
+            if isinstance(template_dict, Template):
+                continue
             # We need to figure out the template class based on the type
             # entry in the data
             template_cls = getattr(sys.modules[__name__], template_dict["type"])
@@ -775,13 +789,13 @@ class TemplateModel:
                     if not isinstance(concept_data, list):
                         concept_data = [concept_data]
                     for concept_dict in concept_data:
-                        if concept_dict.get("name"):
-                            local_symbols[
-                                concept_dict.get("name")
-                            ] = sympy.Symbol(concept_dict.get("name"))
+                        name = concept_dict.get("name")
+                        if name and name not in local_symbols:
+                            local_symbols[name] = sympy.Symbol(name)
         # We can now use these symbols to deserialize rate laws
         templates = [
-            Template.from_json(template, rate_symbols=local_symbols)
+            Template.from_json(template, rate_symbols=local_symbols,
+                               lazy=lazy)
             for template in data["templates"]
         ]
 
@@ -799,6 +813,7 @@ class TemplateModel:
         }
 
         initials = {}
+        parameter_symbols = None
         for name, value in data.get("initials", {}).items():
             if isinstance(value, float):
                 # If the data is just a float, upgrade it to
@@ -810,11 +825,13 @@ class TemplateModel:
             else:
                 # If the data is not a float, assume it's JSON
                 # for a :class:`Initial` instance and parse it to Initial
-                local_symbols = {
-                    p.name: sympy.Symbol(p.name) for p in parameters.values()
-                }
+                if parameter_symbols is None:
+                    parameter_symbols = {
+                        p.name: sympy.Symbol(p.name)
+                        for p in parameters.values()
+                    }
                 initials[name] = Initial.from_json(
-                    value, locals_dict=local_symbols
+                    value, locals_dict=parameter_symbols
                 )
 
         return cls(
@@ -1047,6 +1064,33 @@ class TemplateModel:
             return names[0]
         return None
 
+    def intern_concepts(self, store: Optional[ConceptStore] = None) \
+            -> ConceptStore:
+        """Make equal concepts in this model share a single instance.
+
+        The concepts of templates and initials are replaced, in place, by
+        the interned instances of a :class:`ConceptStore`, which can't be
+        modified.
+
+        Parameters
+        ----------
+        store :
+            The store in which concepts are interned. If not given, a new
+            store is created.
+
+        Returns
+        -------
+        :
+            The store in which the concepts of this model are interned.
+        """
+        if store is None:
+            store = ConceptStore()
+        for template in self.templates:
+            store.intern_template(template)
+        for initial in self.initials.values():
+            initial.concept = store.intern(initial.concept)
+        return store
+
     def reset_base_names(self):
         """Reset the base names of all concepts in this model
         to the current name."""
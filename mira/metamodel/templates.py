@@ -3,10 +3,10 @@ Data models for metamodel templates.
 
 Regenerate the JSON schema by running ``python -m mira.metamodel.schema``.
 """
-import copy
 
 __all__ = [
     "Concept",
+    "ConceptStore",
     "Template",
     "Provenance",
     "ControlledConversion",
@@ -42,7 +42,7 @@ __all__ = [
 import logging
 import sys
 from collections import ChainMap
-from copy import deepcopy
+from copy import copy, deepcopy
 from itertools import product
 from typing import (
     Callable,
@@ -59,7 +59,7 @@ import networkx as nx
 import sympy
 
 from .units import Unit, UNIT_SYMBOLS
-from .utils import safe_parse_expr
+from .utils import _get_parse_locals, get_parseable_expression, safe_parse_expr
 
 
 IS_EQUAL = "is_equal"
@@ -125,8 +125,14 @@ class Concept:
         A mapping of context keys to values.
     units : Optional[Unit]
         The units of the concept.
+
+    Concepts interned in a :class:`ConceptStore` are shared and can't be
+    modified, copies of them can.
     """
 
+    __slots__ = ("name", "display_name", "description", "identifiers",
+                 "context", "units", "_base_name")
+
     def __init__(self, name, display_name=None,
                  description=None, identifiers=None,
                  context=None, units=None):
@@ -198,10 +204,10 @@ class Concept:
         :
             A new concept containing the given context.
         """
+        base_name = self._base_name if self._base_name is not None \
+            else self.name
         if do_rename:
-            if self._base_name is None:
-                self._base_name = self.name
-            name_list = [self._base_name]
+            name_list = [base_name]
             for _, context_value in sorted(context.items()):
                 entity_name = curie_to_name_map.get(
                     context_value, context_value
@@ -212,6 +218,8 @@ class Concept:
             name = self.name
         full_context = dict(ChainMap(context, self.context))
         if inplace:
+            if do_rename:
+                self._base_name = base_name
             self.name = name
             self.context = full_context
             concept = self
@@ -223,7 +231,7 @@ class Concept:
                 context=full_context,
                 units=self.units,
             )
-            concept._base_name = self._base_name
+            concept._base_name = base_name if do_rename else self._base_name
         return concept
 
     def get_curie(self, config: Optional[Config] = None) -> Tuple[str, str]:
@@ -330,6 +338,9 @@ class Concept:
         """
         if not isinstance(other, Concept):
             return False
+        # Interned concepts are equal if they are the same instance
+        if other is self:
+            return True
 
         # With context
         if with_context:
@@ -414,15 +425,209 @@ class Concept:
         :
             The Concept object.
         """
-        # Handle Units
         if isinstance(data, Concept):
             return data
-        elif data.get('units'):
-            # Copy so we don't update the input
-            data = copy.deepcopy(data)
-            data['units'] = Unit.from_json(data['units'])
+        return cls(**_get_concept_kwargs(data))
+
+
+class _InternedConcept(Concept):
+    """A concept interned in a :class:`ConceptStore`, which can't be modified.
+
+    Interned concepts are turned into instances of this class, so that
+    other concepts don't pay for the check when their attributes are set.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        # The base name is only bookkeeping for renaming concepts when they
+        # are stratified, see TemplateModel.reset_base_names
+        if name != "_base_name":
+            raise AttributeError(
+                f"Can't set {name} of concept {self.name!r}, which is "
+                f"interned and may be shared by several templates. Modify a "
+                f"copy instead, e.g., from Template.get_concepts_flat with "
+                f"refresh=True."
+            )
+        object.__setattr__(self, name, value)
+
+    def __reduce_ex__(self, protocol):
+        # Copies of interned concepts, including unpickled ones, are plain
+        # concepts that can be modified
+        state = super().__reduce_ex__(protocol)[2]
+        return Concept.__new__, (Concept,), state
+
 
-        return cls(**data)
+def _get_concept_kwargs(data) -> Dict:
+    """Return constructor arguments for a Concept from its JSON.
+
+    Mutable values are copied so that the Concept doesn't share state with
+    the input, which is left unchanged.
+    """
+    kwargs = dict(data)
+    for key in ('identifiers', 'context'):
+        if kwargs.get(key):
+            kwargs[key] = dict(kwargs[key])
+    if kwargs.get('units'):
+        kwargs['units'] = Unit.from_json(kwargs['units'])
+    return kwargs
+
+
+class ConceptStore:
+    """A store of interned concepts.
+
+    Concepts are interned by their name, display name, description,
+    identifiers, context, units and base name, so that concepts that are
+    equal in all of these are represented by a single shared instance. This
+    makes models in which many templates refer to the same concept, e.g.,
+    stratified models, much smaller, and lets equal concepts be compared by
+    identity.
+
+    Interned concepts are shared, so setting their attributes raises an
+    AttributeError. Copies of them, e.g., from
+    :meth:`Template.get_concepts_flat` with ``refresh=True`` or from a deep
+    copy of a model, aren't interned and can be modified. The identifiers,
+    context and units of interned concepts can't be protected this way and
+    must not be modified in place either.
+    """
+
+    def __init__(self):
+        self._concepts: Dict[Tuple, Concept] = {}
+        self._with_context_cache: Dict[Tuple, Concept] = {}
+
+    def __len__(self) -> int:
+        return len(self._concepts)
+
+    @staticmethod
+    def get_key(concept: Concept) -> Optional[Tuple]:
+        """Return the key by which a concept is interned.
+
+        Parameters
+        ----------
+        concept :
+            A concept.
+
+        Returns
+        -------
+        :
+            A hashable tuple, or None if the concept has unhashable
+            identifiers or context and can't be interned.
+        """
+        key = (
+            concept.name,
+            concept.display_name,
+            concept.description,
+            tuple(sorted(concept.identifiers.items())),
+            tuple(sorted(concept.context.items())),
+            concept.units.expression if concept.units is not None else None,
+            # A concept without a base name is renamed based on its name
+            concept._base_name if concept._base_name is not None
+            else concept.name,
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def intern(self, concept: Concept) -> Concept:
+        """Return the interned instance of a concept.
+
+        Parameters
+        ----------
+        concept :
+            A concept.
+
+        Returns
+        -------
+        :
+            The interned concept equal to the given one. If there is none
+            yet, the given concept is interned, which makes it read-only, and
+            returned.
+        """
+        key = self.get_key(concept)
+        if key is None:
+            return concept
+        interned = self._concepts.setdefault(key, concept)
+        # Only plain concepts are made read-only, not, e.g., parameters
+        if type(interned) is Concept:
+            interned.__class__ = _InternedConcept
+        return interned
+
+    def with_context(self, concept: Concept, do_rename=False,
+                     curie_to_name_map=None, **context) -> Concept:
+        """Return the interned concept with extra context.
+
+        This is equivalent to interning a copy of the concept to which the
+        context was added with :meth:`Concept.with_context` in place, but a
+        new concept is only created the first time a given concept is
+        combined with a given context.
+
+        Parameters
+        ----------
+        concept :
+            A concept.
+        do_rename :
+            If true, will modify the name of the concept based on the context
+            introduced.
+        curie_to_name_map :
+            A mapping of context values to the names used when renaming.
+        **context :
+            The context to add to the concept.
+
+        Returns
+        -------
+        :
+            An interned concept containing the given context.
+        """
+        concept = self.intern(concept)
+        key = (
+            id(concept),
+            do_rename,
+            tuple(sorted(curie_to_name_map.items()))
+            if do_rename and curie_to_name_map else None,
+            tuple(sorted(context.items())),
+        )
+        try:
+            return self._with_context_cache[key]
+        except KeyError:
+            cacheable = True
+        except TypeError:
+            cacheable = False
+        new_concept = copy(concept)
+        # The units are mutable, so each concept gets its own
+        new_concept.units = copy(concept.units)
+        new_concept.identifiers = dict(concept.identifiers)
+        new_concept.with_context(do_rename=do_rename,
+                                 curie_to_name_map=curie_to_name_map,
+                                 inplace=True, **context)
+        new_concept = self.intern(new_concept)
+        # Only interned concepts are kept by the store, so that their ids
+        # can't be reused by other concepts
+        if cacheable and self.get_key(concept) is not None:
+            self._with_context_cache[key] = new_concept
+        return new_concept
+
+    def intern_template(self, template: "Template") -> "Template":
+        """Replace the concepts of a template with interned ones, in place.
+
+        Parameters
+        ----------
+        template :
+            A template.
+
+        Returns
+        -------
+        :
+            The given template.
+        """
+        for role in template.concept_keys:
+            value = getattr(template, role)
+            if isinstance(value, list):
+                setattr(template, role, [self.intern(c) for c in value])
+            else:
+                setattr(template, role, self.intern(value))
+        return template
 
 
 class Template:
@@ -438,12 +643,35 @@ class Template:
         The display name of the template.
     """
 
+    # Subclasses add slots for their concepts and set the provenance
+    __slots__ = ("_rate_law", "_unparsed_rate_law", "name", "display_name",
+                 "provenance")
+
+    _rate_law: Optional[sympy.Expr]
+    # The rate law string and the symbols it uses, if it isn't parsed yet
+    _unparsed_rate_law: Optional[Tuple[str, Dict[str, sympy.Symbol]]]
+
     def __init__(self, rate_law=None, name=None,
                  display_name=None, **kwargs):
         self.rate_law = rate_law
         self.name = name
         self.display_name = display_name
 
+    @property
+    def rate_law(self) -> Optional[sympy.Expr]:
+        """The rate law of the template, parsed on first access if the
+        template was loaded lazily."""
+        if self._unparsed_rate_law is not None:
+            rate_str, rate_symbols = self._unparsed_rate_law
+            self._rate_law = safe_parse_expr(rate_str, local_dict=rate_symbols)
+            self._unparsed_rate_law = None
+        return self._rate_law
+
+    @rate_law.setter
+    def rate_law(self, rate_law):
+        self._rate_law = rate_law
+        self._unparsed_rate_law = None
+
     def __repr__(self):
         parts = []
         for key in self.concept_keys:
@@ -459,9 +687,12 @@ class Template:
         return self.__repr__()
 
     @classmethod
-    def from_json(cls, data, rate_symbols=None) -> "Template":
+    def from_json(cls, data, rate_symbols=None, lazy=False) -> "Template":
         """Create a Template from a JSON object
 
+        The input is not modified and no part of it is shared with the
+        returned Template.
+
         Parameters
         ----------
         data :
@@ -469,45 +700,58 @@ class Template:
         rate_symbols :
             A mapping of symbols to use for the rate law. If not provided,
             the rate law will be parsed without any symbols.
+        lazy :
+            If True, the rate law is kept as a string and only parsed when
+            it is first accessed. This avoids parsing for uses that only
+            inspect the structure of the template, but errors in the rate
+            law are only raised on access. Default: False.
 
         Returns
         -------
         :
             A Template object
         """
-        # Make a copy to make sure we don't update the input
-        data = copy.deepcopy(data)
-        # We make sure to use data such that it's not modified in place,
-        # e.g., we don't use pop or overwrite items, otherwise this function
-        # would have unintended side effects.
-
+        if isinstance(data, Template):
+            return data
         # First, we need to figure out the template class based on the type
         # entry in the data
         stmt_cls = getattr(sys.modules[__name__], data['type'])
 
+        kwargs = {}
+        for key, value in data.items():
+            if key in {'rate_law', 'type'}:
+                continue
+            if key in stmt_cls.concept_keys:
+                # Handle lists of concepts for e.g. controllers in
+                # GroupedControlledConversion
+                if isinstance(value, list):
+                    value = [Concept.from_json(c) for c in value]
+                else:
+                    value = Concept.from_json(value)
+            elif isinstance(value, (list, dict)):
+                # E.g., provenance entries, which are themselves dicts
+                value = deepcopy(value)
+            kwargs[key] = value
+        template = stmt_cls(**kwargs)
+
         # In order to correctly parse the rate, if any, we need to have access
         # to symbols representing parameters, these are passed in from
         # outside, typically the template model level.
         rate_str = data.get('rate_law')
         if rate_str:
-            rate = safe_parse_expr(rate_str, local_dict=rate_symbols)
-        else:
-            rate = None
-
-        # Handle concepts
-        for concept_key in stmt_cls.concept_keys:
-            if concept_key in data:
-                concept_data = data[concept_key]
-                # Handle lists of concepts for e.g. controllers in
-                # GroupedControlledConversion
-                if isinstance(concept_data, list):
-                    data[concept_key] = [Concept.from_json(c) for c in concept_data]
-                else:
-                    data[concept_key] = Concept.from_json(data[concept_key])
-
-        return stmt_cls(**{k: v for k, v in data.items()
-                           if k not in {'rate_law', 'type'}},
-                        rate_law=rate)
+            if lazy:
+                # Only the symbols that the rate law refers to are kept so
+                # that the template doesn't reference, e.g., all symbols of
+                # a model, which would be copied along with it
+                template._unparsed_rate_law = (
+                    rate_str,
+                    _get_parse_locals(get_parseable_expression(rate_str),
+                                      rate_symbols),
+                )
+            else:
+                template.rate_law = safe_parse_expr(rate_str,
+                                                    local_dict=rate_symbols)
+        return template
 
     def to_json(self):
         """Return a JSON-compatible dict."""
@@ -991,6 +1235,7 @@ class ControlledConversion(Template):
 
     type = "ControlledConversion"
     concept_keys = ["controller", "subject", "outcome"]
+    __slots__ = ("controller", "subject", "outcome")
 
     def __init__(self, controller, subject, outcome,
                  provenance=None, **kwargs):
@@ -1096,6 +1341,7 @@ class GroupedControlledConversion(Template):
 
     type = "GroupedControlledConversion"
     concept_keys = ["controllers", "subject", "outcome"]
+    __slots__ = ("controllers", "subject", "outcome")
 
     def __init__(self, controllers, subject, outcome,
                  provenance=None, **kwargs):
@@ -1201,6 +1447,7 @@ class GroupedControlledProduction(Template):
 
     type = "GroupedControlledProduction"
     concept_keys = ["controllers", "outcome"]
+    __slots__ = ("controllers", "outcome")
 
     def __init__(self, controllers, outcome,
                  provenance=None, **kwargs):
@@ -1302,6 +1549,7 @@ class ControlledProduction(Template):
 
     type = "ControlledProduction"
     concept_keys = ["controller", "outcome"]
+    __slots__ = ("controller", "outcome")
 
     def __init__(self, controller, outcome,
                  provenance=None, **kwargs):
@@ -1397,6 +1645,7 @@ class NaturalConversion(Template):
 
     type = "NaturalConversion"
     concept_keys = ["subject", "outcome"]
+    __slots__ = ("subject", "outcome")
 
     def __init__(self, subject, outcome,
                  provenance=None, **kwargs):
@@ -1450,6 +1699,7 @@ class MultiConversion(Template):
 
     type = "MultiConversion"
     concept_keys = ["subjects", "outcomes"]
+    __slots__ = ("subjects", "outcomes")
 
     def __init__(self, subjects, outcomes,
                  provenance=None, **kwargs):
@@ -1512,6 +1762,7 @@ class ReversibleFlux(Template):
 
     type = "ReversibleFlux"
     concept_keys = ["left", "right"]
+    __slots__ = ("left", "right")
 
     def __init__(self, left, right,
                  provenance=None, **kwargs):
@@ -1572,6 +1823,7 @@ class NaturalProduction(Template):
 
     type = "NaturalProduction"
     concept_keys = ["outcome"]
+    __slots__ = ("outcome",)
 
     def __init__(self, outcome, provenance=None, **kwargs):
         super().__init__(**kwargs)
@@ -1619,6 +1871,7 @@ class NaturalDegradation(Template):
 
     type = "NaturalDegradation"
     concept_keys = ["subject"]
+    __slots__ = ("subject",)
 
     def __init__(self, subject, provenance=None, **kwargs):
         super().__init__(**kwargs)
@@ -1666,6 +1919,7 @@ class ControlledDegradation(Template):
 
     type = "ControlledDegradation"
     concept_keys = ["controller", "subject"]
+    __slots__ = ("controller", "subject")
 
     def __init__(self, controller, subject,
                  provenance=None, **kwargs):
@@ -1760,6 +2014,7 @@ class GroupedControlledDegradation(Template):
 
     type = "GroupedControlledDegradation"
     concept_keys = ["controllers", "subject"]
+    __slots__ = ("controllers", "subject")
 
     def __init__(self, controllers, subject,
                  provenance=None, **kwargs):
@@ -1857,6 +2112,7 @@ class NaturalReplication(Template):
 
     type = "NaturalReplication"
     concept_keys = ["subject"]
+    __slots__ = ("subject",)
 
     def __init__(self, subject, provenance=None, **kwargs):
         super().__init__(**kwargs)
@@ -1904,6 +2160,7 @@ class ControlledReplication(Template):
 
     type = "ControlledReplication"
     concept_keys = ["controller", "subject"]
+    __slots__ = ("controller", "subject")
 
     def __init__(self, controller, subject,
                  provenance=None, **kwargs):
@@ -1977,6 +2234,7 @@ class StaticConcept(Template):
 
     type = "StaticConcept"
     concept_keys = ["subject"]
+    __slots__ = ("subject",)
 
     def __init__(self, subject, provenance=None, **kwargs):
         super().__init__(**kwargs)
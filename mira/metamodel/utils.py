@@ -1,9 +1,12 @@
 __all__ = ['get_parseable_expression', 'revert_parseable_expression',
            'safe_parse_expr', 'sanity_check_tm']
 
+import builtins
 import sympy
-import re
+import keyword
 import os
+import re
+import threading
 import unicodedata
 from typing import Any, Optional
 from functools import lru_cache
@@ -42,14 +45,115 @@ def revert_parseable_expression(s: str) -> str:
 
 
 def safe_parse_expr(s: str, local_dict=None) -> sympy.Expr:
-    """Parse an expression that may contain lambda functions."""
-    return sympy.parse_expr(get_parseable_expression(s),
-                            local_dict={get_parseable_expression(k): v
-                                        for k, v in local_dict.items()}
-                                        if local_dict else None,
+    """Parse an expression that may contain lambda functions.
+
+    Parsed expressions are cached by the expression string and the local
+    symbols it refers to, so the returned (immutable) expression may be
+    shared with other callers.
+    """
+    parseable = get_parseable_expression(s)
+    parse_locals = _get_parse_locals(parseable, local_dict)
+    try:
+        key = tuple(sorted(parse_locals.items()))
+        hash(key)
+    except TypeError:
+        # Local values that can't be used as a cache key
+        return _parse_expr(parseable, parse_locals)
+    return _parse_expr_cached(parseable, key)
+
+
+# Identifiers, including ones containing unicode characters
+re_names = re.compile(r'[^\W\d]\w*')
+# A product/quotient of names, e.g., a mass action rate law
+re_mass_action = re.compile(r'^\s*[^\W\d]\w*(\s*[*/]\s*[^\W\d]\w*)*\s*$')
+re_mass_action_split = re.compile(r'\s*([*/])\s*')
+
+
+@lru_cache(maxsize=100000)
+def _get_names(parseable: str):
+    return tuple(set(re_names.findall(parseable)))
+
+
+def _get_parse_locals(parseable: str, local_dict) -> dict:
+    """Return the entries of the local dict used by a parseable expression.
+
+    Keys of the local dict are looked up by the names in the expression
+    instead of transforming every key, which makes parsing with a large
+    local dict, e.g., all symbols of a model, cheap.
+    """
+    if not local_dict:
+        return {}
+    parse_locals = {}
+    unresolved = False
+    for name in _get_names(parseable):
+        if name in local_dict:
+            parse_locals[name] = local_dict[name]
+            continue
+        original = revert_parseable_expression(name)
+        if original in local_dict:
+            parse_locals[name] = local_dict[original]
+        elif name not in _get_global_names():
+            unresolved = True
+    if unresolved:
+        # Keys whose unicode normalization changes them can only be found
+        # by transforming all keys
+        for k, v in local_dict.items():
+            name = get_parseable_expression(k)
+            if name not in parse_locals and name in _get_names(parseable):
+                parse_locals[name] = v
+    return parse_locals
+
+
+@lru_cache(maxsize=1)
+def _get_global_names():
+    """Return the names that sympy's parser resolves without a local dict."""
+    global_dict = {}
+    exec('from sympy import *', global_dict)
+    # This is a superset of the builtins that the parser uses
+    return frozenset(global_dict) | frozenset(vars(builtins))
+
+
+@lru_cache(maxsize=100000)
+def _parse_expr_cached(parseable: str, locals_key) -> sympy.Expr:
+    return _parse_expr(parseable, dict(locals_key))
+
+
+def _parse_expr(parseable: str, parse_locals: dict) -> sympy.Expr:
+    if re_mass_action.match(parseable):
+        expr = _parse_mass_action(parseable, parse_locals)
+        if expr is not None:
+            return expr
+    return sympy.parse_expr(parseable, local_dict=parse_locals or None,
                             evaluate=False)
 
 
+def _parse_mass_action(parseable: str, parse_locals: dict) \
+        -> Optional[sympy.Expr]:
+    """Build a product/quotient of names without sympy's tokenizer.
+
+    The result is identical to what sympy.parse_expr returns with
+    evaluate=False. Returns None if any name isn't a local symbol or
+    would be resolved by the parser in a special way.
+    """
+    tokens = re_mass_action_split.split(parseable.strip())
+    factors = []
+    for idx in range(0, len(tokens), 2):
+        name = tokens[idx]
+        value = parse_locals.get(name)
+        if value is None:
+            if name in _get_global_names() or keyword.iskeyword(name):
+                return None
+            value = sympy.Symbol(name)
+        elif not isinstance(value, sympy.Symbol):
+            return None
+        if idx > 0 and tokens[idx - 1] == '/':
+            value = sympy.Pow(value, -1, evaluate=False)
+        factors.append(value)
+    if len(factors) == 1:
+        return factors[0]
+    return sympy.Mul(*factors, evaluate=False)
+
+
 def sanity_check_tm(tm):
     """Apply a short sanity check to a template model."""
     assert tm.templates
@@ -68,24 +172,45 @@ def sanity_check_tm(tm):
 
 def is_ontological_child(child_curie: str, parent_curie: str,
                          api_url: Optional[str] = None):
-    if api_url:
-        base_url = api_url
-    elif os.environ.get("MIRA_REST_URL"):
-        base_url = os.environ.get("MIRA_REST_URL")
-    else:
+    """Check if one CURIE is an ontological child of another via the REST API.
+
+    This only depends on requests so that it can be used without the
+    dependencies of the DKG. Requests reuse a pooled session and results
+    are kept in memory, see :mod:`mira.dkg.web_client` for a client with
+    an on-disk cache.
+    """
+    base_url = api_url or os.environ.get("MIRA_REST_URL")
+    if not base_url:
         try:
             import pystow
             base_url = pystow.get_config("mira", "rest_url")
         except ImportError:
-            raise ValueError("api_url must be provided or MIRA_REST_URL must be set.")
+            pass
+    if not base_url:
+        raise ValueError("api_url must be provided or MIRA_REST_URL must be set.")
     base_url = base_url.rstrip("/") + "/api" \
         if not base_url.endswith("/api") else base_url
-    endpoint_url = base_url + '/is_ontological_child'
+    return _is_ontological_child_request(child_curie, parent_curie, base_url)
+
 
-    res = requests.post(endpoint_url, json={"child_curie": child_curie,
-                                            "parent_curie": parent_curie},
-                        timeout=30)
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
 
+
+def _get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+        return _session
+
+
+@lru_cache(maxsize=10000)
+def _is_ontological_child_request(child_curie: str, parent_curie: str,
+                                  base_url: str) -> bool:
+    res = _get_session().post(base_url + '/is_ontological_child',
+                              json={"child_curie": child_curie,
+                                    "parent_curie": parent_curie},
+                              timeout=30)
     res.raise_for_status()
-    res_json = res.json()
-    return res_json['is_child']
+    return res.json()['is_child']
@@ -1,5 +1,19 @@
 """This module contains functions for editing ASKEM Model Representation
 models
+
+Each function converts the AMR to a template model, applies one edit and
+converts the result back to AMR. To apply several edits, use
+:func:`apply_ops` or an :class:`AmrEditSession` instead, which convert the
+model only once, e.g.,
+
+.. code-block:: python
+
+    from mira.modeling.amr.ops import apply_ops
+
+    amr = apply_ops(amr, [
+        {"op": "replace_state_id", "old_id": "S", "new_id": "Susceptible"},
+        {"op": "add_parameter", "parameter_id": "delta", "value": 0.01},
+    ])
 """
 # NOTE: the docstrings of the wrapped functions reflect the expected
 # input/output of the functions with the wrapper applied, i.e. the argument
@@ -20,7 +34,7 @@ from mira.metamodel.template_model import Parameter, Distribution, Observable, \
     Initial, Concept, TemplateModel
 from mira.metamodel.templates import NaturalConversion, NaturalProduction, \
     NaturalDegradation, StaticConcept
-from typing import Mapping
+from typing import Any, Callable, Dict, Iterable, Mapping
 
 
 def amr_to_mira(func):
@@ -702,3 +716,172 @@ aggregate_parameters.__doc__ = _fix_docstring(
 counts_to_dimensionless.__doc__ = _fix_docstring(
     tmops.counts_to_dimensionless.__doc__.replace("tm", "model")
 )
+
+
+def _replace_rate_law_mathml(model, transition_id: str, new_rate_law: str):
+    return replace_rate_law_sympy.__wrapped__(
+        model, transition_id, mathml_to_expression(new_rate_law))
+
+
+def _replace_observable_expression_mathml(model, obs_id: str,
+                                          new_expression_mathml: str):
+    return replace_observable_expression_sympy.__wrapped__(
+        model, obs_id, mathml_to_expression(new_expression_mathml))
+
+
+def _replace_initial_expression_mathml(model, initial_id: str,
+                                       new_expression_mathml: str):
+    return replace_initial_expression_sympy.__wrapped__(
+        model, initial_id, mathml_to_expression(new_expression_mathml))
+
+
+#: The edits that can be applied in an :class:`AmrEditSession` by name,
+#: mapped to the functions that apply them to a template model
+AMR_OPS: Dict[str, Callable[..., TemplateModel]] = {
+    func.__name__: func.__wrapped__
+    for func in [
+        replace_state_id,
+        replace_transition_id,
+        replace_observable_id,
+        remove_observable,
+        remove_parameter,
+        add_observable,
+        replace_parameter_id,
+        add_parameter,
+        replace_initial_id,
+        remove_state,
+        add_state,
+        remove_transition,
+        add_transition,
+        replace_rate_law_sympy,
+        replace_observable_expression_sympy,
+        replace_initial_expression_sympy,
+        stratify,
+        simplify_rate_laws,
+        aggregate_parameters,
+        counts_to_dimensionless,
+    ]
+}
+AMR_OPS["replace_rate_law_mathml"] = _replace_rate_law_mathml
+AMR_OPS["replace_observable_expression_mathml"] = \
+    _replace_observable_expression_mathml
+AMR_OPS["replace_initial_expression_mathml"] = \
+    _replace_initial_expression_mathml
+
+
+class AmrEditSession:
+    """A session for applying a sequence of edits to an AMR model.
+
+    The AMR is converted to a template model once when the session is
+    created, edits are applied to the template model in memory, and the
+    AMR is only rebuilt when requested with :meth:`to_amr`.
+
+    Parameters
+    ----------
+    amr : JSON
+        The model as an AMR JSON. It is not modified.
+
+    Attributes
+    ----------
+    template_model : TemplateModel
+        The template model with the edits applied so far.
+    """
+
+    def __init__(self, amr):
+        self.template_model = template_model_from_amr_json(amr)
+
+    def apply(self, op: str, *args, **kwargs) -> "AmrEditSession":
+        """Apply an edit to the model.
+
+        Parameters
+        ----------
+        op :
+            The name of the edit, which is the name of the corresponding
+            function in this module, e.g., "replace_state_id".
+        args :
+            Positional arguments of the edit, following the model.
+        kwargs :
+            Keyword arguments of the edit.
+
+        Returns
+        -------
+        :
+            This session, so that edits can be chained.
+        """
+        self.template_model = _get_op(op)(self.template_model, *args, **kwargs)
+        return self
+
+    def apply_ops(self, ops: Iterable[Mapping[str, Any]]) -> "AmrEditSession":
+        """Apply a list of edits to the model as a single transaction.
+
+        If any of the edits fails, none of them is applied.
+
+        Parameters
+        ----------
+        ops :
+            A list of edits, each given as a dict with the name of the edit
+            under the "op" key and its keyword arguments under the other
+            keys, e.g., ``{"op": "remove_state", "state_id": "R"}``.
+
+        Returns
+        -------
+        :
+            This session, so that edits can be chained.
+        """
+        self.template_model = _apply_ops(copy.deepcopy(self.template_model),
+                                         ops)
+        return self
+
+    def to_amr(self):
+        """Return the edited model as an AMR JSON.
+
+        Returns
+        -------
+        : JSON
+            The edited model as an AMR JSON.
+        """
+        return template_model_to_petrinet_json(self.template_model)
+
+
+def apply_ops(amr, ops: Iterable[Mapping[str, Any]]):
+    """Apply a list of edits to an AMR model.
+
+    The model is converted to a template model once, all edits are applied,
+    and the result is converted back to AMR once.
+
+    Parameters
+    ----------
+    amr : JSON
+        The model as an AMR JSON. It is not modified.
+    ops :
+        A list of edits, see :meth:`AmrEditSession.apply_ops`.
+
+    Returns
+    -------
+    : JSON
+        The updated model as an AMR JSON
+    """
+    tm = template_model_from_amr_json(amr)
+    return template_model_to_petrinet_json(_apply_ops(tm, ops))
+
+
+def _get_op(op: str) -> Callable[..., TemplateModel]:
+    try:
+        return AMR_OPS[op]
+    except KeyError:
+        raise ValueError(f"Unknown edit operation: {op}") from None
+
+
+def _apply_ops(tm: TemplateModel, ops: Iterable[Mapping[str, Any]]) \
+        -> TemplateModel:
+    for idx, op in enumerate(ops):
+        kwargs = dict(op)
+        if "op" not in kwargs:
+            raise ValueError(f"Edit {idx} is missing the 'op' key.")
+        name = kwargs.pop("op")
+        func = _get_op(name)
+        try:
+            tm = func(tm, **kwargs)
+        except Exception as exc:
+            raise ValueError(f"Edit {idx} ({name}) failed: {exc}") from exc
+    return tm
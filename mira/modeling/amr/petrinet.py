@@ -4,13 +4,13 @@ at https://github.com/DARPA-ASKEM/Model-Representations/tree/main/petrinet.
 
 __all__ = ["AMRPetriNetModel", "template_model_to_petrinet_json"]
 
-import json
 import logging
 from copy import deepcopy
 from typing import Dict, List, Optional
 
 import sympy
 from mira.metamodel import expression_to_mathml, TemplateModel
+from mira.metamodel.io import dump_json_file, dumps_json
 from mira.sources.amr import sanity_check_amr
 
 from .. import Model
@@ -270,14 +270,15 @@ class AMRPetriNetModel:
         Parameters
         ----------
         kwargs :
-            Additional keyword arguments to pass to :func:`json.dumps`.
+            Additional keyword arguments to pass to
+            :func:`mira.metamodel.io.dumps_json`.
 
         Returns
         -------
         :
             A JSON string representation of the Petri net model.
         """
-        return json.dumps(self.to_json(), **kwargs)
+        return dumps_json(self.to_json(), **kwargs)
 
     def to_json_file(self, fname, name=None, description=None,
                      model_version=None, **kwargs):
@@ -294,13 +295,13 @@ class AMRPetriNetModel:
         model_version : str, optional
             The version of the model.
         kwargs :
-            Additional keyword arguments to pass to :func:`json.dump`.
+            Additional keyword arguments to pass to
+            :func:`mira.metamodel.io.dump_json_file`.
         """
         indent = kwargs.pop('indent', 1)
         js = self.to_json(name=name, description=description,
                           model_version=model_version)
-        with open(fname, 'w') as fh:
-            json.dump(js, fh, indent=indent, **kwargs)
+        dump_json_file(js, fname, indent=indent, **kwargs)
 
 
 def template_model_to_petrinet_json(tm: TemplateModel):
@@ -4,13 +4,13 @@ at https://github.com/DARPA-ASKEM/Model-Representations/tree/main/regnet.
 
 __all__ = ["AMRRegNetModel", "template_model_to_regnet_json"]
 
-import json
 import logging
 from copy import deepcopy
 from collections import defaultdict
 from typing import Dict, List, Optional, Union
 
 from mira.metamodel import *
+from mira.metamodel.io import dump_json_file, dumps_json
 
 from .. import Model, is_production, is_conversion
 from .utils import add_metadata_annotations
@@ -343,14 +343,15 @@ class AMRRegNetModel:
         Parameters
         ----------
         **kwargs :
-            Keyword arguments to be passed to json.dumps
+            Keyword arguments to be passed to
+            :func:`mira.metamodel.io.dumps_json`
 
         Returns
         -------
         :
             A JSON string representation of the Petri net model.
         """
-        return json.dumps(self.to_json(), **kwargs)
+        return dumps_json(self.to_json(), **kwargs)
 
     def to_json_file(
         self,
@@ -377,12 +378,12 @@ class AMRRegNetModel:
         model_version :
             The version of the model. Defaults to 0.1
         **kwargs :
-            Keyword arguments to be passed to json.dump
+            Keyword arguments to be passed to
+            :func:`mira.metamodel.io.dump_json_file`
         """
         js = self.to_json(name=name, description=description,
                           model_version=model_version)
-        with open(fname, 'w') as fh:
-            json.dump(js, fh, **kwargs)
+        dump_json_file(js, fname, **kwargs)
 
 
 def template_model_to_regnet_json(tm: TemplateModel):
@@ -0,0 +1,473 @@
+"""Steady states and parameter sensitivities of ODE models.
+
+The functions in this module work on the symbolic kinetics of an
+:class:`mira.modeling.ode.OdeModel` or an
+:class:`mira.modeling.ode.IncrementalOdeModel` instead of running many
+simulations with perturbed parameters:
+
+- :func:`find_steady_state` finds an equilibrium with Newton's method using
+  the symbolic Jacobian of the kinetics, constrained by the conservation
+  laws of the model, e.g., a constant total population.
+- :func:`simulate_sensitivities` integrates the forward sensitivity
+  equations, generated from the derivatives of the rate laws with respect
+  to the variables and parameters, together with the model in a single
+  solve.
+- :func:`finite_difference_sensitivities` is a fallback for rate laws that
+  can't be differentiated symbolically, which integrates the model for all
+  perturbed parameter values as one batched system.
+
+Note that :meth:`mira.modeling.ode.OdeModel.simulate_model` substitutes
+the values of the parameters into the kinetics, so the sensitivities of an
+``OdeModel`` have to be calculated before it is simulated.
+"""
+
+__all__ = [
+    "find_steady_state",
+    "get_conservation_laws",
+    "simulate_sensitivities",
+    "finite_difference_sensitivities",
+]
+
+from typing import List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy
+import scipy.integrate
+import scipy.linalg
+import sympy
+
+from .ode import IncrementalOdeModel, OdeModel
+
+CompiledOdeModel = Union[OdeModel, IncrementalOdeModel]
+
+
+class _OdeSystem:
+    """The kinetics of an ODE model as expressions of symbols standing for
+    its variables, parameters and time.
+
+    Parameters
+    ----------
+    ode_model :
+        The ODE model.
+    """
+
+    kinetics: sympy.Matrix
+    _variable_symbols: List[sympy.Expr]
+    _parameter_symbols: List[sympy.Expr]
+    _time_symbol: Optional[sympy.Symbol]
+
+    def __init__(self, ode_model: CompiledOdeModel):
+        if isinstance(ode_model, IncrementalOdeModel):
+            self._init_incremental(ode_model)
+        else:
+            self._init_ode(ode_model)
+        self.ys = [sympy.Dummy(f"y{idx}")
+                   for idx in range(len(self.variable_names))]
+        self.ps = [sympy.Dummy(f"p{idx}")
+                   for idx in range(len(self.parameter_names))]
+        self.t = sympy.Dummy("t")
+        # Variables take precedence over parameters with the same name
+        replacements = dict(zip(self._parameter_symbols, self.ps))
+        replacements.update(zip(self._variable_symbols, self.ys))
+        if self._time_symbol is not None:
+            replacements[self._time_symbol] = self.t
+        self.kinetics = self.kinetics.xreplace(replacements)
+
+    def _init_ode(self, ode_model: OdeModel):
+        num_vars = len(ode_model.vmap)
+        self.variable_names = [ode_model.vname_map[idx]
+                               for idx in range(num_vars)]
+        self.parameter_names = list(ode_model.pmap)
+        self.kinetics = sympy.Matrix(ode_model.kinetics)
+        self._variable_symbols = [ode_model.y[idx, 0]
+                                  for idx in range(num_vars)]
+        self._parameter_symbols = [ode_model.p[idx, 0]
+                                   for idx in range(len(self.parameter_names))]
+        self._time_symbol = sympy.Symbol("t")
+        if self._parameter_symbols and not self.kinetics.has(ode_model.p):
+            raise ValueError("The parameters of the ODE model have been "
+                             "substituted by a simulation.")
+
+        transitions = list(ode_model.model.transitions.values())
+        self.stoichiometry = numpy.zeros((num_vars, len(transitions)))
+        for col, transition in enumerate(transitions):
+            for variable in transition.consumed:
+                self.stoichiometry[ode_model.vmap[variable.key], col] -= 1
+            for variable in transition.produced:
+                self.stoichiometry[ode_model.vmap[variable.key], col] += 1
+        self.parameter_values = list(getattr(
+            ode_model, "parameter_values", [None] * len(self.parameter_names)
+        ))
+        self.initial_expressions = list(getattr(
+            ode_model, "variable_values", [None] * num_vars
+        ))
+
+    def _init_incremental(self, ode_model: IncrementalOdeModel):
+        self.variable_names = list(ode_model.vmap)
+        self.parameter_names = list(ode_model.pmap)
+        self.kinetics = ode_model.get_kinetics()
+        self._variable_symbols = [sympy.Symbol(name)
+                                  for name in self.variable_names]
+        self._parameter_symbols = [sympy.Symbol(name)
+                                   for name in self.parameter_names]
+        time = ode_model.template_model.time
+        self._time_symbol = sympy.Symbol(time.name) if time else None
+        self.stoichiometry = ode_model.stoichiometry.toarray()
+        self.parameter_values = list(ode_model.parameter_values)
+        self.initial_expressions = list(ode_model.variable_values)
+
+    def get_parameter_values(
+        self, parameters: Optional[Mapping[str, float]] = None,
+    ) -> numpy.ndarray:
+        """Return the values of all parameters, with the given values
+        overriding the values of the model."""
+        values = []
+        for name, value in zip(self.parameter_names, self.parameter_values):
+            if parameters and name in parameters:
+                value = parameters[name]
+            if value is None:
+                raise ValueError(f"No value for parameter {name}.")
+            values.append(float(value))
+        return numpy.array(values)
+
+    def get_initials(self, parameter_values: numpy.ndarray) -> numpy.ndarray:
+        """Return the initial values of the variables given the values of
+        the parameters."""
+        subs = self._get_parameter_subs(parameter_values)
+        initials = []
+        for name, expression in zip(self.variable_names,
+                                    self.initial_expressions):
+            if expression is None:
+                raise ValueError(f"No initial value for {name}.")
+            if isinstance(expression, sympy.Expr):
+                expression = expression.subs(subs)
+            initials.append(float(expression))
+        return numpy.array(initials)
+
+    def get_initial_sensitivities(
+        self, parameter_values: numpy.ndarray, parameter_indices: List[int],
+    ) -> numpy.ndarray:
+        """Return the derivatives of the initial values of the variables
+        with respect to the given parameters."""
+        subs = self._get_parameter_subs(parameter_values)
+        sensitivities = numpy.zeros((len(self.ys), len(parameter_indices)))
+        for row, expression in enumerate(self.initial_expressions):
+            if not isinstance(expression, sympy.Expr):
+                continue
+            for col, idx in enumerate(parameter_indices):
+                symbol = sympy.Symbol(self.parameter_names[idx])
+                if symbol in expression.free_symbols:
+                    sensitivities[row, col] = float(
+                        expression.diff(symbol).subs(subs))
+        return sensitivities
+
+    def _get_parameter_subs(self, parameter_values):
+        return {sympy.Symbol(name): value for name, value
+                in zip(self.parameter_names, parameter_values)}
+
+    def get_parameter_indices(
+        self, sensitivity_parameters: Optional[Sequence[str]] = None,
+    ) -> List[int]:
+        """Return the indices of the parameters to calculate sensitivities
+        for, all parameters by default."""
+        if sensitivity_parameters is None:
+            return list(range(len(self.parameter_names)))
+        pmap = {name: idx for idx, name in enumerate(self.parameter_names)}
+        missing = [name for name in sensitivity_parameters
+                   if name not in pmap]
+        if missing:
+            raise ValueError(f"Unknown parameters: {', '.join(missing)}")
+        return [pmap[name] for name in sensitivity_parameters]
+
+    def lambdify(self, exprs):
+        """Compile expressions into a function of the variables, parameters
+        and time returning the list of their values."""
+        return sympy.lambdify([self.ys, self.ps, self.t], list(exprs),
+                              cse=True)
+
+
+def _to_array(values, shape, batch_shape=()) -> numpy.ndarray:
+    """Return the values returned by a lambdified list of expressions as an
+    array of the given shape, broadcasting the values of constant
+    expressions to the shape of the batch the expressions were evaluated
+    for."""
+    return numpy.array([numpy.broadcast_to(value, batch_shape)
+                        for value in values],
+                       dtype=float).reshape(shape + batch_shape)
+
+
+def get_conservation_laws(ode_model: CompiledOdeModel) -> numpy.ndarray:
+    """Return the linear conservation laws of an ODE model.
+
+    Parameters
+    ----------
+    ode_model :
+        The ODE model.
+
+    Returns
+    -------
+    :
+        A two-dimensional array with a row for each conservation law, whose
+        product with the values of the variables, e.g., the total
+        population, stays constant over time. The rows form an orthonormal
+        basis of the left null space of the stoichiometry matrix.
+    """
+    return _get_conservation_laws(_OdeSystem(ode_model))
+
+
+def _get_conservation_laws(system: _OdeSystem) -> numpy.ndarray:
+    return scipy.linalg.null_space(system.stoichiometry.T).T
+
+
+def find_steady_state(
+    ode_model: CompiledOdeModel,
+    initial_guess: Optional[Sequence[float]] = None,
+    parameters: Optional[Mapping[str, float]] = None,
+    tol: float = 1e-10,
+    max_iter: int = 100,
+) -> numpy.ndarray:
+    """Find a steady state of an ODE model with Newton's method.
+
+    Since the conservation laws of a model make its Jacobian singular, the
+    steady state is searched for with the same conserved quantities as the
+    initial guess, e.g., the same total population, by adding the
+    conservation laws to the equations solved.
+
+    Parameters
+    ----------
+    ode_model :
+        The ODE model.
+    initial_guess :
+        A one-dimensional array of values of the variables to start the
+        search from. If None, the initial values of the model are used.
+    parameters :
+        A dictionary of parameter names to their values, overriding the
+        values of the parameters in the model.
+    tol :
+        The tolerance of the residuals of the equations, relative to the
+        largest value of a variable if it is larger than one.
+    max_iter :
+        The maximum number of Newton iterations.
+
+    Returns
+    -------
+    :
+        A one-dimensional array of the values of the variables at the
+        steady state.
+    """
+    system = _OdeSystem(ode_model)
+    if system.t in system.kinetics.free_symbols:
+        raise ValueError("The kinetics of the model depend on time.")
+    parameter_values = system.get_parameter_values(parameters)
+    if initial_guess is None:
+        y = system.get_initials(parameter_values)
+    else:
+        y = numpy.array(initial_guess, dtype=float)
+    num_vars = len(system.ys)
+
+    kinetics = system.lambdify(system.kinetics)
+    jacobian = system.lambdify(system.kinetics.jacobian(system.ys))
+    conservation_laws = _get_conservation_laws(system)
+    totals = conservation_laws @ y
+
+    def get_residuals(y):
+        rates = _to_array(kinetics(y, parameter_values, 0), (num_vars,))
+        return numpy.concatenate([rates, conservation_laws @ y - totals])
+
+    residuals = get_residuals(y)
+    for _ in range(max_iter):
+        if numpy.abs(residuals).max(initial=0) <= \
+                tol * max(1, numpy.abs(y).max(initial=0)):
+            return y
+        matrix = numpy.vstack([
+            _to_array(jacobian(y, parameter_values, 0), (num_vars, num_vars)),
+            conservation_laws,
+        ])
+        step = numpy.linalg.lstsq(matrix, -residuals, rcond=None)[0]
+        # Backtrack until the residuals decrease
+        norm = numpy.linalg.norm(residuals)
+        scale = 1.0
+        while True:
+            new_y = y + scale * step
+            new_residuals = get_residuals(new_y)
+            if numpy.linalg.norm(new_residuals) < norm or scale < 1e-4:
+                break
+            scale /= 2
+        y, residuals = new_y, new_residuals
+    raise ValueError(f"No steady state found in {max_iter} iterations, "
+                     f"residual {numpy.abs(residuals).max()}.")
+
+
+def simulate_sensitivities(
+    ode_model: CompiledOdeModel,
+    times: Sequence[float],
+    initials: Optional[Sequence[float]] = None,
+    parameters: Optional[Mapping[str, float]] = None,
+    sensitivity_parameters: Optional[Sequence[str]] = None,
+    rtol: float = 1e-8,
+    atol: float = 1e-10,
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Simulate an ODE model together with its forward sensitivities.
+
+    The sensitivities ``S = dy/dp`` of the variables to the parameters are
+    integrated with the model as ``dS/dt = J_y S + J_p``, where ``J_y`` and
+    ``J_p`` are the Jacobians of the kinetics with respect to the variables
+    and the parameters, derived symbolically from the rate laws.
+
+    Parameters
+    ----------
+    ode_model :
+        The ODE model.
+    times :
+        A one-dimensional array of time values, typically from
+        a linear space like ``numpy.linspace(0, 25, 100)``
+    initials :
+        A one-dimensional array of the initial values of the variables. If
+        None, the initial values of the model are used, and their
+        derivatives with respect to the parameters they depend on are the
+        initial sensitivities.
+    parameters :
+        A dictionary of parameter names to their values, overriding the
+        values of the parameters in the model.
+    sensitivity_parameters :
+        The names of the parameters to calculate sensitivities for. If None,
+        all parameters are used.
+    rtol :
+        The relative tolerance of the solver.
+    atol :
+        The absolute tolerance of the solver.
+
+    Returns
+    -------
+    :
+        A two-dimensional array of the values of the variables with the
+        first axis being time and the second the variables, and a
+        three-dimensional array of the sensitivities with the first axis
+        being time, the second the variables and the third the parameters.
+    """
+    system = _OdeSystem(ode_model)
+    parameter_values = system.get_parameter_values(parameters)
+    parameter_indices = system.get_parameter_indices(sensitivity_parameters)
+    num_vars, num_params = len(system.ys), len(parameter_indices)
+    if initials is None:
+        y0 = system.get_initials(parameter_values)
+        s0 = system.get_initial_sensitivities(parameter_values,
+                                              parameter_indices)
+    else:
+        y0 = numpy.array(initials, dtype=float)
+        s0 = numpy.zeros((num_vars, num_params))
+
+    kinetics = system.lambdify(system.kinetics)
+    jacobian_y = system.lambdify(system.kinetics.jacobian(system.ys))
+    jacobian_p = system.lambdify(system.kinetics.jacobian(
+        [system.ps[idx] for idx in parameter_indices]))
+
+    def rhs(t, z):
+        y = z[:num_vars]
+        s = z[num_vars:].reshape(num_vars, num_params)
+        dy = _to_array(kinetics(y, parameter_values, t), (num_vars,))
+        ds = _to_array(jacobian_y(y, parameter_values, t),
+                       (num_vars, num_vars)) @ s \
+            + _to_array(jacobian_p(y, parameter_values, t),
+                        (num_vars, num_params))
+        return numpy.concatenate([dy, ds.ravel()])
+
+    res = _solve(rhs, times, numpy.concatenate([y0, s0.ravel()]),
+                 rtol=rtol, atol=atol)
+    return res[:, :num_vars], res[:, num_vars:].reshape(
+        len(times), num_vars, num_params)
+
+
+def finite_difference_sensitivities(
+    ode_model: CompiledOdeModel,
+    times: Sequence[float],
+    initials: Optional[Sequence[float]] = None,
+    parameters: Optional[Mapping[str, float]] = None,
+    sensitivity_parameters: Optional[Sequence[str]] = None,
+    rel_step: float = 1e-6,
+    rtol: float = 1e-10,
+    atol: float = 1e-12,
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Calculate the sensitivities of an ODE model with finite differences.
+
+    The model is integrated for the given parameter values and for each of
+    the parameters perturbed in turn, all as copies of the model in one
+    batched system, such that a single solve gives the forward differences.
+    This doesn't require the rate laws to be differentiable symbolically,
+    but is less accurate than :func:`simulate_sensitivities`.
+
+    Parameters
+    ----------
+    ode_model :
+        The ODE model.
+    times :
+        A one-dimensional array of time values, typically from
+        a linear space like ``numpy.linspace(0, 25, 100)``
+    initials :
+        A one-dimensional array of the initial values of the variables. If
+        None, the initial values of the model for the (perturbed) parameter
+        values are used.
+    parameters :
+        A dictionary of parameter names to their values, overriding the
+        values of the parameters in the model.
+    sensitivity_parameters :
+        The names of the parameters to calculate sensitivities for. If None,
+        all parameters are used.
+    rel_step :
+        The step of each parameter, relative to its value if it's not zero.
+    rtol :
+        The relative tolerance of the solver, which has to be well below
+        the relative step for the differences to be accurate.
+    atol :
+        The absolute tolerance of the solver.
+
+    Returns
+    -------
+    :
+        A two-dimensional array of the values of the variables with the
+        first axis being time and the second the variables, and a
+        three-dimensional array of the sensitivities with the first axis
+        being time, the second the variables and the third the parameters.
+    """
+    system = _OdeSystem(ode_model)
+    parameter_values = system.get_parameter_values(parameters)
+    parameter_indices = system.get_parameter_indices(sensitivity_parameters)
+    num_vars, num_copies = len(system.ys), len(parameter_indices) + 1
+
+    # The parameter values of each copy of the model as columns, the first
+    # one unperturbed
+    batch_parameters = numpy.tile(parameter_values[:, None], num_copies)
+    values = parameter_values[parameter_indices]
+    steps = numpy.where(values != 0, rel_step * numpy.abs(values), rel_step)
+    batch_parameters[parameter_indices, numpy.arange(1, num_copies)] += steps
+
+    if initials is None:
+        y0 = numpy.stack([system.get_initials(batch_parameters[:, copy_idx])
+                          for copy_idx in range(num_copies)], axis=1)
+    else:
+        y0 = numpy.tile(numpy.array(initials, dtype=float)[:, None],
+                        num_copies)
+
+    kinetics = system.lambdify(system.kinetics)
+
+    def rhs(t, z):
+        y = z.reshape(num_vars, num_copies)
+        return _to_array(kinetics(y, batch_parameters, t),
+                         (num_vars,), (num_copies,)).ravel()
+
+    res = _solve(rhs, times, y0.ravel(), rtol=rtol, atol=atol)
+    res = res.reshape(len(times), num_vars, num_copies)
+    sensitivities = (res[:, :, 1:] - res[:, :, :1]) / steps
+    return res[:, :, 0], sensitivities
+
+
+def _solve(rhs, times, y0, rtol, atol) -> numpy.ndarray:
+    """Integrate a system at the given times, returning an array with the
+    first axis being time."""
+    times = numpy.asarray(times, dtype=float)
+    solution = scipy.integrate.solve_ivp(
+        rhs, (times[0], times[-1]), y0, method="LSODA", t_eval=times,
+        rtol=rtol, atol=atol,
+    )
+    if not solution.success:
+        raise ValueError(f"Integration failed: {solution.message}")
+    return solution.y.T
@@ -1,11 +1,23 @@
-__all__ = ["OdeModel", "simulate_ode_model"]
+__all__ = ["OdeModel", "IncrementalOdeModel", "simulate_ode_model"]
 
 from copy import deepcopy
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 
 import numpy
 import scipy.integrate
+import scipy.sparse
 import sympy
 
+from mira.metamodel import (
+    StaticConcept,
+    Template,
+    TemplateModel,
+    has_outcome,
+    has_subject,
+    is_replication,
+    is_reversible,
+)
+
 from . import Model
 
 
@@ -238,6 +250,314 @@ class OdeModel:
         return res
 
 
+class IncrementalOdeModel:
+    """An ODE model compiled term by term, for fast recompilation after
+    edits of its template model.
+
+    Each template contributes one rate term, compiled on its own into a
+    numerical function of the variables, parameters and time it refers to,
+    and one column of the stoichiometry matrix. When the template model is
+    edited, e.g., by adding a template, setting a rate law or substituting a
+    parameter, :meth:`update` only compiles the rate laws that weren't
+    compiled before, while the stoichiometry and the indices of the
+    arguments of each term, which are cheap to build, are reassembled.
+    Templates with the same rate law share the same compiled function.
+
+    Parameter values are passed to the compiled functions at simulation
+    time instead of being substituted into the expressions, so changing
+    them doesn't require any recompilation either.
+
+    Parameters
+    ----------
+    template_model :
+        The template model to compile.
+
+    Attributes
+    ----------
+    vmap : dict[str, int]
+        The index of each variable, keyed by concept name.
+    pmap : dict[str, int]
+        The index of each parameter, keyed by parameter name.
+    observable_map : dict[str, int]
+        The index of each observable, keyed by observable name.
+    """
+
+    def __init__(self, template_model: TemplateModel):
+        self.template_model = template_model
+        self.vmap: Dict[str, int] = {}
+        self.pmap: Dict[str, int] = {}
+        self.observable_map: Dict[str, int] = {}
+        # Compiled functions and the names of their arguments, keyed by the
+        # expression they were compiled from
+        self._compiled: Dict[sympy.Expr, Tuple[Callable, List[str]]] = {}
+        self.update()
+
+    def update(self,
+               template_model: Optional[TemplateModel] = None) -> List[int]:
+        """Update the compiled model after edits of the template model.
+
+        Parameters
+        ----------
+        template_model :
+            The edited template model, if the edits returned a new template
+            model. If None, the template model of this model, which may have
+            been edited in place, is used.
+
+        Returns
+        -------
+        :
+            The indices of the templates whose rate laws had to be compiled.
+        """
+        if template_model is not None:
+            self.template_model = template_model
+        tm = self.template_model
+
+        variables: Dict[str, int] = {}
+        rate_laws = []
+        stoichiometry = []
+        for template in tm.templates:
+            if isinstance(template, StaticConcept):
+                variables.setdefault(template.subject.name, len(variables))
+                continue
+            if template.rate_law is None:
+                raise ValueError(f"Template {template.name} has no rate law.")
+            consumed, controllers, produced = _get_participants(template)
+            for concept in consumed + controllers + produced:
+                variables.setdefault(concept.name, len(variables))
+            rate_laws.append(template.rate_law)
+            stoichiometry.append((consumed, produced))
+        self.vmap = variables
+        self.pmap = {name: idx for idx, name in enumerate(tm.parameters)}
+        self.observable_map = {name: idx for idx, name
+                               in enumerate(tm.observables)}
+
+        compiled = {}
+        compiled_templates = []
+        rate_law_iter = iter(rate_laws)
+        for idx, template in enumerate(tm.templates):
+            if isinstance(template, StaticConcept):
+                continue
+            rate_law = next(rate_law_iter)
+            if rate_law not in compiled:
+                if rate_law not in self._compiled:
+                    self._compiled[rate_law] = _compile(rate_law)
+                    compiled_templates.append(idx)
+                compiled[rate_law] = self._compiled[rate_law]
+        observable_exprs = [observable.expression
+                            for observable in tm.observables.values()]
+        for expr in observable_exprs:
+            if expr not in compiled:
+                compiled[expr] = self._compiled.get(expr) or _compile(expr)
+        # Only keep the functions of the current model
+        self._compiled = compiled
+
+        self._terms = [self._get_term(rate_law) for rate_law in rate_laws]
+        self._observable_terms = [self._get_term(expr)
+                                  for expr in observable_exprs]
+        rows, cols, data = [], [], []
+        for col, (consumed, produced) in enumerate(stoichiometry):
+            for concept in consumed:
+                rows.append(self.vmap[concept.name])
+                cols.append(col)
+                data.append(-1.0)
+            for concept in produced:
+                rows.append(self.vmap[concept.name])
+                cols.append(col)
+                data.append(1.0)
+        # Duplicate entries, e.g., of a catalyst consumed and produced by a
+        # template, are summed
+        self.stoichiometry = scipy.sparse.csr_matrix(
+            (data, (rows, cols)), shape=(len(self.vmap), len(rate_laws)),
+        )
+
+        self.parameter_values = [parameter.value
+                                 for parameter in tm.parameters.values()]
+        initials = {initial.concept.name: initial.expression
+                    for initial in tm.initials.values()}
+        self.variable_values = [initials.get(name) for name in self.vmap]
+        return compiled_templates
+
+    def _get_term(self, expr: sympy.Expr) -> Tuple[Callable, numpy.ndarray]:
+        """Return the compiled function of an expression with the indices of
+        its arguments in the vector of variables, parameters and time."""
+        func, arg_names = self._compiled[expr]
+        time = self.template_model.time
+        indices = []
+        for name in arg_names:
+            if name in self.vmap:
+                indices.append(self.vmap[name])
+            elif name in self.pmap:
+                indices.append(len(self.vmap) + self.pmap[name])
+            elif time and name == time.name:
+                indices.append(len(self.vmap) + len(self.pmap))
+            else:
+                raise ValueError(f"Unknown symbol {name} in {expr}.")
+        return func, numpy.array(indices, dtype=int)
+
+    def _get_arguments(self, parameters: Optional[Mapping[str, float]] = None):
+        """Return the vector of variables, parameters and time with the
+        parameter values filled in."""
+        args = numpy.zeros(len(self.vmap) + len(self.pmap) + 1)
+        for name, idx in self.pmap.items():
+            value = self.parameter_values[idx]
+            if parameters and name in parameters:
+                value = parameters[name]
+            # Parameters without a value make the results undefined
+            args[len(self.vmap) + idx] = numpy.nan if value is None else value
+        return args
+
+    def get_kinetics(self) -> sympy.Matrix:
+        """Return the right-hand side of the ODE system as expressions of
+        the symbols of the variables, parameters and time."""
+        rate_laws = [template.rate_law
+                     for template in self.template_model.templates
+                     if not isinstance(template, StaticConcept)]
+        kinetics = [sympy.Add() for _ in self.vmap]
+        stoichiometry = self.stoichiometry.tocoo()
+        for row, col, value in zip(stoichiometry.row, stoichiometry.col,
+                                   stoichiometry.data):
+            kinetics[row] += int(value) * rate_laws[col]
+        return sympy.Matrix(kinetics)
+
+    def get_rhs(self, parameters: Optional[Mapping[str, float]] = None):
+        """Return the right-hand side of the ODE system.
+
+        Parameters
+        ----------
+        parameters :
+            A dictionary of parameter names to their values, overriding the
+            values of the parameters in the template model.
+
+        Returns
+        -------
+        :
+            A function of time and the array of variable values returning
+            the array of their derivatives.
+        """
+        args = self._get_arguments(parameters)
+        num_vars = len(self.vmap)
+        terms = self._terms
+        stoichiometry = self.stoichiometry
+
+        def rhs(t, y):
+            args[:num_vars] = y
+            args[-1] = t
+            rates = numpy.array([func(*args[indices])
+                                 for func, indices in terms], dtype=float)
+            return stoichiometry @ rates
+
+        return rhs
+
+    def get_initials(self, parameters: Optional[Mapping[str, float]] = None):
+        """Return the initial values of the variables.
+
+        Parameters
+        ----------
+        parameters :
+            A dictionary of parameter names to their values, overriding the
+            values of the parameters in the template model.
+
+        Returns
+        -------
+        :
+            A one-dimensional array of the initial values of the variables.
+        """
+        parameter_values = dict(zip(self.pmap, self.parameter_values))
+        if parameters:
+            parameter_values.update(parameters)
+        initials = []
+        for name, expression in zip(self.vmap, self.variable_values):
+            if expression is None:
+                raise ValueError(f"No initial value for {name}.")
+            if isinstance(expression, sympy.Expr):
+                expression = expression.subs(parameter_values)
+            initials.append(float(expression))
+        return numpy.array(initials)
+
+    def simulate_model(self, times, initials=None,
+                       parameters=None, with_observables=False):
+        """Simulate the ODE model given initial conditions, parameters and a
+        time span.
+
+        Parameters
+        ----------
+        times :
+            A one-dimensional array of time values, typically from
+            a linear space like ``numpy.linspace(0, 25, 100)``
+        initials :
+            A one-dimensional array describing the initial values for the
+            variables in the order of ``vmap``. If None, the initials of
+            the template model are used.
+        parameters :
+            A dictionary of parameter names to their values, overriding the
+            values of the parameters in the template model.
+        with_observables :
+            A boolean indicating whether to return the observables
+            as well as the variables.
+
+        Returns
+        -------
+        A two-dimensional array with the first axis being time
+        and the second axis being the variables in the ODE model.
+        """
+        if initials is None:
+            initials = self.get_initials(parameters)
+        solver = scipy.integrate.ode(f=self.get_rhs(parameters))
+        solver.set_initial_value(initials, times[0])
+        num_vars = len(self.vmap)
+        num_obs = len(self.observable_map)
+        num_cols = num_vars + (num_obs if with_observables else 0)
+        res = numpy.zeros((len(times), num_cols))
+        res[0, :num_vars] = initials
+        for idx, time in enumerate(times[1:]):
+            res[idx + 1, :num_vars] = solver.integrate(time)
+
+        if with_observables:
+            args = self._get_arguments(parameters)
+            for tidx, t in enumerate(times):
+                args[:num_vars] = res[tidx, :num_vars]
+                args[-1] = t
+                for idx, (func, indices) in enumerate(self._observable_terms):
+                    res[tidx, num_vars + idx] = func(*args[indices])
+        return res
+
+
+def _get_participants(template: Template):
+    """Return the consumed, controller and produced concepts of a template,
+    following how :class:`mira.modeling.Model` assembles transitions."""
+    consumed, produced = [], []
+    if has_subject(template):
+        if hasattr(template, "subjects"):
+            consumed = list(template.subjects)
+        elif is_replication(template):
+            produced = [template.subject]
+        else:
+            consumed = [template.subject]
+    elif is_reversible(template):
+        consumed = list(template.left)
+    if has_outcome(template):
+        if hasattr(template, "outcomes"):
+            produced = list(template.outcomes)
+        else:
+            produced = [template.outcome]
+    elif is_reversible(template):
+        produced = list(template.right)
+    if hasattr(template, "controllers"):
+        controllers = list(template.controllers)
+    elif hasattr(template, "controller"):
+        controllers = [template.controller]
+    else:
+        controllers = []
+    return consumed, controllers, produced
+
+
+def _compile(expr: sympy.Expr) -> Tuple[Callable, List[str]]:
+    """Compile an expression into a numerical function of its symbols,
+    returned with the names of the symbols in the order of its arguments."""
+    symbols = sorted(expr.free_symbols, key=str)
+    return sympy.lambdify(symbols, expr), [str(symbol) for symbol in symbols]
+
+
 def simulate_ode_model(ode_model: OdeModel, times, initials=None,
                        parameters=None, with_observables=False):
     """Simulate an ODE model given initial conditions, parameters and a
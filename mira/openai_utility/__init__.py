@@ -1,6 +1,8 @@
 try:
     import openai
     from .client import OpenAIClient, ImageFmts, ALLOWED_FORMATS
+    from .cache import ResponseCache
+    from .async_client import AsyncOpenAIClient, RateLimiter
 except ImportError as ierr:
     if 'openai' in str(ierr):
         raise ImportError(
@@ -0,0 +1,425 @@
+"""An asyncio OpenAI client for running many chat completions concurrently.
+
+The :class:`AsyncOpenAIClient` has the same ``run_chat_completion*``
+methods as :class:`mira.openai_utility.OpenAIClient`, as coroutines, so
+that many calls, e.g., for the papers of an extraction run, can be
+overlapped with :func:`asyncio.gather`. To stay within the rate limits of
+the API, requests wait for a :class:`RateLimiter` based on the requests and
+tokens per minute limits of the account, and rate limited (429) or failed
+(5xx) requests are retried with jittered exponential backoff. Identical
+requests that are in flight at the same time are sent only once.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Union
+
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
+
+from .cache import ResponseCache
+from .client import (
+    BaseOpenAIClient,
+    ImageFmts,
+    MAX_TOKENS,
+    get_image_content,
+    get_image_url_content,
+    get_pdf_content,
+    get_text_content,
+)
+
+__all__ = ["AsyncOpenAIClient", "RateLimiter"]
+
+logger = logging.getLogger(__name__)
+
+#: The number of tokens assumed for an image or file in a request, used
+#: to estimate its size before it is sent
+ATTACHMENT_TOKENS = 1000
+
+
+class RateLimiter:
+    """A token bucket limiter of requests and tokens per minute
+
+    Parameters
+    ----------
+    requests_per_minute :
+        The maximum number of requests per minute. If None, the number of
+        requests isn't limited.
+    tokens_per_minute :
+        The maximum number of tokens per minute. If None, the number of
+        tokens isn't limited.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = requests_per_minute or 0.0
+        self._tokens = tokens_per_minute or 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until a request of the given number of tokens can be sent
+
+        Parameters
+        ----------
+        tokens :
+            The (estimated) number of tokens of the request. A request
+            larger than the tokens per minute limit is sent once the bucket
+            is full.
+        """
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.requests_per_minute is not None and self._requests < 1:
+                    wait = (1 - self._requests) * 60 / self.requests_per_minute
+                if self.tokens_per_minute is not None:
+                    needed = min(tokens, self.tokens_per_minute)
+                    if self._tokens < needed:
+                        wait = max(wait, (needed - self._tokens) * 60
+                                   / self.tokens_per_minute)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests_per_minute is not None:
+                self._requests -= 1
+            if self.tokens_per_minute is not None:
+                self._tokens -= tokens
+
+    def adjust(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the tokens taken for a request after it completed
+
+        Parameters
+        ----------
+        estimated_tokens :
+            The number of tokens the request was acquired with.
+        actual_tokens :
+            The number of tokens the request actually used.
+        """
+        if self.tokens_per_minute is not None:
+            self._tokens += estimated_tokens - actual_tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed_minutes = (now - self._updated) / 60
+        self._updated = now
+        if self.requests_per_minute is not None:
+            self._requests = min(
+                self.requests_per_minute,
+                self._requests + elapsed_minutes * self.requests_per_minute,
+            )
+        if self.tokens_per_minute is not None:
+            self._tokens = min(
+                self.tokens_per_minute,
+                self._tokens + elapsed_minutes * self.tokens_per_minute,
+            )
+
+
+class AsyncOpenAIClient(BaseOpenAIClient):
+    """An OpenAI client whose chat completion methods are coroutines
+
+    Parameters
+    ----------
+    api_key :
+        The OpenAI API key. If None, it is taken from the environment.
+    model :
+        The model to use.
+    temperature :
+        The sampling temperature.
+    max_completion_tokens :
+        The maximum number of tokens to generate per completion.
+    base_url :
+        The base URL of the API, e.g., of a compatible local server.
+    cache :
+        An optional cache of responses.
+    requests_per_minute :
+        The maximum number of requests per minute sent by the client.
+    tokens_per_minute :
+        The maximum number of tokens per minute sent by the client.
+    max_retries :
+        The maximum number of times a rate limited or failed request is
+        retried.
+    backoff :
+        The base delay in seconds between retries, which is doubled for
+        every retry and jittered.
+    max_backoff :
+        The maximum delay in seconds between retries.
+    """
+
+    def __init__(
+            self,
+            api_key: Optional[str] = None,
+            model: str = "gpt-4o-mini",
+            temperature: float = 0.0,
+            max_completion_tokens: int = MAX_TOKENS,
+            base_url: Optional[str] = None,
+            cache: Optional[ResponseCache] = None,
+            requests_per_minute: Optional[float] = None,
+            tokens_per_minute: Optional[float] = None,
+            max_retries: int = 5,
+            backoff: float = 1.0,
+            max_backoff: float = 60.0,
+    ):
+        super().__init__(api_key=api_key, model=model,
+                         temperature=temperature,
+                         max_completion_tokens=max_completion_tokens,
+                         base_url=base_url, cache=cache)
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def _get_client(self, api_key: Optional[str], base_url: Optional[str]):
+        # Retries are handled by the client to apply the rate limiter
+        return AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+    async def _create_chat_completion(self, kwargs: dict):
+        """Run a chat completion request, sharing identical in-flight ones
+
+        Parameters
+        ----------
+        kwargs :
+            The keyword arguments of the chat completion request.
+
+        Returns
+        -------
+        :
+            The raw response object of the chat completion.
+        """
+        key = ResponseCache.get_key(kwargs)
+        if self.cache is not None:
+            # The cache reads from disk, which mustn't block the event loop
+            response = await asyncio.to_thread(self.cache.get, key)
+            if response is not None:
+                return response
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._send_request(kwargs, key))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # A cancelled caller mustn't cancel the request for the others
+        return await asyncio.shield(future)
+
+    async def _send_request(self, kwargs: dict, key: str):
+        estimated_tokens = estimate_tokens(kwargs)
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(estimated_tokens)
+            try:
+                response = await self.client.chat.completions.create(**kwargs)
+            except (APIConnectionError, APIStatusError) as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._get_retry_delay(attempt, e)
+                logger.info("Retrying chat completion in %.1fs after: %s",
+                            delay, e)
+                await asyncio.sleep(delay)
+                continue
+            self._track_usage(response)
+            if response.usage:
+                self.rate_limiter.adjust(estimated_tokens,
+                                         response.usage.total_tokens)
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.set, key, response)
+            return response
+
+    def _get_retry_delay(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                return min(self.max_backoff,
+                           float(response.headers["retry-after"]))
+            except (KeyError, ValueError):
+                pass
+        # Full jitter, to spread out retries of concurrent requests
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def run_chat_completion(
+        self,
+        message: str,
+        schema: Optional[dict] = None,
+        strict: Optional[bool] = True,
+    ):
+        """Run the OpenAI chat completion
+
+        Parameters
+        ----------
+        message :
+          The prompt to send for chat completion
+        schema :
+            The schema to use for the response format.
+        strict :
+            Whether to enforce the schema strictly.
+
+        Returns
+        -------
+        :
+            The first choice of the response.
+        """
+        kwargs = self._get_request(get_text_content(message), schema, strict)
+        response = await self._create_chat_completion(kwargs)
+        return response.choices[0]
+
+    async def run_chat_completion_with_image(
+        self,
+        message: str,
+        image_format: Union[ImageFmts, List[ImageFmts]],
+        base64_image: Union[str, List[str]],
+        schema: Optional[dict] = None,
+        strict: Optional[bool] = True,
+    ):
+        """Run the OpenAI chat completion with an image or a list of images
+
+        Parameters
+        ----------
+        message :
+          The prompt to send for chat completion together with the image or
+          list of images
+        image_format :
+            The format of the image or images.
+        base64_image :
+          The image data or list of image data as a base64 string
+        schema :
+            The schema to use for the response format.
+        strict :
+            Whether to enforce the schema strictly.
+
+        Returns
+        -------
+        :
+            The first choice of the response.
+        """
+        content = get_image_content(message, image_format, base64_image)
+        kwargs = self._get_request(content, schema, strict)
+        response = await self._create_chat_completion(kwargs)
+        return response.choices[0]
+
+    async def run_chat_completion_with_pdf(
+        self,
+        message: str,
+        base64_pdf: str,
+        schema: Optional[dict] = None,
+        strict: Optional[bool] = True,
+    ):
+        """Run the OpenAI chat completion with a PDF file
+
+        Parameters
+        ----------
+        message :
+            The prompt to send for chat completion together with the PDF
+        base64_pdf :
+            The PDF data as a base64 string
+        schema :
+            The schema to use for the response format.
+        strict :
+            Whether to enforce the schema strictly.
+
+        Returns
+        -------
+        :
+            The first choice of the response.
+        """
+        content = get_pdf_content(message, base64_pdf)
+        kwargs = self._get_request(content, schema, strict)
+        response = await self._create_chat_completion(kwargs)
+        return response.choices[0]
+
+    async def run_chat_completion_with_text(
+        self,
+        message: str,
+        text_content: str,
+        schema: Optional[dict] = None,
+        strict: Optional[bool] = True,
+    ):
+        """Run the OpenAI chat completion with input text
+
+        Parameters
+        ----------
+        message :
+            The prompt to send for chat completion together with the text
+        text_content :
+            The input text
+        schema :
+            The schema to use for the response format.
+        strict :
+            Whether to enforce the schema strictly.
+
+        Returns
+        -------
+        :
+            The content of the response as a string
+        """
+        content = get_text_content(f"{message}\n\n{text_content}")
+        kwargs = self._get_request(content, schema, strict)
+        response = await self._create_chat_completion(kwargs)
+        return response.choices[0].message.content
+
+    async def run_chat_completion_with_image_url(
+        self,
+        message: str,
+        image_url: str,
+        schema: Optional[dict] = None,
+        strict: Optional[bool] = True,
+    ):
+        """Run the OpenAI chat completion with an image URL
+
+        Parameters
+        ----------
+        message :
+          The prompt to send for chat completion together with the image
+        image_url :
+          The URL of the image
+        schema :
+            The schema to use for the response format.
+        strict :
+            Whether to enforce the schema strictly.
+
+        Returns
+        -------
+        :
+            The first choice of the response.
+        """
+        content = get_image_url_content(message, image_url)
+        kwargs = self._get_request(content, schema, strict)
+        response = await self._create_chat_completion(kwargs)
+        return response.choices[0]
+
+
+def estimate_tokens(kwargs: dict) -> int:
+    """Return an estimate of the number of tokens used by a request
+
+    Parameters
+    ----------
+    kwargs :
+        The keyword arguments of the chat completion request.
+
+    Returns
+    -------
+    :
+        The estimated number of prompt tokens, assuming about four
+        characters per token of text, plus the maximum number of
+        completion tokens.
+    """
+    tokens = kwargs.get("max_completion_tokens") or 0
+    for message in kwargs["messages"]:
+        content = message["content"]
+        if isinstance(content, str):
+            tokens += len(content) // 4
+            continue
+        for part in content:
+            if part["type"] == "text":
+                tokens += len(part["text"]) // 4
+            else:
+                tokens += ATTACHMENT_TOKENS
+    return tokens
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    # Connection errors and timeouts
+    return isinstance(error, APIConnectionError)
@@ -0,0 +1,107 @@
+"""An on-disk cache of chat completion responses.
+
+Responses are stored under a digest of the complete request, i.e., the
+model, the prompt, the input content (text, images or PDFs) and the
+generation settings, so that repeating an identical request, e.g., when
+re-running an extraction over the same papers, doesn't call the API again.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+from openai.types.chat import ChatCompletion
+
+from mira.utils import write_atomic
+
+__all__ = ["ResponseCache"]
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """A content-addressed cache of chat completion responses
+
+    Parameters
+    ----------
+    directory :
+        The directory in which responses are stored, one JSON file per
+        response. The cache can be shared by several clients, threads and
+        processes.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(request: dict) -> str:
+        """Return the cache key of a chat completion request
+
+        Parameters
+        ----------
+        request :
+            The keyword arguments of the chat completion request.
+
+        Returns
+        -------
+        :
+            The SHA-256 digest of the request.
+        """
+        data = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        """Return the cached response for a key, if any
+
+        Parameters
+        ----------
+        key :
+            The cache key of the request.
+
+        Returns
+        -------
+        :
+            The cached response, or None if the request wasn't cached or
+            the cached response can't be read.
+        """
+        try:
+            response = ChatCompletion.model_validate_json(
+                self._get_path(key).read_text())
+        except FileNotFoundError:
+            response = None
+        except (OSError, ValueError) as exc:
+            # E.g., a file written by an incompatible version of openai
+            logger.warning("Ignoring unreadable cached response %s: %s",
+                           key, exc)
+            response = None
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def set(self, key: str, response: ChatCompletion) -> None:
+        """Cache the response to a request
+
+        Parameters
+        ----------
+        key :
+            The cache key of the request.
+        response :
+            The response to cache.
+        """
+        write_atomic(self._get_path(key), response.model_dump_json())
+
+    def __contains__(self, key: str) -> bool:
+        return self._get_path(key).is_file()
+
+    def _get_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
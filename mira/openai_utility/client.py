@@ -1,30 +1,55 @@
 import base64
+import threading
+from abc import ABC, abstractmethod
 from typing import Literal, Optional, Union, List
 
 from openai import OpenAI
 
+from .cache import ResponseCache
+
 
 ImageFmts = Literal["jpeg", "jpg", "png", "webp", "gif"]
 ALLOWED_FORMATS = ["jpeg", "jpg", "png", "webp", "gif"]
 MAX_TOKENS = 2048
 
 
-class OpenAIClient:
+class BaseOpenAIClient(ABC):
+    """Request building and usage accounting shared by the OpenAI clients
+
+    Subclasses implement :meth:`_get_client` to create the underlying
+    synchronous or asynchronous OpenAI client.
+    """
 
     def __init__(
             self, 
-            api_key: str = None, 
+            api_key: Optional[str] = None,
             model: str = "gpt-4o-mini", 
             temperature: float = 0.0,
-            max_completion_tokens: int = MAX_TOKENS
+            max_completion_tokens: int = MAX_TOKENS,
+            base_url: Optional[str] = None,
+            cache: Optional[ResponseCache] = None,
     ):
-        self.client = OpenAI(api_key=api_key)
+        self.client = self._get_client(api_key=api_key, base_url=base_url)
         self.model = model
         self.temperature = temperature
         self.max_completion_tokens = max_completion_tokens
+        self.cache = cache
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self._usage_lock = threading.Lock()
         # instructions, systerm_prompt, reasoning
+
+    @abstractmethod
+    def _get_client(self, api_key: Optional[str], base_url: Optional[str]):
+        """Return the OpenAI client used to send requests
+
+        Parameters
+        ----------
+        api_key :
+            The OpenAI API key. If None, it is taken from the environment.
+        base_url :
+            The base URL of the API, e.g., of a compatible local server.
+        """
  
     def _track_usage(
             self, 
@@ -38,15 +63,15 @@ class OpenAIClient:
             The raw response object returned by chat.completions.create.
         """
         if response.usage:
-            self.total_input_tokens += response.usage.prompt_tokens
-            self.total_output_tokens += response.usage.completion_tokens
-
+            with self._usage_lock:
+                self.total_input_tokens += response.usage.prompt_tokens
+                self.total_output_tokens += response.usage.completion_tokens
 
     def _add_response_schema(
         self,
         kwargs: dict,
         schema: dict | None,
-        strict: bool = True,
+        strict: Optional[bool] = True,
     ) -> None:
         """Add the response format schema to the kwargs for chat completion
 
@@ -71,10 +96,49 @@ class OpenAIClient:
             },
         }
 
+    def _get_request(
+        self,
+        content: list,
+        schema: Optional[dict] = None,
+        strict: Optional[bool] = True,
+    ) -> dict:
+        """Return the kwargs of a chat completion request for a user message
+
+        Parameters
+        ----------
+        content :
+            The content of the user message
+        schema :
+            The schema to use for the response format.
+        strict :
+            Whether to enforce the schema strictly.
+
+        Returns
+        -------
+        :
+            The kwargs to pass to chat completion
+        """
+        kwargs = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content,
+                }
+            ],
+            "max_completion_tokens": self.max_completion_tokens,
+        }
+
+        if self.temperature is not None:
+            kwargs["temperature"] = self.temperature
+        self._add_response_schema(kwargs, schema, strict)
+        return kwargs
+
     def reset_token_counts(self):
         """Reset the session token counters to zero."""
-        self.total_input_tokens = 0
-        self.total_output_tokens = 0
+        with self._usage_lock:
+            self.total_input_tokens = 0
+            self.total_output_tokens = 0
 
     def save_client_usage(self, filepath: str = "client_usage.txt"):
         """Save the total token usage to a file
@@ -90,7 +154,38 @@ class OpenAIClient:
             f.write(f"Temperature: {self.temperature}\n")
             f.write(f"Total input tokens: {self.total_input_tokens}\n")
             f.write(f"Total output tokens: {self.total_output_tokens}\n")
-        
+
+
+class OpenAIClient(BaseOpenAIClient):
+
+    def _get_client(self, api_key: Optional[str], base_url: Optional[str]):
+        return OpenAI(api_key=api_key, base_url=base_url)
+
+    def _create_chat_completion(self, kwargs: dict):
+        """Run a chat completion request, answering it from the cache if set
+
+        Parameters
+        ----------
+        kwargs :
+            The keyword arguments of the chat completion request.
+
+        Returns
+        -------
+        :
+            The raw response object of the chat completion.
+        """
+        if self.cache is None:
+            response = self.client.chat.completions.create(**kwargs)
+            self._track_usage(response)
+            return response
+        key = self.cache.get_key(kwargs)
+        response = self.cache.get(key)
+        if response is None:
+            response = self.client.chat.completions.create(**kwargs)
+            self._track_usage(response)
+            self.cache.set(key, response)
+        return response
+
     def run_chat_completion(
         self,
         message: str,
@@ -113,31 +208,8 @@ class OpenAIClient:
         :
             The response from OpenAI as a string.
         """
-
-        content = [
-                    {
-                        "type": "text",
-                        "text": message,
-                    }
-                ]
-        
-        kwargs = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": content,
-                }
-            ],
-            "max_completion_tokens": self.max_completion_tokens,
-        }
-
-        if self.temperature is not None:
-            kwargs["temperature"] = self.temperature
-
-        self._add_response_schema(kwargs, schema, strict)
-        response = self.client.chat.completions.create(**kwargs)
-        self._track_usage(response)
+        kwargs = self._get_request(get_text_content(message), schema, strict)
+        response = self._create_chat_completion(kwargs)
         return response.choices[0]
 
     def run_chat_completion_with_image(
@@ -172,47 +244,9 @@ class OpenAIClient:
         :
             The response from OpenAI as a string.
         """
-
-        if not isinstance(image_format, list):
-            image_format = [image_format]
-            base64_image = [base64_image]
-
-        for fmt in image_format:
-            if fmt not in ALLOWED_FORMATS:
-                raise ValueError(
-                    f"Image format {fmt} not supported. "
-                    f"Supported formats are {ALLOWED_FORMATS}"
-                )
-        content = [
-                    {"type": "text", "text": message},
-                    *[
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/{fmt};base64,{img}",
-                                "detail": "high"
-                            }
-                        }
-                        for img, fmt in zip(base64_image, image_format)
-                    ]
-                ]
-
-        kwargs = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": content,
-                }
-            ],
-            "max_completion_tokens": self.max_completion_tokens,
-        }
-
-        if self.temperature is not None:
-            kwargs["temperature"] = self.temperature
-        self._add_response_schema(kwargs, schema, strict)
-        response = self.client.chat.completions.create(**kwargs)
-        self._track_usage(response)
+        content = get_image_content(message, image_format, base64_image)
+        kwargs = self._get_request(content, schema, strict)
+        response = self._create_chat_completion(kwargs)
         return response.choices[0]
 
     def run_chat_completion_with_pdf(
@@ -240,36 +274,9 @@ class OpenAIClient:
         :
             The response from OpenAI as a string
         """
-        content = [
-                        {
-                        "type": "text",
-                        "text": message,
-                    },
-                    {
-                        "type": "file",
-                        "file": {
-                            "filename": "document.pdf",
-                            "file_data": f"data:application/pdf;base64,{base64_pdf}",
-                        },
-                    },
-                ]
-        
-        kwargs = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": content,
-                }
-            ],
-            "max_completion_tokens": self.max_completion_tokens,
-        }
-
-        if self.temperature is not None:
-            kwargs["temperature"] = self.temperature
-        self._add_response_schema(kwargs, schema, strict)
-        response = self.client.chat.completions.create(**kwargs)
-        self._track_usage(response)
+        content = get_pdf_content(message, base64_pdf)
+        kwargs = self._get_request(content, schema, strict)
+        response = self._create_chat_completion(kwargs)
         return response.choices[0]
 
     def run_chat_completion_with_text(
@@ -297,29 +304,9 @@ class OpenAIClient:
         :
             The response from OpenAI as a string
         """
-        content = [
-                    {
-                        "type": "text",
-                        "text": f"{message}\n\n{text_content}" ,
-                    },
-                ]
-        
-        kwargs = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": content,
-                }
-            ],
-            "max_completion_tokens": self.max_completion_tokens,
-        }
-
-        if self.temperature is not None:
-            kwargs["temperature"] = self.temperature
-        self._add_response_schema(kwargs, schema, strict)
-        response = self.client.chat.completions.create(**kwargs)
-        self._track_usage(response)
+        content = get_text_content(f"{message}\n\n{text_content}")
+        kwargs = self._get_request(content, schema, strict)
+        response = self._create_chat_completion(kwargs)
         return response.choices[0].message.content
 
     def run_chat_completion_with_image_url(
@@ -347,35 +334,85 @@ class OpenAIClient:
         :
             The response from OpenAI
         """
-        content = [
-                    {
-                        "type": "text",
-                        "text": message,
-                    },
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": image_url,
-                        },
-                    },
-                ]
-        kwargs = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": content,
-                }
-            ],
-            "max_completion_tokens": self.max_completion_tokens,
+        content = get_image_url_content(message, image_url)
+        kwargs = self._get_request(content, schema, strict)
+        response = self._create_chat_completion(kwargs)
+        return response.choices[0]
+
+
+def get_text_content(message: str) -> list:
+    """Return the content of a user message consisting of text"""
+    return [
+        {
+            "type": "text",
+            "text": message,
         }
+    ]
+
+
+def get_image_content(
+    message: str,
+    image_format: Union[ImageFmts, List[ImageFmts]],
+    base64_image: Union[str, List[str]],
+) -> list:
+    """Return the content of a user message with text and images"""
+    if not isinstance(image_format, list):
+        image_format = [image_format]
+        base64_image = [base64_image]
+
+    for fmt in image_format:
+        if fmt not in ALLOWED_FORMATS:
+            raise ValueError(
+                f"Image format {fmt} not supported. "
+                f"Supported formats are {ALLOWED_FORMATS}"
+            )
+    return [
+        {"type": "text", "text": message},
+        *[
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/{fmt};base64,{img}",
+                    "detail": "high"
+                }
+            }
+            for img, fmt in zip(base64_image, image_format)
+        ]
+    ]
+
+
+def get_pdf_content(message: str, base64_pdf: str) -> list:
+    """Return the content of a user message with text and a PDF file"""
+    return [
+        {
+            "type": "text",
+            "text": message,
+        },
+        {
+            "type": "file",
+            "file": {
+                "filename": "document.pdf",
+                "file_data": f"data:application/pdf;base64,{base64_pdf}",
+            },
+        },
+    ]
+
+
+def get_image_url_content(message: str, image_url: str) -> list:
+    """Return the content of a user message with text and an image URL"""
+    return [
+        {
+            "type": "text",
+            "text": message,
+        },
+        {
+            "type": "image_url",
+            "image_url": {
+                "url": image_url,
+            },
+        },
+    ]
 
-        if self.temperature is not None:
-            kwargs["temperature"] = self.temperature
-        self._add_response_schema(kwargs, schema, strict)
-        response = self.client.chat.completions.create(**kwargs)
-        self._track_usage(response)
-        return response.choices[0]  
 
 # encode an image file
 def encode_image(image_path: str):
@@ -1,3 +1,5 @@
+from collections import Counter, defaultdict
+
 from mira.metamodel.decapodes import *
 from mira.sources.acsets.decapodes.util import PARTIAL_TIME_DERIVATIVE
 
@@ -165,267 +167,278 @@ def expand_equations(
     var_name_to_index,
 ) -> Variable:
     """Expand the equations in a decaexpr JSON to its components"""
-    _type = decaexpr_equations_json["_type"]
-    if _type in {"Var", "Lit"}:
-        var_name = decaexpr_equations_json["name"]
-        if var_name not in var_name_to_index:
-            # Create new variable
-            var_type = "Constant" if _type == "Lit" else "Form0"
-            new_var_ix = len(variable_lookup)
-            variable_lookup[new_var_ix] = Variable(
-                id=new_var_ix, type=var_type, name=var_name
-            )
-            var_name_to_index[var_name] = new_var_ix
-        return variable_lookup[var_name_to_index[var_name]]
-
-    elif _type == "App2":
-        # Binary operation
-        arg1 = expand_equations(
-            decaexpr_equations_json["arg1"],
-            variable_lookup,
-            op2s_lookup,
-            op1s_lookup,
-            tangent_variables_lookup,
-            summations_lookup,
-            var_name_to_index,
-        )
-        arg2 = expand_equations(
-            decaexpr_equations_json["arg2"],
-            variable_lookup,
-            op2s_lookup,
-            op1s_lookup,
-            tangent_variables_lookup,
-            summations_lookup,
-            var_name_to_index,
-        )
-        op2 = decaexpr_equations_json["f"]
-        # Create new variable that is the result of the binary operation
-        var_type = "infer"
-        if op2 == "*":
-            name_prefix = "mult"
-        elif op2 == "+":
-            name_prefix = "add"
-        elif op2 == "-":
-            name_prefix = "sub"
-        elif op2 == "/":
-            name_prefix = "div"
-        else:
-            raise NotImplementedError(
-                f"Unhandled binary operation: {op2}"
-            )
-
-        new_var_name_ix = len(
-            [var.name for var in variable_lookup.values()
-             if var.name.startswith(name_prefix)]
-        ) + 1
-        new_var_name = f"{name_prefix}_{new_var_name_ix}"
-
-        new_var_ix = len(variable_lookup)
-        variable_lookup[new_var_ix] = Variable(
-            id=new_var_ix, type=var_type, name=new_var_name
-        )
-
-        # Add binary operation
-        new_op2_ix = len(op2s_lookup)
-        op2s_lookup[new_op2_ix] = Op2(
-            id=new_op2_ix,
-            proj1=variable_lookup[arg1.id],
-            proj2=variable_lookup[arg2.id],
-            res=variable_lookup[new_var_ix],
-            function_str=op2,
-        )
-
-        var_name_to_index[new_var_name] = new_var_ix
-
-        return variable_lookup[new_var_ix]
-
-    elif _type == "App1":
-        # Unary operation; apply a function to an argument
-        arg = expand_equations(
-            decaexpr_equations_json["arg"],
-            variable_lookup,
-            op2s_lookup,
-            op1s_lookup,
-            tangent_variables_lookup,
-            summations_lookup,
-            var_name_to_index,
-        )
-        op1 = decaexpr_equations_json["f"]
-
-        # Create new variable that is the result of the unary operation
-        var_type = "infer"
-        var_name = f"{op1}({arg.name})"
-
-        new_var_ix = len(variable_lookup)
-        variable_lookup[new_var_ix] = Variable(
-            id=new_var_ix, type=var_type, name=var_name
-        )
-
-        var_name_to_index[var_name] = new_var_ix
-
-        # Add unary operation
-        new_op1_ix = len(op1s_lookup)
-        op1s_lookup[new_op1_ix] = Op1(
-            id=new_op1_ix,
-            src=variable_lookup[arg.id],
-            tgt=variable_lookup[new_var_ix],
-            function_str=op1,
-        )
+    expander = EquationExpander(
+        variable_lookup=variable_lookup,
+        op2s_lookup=op2s_lookup,
+        op1s_lookup=op1s_lookup,
+        tangent_variables_lookup=tangent_variables_lookup,
+        summations_lookup=summations_lookup,
+        var_name_to_index=var_name_to_index,
+    )
+    return expander.expand(decaexpr_equations_json)
 
-        return variable_lookup[new_var_ix]
-
-    elif _type == "Tan":
-        # Time derivative
-        arg = expand_equations(
-            decaexpr_equations_json["var"],
-            variable_lookup,
-            op2s_lookup,
-            op1s_lookup,
-            tangent_variables_lookup,
-            summations_lookup,
-            var_name_to_index,
-        )
 
-        # Create new variable that is the result of the unary operation
-        var_type = "infer"
-        var_name = f"{PARTIAL_TIME_DERIVATIVE}({arg.name})"
+#: The prefixes of the names of variables that are the result of operations
+RESULT_NAME_PREFIXES = ("mult", "add", "sub", "div")
 
-        new_var_ix = len(variable_lookup)
-        variable_lookup[new_var_ix] = Variable(
-            id=new_var_ix, type=var_type, name=var_name
-        )
 
-        var_name_to_index[var_name] = new_var_ix
+class EquationExpander:
+    """Expand the equations of a decaexpr JSON into the lookup tables of a
+    Decapode
 
-        # Add unary operation
-        new_op1_ix = len(op1s_lookup)
-        op1s_lookup[new_op1_ix] = Op1(
-            id=new_op1_ix,
-            src=variable_lookup[arg.id],
-            tgt=variable_lookup[new_var_ix],
-            function_str=PARTIAL_TIME_DERIVATIVE,
-        )
+    The expander keeps count of the variable names starting with each of
+    the prefixes used to name the results of operations, so that new
+    variables are named without going through all the variables.
 
-        # Add tangent variable - the result of the derivative
-        new_tangent_var_ix = len(tangent_variables_lookup)
-        tangent_variables_lookup[new_tangent_var_ix] = TangentVariable(
-            id=new_tangent_var_ix, incl_var=variable_lookup[new_var_ix]
-        )
+    Parameters
+    ----------
+    variable_lookup : dict[int, Variable]
+        The lookup table for the variables
+    op2s_lookup : dict[int, Op2]
+        The lookup table for the binary operations
+    op1s_lookup : dict[int, Op1]
+        The lookup table for the unary operations
+    tangent_variables_lookup : dict[int, TangentVariable]
+        The lookup table for the tangent variables
+    summations_lookup : dict[int, Summation]
+        The lookup table for the summations
+    var_name_to_index : dict[str, int]
+        The lookup table for the variable names
+    """
 
-        return variable_lookup[new_var_ix]
-
-    elif _type == "Mult":
-        # Loop through the arguments and multiply them together to get the
-        # result, start from the left
-        new_mult_result = None
-        new_var_ix = None
-        for iter_ix in range(len(decaexpr_equations_json["args"]) - 1):
-            if iter_ix == 0:
-                # First iteration, create a new variable with the first two
-                # arguments
-                arg0 = expand_equations(
-                    decaexpr_equations_json["args"][iter_ix],
-                    variable_lookup,
-                    op2s_lookup,
-                    op1s_lookup,
-                    tangent_variables_lookup,
-                    summations_lookup,
-                    var_name_to_index,
-                )
-                arg1 = expand_equations(
-                    decaexpr_equations_json["args"][iter_ix + 1],
-                    variable_lookup,
-                    op2s_lookup,
-                    op1s_lookup,
-                    tangent_variables_lookup,
-                    summations_lookup,
-                    var_name_to_index,
-                )
+    def __init__(
+        self,
+        variable_lookup,
+        op2s_lookup,
+        op1s_lookup,
+        tangent_variables_lookup,
+        summations_lookup,
+        var_name_to_index,
+    ):
+        self.variable_lookup = variable_lookup
+        self.op2s_lookup = op2s_lookup
+        self.op1s_lookup = op1s_lookup
+        self.tangent_variables_lookup = tangent_variables_lookup
+        self.summations_lookup = summations_lookup
+        self.var_name_to_index = var_name_to_index
+        self.prefix_counts = Counter()
+        for var in variable_lookup.values():
+            self._count_prefixes(var, 1)
+        # The places where each variable is referenced in the operations,
+        # keyed by variable id, as tuples of the object and the attribute
+        # or list index referencing it
+        self.references = defaultdict(list)
+        for op1 in op1s_lookup.values():
+            self._add_references(op1, ("src", "tgt"))
+        for op2 in op2s_lookup.values():
+            self._add_references(op2, ("proj1", "proj2", "res"))
+        for tangent_var in tangent_variables_lookup.values():
+            self._add_references(tangent_var, ("incl_var",))
+        for summation in summations_lookup.values():
+            self._add_summation_references(summation)
+
+    def _count_prefixes(self, variable: Variable, increment: int):
+        for prefix in RESULT_NAME_PREFIXES:
+            if variable.name.startswith(prefix):
+                self.prefix_counts[prefix] += increment
+
+    def add_variable(self, var_type: str, name: str) -> Variable:
+        """Add a new variable to the lookup table and return it"""
+        new_var_ix = len(self.variable_lookup)
+        if new_var_ix in self.variable_lookup:
+            self._count_prefixes(self.variable_lookup[new_var_ix], -1)
+        variable = Variable(id=new_var_ix, type=var_type, name=name)
+        self.variable_lookup[new_var_ix] = variable
+        self._count_prefixes(variable, 1)
+        return variable
+
+    def _add_references(self, op, attributes):
+        for attribute in attributes:
+            self.references[getattr(op, attribute).id].append((op, attribute))
+
+    def _add_summation_references(self, summation: Summation):
+        for ix, summand in enumerate(summation.summands):
+            self.references[summand.id].append((summation.summands, ix))
+        self.references[summation.sum.id].append((summation, "sum"))
+
+    def replace_variable(self, replacement: Variable, to_replace: Variable):
+        """Replace a variable in the lookup tables and operations
+
+        This is equivalent to :func:`replace_variable`, but only the
+        references to the variable are visited instead of all operations.
+
+        Parameters
+        ----------
+        replacement : Variable
+            The variable to replace the other variable with
+        to_replace : Variable
+            The variable to be replaced
+        """
+        # Remove the variable to be replaced from the lookup tables
+        removed = self.variable_lookup.pop(to_replace.id)
+        self._count_prefixes(removed, -1)
+        del self.var_name_to_index[to_replace.name]
+
+        references = self.references.pop(to_replace.id, [])
+        for container, key in references:
+            if isinstance(key, int):
+                container[key] = replacement
+            else:
+                setattr(container, key, replacement)
+        self.references[replacement.id].extend(references)
+
+    def expand(self, decaexpr_equations_json) -> Variable:
+        """Expand (one side of) an equation, returning its result variable"""
+        _type = decaexpr_equations_json["_type"]
+        if _type in {"Var", "Lit"}:
+            var_name = decaexpr_equations_json["name"]
+            if var_name not in self.var_name_to_index:
+                # Create new variable
+                var_type = "Constant" if _type == "Lit" else "Form0"
+                new_var = self.add_variable(var_type, var_name)
+                self.var_name_to_index[var_name] = new_var.id
+            return self.variable_lookup[self.var_name_to_index[var_name]]
+
+        elif _type == "App2":
+            # Binary operation
+            arg1 = self.expand(decaexpr_equations_json["arg1"])
+            arg2 = self.expand(decaexpr_equations_json["arg2"])
+            op2 = decaexpr_equations_json["f"]
+            # Create new variable that is the result of the binary operation
+            if op2 == "*":
+                name_prefix = "mult"
+            elif op2 == "+":
+                name_prefix = "add"
+            elif op2 == "-":
+                name_prefix = "sub"
+            elif op2 == "/":
+                name_prefix = "div"
             else:
-                # Subsequent iterations, use the result of the previous
-                # iteration
-                assert new_mult_result is not None, "Should not be None"
-                arg0 = new_mult_result
-                arg1 = expand_equations(
-                    decaexpr_equations_json["args"][iter_ix + 1],
-                    variable_lookup,
-                    op2s_lookup,
-                    op1s_lookup,
-                    tangent_variables_lookup,
-                    summations_lookup,
-                    var_name_to_index,
+                raise NotImplementedError(
+                    f"Unhandled binary operation: {op2}"
                 )
-
-            # Create new variable that is the result of the multiplication
-            var_type = "infer"
-            new_mult_ix = len([var.name for var in variable_lookup.values() if
-                               var.name.startswith("mult")]) + 1
-            new_var_name = f"mult_{new_mult_ix}"
-
-            new_var_ix = len(variable_lookup)
-            variable_lookup[new_var_ix] = Variable(
-                id=new_var_ix, type=var_type, name=new_var_name
-            )
-
-            var_name_to_index[new_var_name] = new_var_ix
+            new_var_name_ix = self.prefix_counts[name_prefix] + 1
+            new_var_name = f"{name_prefix}_{new_var_name_ix}"
+            new_var = self.add_variable("infer", new_var_name)
 
             # Add binary operation
-            new_op2_ix = len(op2s_lookup)
-            op2s_lookup[new_op2_ix] = Op2(
-                id=new_op2_ix,
-                proj1=variable_lookup[arg0.id],
-                proj2=variable_lookup[arg1.id],
-                res=variable_lookup[new_var_ix],
-                function_str="*",
+            self.add_op2(arg1, arg2, new_var, op2)
+            self.var_name_to_index[new_var_name] = new_var.id
+            return new_var
+
+        elif _type == "App1":
+            # Unary operation; apply a function to an argument
+            arg = self.expand(decaexpr_equations_json["arg"])
+            op1 = decaexpr_equations_json["f"]
+
+            # Create new variable that is the result of the unary operation
+            var_name = f"{op1}({arg.name})"
+            new_var = self.add_variable("infer", var_name)
+            self.var_name_to_index[var_name] = new_var.id
+
+            # Add unary operation
+            self.add_op1(arg, new_var, op1)
+            return new_var
+
+        elif _type == "Tan":
+            # Time derivative
+            arg = self.expand(decaexpr_equations_json["var"])
+
+            # Create new variable that is the result of the unary operation
+            var_name = f"{PARTIAL_TIME_DERIVATIVE}({arg.name})"
+            new_var = self.add_variable("infer", var_name)
+            self.var_name_to_index[var_name] = new_var.id
+
+            # Add unary operation
+            self.add_op1(arg, new_var, PARTIAL_TIME_DERIVATIVE)
+
+            # Add tangent variable - the result of the derivative
+            new_tangent_var_ix = len(self.tangent_variables_lookup)
+            tangent_var = TangentVariable(id=new_tangent_var_ix,
+                                          incl_var=new_var)
+            self.tangent_variables_lookup[new_tangent_var_ix] = tangent_var
+            self._add_references(tangent_var, ("incl_var",))
+            return new_var
+
+        elif _type == "Mult":
+            # Loop through the arguments and multiply them together to get
+            # the result, start from the left
+            args = decaexpr_equations_json["args"]
+            # The first argument, and then the result of the previous
+            # multiplication, is multiplied by the next argument
+            mult_result = self.expand(args[0])
+            for arg in args[1:]:
+                arg1 = self.expand(arg)
+
+                # Create new variable that is the result of the
+                # multiplication
+                new_mult_ix = self.prefix_counts["mult"] + 1
+                new_var_name = f"mult_{new_mult_ix}"
+                new_mult_result = self.add_variable("infer", new_var_name)
+                self.var_name_to_index[new_var_name] = new_mult_result.id
+
+                # Add binary operation
+                self.add_op2(mult_result, arg1, new_mult_result, "*")
+                mult_result = new_mult_result
+
+            return mult_result
+
+        elif _type == "Plus":
+            # In decapode:
+            #  - the Σ table specifies the result of the sums in the equation
+            #  - the summand table specifies the terms in the sum(s), which
+            #    sum they belong to is specified by the summation value which
+            #    references one of the sums in the Σ table
+            summand_list = [
+                self.expand(summand_json)
+                for summand_json in decaexpr_equations_json["args"]
+            ]
+
+            # Create new variable that is the result of the addition
+            new_add_ix = self.prefix_counts["add"] + 1
+            new_var_name = f"sum_{new_add_ix}"
+            new_var = self.add_variable("infer", new_var_name)
+
+            new_sum_ix = len(self.summations_lookup)
+            summation = Summation(
+                id=new_sum_ix,
+                summands=summand_list,
+                sum=new_var,
             )
+            self.summations_lookup[new_sum_ix] = summation
+            self._add_summation_references(summation)
 
-            new_mult_result = variable_lookup[new_var_ix]
-
-        assert new_var_ix is not None
-        return variable_lookup[new_var_ix]
-
-    elif _type == "Plus":
-        # In decapode:
-        #  - the Σ table specifies the result of the sums in the equation
-        #  - the summand table specifies the terms in the sum(s), which sum
-        #    they belong to is specified by the summation value which
-        #    references one of the sums in the Σ table
-        summand_list = []
-        for summand_json in decaexpr_equations_json["args"]:
-            summand_var = expand_equations(
-                summand_json,
-                variable_lookup,
-                op2s_lookup,
-                op1s_lookup,
-                tangent_variables_lookup,
-                summations_lookup,
-                var_name_to_index,
-            )
-            summand_list.append(summand_var)
+            self.var_name_to_index[new_var_name] = new_var.id
+            return new_var
 
-        # Create new variable that is the result of the addition
-        var_type = "infer"
-        new_add_ix = len([var.name for var in variable_lookup.values()
-                          if var.name.startswith("add")]) + 1
-        new_var_name = f"sum_{new_add_ix}"
+        else:
+            raise NotImplementedError(f"Unhandled equation type: {_type}")
 
-        new_var_ix = len(variable_lookup)
-        variable_lookup[new_var_ix] = Variable(
-            id=new_var_ix, type=var_type, name=new_var_name
+    def add_op1(self, src: Variable, tgt: Variable, function_str: str):
+        """Add a unary operation to the lookup table"""
+        new_op1_ix = len(self.op1s_lookup)
+        op1 = Op1(
+            id=new_op1_ix,
+            src=self.variable_lookup[src.id],
+            tgt=self.variable_lookup[tgt.id],
+            function_str=function_str,
         )
-
-        new_sum_ix = len(summations_lookup)
-        summations_lookup[new_sum_ix] = Summation(
-            id=new_sum_ix,
-            summands=summand_list,
-            sum=variable_lookup[new_var_ix],
+        self.op1s_lookup[new_op1_ix] = op1
+        self._add_references(op1, ("src", "tgt"))
+
+    def add_op2(self, proj1: Variable, proj2: Variable, res: Variable,
+                function_str: str):
+        """Add a binary operation to the lookup table"""
+        new_op2_ix = len(self.op2s_lookup)
+        op2 = Op2(
+            id=new_op2_ix,
+            proj1=self.variable_lookup[proj1.id],
+            proj2=self.variable_lookup[proj2.id],
+            res=self.variable_lookup[res.id],
+            function_str=function_str,
         )
-
-        var_name_to_index[new_var_name] = new_var_ix
-        return variable_lookup[new_var_ix]
-
-    else:
-        raise NotImplementedError(f"Unhandled equation type: {_type}")
+        self.op2s_lookup[new_op2_ix] = op2
+        self._add_references(op2, ("proj1", "proj2", "res"))
 
 
 def replace_variable(replacement: Variable,
@@ -518,26 +531,19 @@ def process_decaexpr(decaexpr_json) -> Decapode:
     tangent_variables_lookup = {}
     summations_lookup = {}
 
+    expander = EquationExpander(
+        variable_lookup=variables,
+        op1s_lookup=op1s_lookup,
+        op2s_lookup=op2_lookup,
+        tangent_variables_lookup=tangent_variables_lookup,
+        summations_lookup=summations_lookup,
+        var_name_to_index=name_to_variable_index,
+    )
+
     # Expand each side of the equation(s) into its components
     for equation_json in decaexpr_json_model["equations"]:
-        lhs_var = expand_equations(
-            equation_json["lhs"],
-            variable_lookup=variables,
-            op1s_lookup=op1s_lookup,
-            op2s_lookup=op2_lookup,
-            tangent_variables_lookup=tangent_variables_lookup,
-            summations_lookup=summations_lookup,
-            var_name_to_index=name_to_variable_index,
-        )
-        rhs_var = expand_equations(
-            equation_json["rhs"],
-            variable_lookup=variables,
-            op1s_lookup=op1s_lookup,
-            op2s_lookup=op2_lookup,
-            tangent_variables_lookup=tangent_variables_lookup,
-            summations_lookup=summations_lookup,
-            var_name_to_index=name_to_variable_index,
-        )
+        lhs_var = expander.expand(equation_json["lhs"])
+        rhs_var = expander.expand(equation_json["rhs"])
 
         lhs_type = equation_json["lhs"]["_type"]
         lhs_priority = equation_type_priority.index(lhs_type)
@@ -554,16 +560,7 @@ def process_decaexpr(decaexpr_json) -> Decapode:
             del_var = lhs_var if lhs_priority > rhs_priority else rhs_var
 
         # Replace the variable that is not the priority variable
-        replace_variable(
-            replacement=prio_var,
-            to_replace=del_var,
-            variable_lookup=variables,
-            name_to_variable_index=name_to_variable_index,
-            op2s_lookup=op2_lookup,
-            op1s_lookup=op1s_lookup,
-            tangent_variables_lookup=tangent_variables_lookup,
-            summations_lookup=summations_lookup,
-        )
+        expander.replace_variable(replacement=prio_var, to_replace=del_var)
 
     return Decapode(
         variables=variables,
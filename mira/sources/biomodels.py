@@ -1,27 +1,62 @@
 """
 The BioModels database lists several high quality
 models at https://www.ebi.ac.uk/biomodels/covid-19.
+
+Models are downloaded and parsed in bulk with :func:`ingest_biomodels`,
+which downloads over a pooled HTTP session in a thread pool (or reads a
+local mirror of the BioModels files) and parses SBML in a process pool. The
+parsed template models are cached by model ID and a hash of the SBML and
+the MIRA version, so models are only parsed again if their SBML or the
+parser changed.
 """
+import hashlib
 import io
 import json
+import time
 import zipfile
-from typing import Dict, List
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
+import click
 import pystow
 import requests
+from requests.adapters import HTTPAdapter
 from tabulate import tabulate
 from tqdm import tqdm
 
+from mira import __version__
 from mira.metamodel import TemplateModel
 from mira.modeling.viz import GraphicalModel
 from mira.sources.sbml import (
     template_model_from_sbml_file_obj,
     template_model_from_sbml_string,
 )
+from mira.utils import write_atomic
+
+__all__ = [
+    "query_biomodels",
+    "get_sbml_model",
+    "download_sbml_model",
+    "get_template_model",
+    "ingest_biomodels",
+    "get_summary_table",
+    "IngestionResult",
+]
 
 MODULE = pystow.module("mira")
 BIOMODELS = MODULE.module("biomodels")
 
+#: The version of the parser, part of the key of cached template models
+PARSE_CACHE_VERSION = f"mira-{__version__}"
+
 SEARCH_URL = "https://biomodels.org/search"
 DOWNLOAD_URL = "https://biomodels.org/search/download"
 
@@ -63,10 +98,24 @@ MODEL_TO_PUBMED = {
     "BIOMD0000000717": "30839942",
 }
 
+#: The timeout of requests to BioModels, in seconds
+TIMEOUT = 60
+
+
+@lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    """Return a session with a connection pool shared by all requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 def query_biomodels(
     query: str = "submitter_keywords:COVID-19",
     limit: int = 30,
+    workers: int = 8,
 ) -> List[Dict[str, str]]:
     """Query and paginate over results from the BioModels API.
 
@@ -79,6 +128,8 @@ def query_biomodels(
         "submitter_keywords:COVID-19".
     limit :
         The maximum number of results to return. Defaults to 30.
+    workers :
+        The number of model metadata requests made at the same time.
 
     Returns
     -------
@@ -86,7 +137,7 @@ def query_biomodels(
         A list of model metadata dictionaries.
     """
     model_ids = set()
-    res = requests.get(
+    res = get_session().get(
         SEARCH_URL,
         headers={"Accept": "application/json"},
         params={
@@ -94,6 +145,7 @@ def query_biomodels(
             "domain": "biomodels",
             "numResults": limit,
         },
+        timeout=TIMEOUT,
     ).json()
     model_ids.update(
         model['id']
@@ -104,68 +156,106 @@ def query_biomodels(
 
     # TODO extend with pagination at same time as making query configurable
 
-    rv = []
-    # Split titles that have the AuthorYYYY - Title format
-    for model_id in model_ids:
-        model = {"biomodels_id": model_id}
-        model_metadata = requests.get(
-            f"https://www.ebi.ac.uk/biomodels/{model_id}",
-            headers={"Accept": "application/json"},
-        ).json()
-        publication_link = model_metadata.get("publication", {}).get("link")
-        if publication_link:
-            if model_id in MODEL_TO_PUBMED:
-                model["pubmed"] = MODEL_TO_PUBMED[model_id]
-            elif "identifiers.org/pubmed/" in publication_link:
-                model["pubmed"] = publication_link.split("/")[-1]
-            elif publication_link.startswith("http://identifiers.org/doi/"):
-                model["doi"] = publication_link[len("http://identifiers.org/doi/"):]
-            elif publication_link.startswith("https://doi.org/"):
-                model["doi"] = publication_link[len("https://doi.org/"):]
-            else:
-                tqdm.write(f"[{model_id}] unhandled publication link: {publication_link}")
-        model_name = model_metadata.get("name")
-        if model_name == model_id:
-            continue
-        try:
-            model_author, model_name = (s.strip() for s in model_name.split(" - ", 1))
-        except ValueError:
-            model["name"] = model_name
-            continue
+    # Fetch the metadata of the models concurrently
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        models = executor.map(_get_model_metadata, sorted(model_ids))
+        return [model for model in models if model is not None]
+
+
+def _get_model_metadata(model_id: str) -> Optional[Dict[str, str]]:
+    model = {"biomodels_id": model_id}
+    model_metadata = get_session().get(
+        f"https://www.ebi.ac.uk/biomodels/{model_id}",
+        headers={"Accept": "application/json"},
+        timeout=TIMEOUT,
+    ).json()
+    publication_link = model_metadata.get("publication", {}).get("link")
+    if publication_link:
+        if model_id in MODEL_TO_PUBMED:
+            model["pubmed"] = MODEL_TO_PUBMED[model_id]
+        elif "identifiers.org/pubmed/" in publication_link:
+            model["pubmed"] = publication_link.split("/")[-1]
+        elif publication_link.startswith("http://identifiers.org/doi/"):
+            model["doi"] = publication_link[len("http://identifiers.org/doi/"):]
+        elif publication_link.startswith("https://doi.org/"):
+            model["doi"] = publication_link[len("https://doi.org/"):]
         else:
-            model["name"] = model_name
-            model["author"] = model_author[:-4]
-            model["year"] = model_author[-4:]
-        rv.append(model)
-    return rv
+            tqdm.write(f"[{model_id}] unhandled publication link: {publication_link}")
+    model_name = model_metadata.get("name")
+    if model_name == model_id:
+        return None
+    # Split titles that have the AuthorYYYY - Title format
+    try:
+        model_author, model_name = (s.strip() for s in model_name.split(" - ", 1))
+    except ValueError:
+        return None
+    model["name"] = model_name
+    model["author"] = model_author[:-4]
+    model["year"] = model_author[-4:]
+    return model
 
 
-def get_sbml_model(model_id: str) -> str:
+def get_sbml_model(model_id: str, force: bool = False) -> str:
     """Return the SBML string content for a BioModels model from the web.
 
+    The archive of the model is downloaded once and reused from the
+    BioModels directory of the MIRA pystow module afterwards.
+
     Parameters
     ----------
     model_id :
         The BioModels ID of the model.
+    force :
+        If True, the archive of the model is downloaded again even if it
+        was downloaded before.
 
     Returns
     -------
     :
         The SBML XML string corresponding to the model.
     """
+    path = download_sbml_model(model_id, force=force)
+    return _read_sbml(path, model_id).decode('utf-8')
+
+
+def download_sbml_model(model_id: str, force: bool = False) -> Path:
+    """Download the archive of a BioModels model, unless already downloaded.
+
+    Parameters
+    ----------
+    model_id :
+        The BioModels ID of the model.
+    force :
+        If True, the archive is downloaded even if it was downloaded before.
+
+    Returns
+    -------
+    :
+        The path to the zip archive containing the SBML file of the model.
+    """
+    path = BIOMODELS.join("models", model_id, name=f"{model_id}.zip")
+    if path.is_file() and not force:
+        return path
     url = f'{DOWNLOAD_URL}?models={model_id}'
-    res = requests.get(url)
+    res = get_session().get(url, timeout=TIMEOUT)
     if res.status_code == 404:
         raise FileNotFoundError(f'No such file on source server: {model_id}')
     res.raise_for_status()
-    try:
-        z = zipfile.ZipFile(io.BytesIO(res.content))
-    except zipfile.BadZipFile:
+    if not zipfile.is_zipfile(io.BytesIO(res.content)):
         raise ValueError(
             f'Expected a zip archive for {model_id} from {res.url} but got '
             f'{res.headers.get("Content-Type")!r} ({len(res.content)} bytes)'
         )
-    return z.open(f'{model_id}.xml').read().decode('utf-8')
+    write_atomic(path, res.content)
+    return path
+
+
+def _read_sbml(path: Path, model_id: str) -> bytes:
+    """Return the SBML of a model from an XML file or a zip archive."""
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path) as z:
+            return z.read(f'{model_id}.xml')
+    return path.read_bytes()
 
 
 def get_template_model(model_id: str) -> TemplateModel:
@@ -186,10 +276,264 @@ def get_template_model(model_id: str) -> TemplateModel:
     return template_model
 
 
-def main():
+@dataclass
+class IngestionResult:
+    """The result of ingesting a BioModels model
+
+    Attributes
+    ----------
+    model_id :
+        The BioModels ID of the model.
+    status :
+        One of "parsed", "cached" (the template model was taken from the
+        cache) or "failed".
+    stage :
+        The stage that failed, either "download" or "parse", if any.
+    error :
+        Error message if a stage failed, otherwise None.
+    sbml_hash :
+        The hash of the SBML of the model the cache is keyed by.
+    n_templates :
+        The number of templates of the template model.
+    download_time :
+        The time taken to download, or read from the mirror, and hash the
+        SBML, in seconds.
+    parse_time :
+        The time taken to parse the SBML into a template model, in
+        seconds. It is zero if the template model was cached.
+    path :
+        The path to the JSON file of the template model.
+    """
+    model_id: str
+    status: str = "parsed"
+    stage: Optional[str] = None
+    error: Optional[str] = None
+    sbml_hash: Optional[str] = None
+    n_templates: Optional[int] = None
+    download_time: float = 0.0
+    parse_time: float = 0.0
+    path: Optional[Path] = None
+
+    @property
+    def success(self) -> bool:
+        return self.status != "failed"
+
+    def get_template_model(self) -> TemplateModel:
+        """Return the ingested template model.
+
+        Raises
+        ------
+        ValueError
+            If the model failed to be ingested.
+        """
+        if not self.success or self.path is None:
+            raise ValueError(f"{self.model_id} failed to {self.stage}: "
+                             f"{self.error}")
+        with open(self.path) as fh:
+            return TemplateModel.from_json(json.load(fh))
+
+
+def ingest_biomodels(
+    model_ids: Iterable[str],
+    *,
+    mirror: Union[None, str, Path] = None,
+    cache_dir: Union[None, str, Path] = None,
+    download_workers: int = 8,
+    parse_workers: Optional[int] = None,
+    use_cache: bool = True,
+) -> Dict[str, IngestionResult]:
+    """Download and parse BioModels models into template models in bulk.
+
+    Downloads run concurrently in a thread pool and the SBML is parsed in a
+    process pool, starting as soon as the download of a model finished.
+    Each template model is stored as JSON in the cache directory under the
+    model ID and a hash of its SBML, the reporter species of the model
+    and :data:`PARSE_CACHE_VERSION`, so a model is only parsed again if its
+    SBML or the version of MIRA changed.
+
+    Parameters
+    ----------
+    model_ids :
+        The BioModels IDs of the models.
+    mirror :
+        A local mirror of the BioModels files containing the SBML file of
+        each model as ``<model_id>/<model_id>.xml`` or ``<model_id>.xml``,
+        or the zip archive as downloaded from BioModels in place of the XML
+        file. Models not found in the mirror are downloaded. If None, all
+        models are downloaded, unless they were downloaded before.
+    cache_dir :
+        The directory in which the parsed template models are cached. If
+        None, the ``cache`` subdirectory of the BioModels directory of the
+        MIRA pystow module is used.
+    download_workers :
+        The number of models downloaded at the same time.
+    parse_workers :
+        The number of processes parsing models. If None, the number of
+        CPUs is used. If 1, the models are parsed in this process.
+    use_cache :
+        If False, all models are parsed, and their cached template models
+        replaced.
+
+    Returns
+    -------
+    :
+        A dict of results keyed by model ID, in the order of the given IDs.
+    """
+    model_ids = list(dict.fromkeys(model_ids))
+    mirror = Path(mirror) if mirror is not None else None
+    cache_dir = Path(cache_dir) if cache_dir is not None \
+        else BIOMODELS.join("cache")
+    results = {model_id: IngestionResult(model_id) for model_id in model_ids}
+
+    parse_pool: Executor
+    if parse_workers == 1:
+        parse_pool = ThreadPoolExecutor(max_workers=1)
+    else:
+        parse_pool = ProcessPoolExecutor(parse_workers)
+        # Start the worker processes before any download thread, since
+        # forking while other threads hold locks can deadlock the workers
+        parse_pool.submit(int).result()
+    parse_futures = {}
+    with parse_pool, ThreadPoolExecutor(max_workers=download_workers) \
+            as download_pool:
+        download_futures = {
+            download_pool.submit(_get_sbml_path, model_id, mirror): model_id
+            for model_id in model_ids
+        }
+        for future in tqdm(as_completed(download_futures),
+                           total=len(download_futures), unit="model",
+                           desc="Downloading"):
+            result = results[download_futures[future]]
+            try:
+                sbml_path, result.sbml_hash, result.download_time = \
+                    future.result()
+            except Exception as e:
+                _set_failed(result, "download", e)
+                continue
+            result.path = cache_dir.joinpath(
+                result.model_id, f"{result.sbml_hash}.json"
+            )
+            if use_cache and result.path.is_file():
+                result.status = "cached"
+                result.n_templates = _count_templates(result.path)
+                continue
+            parse_futures[result.model_id] = parse_pool.submit(
+                _parse_sbml, result.model_id, sbml_path, result.path
+            )
+        for model_id, future in tqdm(parse_futures.items(), unit="model",
+                                     desc="Parsing"):
+            result = results[model_id]
+            try:
+                result.n_templates, result.parse_time = future.result()
+            except Exception as e:
+                _set_failed(result, "parse", e)
+    return results
+
+
+def get_summary_table(results: Dict[str, IngestionResult]):
+    """Return a summary table of the ingestion of BioModels models.
+
+    Parameters
+    ----------
+    results :
+        The results of :func:`ingest_biomodels`.
+
+    Returns
+    -------
+    :
+        A pandas DataFrame with a row for each model, its status and, if it
+        failed, the stage and error, its number of templates, and the time
+        taken to download and parse it.
+    """
+    import pandas as pd
+
+    columns = ["model_id", "status", "stage", "error", "n_templates",
+               "download_time", "parse_time"]
+    return pd.DataFrame(
+        [[getattr(result, column) for column in columns]
+         for result in results.values()],
+        columns=columns,
+    )
+
+
+def _get_sbml_path(model_id: str, mirror: Optional[Path]) \
+        -> Tuple[Path, str, float]:
+    start = time.perf_counter()
+    path = _find_in_mirror(mirror, model_id) if mirror is not None else None
+    if path is None:
+        path = download_sbml_model(model_id)
+    digest = hashlib.sha256(_read_sbml(path, model_id))
+    # The reporter species change the parsed template model as well
+    digest.update(json.dumps(SPECIES_BLACKLIST.get(model_id)).encode("utf-8"))
+    # A template model parsed by another version of MIRA may differ
+    digest.update(PARSE_CACHE_VERSION.encode("utf-8"))
+    return path, digest.hexdigest(), time.perf_counter() - start
+
+
+def _find_in_mirror(mirror: Path, model_id: str) -> Optional[Path]:
+    for directory in (mirror / model_id, mirror):
+        for suffix in (".xml", ".zip"):
+            path = directory / f"{model_id}{suffix}"
+            if path.is_file():
+                return path
+    return None
+
+
+def _parse_sbml(model_id: str, sbml_path: Path, json_path: Path) \
+        -> Tuple[int, float]:
+    """Parse the SBML of a model and write the template model to the cache,
+    returning its number of templates and the time taken."""
+    start = time.perf_counter()
+    template_model = template_model_from_sbml_string(
+        _read_sbml(sbml_path, model_id).decode("utf-8"),
+        model_id=model_id,
+        reporter_ids=SPECIES_BLACKLIST.get(model_id),
+    )
+    write_atomic(json_path, json.dumps(template_model.to_json(), indent=2))
+    # Remove the template models parsed from previous versions of the SBML
+    for path in json_path.parent.glob("*.json"):
+        if path != json_path:
+            path.unlink(missing_ok=True)
+    return len(template_model.templates), time.perf_counter() - start
+
+
+def _count_templates(path: Path) -> int:
+    with open(path) as fh:
+        return len(json.load(fh)["templates"])
+
+
+def _set_failed(result: IngestionResult, stage: str, error: Exception):
+    tqdm.write(f"[{result.model_id}] failed to {stage}: {error}")
+    result.status = "failed"
+    result.stage = stage
+    result.error = f"{type(error).__name__}: {error}"
+    result.path = None
+
+
+def _render_model(json_path: Path, label: str, paths: List[Path]) -> None:
+    """Write a petri-net type graphical representation of a model."""
+    with open(json_path) as fh:
+        template_model = TemplateModel.from_json(json.load(fh))
+    m = GraphicalModel.from_template_model(template_model)
+    m.graph.graph_attr["label"] = label
+    for path in paths:
+        m.write(path)
+
+
+@click.command()
+@click.option("--mirror", type=click.Path(exists=True, file_okay=False),
+              help="A local mirror of the BioModels files")
+@click.option("--download-workers", default=8, show_default=True,
+              help="The number of models downloaded at the same time")
+@click.option("--parse-workers", type=int,
+              help="The number of processes parsing models [default: the "
+                   "number of CPUs]")
+@click.option("--no-cache", is_flag=True,
+              help="Parse all models instead of reusing cached ones")
+def main(mirror, download_workers, parse_workers, no_cache):
     """Iterate over COVID-19 models and parse them."""
     import pandas as pd
-    from modeling.triples import TriplesGenerator
+    from mira.modeling.triples import TriplesGenerator
 
     triples_path = BIOMODELS.join(name="triples.tsv")
     query_path = BIOMODELS.join(name="query.tsv")
@@ -201,48 +545,52 @@ def main():
         df = df[["biomodels_id", "name", "author", "year", "pubmed", "doi"]]
         df.to_csv(query_path, sep="\t", index=False)
 
+    results = ingest_biomodels(
+        df["biomodels_id"], mirror=mirror, download_workers=download_workers,
+        parse_workers=parse_workers, use_cache=not no_cache,
+    )
+    summary_table = get_summary_table(results)
+    summary_table.to_csv(BIOMODELS.join(name="summary.tsv"), sep="\t",
+                         index=False)
+
     rows = []
     dataframes = []
-    for model_id, model_name, model_author, model_year, pubmed, doi in tqdm(
-        df.values, desc="Converting", unit="model"
-    ):
-        model_module = BIOMODELS.module("models", model_id)
-        url = f"{DOWNLOAD_URL}?models={model_id}"
-        with model_module.ensure_open_zip(
-            url=url, name=f"{model_id}.zip", inner_path=f"{model_id}.xml"
-        ) as file:
-            try:
-                template_model = template_model_from_sbml_file_obj(
-                    file, model_id=model_id, reporter_ids=SPECIES_BLACKLIST.get(model_id)
-                )
-            except Exception as e:
-                tqdm.write(f"[{model_id}] failed to parse: {e}")
+    with ProcessPoolExecutor(parse_workers) as executor:
+        render_futures = []
+        for model_id, model_name, model_author, model_year, pubmed, doi in tqdm(
+            df.values, desc="Converting", unit="model"
+        ):
+            result = results[model_id]
+            if not result.success:
                 continue
-        model_module.join(name=f"{model_id}.json").write_text(
-            json.dumps(template_model.to_json(), indent=2)
-        )
+            template_model = result.get_template_model()
+            model_module = BIOMODELS.module("models", model_id)
+            model_module.join(name=f"{model_id}.json").write_text(
+                json.dumps(template_model.to_json(), indent=2)
+            )
 
-        # Write a petri-net type graphical representation of the model
-        m = GraphicalModel.from_template_model(template_model)
-        m.graph.graph_attr[
-            "label"
-        ] = f"{model_name}\n{model_id}\n{model_author}, {model_year}"
-        m.write(model_module.join(name=f"{model_id}.png"))
-        m.write(BIOMODELS.join("images", name=f"{model_id}.png"))
-
-        m = TriplesGenerator(template_model, skip_prefixes=["biomodel.species"])
-        triples_df = m.to_dataframe()
-        triples_df["model"] = model_id
-        dataframes.append(triples_df)
-
-        rows.append(
-            (
-                model_id,
-                model_name,
-                len(template_model.templates),
-                ", ".join(sorted({t.type for t in template_model.templates})),
+            render_futures.append(executor.submit(
+                _render_model, result.path,
+                f"{model_name}\n{model_id}\n{model_author}, {model_year}",
+                [model_module.join(name=f"{model_id}.png"),
+                 BIOMODELS.join("images", name=f"{model_id}.png")],
+            ))
+
+            m = TriplesGenerator(template_model, skip_prefixes=["biomodel.species"])
+            triples_df = m.to_dataframe()
+            triples_df["model"] = model_id
+            dataframes.append(triples_df)
+
+            rows.append(
+                (
+                    model_id,
+                    model_name,
+                    len(template_model.templates),
+                    ", ".join(sorted({t.type for t in template_model.templates})),
+                )
             )
-        )
+        for future in render_futures:
+            future.result()
 
     cat_triples_df = pd.concat(dataframes)
     cat_triples_df.to_csv(triples_path, sep="\t", index=False)
@@ -253,6 +601,12 @@ def main():
     )
     print(tabulate(summary_df, headers=summary_df.columns, showindex=False))
 
+    failed = summary_table[summary_table["status"] == "failed"]
+    if len(failed):
+        print(tabulate(failed[["model_id", "stage", "error"]],
+                       headers=["model_id", "stage", "error"],
+                       showindex=False))
+
 
 if __name__ == "__main__":
     main()
@@ -8,7 +8,7 @@ Alternate XPath queries for COPASI data:
 import copy
 import math
 import libsbml
-from typing import Dict, Iterable, List, Mapping, Tuple
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 
 from mira.sources.sbml.utils import *
 
@@ -143,6 +143,11 @@ class SbmlProcessor:
             rule_expr = parse_assignment_rule(rule.formula, all_locals)
             if rule_expr:
                 assignment_rules[rule.id] = rule_expr
+        assignment_rule_map = get_assignment_rule_map(assignment_rules)
+        compartment_values = [
+            (comp_symbol, all_parameters[comp]["value"])
+            for comp, comp_symbol in compartment_symbols.items()
+        ]
 
         all_implicit_modifiers = set()
         implicit_modifiers = None
@@ -180,28 +185,26 @@ class SbmlProcessor:
                 }
                 parameter_symbols[parameter.id] = sympy.Symbol(parameter.id)
 
-            rate_expr = safe_parse_expr(rate_law.formula, local_dict=all_locals)
+            rate_expr = sympy_from_ast(rate_law.getMath(), all_locals)
             # At this point we need to make sure we substitute the assignments
-            rate_expr = rate_expr.subs(assignment_rules)
+            if assignment_rule_map:
+                rate_expr = rate_expr.xreplace(assignment_rule_map)
 
-            for comp, comp_symbol in compartment_symbols.items():
+            free_symbols = rate_expr.free_symbols
+            for comp_symbol, comp_value in compartment_values:
+                if comp_symbol not in free_symbols:
+                    continue
                 # We want to handle the special case where the compartment is
                 # just a constant 1.0 and so we can just remove it from the
-                # rate expression but that requires some special handling otherwise
-                # and explicit 1.0 will be carried around in the rate expression
-                comp_one = False
-                if comp_symbol in rate_expr.free_symbols:
-                    if (
-                        rate_expr
-                        not in rate_expr.diff(comp_symbol).free_symbols
-                    ):
-                        if all_parameters[comp]["value"] == 1.0:
-                            comp_one = True
-                            rate_expr /= comp_symbol
-                if not comp_one:
-                    rate_expr = rate_expr.subs(
-                        comp_symbol, all_parameters[comp]["value"]
-                    )
+                # rate expression if it's a multiplicative factor, otherwise
+                # an explicit 1.0 would be carried around in the rate
+                # expression
+                if comp_value == 1.0:
+                    reduced_expr = remove_factor(rate_expr, comp_symbol)
+                    if reduced_expr is not None:
+                        rate_expr = reduced_expr
+                        continue
+                rate_expr = rate_expr.subs(comp_symbol, comp_value)
 
             rate_law_variables = variables_from_sympy_expr(rate_expr)
 
@@ -563,6 +566,190 @@ def get_formula_str(ast_node):
         return name
 
 
+class _UnsupportedAstError(ValueError):
+    """Raised for libSBML math the direct sympy conversion doesn't handle."""
+
+
+def sympy_from_ast(ast_node, local_dict=None) -> sympy.Expr:
+    """Return the sympy expression of a libSBML math formula.
+
+    The AST is converted into sympy objects directly, rather than rendering
+    it as a formula string and parsing that, which is much faster. The
+    result is identical to parsing the formula string with
+    :func:`safe_parse_expr`, which is used as a fallback for math that
+    isn't converted directly, e.g., powers, piecewise functions and
+    relations.
+
+    Parameters
+    ----------
+    ast_node :
+        The libSBML AST node.
+    local_dict :
+        A dict of symbols and functions that names in the formula refer to.
+
+    Returns
+    -------
+    :
+        The sympy expression of the formula.
+    """
+    local_dict = local_dict or {}
+    try:
+        return _convert_ast(ast_node, local_dict)[0]
+    except _UnsupportedAstError:
+        return safe_parse_expr(libsbml.formulaToString(ast_node),
+                               local_dict=local_dict)
+
+
+#: Types of AST nodes whose name is looked up, e.g., species and parameters
+_NAME_AST_TYPES = frozenset({libsbml.AST_NAME, libsbml.AST_NAME_TIME,
+                             libsbml.AST_CONSTANT_PI})
+#: Types of AST nodes that are numbers
+_NUMBER_AST_TYPES = frozenset({libsbml.AST_INTEGER, libsbml.AST_REAL,
+                               libsbml.AST_REAL_E})
+#: Functions with a sympy counterpart, which the parser doesn't evaluate
+_FUNCTION_AST_TYPES = {libsbml.AST_FUNCTION_EXP: sympy.exp,
+                       libsbml.AST_FUNCTION_LN: sympy.log}
+
+
+def _convert_ast(ast_node, local_dict):
+    """Return the sympy expression of an AST node and the arguments it has
+    if it is an unevaluated Add or Mul that a parent of the same kind
+    flattens, mirroring how sympy's parser handles nested operators when
+    parsing with evaluate=False."""
+    node_type = ast_node.getType()
+    if node_type in _NAME_AST_TYPES:
+        name = ast_node.getName()
+        value = local_dict.get(name)
+        if value is None:
+            value = _parse_leaf(name, local_dict)
+        return value, None
+    n_children = ast_node.getNumChildren()
+    if node_type == libsbml.AST_TIMES and n_children >= 2:
+        args = []
+        for idx in range(n_children):
+            args += _convert_operand(ast_node.getChild(idx), local_dict,
+                                     sympy.Mul)
+        return sympy.Mul(*args, evaluate=False), sympy.Mul
+    elif node_type == libsbml.AST_DIVIDE and n_children == 2:
+        args = _convert_operand(ast_node.getChild(0), local_dict, sympy.Mul)
+        right = _convert_ast(ast_node.getChild(1), local_dict)[0]
+        args.append(sympy.Pow(right, -1, evaluate=False))
+        return sympy.Mul(*args, evaluate=False), sympy.Mul
+    elif node_type == libsbml.AST_PLUS and n_children >= 2:
+        args = []
+        for idx in range(n_children):
+            args += _convert_operand(ast_node.getChild(idx), local_dict,
+                                     sympy.Add)
+        return sympy.Add(*args, evaluate=False), sympy.Add
+    elif node_type == libsbml.AST_MINUS and n_children == 2:
+        args = _convert_operand(ast_node.getChild(0), local_dict, sympy.Add)
+        right = _convert_ast(ast_node.getChild(1), local_dict)[0]
+        args.append(sympy.Mul(-1, right, evaluate=False))
+        return sympy.Add(*args, evaluate=False), sympy.Add
+    elif node_type == libsbml.AST_MINUS and n_children == 1:
+        return -_convert_ast(ast_node.getChild(0), local_dict)[0], None
+    elif node_type in _NUMBER_AST_TYPES:
+        # Numbers are parsed from their formula representation, e.g., 2.0 is
+        # rendered, and therefore parsed, as the integer 2
+        return _parse_leaf(libsbml.formulaToString(ast_node), local_dict), None
+    elif node_type == libsbml.AST_FUNCTION:
+        function = local_dict.get(ast_node.getName())
+        if not isinstance(function, sympy.Lambda):
+            raise _UnsupportedAstError
+        args = [_convert_ast(ast_node.getChild(idx), local_dict)[0]
+                for idx in range(n_children)]
+        return function(*args), None
+    elif node_type in _FUNCTION_AST_TYPES and n_children == 1:
+        function = _FUNCTION_AST_TYPES[node_type]
+        # The name would refer to a local symbol instead when parsed
+        if function.__name__ in local_dict:
+            raise _UnsupportedAstError
+        arg = _convert_ast(ast_node.getChild(0), local_dict)[0]
+        return function(arg, evaluate=False), None
+    raise _UnsupportedAstError
+
+
+def _convert_operand(ast_node, local_dict, operation) -> List[sympy.Expr]:
+    expr, flattened = _convert_ast(ast_node, local_dict)
+    if flattened is operation:
+        return list(expr.args)
+    return [expr]
+
+
+def _parse_leaf(formula, local_dict):
+    try:
+        return safe_parse_expr(formula, local_dict=local_dict)
+    except Exception:
+        # Let the whole formula fail the same way
+        raise _UnsupportedAstError
+
+
+def get_assignment_rule_map(assignment_rules) -> Dict[sympy.Symbol, sympy.Expr]:
+    """Return a mapping to substitute assignment rules in a single pass.
+
+    Substituting the rules with ``expr.subs(assignment_rules)`` replaces
+    one rule after the other, such that the expression of a rule is itself
+    subject to the substitution of rules that come later. The returned
+    mapping resolves this once for all rules, so that
+    ``expr.xreplace(mapping)`` gives the same result.
+
+    Parameters
+    ----------
+    assignment_rules :
+        A dict of rule expressions keyed by the ID of the variable they
+        assign.
+
+    Returns
+    -------
+    :
+        A dict of resolved rule expressions keyed by the symbol of the
+        variable they assign.
+    """
+    from sympy.core.sorting import default_sort_key
+
+    rules = {sympy.Symbol(rule_id): rule_expr
+             for rule_id, rule_expr in assignment_rules.items()}
+    # This is the order in which subs applies the rules
+    order = sorted(rules, key=default_sort_key)
+    rule_map: Dict[sympy.Symbol, sympy.Expr] = {}
+    for symbol in reversed(order):
+        rule_map[symbol] = rules[symbol].xreplace(rule_map)
+    return rule_map
+
+
+def remove_factor(expr: sympy.Expr, factor: sympy.Symbol) \
+        -> Optional[sympy.Expr]:
+    """Return an expression divided by a symbol if it is a factor of it.
+
+    Parameters
+    ----------
+    expr :
+        The expression.
+    factor :
+        The symbol to remove.
+
+    Returns
+    -------
+    :
+        The expression divided by the symbol if the symbol is a
+        multiplicative factor of the expression or of each of its terms,
+        otherwise None.
+    """
+    if expr == factor:
+        return sympy.Integer(1)
+    if expr.is_Mul:
+        if factor in expr.args or any(arg.is_Mul and factor in arg.args
+                                      for arg in expr.args):
+            return expr / factor
+        return None
+    if expr.is_Add:
+        terms = [remove_factor(term, factor) for term in expr.args]
+        if any(term is None for term in terms):
+            return None
+        return sympy.Add(*terms)
+    return None
+
+
 def variables_from_sympy_expr(expr):
     """Recursively find variables appearing in a sympy expression."""
     variables = set()
@@ -187,30 +187,32 @@ def template_model_from_sympy_odes(odes, concept_data=None, param_data=None):
                         'potential_controllers': potential_controllers})
     logger.debug("Constructed hypergraph with %d nodes", len(G.nodes))
 
-    # Precompute and store expanded forms
-    expr_map = {}
-    for node in G.nodes:
-        term = sympy.expand(G.nodes[node]['term'])
-        expr_map[node] = term
+    # Precompute the expanded forms of terms as mappings from monomials
+    # to numeric coefficients, so that terms cancelling each other can be
+    # found by comparing coefficients instead of adding up expressions
+    coefficients = {node: get_term_coefficients(G.nodes[node]['term'])
+                    for node in G.nodes}
 
     # First, we look at all pairs of terms and check if the terms are
     # compatible, in which case we add a hyperedge between them
     edge_idx = 0
-    for n1, n2 in itertools.combinations(G.nodes, 2):
-        if expr_map[n1] + expr_map[n2] == 0:
-            sources = {n1 if G.nodes[n1]['neg'] else n2}
-            targets = {n1, n2} - sources
-            G.add_edge(edge_idx, sources, targets)
-            edge_idx += 1
+    for n1, n2 in find_cancelling_pairs(list(G.nodes), coefficients):
+        sources = {n1 if G.nodes[n1]['neg'] else n2}
+        targets = {n1, n2} - sources
+        G.add_edge(edge_idx, sources, targets)
+        edge_idx += 1
 
     # Next we look at all 3-sets of terms and see if they form an equation
     # in which case we add a hyperedge between the two sides
-    for n1, n2, n3 in itertools.combinations(G.get_unconnected_nodes(), 3):
-        nodes = {n1, n2, n3}
-        if expr_map[n1] + expr_map[n2] + expr_map[n3] == 0:
-            sources = {n for n in nodes if G.nodes[n]['neg']}
-            targets = nodes - sources
-            G.add_edge(edge_idx, sources, targets)
+    unconnected_nodes = G.get_unconnected_nodes()
+    unconnected_nodes = [node for node in G.nodes
+                         if node in unconnected_nodes]
+    for nodes in find_cancelling_triples(unconnected_nodes, coefficients):
+        nodes = set(nodes)
+        sources = {n for n in nodes if G.nodes[n]['neg']}
+        targets = nodes - sources
+        G.add_edge(edge_idx, sources, targets)
+        edge_idx += 1
 
     # Remove ambiguous edges
     G.remove_ambiguous_edges()
@@ -312,6 +314,126 @@ def template_model_from_sympy_odes(odes, concept_data=None, param_data=None):
     return tm
 
 
+def get_term_coefficients(term):
+    """Return the expanded form of a term as a mapping of its monomials to
+    their numeric coefficients.
+
+    Parameters
+    ----------
+    term : sympy.Expr
+        A term of the right-hand side of an ODE.
+
+    Returns
+    -------
+    : dict
+        A dict whose keys are monomials without numeric coefficients, e.g.,
+        ``b*I(t)*S(t)``, and whose values are the numeric coefficients of
+        the monomials in the expanded term.
+    """
+    return {monomial: coefficient for monomial, coefficient
+            in sympy.expand(term).as_coefficients_dict().items()
+            if not coefficient.is_zero}
+
+
+def _cancels(coefficients, other_coefficients):
+    """Return True if the sum of two expanded terms is zero."""
+    return coefficients.keys() == other_coefficients.keys() and all(
+        (coefficient + other_coefficients[monomial]).is_zero
+        for monomial, coefficient in coefficients.items()
+    )
+
+
+def find_cancelling_pairs(nodes, coefficients):
+    """Return the pairs of terms that sum to zero.
+
+    Terms are bucketed by their monomials, so only terms with the same
+    monomials are compared.
+
+    Parameters
+    ----------
+    nodes : list
+        The keys of the terms.
+    coefficients : dict
+        The coefficients of each term, as returned by
+        :func:`get_term_coefficients`.
+
+    Returns
+    -------
+    : list of tuple
+        The pairs of terms that sum to zero, in the order in which they
+        appear in ``nodes``.
+    """
+    order = {node: idx for idx, node in enumerate(nodes)}
+    buckets = {}
+    for node in nodes:
+        buckets.setdefault(frozenset(coefficients[node]), []).append(node)
+    pairs = []
+    for n1 in nodes:
+        for n2 in buckets[frozenset(coefficients[n1])]:
+            if order[n2] > order[n1] and \
+                    _cancels(coefficients[n1], coefficients[n2]):
+                pairs.append((n1, n2))
+    return pairs
+
+
+def find_cancelling_triples(nodes, coefficients):
+    """Return the sets of three terms that sum to zero.
+
+    Each monomial of a cancelling triple appears in at least two of its
+    terms. Therefore, the second term of a triple is looked up among
+    the terms sharing a monomial with the first one, and the third term
+    among the terms whose monomials are those of the negated sum of the
+    first two.
+
+    Parameters
+    ----------
+    nodes : list
+        The keys of the terms.
+    coefficients : dict
+        The coefficients of each term, as returned by
+        :func:`get_term_coefficients`.
+
+    Returns
+    -------
+    : list of tuple
+        The triples of terms that sum to zero, each in the order in which
+        the terms appear in ``nodes``.
+    """
+    order = {node: idx for idx, node in enumerate(nodes)}
+    buckets = {}
+    by_monomial = {}
+    for node in nodes:
+        buckets.setdefault(frozenset(coefficients[node]), []).append(node)
+        for monomial in coefficients[node]:
+            by_monomial.setdefault(monomial, []).append(node)
+    triples = set()
+    for n1 in nodes:
+        if coefficients[n1]:
+            candidates = by_monomial[next(iter(coefficients[n1]))]
+        else:
+            candidates = nodes
+        for n2 in candidates:
+            if n2 == n1:
+                continue
+            # The negated sum of the first two terms
+            residual = {}
+            for coefs in (coefficients[n1], coefficients[n2]):
+                for monomial, coefficient in coefs.items():
+                    residual[monomial] = \
+                        residual.get(monomial, 0) - coefficient
+            residual = {monomial: coefficient for monomial, coefficient
+                        in residual.items() if not coefficient.is_zero}
+            for n3 in buckets.get(frozenset(residual), []):
+                if n3 in {n1, n2}:
+                    continue
+                if all((coefficient - residual[monomial]).is_zero
+                       for monomial, coefficient
+                       in coefficients[n3].items()):
+                    triples.add(tuple(sorted((n1, n2, n3),
+                                             key=order.__getitem__)))
+    return sorted(triples, key=lambda triple: [order[n] for n in triple])
+
+
 def is_negative(term, time):
     # Replace any parameters with 0.1, assuming positivity
     term = term.subs({s: 0.1 for s in term.free_symbols
@@ -1,7 +1,7 @@
 import logging
 import textwrap
 import click
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional, Union, List, Dict
 
 from mira.sources.sympy_ode import template_model_from_sympy_odes
@@ -14,11 +14,11 @@ from mira.sources.sympy_ode.llm_util import (
     test_execution,
     pdf_file_to_odes_str,
     ContentType,
-    test_ode_model,
     CodeExecutionError
 )
 from mira.sources.sympy_ode.constants import (EXECUTION_ERROR_PROMPT,
                                               ODE_MARKDOWN_PROMPT)
+from mira.sources.sympy_ode.sandbox import ExecutionResult, get_default_pool
 from mira.metamodel import Concept
 
 
@@ -58,9 +58,13 @@ class CorrectionResult(PhaseResult):
     ----------
     attempts :
         Number of correction attempts made.
+    execution :
+        The result of running the corrected ODE string in the sandbox, if
+        the correction succeeded.
     """
     ode_str: Optional[str] = None
     attempts: int = 0
+    execution: Optional[ExecutionResult] = field(default=None, repr=False)
 
 
 @dataclass
@@ -185,9 +189,11 @@ def fix_execution_errors(ode_str, client, error, max_attempts=10):
 
         response = client.run_chat_completion(prompt)
         ode_str = clean_response(response.message.content)
-        success, error = test_execution(ode_str)
-        if success:
-            return CorrectionResult(ode_str=ode_str, attempts=attempt + 1)
+        execution = get_default_pool().run(ode_str, test_model=True)
+        if execution.success:
+            return CorrectionResult(ode_str=ode_str, attempts=attempt + 1,
+                                    execution=execution)
+        error = execution.error
 
     # Failed after all attempts
     logger.info("  ERROR: Cannot fix execution errors - stopping")
@@ -329,18 +335,16 @@ def fix_mira_model_errors(ode_str, client, error, max_attempts=10):
         response = client.run_chat_completion(prompt)
         ode_str = clean_response(response.message.content)
 
-        exec_success, exec_error = test_execution(ode_str)
-        if not exec_success:
-            error = exec_error
+        # Run the code and build a model from its ODEs in the sandbox
+        result = get_default_pool().run(ode_str, test_model=True)
+        if not result.success:
+            error = result.error
             continue
 
-        local_dict = {}
-        exec(ode_str, {"__builtins__": __builtins__}, local_dict)
-        odes = local_dict.get("odes")
-
-        mira_success, error = test_ode_model(odes)
-        if mira_success:
-            return CorrectionResult(ode_str=ode_str, attempts=attempt + 1)
+        if result.model_success:
+            return CorrectionResult(ode_str=ode_str, attempts=attempt + 1,
+                                    execution=result)
+        error = result.model_error
 
     # Failed after all attempts
     logger.info("  ERROR: Cannot fix MIRA model errors - stopping")
@@ -378,34 +382,25 @@ def execute_template_model_from_sympy_odes(
 
     logger.info("Creating TemplateModel from Sympy ODEs...")
 
-    # Part 1: Fix any SymPy execution errors
-    success, error = test_execution(ode_str)
-    if not success:
-        result = fix_execution_errors(ode_str, client, error)
-        ode_str = result.ode_str
-
-    # Execute once with the (potentially corrected) string
-    local_dict = locals()
-    try:
-        exec(ode_str, globals(), local_dict)
-    except Exception as e:
-        raise CodeExecutionError(f"Error while executing the code: {e}")
+    # Part 1: Fix any SymPy execution errors. The code is run in the
+    # sandbox once, which also tests building a model from its ODEs.
+    execution = get_default_pool().run(ode_str, test_model=True)
+    if not execution.success:
+        result = fix_execution_errors(ode_str, client, execution.error)
+        if not result.success:
+            raise CodeExecutionError(
+                f"Error while executing the code: {execution.error}")
+        ode_str, execution = result.ode_str, result.execution
 
-    odes = local_dict.get("odes")
-    assert odes is not None, "The code should define a variable called `odes`"
-    
     # Part 2: Fix any MIRA OdeModel errors
-    success, error = test_ode_model(odes)
-    if not success:
-        result = fix_mira_model_errors(ode_str, client, error)
+    if not execution.model_success:
+        result = fix_mira_model_errors(ode_str, client, execution.model_error)
         if not result.success:
             raise CodeExecutionError("MIRA OdeModel error correction "
                                      f"failed: {result.error}")
-        # Re-execute and rebuild after correction
-        ode_str = result.ode_str
-        local_dict = locals()
-        exec(ode_str, globals(), local_dict)
-        odes = local_dict.get("odes")
+        ode_str, execution = result.ode_str, result.execution
+
+    odes = execution.odes
 
     if attempt_grounding:
         concept_data = get_concepts_from_odes(ode_str, client)
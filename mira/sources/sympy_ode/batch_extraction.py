@@ -0,0 +1,299 @@
+"""Extract template models from many papers concurrently.
+
+Each paper goes through three stages:
+
+1. ``parse``: download the paper and extract its equations, e.g., with
+   MinerU or Marker, into the input of the LLM pipeline.
+2. ``extract``: run the multi-agent LLM pipeline to get SymPy ODEs.
+3. ``convert``: build a MIRA template model from the ODEs.
+
+The stages run as a pipeline, i.e., one paper can be parsed while others
+are in the LLM stages, and each stage has its own concurrency limit, since
+PDF parsing is typically bound by a GPU and the other stages by the LLM
+API. The output of each stage is checkpointed in the output directory, so
+that an interrupted run resumes where it left off. LLM responses are
+cached under a digest of the request, so re-running the pipeline on the
+same papers with the same model doesn't repeat identical LLM calls.
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Union
+
+import click
+
+from mira.metamodel import TemplateModel
+from mira.openai_utility import OpenAIClient, ResponseCache
+from mira.sources.sympy_ode.agent_pipeline import (
+    execute_template_model_from_sympy_odes,
+    run_multi_agent_pipeline,
+)
+from mira.utils import write_atomic
+
+__all__ = [
+    "PaperResult",
+    "run_batch_extraction",
+    "STAGES",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The stages each paper goes through, in order
+STAGES = ("parse", "extract", "convert")
+
+
+@dataclass
+class PaperResult:
+    """The result of extracting a template model from a paper
+
+    Attributes
+    ----------
+    pmid :
+        The pmid of the paper.
+    status :
+        Either "complete" or "failed".
+    stage :
+        The stage that failed, if any.
+    error :
+        Error message if a stage failed, otherwise None.
+    ode_str :
+        The extracted SymPy ODE string, if the extract stage completed.
+    template_model :
+        The template model, if the convert stage completed.
+    """
+    pmid: str
+    status: str = "complete"
+    stage: Optional[str] = None
+    error: Optional[str] = None
+    ode_str: Optional[str] = None
+    template_model: Optional[TemplateModel] = None
+
+    @property
+    def success(self) -> bool:
+        return self.status == "complete"
+
+
+def run_batch_extraction(
+    pmids: Iterable[str],
+    output_dir: Union[str, Path],
+    extractor: Union[str, Callable[[str], object]] = "mineru",
+    ode_extraction_method: str = "text",
+    client: Optional[OpenAIClient] = None,
+    pmid_to_download_mapping: Optional[dict] = None,
+    attempt_grounding: bool = True,
+    parse_workers: int = 1,
+    llm_workers: int = 4,
+    convert_workers: int = 2,
+    resume: bool = True,
+) -> Dict[str, PaperResult]:
+    """Return template models extracted from a list of PubMed articles
+
+    Parameters
+    ----------
+    pmids :
+        The pmids of the articles.
+    output_dir :
+        The directory in which the output of each stage is checkpointed,
+        under a subdirectory per pmid. A summary of the run is written to
+        ``summary.json``.
+    extractor :
+        The method used to extract the ODEs from the articles, one of
+        "mineru", "marker" or "xml", or a function that takes a pmid and
+        returns an extractor.
+    ode_extraction_method :
+        The type of input that will be supplied to the LLM when extracting
+        equations (i.e. text or images).
+    client :
+        The OpenAI client to use. If None, a client caching its responses
+        in the ``llm_cache`` subdirectory of the output directory is
+        created.
+    pmid_to_download_mapping :
+        A dictionary mapping pmids to their corresponding download paths.
+        If None and needed by the extractor, it is loaded.
+    attempt_grounding :
+        Whether to attempt grounding the concepts of the template models.
+    parse_workers :
+        The number of papers parsed at the same time.
+    llm_workers :
+        The number of papers in the LLM extraction stage at the same time.
+    convert_workers :
+        The number of papers converted into template models at the same
+        time.
+    resume :
+        If True, the checkpointed output of stages completed in a previous
+        run is reused. Failed stages are always run again.
+
+    Returns
+    -------
+    :
+        A dict of results keyed by pmid, in the order of the given pmids.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pmids = list(dict.fromkeys(pmids))
+    if client is None:
+        client = OpenAIClient(model="gpt-5.4-mini", temperature=0.0,
+                              cache=ResponseCache(output_dir / "llm_cache"))
+    if isinstance(extractor, str):
+        extractor = _get_extractor_factory(
+            extractor, ode_extraction_method, pmid_to_download_mapping,
+        )
+
+    batch = _Batch(output_dir, extractor, client, attempt_grounding, resume,
+                   parse_workers, llm_workers, convert_workers)
+    max_workers = max(1, parse_workers + llm_workers + convert_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip(pmids, executor.map(batch.run, pmids)))
+
+    _write_json(output_dir / "summary.json", {
+        pmid: {"status": result.status, "stage": result.stage,
+               "error": result.error}
+        for pmid, result in results.items()
+    })
+    n_complete = sum(result.success for result in results.values())
+    logger.info("Extracted template models from %d of %d papers",
+                n_complete, len(results))
+    return results
+
+
+class _Batch:
+    def __init__(self, output_dir, extractor, client, attempt_grounding,
+                 resume, parse_workers, llm_workers, convert_workers):
+        self.output_dir = output_dir
+        self.extractor = extractor
+        self.client = client
+        self.attempt_grounding = attempt_grounding
+        self.resume = resume
+        self.semaphores = {
+            "parse": threading.BoundedSemaphore(parse_workers),
+            "extract": threading.BoundedSemaphore(llm_workers),
+            "convert": threading.BoundedSemaphore(convert_workers),
+        }
+        self.stage_functions = {
+            "parse": self.parse,
+            "extract": self.extract,
+            "convert": self.convert,
+        }
+
+    def run(self, pmid: str) -> PaperResult:
+        result = PaperResult(pmid=pmid)
+        data = None
+        for stage in STAGES:
+            path = self.output_dir / pmid / f"{stage}.json"
+            if self.resume and path.is_file():
+                with open(path) as fh:
+                    data = json.load(fh)
+                logger.debug("Resuming %s from %s checkpoint", pmid, stage)
+                continue
+            try:
+                with self.semaphores[stage]:
+                    logger.info("Running %s stage for %s", stage, pmid)
+                    data = self.stage_functions[stage](pmid, data)
+            except Exception as e:
+                logger.warning("Failed %s stage for %s: %s", stage, pmid, e)
+                result.status = "failed"
+                result.stage = stage
+                result.error = f"{type(e).__name__}: {e}"
+                return result
+            _write_json(path, data)
+        result.ode_str = _read_json(
+            self.output_dir / pmid / "extract.json")["ode_str"]
+        result.template_model = TemplateModel.from_json(data)
+        return result
+
+    def parse(self, pmid: str, data: None) -> dict:
+        extractor = self.extractor(pmid)
+        inputs = extractor.get_pipeline_inputs()
+        return {"inputs": inputs,
+                "extraction_file": extractor.extraction_file}
+
+    def extract(self, pmid: str, data: dict) -> dict:
+        pipeline_result = run_multi_agent_pipeline(client=self.client,
+                                                   **data["inputs"])
+        ode_str = pipeline_result.final_ode_str
+        if ode_str is None:
+            phase = pipeline_result.correction or pipeline_result.extraction
+            raise ValueError(phase.error or "No ODEs found in the paper")
+        correction = pipeline_result.correction
+        return {
+            "ode_str": ode_str,
+            "extraction_file": data["extraction_file"],
+            "correction_attempts": correction.attempts if correction else 0,
+        }
+
+    def convert(self, pmid: str, data: dict) -> dict:
+        template_model = execute_template_model_from_sympy_odes(
+            ode_str=data["ode_str"],
+            attempt_grounding=self.attempt_grounding,
+            client=self.client,
+        )
+        return template_model.to_json()
+
+
+def _get_extractor_factory(extractor: str, ode_extraction_method: str,
+                           pmid_to_download_mapping: Optional[dict]):
+    from mira.sources.sympy_ode.paper_extraction import (
+        get_extractor, get_pmid_pmc_download_mapping,
+    )
+
+    lock = threading.Lock()
+
+    def get_paper_extractor(pmid):
+        nonlocal pmid_to_download_mapping
+        with lock:
+            if pmid_to_download_mapping is None:
+                pmid_to_download_mapping = get_pmid_pmc_download_mapping()
+        return get_extractor(pmid, extractor, ode_extraction_method,
+                             pmid_to_download_mapping)
+
+    return get_paper_extractor
+
+
+def _read_json(path: Path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _write_json(path: Path, data) -> None:
+    write_atomic(path, json.dumps(data, indent=1))
+
+
+@click.command()
+@click.argument("pmids_file", type=click.Path(exists=True))
+@click.argument("output_dir", type=click.Path())
+@click.option("--extractor", default="mineru",
+              type=click.Choice(["mineru", "marker", "xml"]),
+              help="The method used to extract the ODEs from the papers")
+@click.option("--ode-extraction-method", default="text",
+              type=click.Choice(["text", "image"]),
+              help="The type of input supplied to the LLM")
+@click.option("--parse-workers", default=1, show_default=True,
+              help="The number of papers parsed at the same time")
+@click.option("--llm-workers", default=4, show_default=True,
+              help="The number of papers in the LLM stage at the same time")
+@click.option("--no-resume", is_flag=True,
+              help="Rerun all stages instead of resuming from checkpoints")
+def main(pmids_file, output_dir, extractor, ode_extraction_method,
+         parse_workers, llm_workers, no_resume):
+    """Extract template models from the papers whose pmids are listed, one
+    per line, in PMIDS_FILE, checkpointing the output in OUTPUT_DIR.
+    """
+    with open(pmids_file) as fh:
+        pmids = [line.strip() for line in fh if line.strip()]
+    results = run_batch_extraction(
+        pmids, output_dir, extractor=extractor,
+        ode_extraction_method=ode_extraction_method,
+        parse_workers=parse_workers, llm_workers=llm_workers,
+        resume=not no_resume,
+    )
+    n_complete = sum(result.success for result in results.values())
+    click.echo(f"Extracted template models from {n_complete} of "
+               f"{len(results)} papers")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from typing import Optional, List, Union, Literal
 
 from mira.openai_utility import OpenAIClient, ImageFmts
 from mira.sources.sympy_ode import template_model_from_sympy_odes
+from mira.sources.sympy_ode.sandbox import SandboxPool, get_default_pool
 from mira.sources.sympy_ode.constants import (
     ODE_IMAGE_PROMPT,
     ODE_CONCEPTS_PROMPT_TEMPLATE,
@@ -296,13 +297,20 @@ def get_concepts_from_odes(
     return concept_data
 
 
-def test_execution(code: str) -> tuple[bool, str]:
+def test_execution(code: str,
+                   pool: Optional[SandboxPool] = None) -> tuple[bool, str]:
     """Test if code executes successfully
 
+    The code is run in a sandboxed worker process, so that it can't affect
+    the current process.
+
     Parameters
     ----------
     code :
         The Python code
+    pool :
+        The sandbox pool in which the code is run. If not given, the default
+        pool is used.
 
     Returns
     -------
@@ -310,15 +318,9 @@ def test_execution(code: str) -> tuple[bool, str]:
         Tuple of (success, error_message). success is True if code executed
         and defined `odes`, False otherwise. error_message is empty on success.
     """
-    try:
-        namespace = {}
-        exec("import sympy", namespace)
-        exec(code, namespace)
-        if 'odes' in namespace:
-            return (True, "")
-        return (False, "Code executed but 'odes' was not defined")
-    except Exception as e:
-        return (False, f"{type(e).__name__}: {e}")
+    pool = pool if pool is not None else get_default_pool()
+    result = pool.run(code)
+    return result.success, result.error or ""
 
 def test_ode_model(odes) -> tuple[bool, str]:
     """Test if a list of SymPy ODEs can be converted to a TemplateModel
@@ -9,6 +9,7 @@ from indra.literature.pubmed_client import (
 )
 
 from mira.sources.sympy_ode.extractors import (
+    Extractor,
     MineruExtractor,
     MarkerExtractor,
     XmlExtractor,
@@ -38,6 +39,47 @@ def get_pmid_pmc_download_mapping():
     )
 
 
+def get_extractor(pmid: str, extractor: str = "mineru",
+                  ode_extraction_method: ExtractionMethod = "text",
+                  pmid_to_download_mapping=None) -> Extractor:
+    """Return the extractor of the equations of a PubMed article
+
+    Parameters
+    ----------
+    pmid :
+        The pmid of the article
+    extractor :
+        The method used to extract the ODEs from the article, one of
+        "mineru", "marker" or "xml".
+    ode_extraction_method :
+        The type of input that will be supplied to the LLM when extracting
+        equations (i.e. text or images).
+    pmid_to_download_mapping :
+        A dictionary mapping pmids to their corresponding download paths.
+
+    Returns
+    -------
+    :
+        The extractor for the article
+    """
+    paper_base = BASE.join(pmid)
+
+    pmc = Path(pmid_to_download_mapping[pmid]).name.removesuffix('.tar.gz')
+
+    if extractor == "mineru":
+        return MineruExtractor(pmid, pmc, paper_base,
+                               pmid_to_download_mapping,
+                               ode_extraction_method)
+    elif extractor == "marker":
+        return MarkerExtractor(pmid, pmc, paper_base,
+                               pmid_to_download_mapping,
+                               ode_extraction_method)
+    elif extractor == "xml":
+        return XmlExtractor(pmid, pmc)
+    else:
+        raise ValueError(f"Unknown extractor: {extractor}")
+
+
 def get_template_model_from_pmid(pmid: str, extractor: str = "mineru",
                                  ode_extraction_method: ExtractionMethod = "text",
                                  pmid_to_download_mapping=None, client=None) \
@@ -72,23 +114,8 @@ def get_template_model_from_pmid(pmid: str, extractor: str = "mineru",
     if client is None:
         client = OpenAIClient(model="gpt-5.4-mini", temperature=0.0)
 
-    paper_base = BASE.join(pmid)
-
-    pmc = Path(pmid_to_download_mapping[pmid]).name.removesuffix('.tar.gz')
-
-    if extractor == "mineru":
-        extractor_obj = MineruExtractor(pmid, pmc, paper_base,
-                                        pmid_to_download_mapping,
-                                        ode_extraction_method)
-    elif extractor == "marker":
-        extractor_obj = MarkerExtractor(pmid, pmc, paper_base,
-                                        pmid_to_download_mapping,
-                                        ode_extraction_method)
-    elif extractor == "xml":
-        extractor_obj = XmlExtractor(pmid, pmc)
-    else:
-        raise ValueError(f"Unknown extractor: {extractor}")
-
+    extractor_obj = get_extractor(pmid, extractor, ode_extraction_method,
+                                  pmid_to_download_mapping)
     ode = extractor_obj.extract(client=client)
 
     tm = execute_template_model_from_sympy_odes(ode_str=ode.final_ode_str,
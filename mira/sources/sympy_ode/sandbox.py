@@ -0,0 +1,313 @@
+"""Run LLM-generated ODE code in a pool of sandboxed worker processes.
+
+Code snippets generated by an LLM, e.g., candidate ``odes = [...]``
+definitions, are executed to validate them. Running them in the service
+process would let a runaway snippet use up its time and memory, so they
+are run in a pool of worker processes instead. Each snippet runs under a
+time limit, after which its worker is killed and replaced, and under a
+memory limit. Workers are long-lived and import sympy and MIRA once when
+they start, so running a snippet is cheap, and several snippets can be
+validated at the same time with :meth:`SandboxPool.map`.
+
+Pools are typically used from threaded services, and forking a process
+with other threads can copy locks they hold into the new process, so
+workers are started by a fork server where available, and spawned
+otherwise.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Union
+
+import sympy
+
+from mira.sources.sympy_ode import template_model_from_sympy_odes
+
+if TYPE_CHECKING:
+    # The fork server context is not available on Windows
+    from multiprocessing.context import ForkServerContext, SpawnContext
+
+__all__ = [
+    "ExecutionResult",
+    "SandboxPool",
+    "get_default_pool",
+    "execute_code",
+    "SANDBOX_PROCESSES",
+    "SANDBOX_TIMEOUT",
+    "SANDBOX_MEMORY_LIMIT",
+]
+
+logger = logging.getLogger(__name__)
+
+#: The number of worker processes of the default pool
+SANDBOX_PROCESSES = int(os.getenv("MIRA_SANDBOX_PROCESSES", "2"))
+#: The maximum number of seconds a snippet may run for
+SANDBOX_TIMEOUT = float(os.getenv("MIRA_SANDBOX_TIMEOUT", "30"))
+#: The maximum number of megabytes a snippet may allocate
+SANDBOX_MEMORY_LIMIT = int(os.getenv("MIRA_SANDBOX_MEMORY_LIMIT", "1024"))
+
+
+@dataclass
+class ExecutionResult:
+    """The result of running a code snippet in a sandbox"""
+
+    #: True if the code executed and defined ``odes``
+    success: bool
+    #: A description of the error, if the code didn't execute successfully
+    error: Optional[str] = None
+    #: The ODEs defined by the code
+    odes: Optional[List[sympy.Eq]] = None
+    #: The concept data defined by the code, if any
+    concept_data: Optional[Dict[str, Any]] = None
+    #: Whether a template model could be built from the ODEs, if tested
+    model_success: Optional[bool] = None
+    #: A description of the error building the template model, if any
+    model_error: Optional[str] = None
+
+
+class SandboxPool:
+    """A pool of worker processes running code snippets under limits
+
+    Parameters
+    ----------
+    processes :
+        The number of worker processes, i.e., the number of snippets that
+        can run at the same time.
+    timeout :
+        The maximum number of seconds a snippet may run for.
+    memory_limit :
+        The maximum number of megabytes a snippet may allocate. The limit
+        is only enforced on platforms that support address space limits,
+        e.g., Linux.
+    """
+
+    def __init__(self, processes: int = SANDBOX_PROCESSES,
+                 timeout: float = SANDBOX_TIMEOUT,
+                 memory_limit: Optional[int] = SANDBOX_MEMORY_LIMIT):
+        self.processes = processes
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._context: Union["ForkServerContext", "SpawnContext"]
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+        else:
+            self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(processes):
+            self._idle.put(self._start_worker())
+
+    def run(self, code: str, test_model: bool = False) -> ExecutionResult:
+        """Run a code snippet in a worker process
+
+        Parameters
+        ----------
+        code :
+            The Python code, which is expected to define ``odes`` and
+            optionally ``concept_data``. ``sympy`` is imported before the
+            code is run.
+        test_model :
+            If True, also test whether a template model can be built from
+            the ODEs.
+
+        Returns
+        -------
+        :
+            The result of running the code.
+        """
+        if self._closed:
+            raise RuntimeError("The sandbox pool is closed")
+        worker = self._idle.get()
+        try:
+            if not worker.ready:
+                # Wait for the worker to start, which doesn't count
+                # towards the snippet's time limit
+                worker.conn.recv()
+                worker.ready = True
+            worker.conn.send((code, test_model))
+            if worker.conn.poll(self.timeout):
+                result = worker.conn.recv()
+                self._idle.put(worker)
+                return result
+            error = (f"TimeoutError: Code execution did not finish "
+                     f"in {self.timeout}s")
+        except (EOFError, OSError):
+            # E.g., the worker was killed for exceeding the memory limit
+            error = "The worker process running the code exited unexpectedly"
+        # The worker may still be running the code, so it's replaced
+        logger.info("Replacing sandbox worker: %s", error)
+        self._replace_worker(worker)
+        return ExecutionResult(success=False, error=error)
+
+    def map(self, codes: Iterable[str],
+            test_model: bool = False) -> List[ExecutionResult]:
+        """Run several code snippets concurrently
+
+        Parameters
+        ----------
+        codes :
+            The code snippets.
+        test_model :
+            If True, also test whether a template model can be built from
+            the ODEs of each snippet.
+
+        Returns
+        -------
+        :
+            The results of running the code snippets, in the same order.
+        """
+        codes = list(codes)
+        with ThreadPoolExecutor(max_workers=self.processes) as executor:
+            return list(executor.map(
+                lambda code: self.run(code, test_model=test_model), codes))
+
+    def close(self) -> None:
+        """Stop all worker processes"""
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _start_worker(self) -> "_Worker":
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_work, args=(child_conn, self.memory_limit), daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, conn)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _replace_worker(self, worker: "_Worker") -> None:
+        worker.stop()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if self._closed:
+                return
+        self._idle.put(self._start_worker())
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        #: Whether the worker has signalled that it's ready to run code
+        self.ready = False
+
+    def stop(self) -> None:
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+_default_pool: Optional[SandboxPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> SandboxPool:
+    """Return the default sandbox pool, starting it on first use
+
+    The pool is configured with the ``MIRA_SANDBOX_PROCESSES``,
+    ``MIRA_SANDBOX_TIMEOUT`` and ``MIRA_SANDBOX_MEMORY_LIMIT`` (in
+    megabytes) environment variables.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None or _default_pool._closed:
+            _default_pool = SandboxPool()
+        return _default_pool
+
+
+def _work(conn, memory_limit: Optional[int]) -> None:
+    _set_memory_limit(memory_limit)
+    conn.send("ready")
+    while True:
+        try:
+            code, test_model = conn.recv()
+        except (EOFError, OSError):
+            return
+        result = execute_code(code, test_model=test_model)
+        try:
+            conn.send(result)
+        except Exception as exc:
+            conn.send(ExecutionResult(
+                success=False,
+                error=f"The result could not be returned: {exc}",
+            ))
+
+
+def _set_memory_limit(memory_limit: Optional[int]) -> None:
+    if memory_limit is None:
+        return
+    try:
+        import resource
+        # The limit is on top of the memory the worker already maps
+        with open("/proc/self/statm") as fh:
+            mapped = int(fh.read().split()[0]) * resource.getpagesize()
+    except (ImportError, OSError):
+        logger.debug("Memory limits are not supported on this platform")
+        return
+    limit = mapped + memory_limit * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def execute_code(code: str, test_model: bool = False) -> ExecutionResult:
+    """Execute a code snippet defining ODEs in the current process
+
+    Parameters
+    ----------
+    code :
+        The Python code, which is expected to define ``odes`` and optionally
+        ``concept_data``.
+    test_model :
+        If True, also test whether a template model can be built from the
+        ODEs.
+
+    Returns
+    -------
+    :
+        The result of running the code.
+    """
+    namespace: Dict[str, Any] = {}
+    try:
+        exec("import sympy", namespace)
+        exec(code, namespace)
+    except BaseException as exc:
+        return ExecutionResult(success=False,
+                               error=f"{type(exc).__name__}: {exc}")
+    if "odes" not in namespace:
+        return ExecutionResult(
+            success=False, error="Code executed but 'odes' was not defined")
+    odes = namespace["odes"]
+    result = ExecutionResult(success=True, odes=odes,
+                             concept_data=namespace.get("concept_data"))
+    if test_model:
+        if not odes:
+            result.model_success = False
+            result.model_error = "Empty ODE list"
+            return result
+        try:
+            template_model_from_sympy_odes(odes)
+            result.model_success = True
+        except Exception as exc:
+            result.model_success = False
+            result.model_error = f"{type(exc).__name__}: {exc}"
+    return result
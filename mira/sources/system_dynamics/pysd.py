@@ -63,6 +63,8 @@ def template_model_from_pysd_model(
     """
     # dataframe that contains information about each variable in the model
     model_doc_df = pysd_model.doc
+    # the information about each variable keyed by its python-equivalent name
+    doc_index = get_doc_index(model_doc_df)
 
     # mapping of expressions after they have been processed to be sympy compatible
     processed_expression_map = {}
@@ -79,17 +81,13 @@ def template_model_from_pysd_model(
         )
 
     # Mapping of variable's python name to symbol for expression parsing in sympy
-    symbols = dict(
-        zip(
-            model_doc_df["Py Name"],
-            list(map(lambda x: sympy.Symbol(x), model_doc_df["Py Name"])),
-        )
-    )
+    symbols = {name: sympy.Symbol(name) for name in doc_index}
 
     # Retrieve the states
-    model_states = model_doc_df.loc[
-        (model_doc_df["Type"] == "Stateful")
-        & (model_doc_df["Subtype"] == "Integ")
+    model_states = [
+        row
+        for row in doc_index.values()
+        if row["Type"] == "Stateful" and row["Subtype"] == "Integ"
     ]
 
     concepts = {}
@@ -99,7 +97,7 @@ def template_model_from_pysd_model(
     state_rate_map = {}
 
     # process states and build mapping of state to input rate laws and output rate laws
-    for index, state in model_states.iterrows():
+    for state in model_states:
         concept_state = state_to_concept(state, grounding_map=grounding_map)
         concepts[concept_state.name] = concept_state
         all_states.add(concept_state.name)
@@ -144,7 +142,7 @@ def template_model_from_pysd_model(
         # get a mapping from flow/stock/etc. name to the related Sympy expression.
         # slightly redundant of the previous block, but this is better encapsulated
     identifier_to_expr = get_identifier_to_expr(
-        pysd_model, expression_map, concepts
+        pysd_model, expression_map, concepts, doc_index=doc_index
     )
 
     # process initials, currently we use the value of the state at timestamp 0
@@ -231,29 +229,27 @@ def template_model_from_pysd_model(
         ):
             if not is_initial:
                 value = float(str_eval_expression)
-            model_parameter_info = model_doc_df[model_doc_df["Py Name"] == name]
+            model_parameter_info = doc_index[name]
 
             # if units exist
             if (
-                model_parameter_info["Units"].values[0]
-                and model_parameter_info["Units"].values[0] != "dimensionless"
-                and model_parameter_info["Units"].values[0] != "fraction"
+                model_parameter_info["Units"]
+                and model_parameter_info["Units"] != "dimensionless"
+                and model_parameter_info["Units"] != "fraction"
             ):
-                unit_text = (
-                    model_parameter_info["Units"].values[0].replace(" ", "")
-                )
+                unit_text = model_parameter_info["Units"].replace(" ", "")
 
                 parameter = {
                     "id": name,
                     "value": value,
-                    "description": model_parameter_info["Comment"].values[0],
+                    "description": model_parameter_info["Comment"],
                     "units": {"expression": unit_text},
                 }
             else:
                 parameter = {
                     "id": name,
                     "value": value,
-                    "description": model_parameter_info["Comment"].values[0],
+                    "description": model_parameter_info["Comment"],
                 }
 
             mira_parameters[name] = parameter_to_mira(parameter)
@@ -290,10 +286,12 @@ def template_model_from_pysd_model(
     # create map of transitions
     for rate_name in sorted(rates):
         rate_expr = identifier_to_expr[rate_name]
+        # free_symbols traverses the whole expression, so only do it once
+        rate_symbols = rate_expr.free_symbols
         inputs, outputs, controllers = [], [], []
         for state_id, in_out_rate_map in state_rate_map.items():
             if (
-                sympy.Symbol(state_id) in rate_expr.free_symbols
+                symbols[state_id] in rate_symbols
                 and rate_name not in in_out_rate_map["output_rates"]
             ):
                 controllers.append(state_id)
@@ -358,8 +356,8 @@ def state_to_concept(state, grounding_map=None) -> Concept:
 
     Parameters
     ----------
-    state : pd.Series
-        The series that contains state data
+    state : dict or pd.Series
+        The entry of the model doc that contains state data
     grounding_map: dict[str, Concept]
         A grounding map, a map from label to Concept
 
@@ -569,19 +567,65 @@ def with_lookup_to_piecewise(expr_text: str) -> str:
     return sympy_str
 
 
-def get_identifier_to_expr(pysd_model, name_to_expr_str, concepts):
+def get_doc_index(model_doc_df) -> t.Dict[str, t.Dict[str, t.Any]]:
+    """Return the entries of a pysd model doc keyed by their python name
+
+    Looking variables up in the index avoids scanning the model doc
+    dataframe for each variable, which is slow for large models.
+
+    Parameters
+    ----------
+    model_doc_df : pd.DataFrame
+        The model doc, i.e., the ``doc`` attribute of a pysd model, with a
+        row for each variable
+
+    Returns
+    -------
+    :
+        A mapping of the "Py Name" of each variable to its row in the model
+        doc as a dict with the columns (e.g., "Real Name", "Type",
+        "Subtype", "Units" and "Comment") as keys
+    """
+    doc_index: t.Dict[str, t.Dict[str, t.Any]] = {}
+    for row in model_doc_df.to_dict("records"):
+        doc_index.setdefault(row["Py Name"], row)
+    return doc_index
+
+
+def get_identifier_to_expr(pysd_model, name_to_expr_str, concepts,
+                           doc_index=None):
+    """Return the expressions of the variables of a model with their
+    auxiliary variables inlined
+
+    Parameters
+    ----------
+    pysd_model : Model
+        The pysd model object
+    name_to_expr_str : dict[str, str]
+        Map of variable name to expression
+    concepts : dict[str, Concept]
+        The concepts of the states of the model keyed by their name
+    doc_index : dict[str, dict]
+        The index of the model doc as returned by :func:`get_doc_index`. If
+        not given, it is built from the model doc.
+
+    Returns
+    -------
+    : dict[str, sympy.Expr]
+        A mapping of the python name of each variable to its expression,
+        in which every auxiliary variable is replaced by its own (inlined)
+        expression, so that only stocks, constants and other variables
+        remain
+    """
+    if doc_index is None:
+        doc_index = get_doc_index(pysd_model.doc)
     # maps from full length string names to python-appropriate identifiers
     # maps from python identifier strings to Sympy symbols
-    identifier_to_symbol = {
-        name: sympy.Symbol(name) for name in pysd_model.doc["Py Name"]
-    }
+    identifier_to_symbol = {name: sympy.Symbol(name) for name in doc_index}
     name_to_identifier = dict(pysd_model.doc[["Real Name", "Py Name"]].values)
     # get a subset of states representing flows (i.e., excluding stocks).
     aux_state_identifiers = {
-        name
-        for name in pysd_model.doc.loc[(pysd_model.doc["Type"] == "Auxiliary")][
-            "Py Name"
-        ]
+        name for name, row in doc_index.items() if row["Type"] == "Auxiliary"
     }
     # maps sympy symbols for expressions to parsed sympy expressions
     id_to_expr = {}
@@ -603,46 +647,40 @@ def get_identifier_to_expr(pysd_model, name_to_expr_str, concepts):
     # of dependencies where edge (u,v) means u depends on v.
     # the keys in norm_name_to_expr can be both stocks and flows
     graph = nx.DiGraph()
+    id_to_symbols = {}
     for identifier, expr in id_to_expr.items():
-        for arg_symbol in expr.free_symbols:
-            arg_id = str(arg_symbol)
-            graph.add_edge(identifier, arg_id)
+        id_to_symbols[identifier] = expr.free_symbols
+        for arg_symbol in id_to_symbols[identifier]:
+            graph.add_edge(identifier, arg_symbol.name)
+
+    # the symbols of variables that are inlined, i.e., all variables with
+    # an expression except parameter values and stocks
+    inlined_symbols = {
+        sympy.Symbol(identifier)
+        for identifier in id_to_expr
+        if doc_index[identifier]["Type"] != "Constant"
+        and identifier not in concepts
+    }
 
     # get the subgraph of flows, so we can calculate their dependencies
     # and do recursive substitution
     flow_dependencies = graph.subgraph(aux_state_identifiers)
     # Traverse in reverse topological sort order, meaning that at any
     # position, all the things that position depends on will have
-    # already come. This means we only need one pass for making substitutions
-    # for everything in the current position with ones that have already been
-    # seen and substituted before
-    identifier_ordering = list(
-        reversed(list(nx.topological_sort(flow_dependencies)))
-    )
+    # already come. This means we only need one pass, replacing all the
+    # inlined symbols of an expression at once with the expressions that
+    # have already been seen and inlined before
+    identifier_ordering = reversed(list(nx.topological_sort(flow_dependencies)))
 
     new_id_to_expr = id_to_expr.copy()
     for identifier in identifier_ordering:
-        expr = id_to_expr[identifier]
-
-        # get a set of strings for all symbols that represent flows
-        symbols = set(expr.free_symbols).intersection(
-            sympy.Symbol(s) for s in id_to_expr
-        )
-        # for each symbol representing a flow, substitute. because we're
-        # traversing in reverse topological order, the new value will always
-        # have only stocks in it, since it also was already substituted
-
-        # don't substitute parameter values and stocks
-        for symbol in symbols:
-            if (
-                pysd_model.doc.loc[pysd_model.doc["Py Name"] == str(symbol)][
-                    "Type"
-                ].values[0]
-                == "Constant"
-                or str(symbol) in concepts
-            ):
-                continue
-            expr = expr.subs(symbol, new_id_to_expr[str(symbol)])
-        new_id_to_expr[identifier] = expr
+        replacements = {
+            symbol: new_id_to_expr[symbol.name]
+            for symbol in id_to_symbols[identifier]
+            if symbol in inlined_symbols
+        }
+        if replacements:
+            new_id_to_expr[identifier] = \
+                id_to_expr[identifier].xreplace(replacements)
 
     return new_id_to_expr
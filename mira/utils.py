@@ -0,0 +1,42 @@
+"""Utilities shared across MIRA's subpackages."""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Union
+
+__all__ = [
+    "write_atomic",
+]
+
+
+def write_atomic(path: Union[str, Path], content: Union[str, bytes]) -> None:
+    """Write a file such that readers never see it partially written
+
+    The content is first written to a uniquely named temporary file in the
+    same directory, which then replaces the file. Concurrent writers, in
+    other threads or processes, therefore don't interfere, and the
+    temporary file is removed if writing fails.
+
+    Parameters
+    ----------
+    path :
+        The path of the file. Its parent directories are created if needed.
+    content :
+        The text, written as UTF-8, or bytes to write.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.",
+                               suffix=".tmp")
+    try:
+        if isinstance(content, str):
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(content)
+        else:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mira.openai_utility import AsyncOpenAIClient, RateLimiter
+from mira.openai_utility.cache import ResponseCache
+from mira.openai_utility.client import BaseOpenAIClient
+
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    """A stand-in for the chat completions endpoint echoing the prompt"""
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(request)
+        if self.server.failures:
+            self.server.failures.pop(0)
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", "2")
+            self.send_header("Retry-After", "0.05")
+            self.end_headers()
+            self.wfile.write(b"{}")
+            return
+        time.sleep(0.2)
+        prompt = request["messages"][0]["content"][0]["text"]
+        body = json.dumps({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": prompt.upper()},
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5,
+                      "total_tokens": 15},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionsHandler)
+    server.requests = []
+    server.failures = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def get_client(server, **kwargs):
+    return AsyncOpenAIClient(
+        api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1",
+        **kwargs,
+    )
+
+
+def test_concurrent_requests(server):
+    client = get_client(server)
+
+    async def run():
+        return await asyncio.gather(*[
+            client.run_chat_completion(f"prompt {i}") for i in range(10)
+        ])
+
+    start = time.time()
+    choices = asyncio.run(run())
+    # The requests overlap instead of taking 0.2s each
+    assert time.time() - start < 1.5
+    assert [choice.message.content for choice in choices] == \
+        [f"PROMPT {i}" for i in range(10)]
+    assert len(server.requests) == 10
+    assert client.total_input_tokens == 100
+    assert client.total_output_tokens == 50
+
+
+def test_coalescing(server):
+    client = get_client(server)
+
+    async def run():
+        return await asyncio.gather(*[
+            client.run_chat_completion_with_text("hello", "world")
+            for _ in range(5)
+        ])
+
+    assert asyncio.run(run()) == ["HELLO\n\nWORLD"] * 5
+    assert len(server.requests) == 1
+    assert client.total_input_tokens == 10
+
+
+def test_retry(server):
+    server.failures = [429, 429]
+    client = get_client(server, backoff=0.01)
+    choice = asyncio.run(client.run_chat_completion("hello"))
+    assert choice.message.content == "HELLO"
+    assert len(server.requests) == 3
+
+    server.failures = [429] * 3
+    client = get_client(server, max_retries=2, backoff=0.01)
+    with pytest.raises(Exception, match="429"):
+        asyncio.run(client.run_chat_completion("again"))
+
+
+def test_cache(server, tmp_path):
+    cache = ResponseCache(tmp_path)
+    client = get_client(server, cache=cache)
+    get_threads = []
+
+    def get(key):
+        get_threads.append(threading.current_thread())
+        return ResponseCache.get(cache, key)
+
+    cache.get = get
+    assert asyncio.run(client.run_chat_completion("hello")) \
+        .message.content == "HELLO"
+    assert asyncio.run(client.run_chat_completion("hello")) \
+        .message.content == "HELLO"
+    assert len(server.requests) == 1
+    # The cache is read off the event loop's thread
+    assert threading.main_thread() not in get_threads
+
+
+def test_base_client_is_abstract():
+    with pytest.raises(TypeError):
+        BaseOpenAIClient(api_key="test")
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=6000)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(10):
+            await limiter.acquire(10)
+        burst = time.monotonic() - start
+        # The bucket of requests is empty, the next has to wait ~0.1s
+        await limiter.acquire(10)
+        # Tokens are refilled at 100 per second
+        await limiter.acquire(5900)
+        await limiter.acquire(100)
+        return burst, time.monotonic() - start
+
+    burst, total = asyncio.run(run())
+    assert burst < 0.05
+    assert 0.15 < total < 3
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import httpx
+
+from mira.dkg.async_web_client import AsyncDkgWebClient
+
+
+def test_async_web_client_coalescing_and_retry():
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        # Let concurrent duplicate requests pile up
+        await asyncio.sleep(0.01)
+        if request.url.path.endswith("ido:0000592") and \
+                calls.count(request.url.path) == 1:
+            return httpx.Response(503)
+        if request.url.path.endswith("ido:0000000"):
+            return httpx.Response(404)
+        curie = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={"id": curie, "name": curie,
+                                         "type": "class", "obsolete": False})
+
+    async def run():
+        async with AsyncDkgWebClient(
+            api_url="http://localhost:8771",
+            transport=httpx.MockTransport(handler),
+            backoff_factor=0,
+        ) as client:
+            return await client.get_entities_batch(
+                ["ido:0000511", "ido:0000511", "ido:0000592", "ido:0000000"]
+            )
+
+    entities = asyncio.run(run())
+    assert [e.id if e else None for e in entities] == \
+        ["ido:0000511", "ido:0000511", "ido:0000592", None]
+    # The duplicate request was coalesced and the 503 was retried
+    assert calls.count("/api/entity/ido:0000511") == 1
+    assert calls.count("/api/entity/ido:0000592") == 2
+
+
+def test_async_web_client_cache(tmp_path):
+    calls = []
+    cache_threads = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"is_child": True})
+
+    async def run():
+        async with AsyncDkgWebClient(
+            api_url="http://localhost:8771",
+            cache_dir=tmp_path,
+            transport=httpx.MockTransport(handler),
+        ) as client:
+            get = client.cache.get
+
+            def get_in_thread(key):
+                cache_threads.append(threading.current_thread())
+                return get(key)
+
+            client.cache.get = get_in_thread
+            first = await client.is_ontological_child("ido:0000511",
+                                                      "ido:0000592")
+            second = await client.is_ontological_child("ido:0000511",
+                                                       "ido:0000592")
+            return first, second
+
+    assert asyncio.run(run()) == (True, True)
+    # The second lookup was answered from the on-disk cache
+    assert len(calls) == 1
+    assert len(list(tmp_path.glob("*/*.json"))) == 1
+    # The cache was read off the thread running the event loop
+    assert threading.main_thread() not in cache_threads
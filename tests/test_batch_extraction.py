@@ -0,0 +1,143 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mira.openai_utility import OpenAIClient, ResponseCache
+from mira.sources.sympy_ode.batch_extraction import run_batch_extraction
+
+SIR_CODE = """```python
+import sympy
+t = sympy.symbols("t")
+S, I, R = sympy.symbols("S I R", cls=sympy.Function)
+b, g = sympy.symbols("b g")
+odes = [
+    sympy.Eq(S(t).diff(t), -b * S(t) * I(t)),
+    sympy.Eq(I(t).diff(t), b * S(t) * I(t) - g * I(t)),
+    sympy.Eq(R(t).diff(t), g * I(t)),
+]
+```"""
+
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    """A stand-in for the chat completions endpoint answering with ODEs"""
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(request)
+        body = json.dumps({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": request["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": SIR_CODE},
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 20,
+                      "total_tokens": 30},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionsHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+def get_client(server, cache_dir):
+    return OpenAIClient(api_key="test",
+                        base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                        cache=ResponseCache(cache_dir))
+
+
+class TextExtractor:
+    def __init__(self, pmid):
+        if pmid == "bad":
+            raise FileNotFoundError("No pdf file")
+        self.pmid = pmid
+        self.extraction_file = f"{pmid}.txt"
+
+    def get_pipeline_inputs(self):
+        return {"content_type": "text",
+                "text_content": f"Equations of paper {self.pmid}"}
+
+
+def test_response_cache(server, tmp_path):
+    client = get_client(server, tmp_path)
+    n_requests = len(server.requests)
+    first = client.run_chat_completion("Hello")
+    second = client.run_chat_completion("Hello")
+    assert first.message.content == second.message.content == SIR_CODE
+    assert len(server.requests) == n_requests + 1
+    assert client.cache.hits == 1
+    # Only the request that reached the server counts towards the usage
+    assert client.total_input_tokens == 10
+
+    client.run_chat_completion("Hello", schema={"type": "object"})
+    assert len(server.requests) == n_requests + 2
+
+
+def test_response_cache_corrupt_file(server, tmp_path):
+    client = get_client(server, tmp_path)
+    client.run_chat_completion("Corrupt")
+    [path] = tmp_path.glob("*/*.json")
+    path.write_text('{"id": "chatcmpl-test", "choi')
+    # An unreadable entry is a miss, and is replaced by a new response
+    n_requests = len(server.requests)
+    response = client.run_chat_completion("Corrupt")
+    assert response.message.content == SIR_CODE
+    assert len(server.requests) == n_requests + 1
+    assert client.cache.misses == 2
+    assert client.run_chat_completion("Corrupt").message.content == SIR_CODE
+    assert client.cache.hits == 1
+    # No temporary files are left behind
+    assert [p.name for p in tmp_path.glob("*/*")] == [path.name]
+
+
+def test_batch_extraction(server, tmp_path):
+    pmids = ["1", "2", "bad", "3"]
+    client = get_client(server, tmp_path / "cache")
+    results = run_batch_extraction(pmids, tmp_path / "out",
+                                   extractor=TextExtractor, client=client,
+                                   attempt_grounding=False, llm_workers=2)
+    assert list(results) == pmids
+    assert results["bad"].status == "failed"
+    assert results["bad"].stage == "parse"
+    for pmid in ["1", "2", "3"]:
+        result = results[pmid]
+        assert result.success, result.error
+        assert len(result.template_model.templates) == 2
+        assert "sympy.Eq" in result.ode_str
+        assert (tmp_path / "out" / pmid / "convert.json").is_file()
+    with open(tmp_path / "out" / "summary.json") as fh:
+        assert json.load(fh)["bad"]["stage"] == "parse"
+
+    # Resuming from the checkpoints doesn't call the LLM again
+    n_requests = len(server.requests)
+    results = run_batch_extraction(pmids, tmp_path / "out",
+                                   extractor=TextExtractor, client=client,
+                                   attempt_grounding=False)
+    assert results["1"].success
+    assert len(server.requests) == n_requests
+
+    # Without checkpoints, the LLM responses come from the cache
+    results = run_batch_extraction(pmids, tmp_path / "rerun",
+                                   extractor=TextExtractor, client=client,
+                                   attempt_grounding=False)
+    assert all(results[pmid].success for pmid in ["1", "2", "3"])
+    assert len(server.requests) == n_requests
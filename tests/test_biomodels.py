@@ -1,13 +1,22 @@
 import os
 import glob
 import unittest
+import unittest.mock
+import zipfile
 
+import pytest
 import tqdm
 import pystow
+import sympy
 
+from mira.examples.concepts import infected, recovered, susceptible
+from mira.metamodel import ControlledConversion, Initial, \
+    NaturalConversion, Parameter, TemplateModel
 from mira.metamodel.ops import simplify_rate_laws
 from mira.modeling import Model
 from mira.modeling.acsets.petri import PetriNetModel
+from mira.modeling.sbml import template_model_to_sbml_string
+from mira.sources.biomodels import get_summary_table, ingest_biomodels
 from mira.sources.sbml import template_model_from_sbml_file
 
 
@@ -32,3 +41,61 @@ def test_process_biomodels():
         assert tm.templates
     print(f"Simplified {simplified} out of {len(fnames)} models")
 
+
+
+def test_ingest_biomodels(tmp_path):
+    mirror = tmp_path / "mirror"
+    cache_dir = tmp_path / "cache"
+    S, I, beta, gamma = sympy.symbols("susceptible_population "
+                                      "infected_population beta gamma")
+    sir = TemplateModel(
+        templates=[
+            ControlledConversion(subject=susceptible, outcome=infected,
+                                 controller=infected,
+                                 rate_law=beta * S * I),
+            NaturalConversion(subject=infected, outcome=recovered,
+                              rate_law=gamma * I),
+        ],
+        parameters={"beta": Parameter(name="beta", value=0.1),
+                    "gamma": Parameter(name="gamma", value=0.2)},
+        initials={concept.name: Initial(concept=concept,
+                                        expression=sympy.Float(value))
+                  for concept, value in [(susceptible, 1), (infected, 2),
+                                         (recovered, 3)]},
+    )
+    sbml = template_model_to_sbml_string(sir)
+    (mirror / "MODEL1").mkdir(parents=True)
+    (mirror / "MODEL1" / "MODEL1.xml").write_text(sbml)
+    with zipfile.ZipFile(mirror / "MODEL2.zip", "w") as z:
+        z.writestr("MODEL2.xml", sbml)
+    (mirror / "MODEL3.xml").write_text("<not sbml")
+
+    results = ingest_biomodels(["MODEL1", "MODEL2", "MODEL3"], mirror=mirror,
+                               cache_dir=cache_dir, parse_workers=2)
+    assert [result.status for result in results.values()] == \
+        ["parsed", "parsed", "failed"]
+    assert results["MODEL3"].stage == "parse"
+    with pytest.raises(ValueError):
+        results["MODEL3"].get_template_model()
+    tm = results["MODEL1"].get_template_model()
+    assert len(tm.templates) == results["MODEL1"].n_templates == 2
+    summary = get_summary_table(results)
+    assert list(summary["status"]) == ["parsed", "parsed", "failed"]
+
+    # Only the changed model is parsed again
+    (mirror / "MODEL1" / "MODEL1.xml").write_text(
+        sbml.replace('initialAmount="1"', 'initialAmount="10"'))
+    results = ingest_biomodels(["MODEL1", "MODEL2"], mirror=mirror,
+                               cache_dir=cache_dir, parse_workers=1)
+    assert results["MODEL1"].status == "parsed"
+    assert results["MODEL2"].status == "cached"
+    assert results["MODEL2"].n_templates == 2
+    assert len(list((cache_dir / "MODEL1").glob("*.json"))) == 1
+
+    # Models parsed by another version of MIRA are parsed again
+    with unittest.mock.patch("mira.sources.biomodels.PARSE_CACHE_VERSION",
+                             "mira-0.0.0"):
+        results = ingest_biomodels(["MODEL2"], mirror=mirror,
+                                   cache_dir=cache_dir, parse_workers=1)
+    assert results["MODEL2"].status == "parsed"
+    assert len(list((cache_dir / "MODEL2").glob("*.json"))) == 1
@@ -5,6 +5,7 @@ from mira.examples.decapodes.decapodes_examples import (
     get_friction_decaexpr,
 )
 from mira.metamodel.decapodes import RootVariable
+from mira.sources.acsets.decapodes.deca_expr import process_decaexpr
 
 
 def test_oscillator_decaexpr():
@@ -180,3 +181,51 @@ def test_friction_decaexpr():
         name_to_variable["mult_2"].expression
         == _lambda * name_to_variable["sub_1"].expression
     )
+
+
+def test_shared_subexpressions_decaexpr():
+    # G_i = G_{i-1} * k_i + G_{i-1} refers to G_{i-1} twice, so expanding
+    # the expression of G_n without reusing the expansions of the G_i would
+    # take 2^n steps
+    def var(name):
+        return {"_type": "Var", "name": name}
+
+    n = 30
+    context = [
+        {"_type": "Judgement", "var": var(name), "dim": dim, "space": "Point"}
+        for i in range(n)
+        for name, dim in ((f"G{i}", "Form0"), (f"k{i}", "Constant"))
+    ]
+    equations = [
+        {
+            "_type": "Eq",
+            "lhs": var(f"G{i}"),
+            "rhs": {
+                "_type": "Plus",
+                "args": [
+                    {"_type": "App2", "f": "*", "arg1": var(f"G{i - 1}"),
+                     "arg2": var(f"k{i}")},
+                    var(f"G{i - 1}"),
+                ],
+            },
+        }
+        for i in range(1, n)
+    ]
+    decaexpr_json = {
+        "model": {
+            "_type": "DecaExpr",
+            "context": context,
+            "equations": equations,
+        }
+    }
+    decapode = process_decaexpr(decaexpr_json)
+
+    name_to_variable = {v.name: v for v in decapode.variables.values()}
+    assert len(decapode.op2s) == n - 1
+    assert len(decapode.summations) == n - 1
+    assert {f"mult_{i}" for i in range(1, n)} <= set(name_to_variable)
+
+    expected = sympy.Symbol("G0")
+    for i in range(1, n):
+        expected = expected * sympy.Symbol(f"k{i}") + expected
+        assert name_to_variable[f"G{i}"].expression == expected
@@ -0,0 +1,129 @@
+import json
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from gilda.grounder import Grounder
+from gilda.process import normalize
+from gilda.term import Term
+
+from mira.dkg.grounding import grounding_blueprint, ground_batch, \
+    GroundRequest
+
+
+def _get_grounder() -> Grounder:
+    terms = [
+        Term(normalize(text), text, "ido", identifier, text, "name", "ido")
+        for identifier, text in [
+            ("0000511", "infected population"),
+            ("0000514", "susceptible population"),
+        ]
+    ]
+    return Grounder(terms)
+
+
+class State:
+    def __init__(self):
+        self.grounder = _get_grounder()
+
+
+class TestGrounding(unittest.TestCase):
+    def setUp(self) -> None:
+        self.test_app = FastAPI()
+        self.test_app.state = State()
+        self.test_app.include_router(grounding_blueprint, prefix="/api")
+        self.client = TestClient(self.test_app)
+        self.texts = ["infected population", "susceptible population",
+                      "infected population", "recovered population"]
+
+    def test_ground_batch(self):
+        results = ground_batch(
+            self.test_app.state.grounder,
+            [GroundRequest(text=text) for text in self.texts],
+        )
+        self.assertEqual(
+            [[r.curie for r in res.results] for res in results],
+            [["ido:0000511"], ["ido:0000514"], ["ido:0000511"], []],
+        )
+        self.assertEqual(results[0].request.text, "infected population")
+
+    def test_ground_list(self):
+        response = self.client.post(
+            "/api/ground_list", json=[{"text": text} for text in self.texts]
+        )
+        self.assertEqual(200, response.status_code)
+        single = self.client.post("/api/ground",
+                                  json={"text": "infected population"})
+        self.assertEqual(single.json(), response.json()[0])
+
+    def test_ground_list_stream(self):
+        response = self.client.post(
+            "/api/ground_list_stream",
+            json=[{"text": text} for text in self.texts]
+        )
+        self.assertEqual(200, response.status_code)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        expected = self.client.post(
+            "/api/ground_list", json=[{"text": text} for text in self.texts]
+        ).json()
+        self.assertEqual(expected, lines)
+
+    def test_ground_batch_parallel(self):
+        texts = [f"infected population {i}" for i in range(250)]
+        requests = [GroundRequest(text=text) for text in texts]
+        grounder = self.test_app.state.grounder
+        # Results are cached per grounder, so the serial results are
+        # computed with a separate grounder
+        self.assertEqual(
+            ground_batch(grounder, requests, workers=2),
+            ground_batch(_get_grounder(), requests, workers=0),
+        )
+
+    def test_ground_batch_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        grounder = _get_grounder()
+        batches = [
+            [GroundRequest(text=f"infected population {i % 50}")
+             for i in range(start, start + 100)]
+            for start in range(0, 800, 100)
+        ]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda batch: ground_batch(grounder, batch, workers=0),
+                batches,
+            ))
+        self.assertEqual(
+            [ground_batch(_get_grounder(), batch, workers=0)
+             for batch in batches],
+            results,
+        )
+
+    def test_cache_does_not_keep_grounder(self):
+        import gc
+        import weakref
+
+        grounder = _get_grounder()
+        ground_batch(grounder, [GroundRequest(text="infected population")])
+        ref = weakref.ref(grounder)
+        del grounder
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+def test_grounder_cache(tmp_path):
+    from mira.dkg.grounder_cache import dump_grounder, load_grounder
+
+    grounder = _get_grounder()
+    terms = [term for terms in grounder.entries.values() for term in terms]
+    path = tmp_path / "grounder.pkl"
+    assert load_grounder(path) is None
+    dump_grounder(terms, path, prefixes=["ido"], graph_version="2024-09-30")
+
+    loaded = load_grounder(path, prefixes=["ido"], graph_version="2024-09-30")
+    assert {k: [t.to_list() for t in v] for k, v in loaded.entries.items()} == \
+        {k: [t.to_list() for t in v] for k, v in grounder.entries.items()}
+    assert loaded.ground("infected population")[0].term.id == "0000511"
+    # Mismatching versions or prefixes are not loaded
+    assert load_grounder(path, graph_version="2025-01-01") is None
+    assert load_grounder(path, prefixes=["ido", "vo"]) is None
@@ -56,3 +56,126 @@ def test_templates():
         for f in failed:
             print(f)
         raise AssertionError(f"{len(failed)} roundtrips failed")
+
+
+def test_expression_to_mathml():
+    import sympy
+    from mira.metamodel.io import expression_to_mathml
+
+    expr = sympy.Symbol("beta_1") * sympy.Symbol("S_young") * \
+        sympy.Symbol("I") / sympy.Symbol("N")
+    mml = expression_to_mathml(expr)
+    # Underscores, numeric suffixes and Greek letter names are kept as is
+    assert "<ci>beta_1</ci>" in mml
+    assert "<ci>S_young</ci>" in mml
+    assert "msub" not in mml
+    assert mathml_to_expression(mml) == expr
+    # The cached result is returned for equal expressions
+    expr2 = sympy.Symbol("I") * sympy.Symbol("S_young") * \
+        sympy.Symbol("beta_1") / sympy.Symbol("N")
+    assert expression_to_mathml(expr2) == mml
+    assert expression_to_mathml(sympy.Integer(2)) == "<cn>2</cn>"
+
+
+def _get_sir_model():
+    import sympy
+
+    S, I, R = (Concept(name=name, identifiers={"ido": ido})
+               for name, ido in [("S", "0000514"), ("I", "0000511"),
+                                 ("R", "0000592")])
+    beta, gamma = sympy.symbols("beta gamma")
+    return TemplateModel(
+        templates=[
+            ControlledConversion(
+                subject=S, outcome=I, controller=I,
+                rate_law=beta * sympy.Symbol("S") * sympy.Symbol("I"),
+            ),
+            NaturalConversion(subject=I, outcome=R,
+                              rate_law=gamma * sympy.Symbol("I")),
+        ],
+        parameters={"beta": Parameter(name="beta", value=0.1),
+                    "gamma": Parameter(name="gamma", value=0.05)},
+        initials={"S": Initial(concept=S, expression=sympy.Float(990)),
+                  "I": Initial(concept=I, expression=beta * 100)},
+        annotations=Annotations(name="SIR – test"),
+    )
+
+
+def test_json_file_streaming():
+    import json
+
+    import pytest
+
+    tm = _get_sir_model()
+    with tempfile.NamedTemporaryFile(suffix=".json") as temp_file:
+        model_to_json_file(tm, temp_file.name)
+        with open(temp_file.name, encoding="utf-8") as fh:
+            text = fh.read()
+        # The numbers of this model are written the same way by orjson and
+        # json, so the file is the same as with json.dump
+        assert text == json.dumps(tm.to_json(), indent=1, ensure_ascii=False)
+
+        pytest.importorskip("ijson")
+        templates = list(iter_templates_from_json_file(temp_file.name))
+        assert [t.to_json() for t in templates] == \
+            [t.to_json() for t in tm.templates]
+        # The capital I is a concept, not the imaginary unit
+        assert sympy_symbol_names(templates[0].rate_law) == {"beta", "S", "I"}
+
+        tm2 = model_from_json_file(temp_file.name, stream=True)
+        assert tm2.to_json() == tm.to_json()
+        assert sympy_symbol_names(tm2.templates[0].rate_law) == \
+            {"beta", "S", "I"}
+        tm3 = model_from_json_file(temp_file.name, stream=True, lazy=True)
+        assert tm3.to_json() == tm.to_json()
+
+
+def test_msgpack_file():
+    import pytest
+
+    pytest.importorskip("msgpack")
+    tm = _get_sir_model()
+    with tempfile.NamedTemporaryFile(suffix=".msgpack") as temp_file:
+        model_to_msgpack_file(tm, temp_file.name)
+        tm2 = model_from_msgpack_file(temp_file.name)
+    assert tm2.to_json() == tm.to_json()
+    assert sympy_symbol_names(tm2.templates[0].rate_law) == {"beta", "S", "I"}
+
+
+def test_dumps_json():
+    import json
+
+    data = {"a": [1, 2.5, {"b": None}], "c": "ü", "d": {}}
+    for indent in [None, 1, 2, 4]:
+        assert json.loads(dumps_json(data, indent=indent)) == data
+        if indent:
+            assert dumps_json(data, indent=indent) == \
+                json.dumps(data, indent=indent, ensure_ascii=False)
+    # Without indentation, the output is the same as json's
+    assert dumps_json(data) == json.dumps(data)
+    assert dumps_json(data) == \
+        '{"a": [1, 2.5, {"b": null}], "c": "\\u00fc", "d": {}}'
+
+    # NaN and infinity aren't turned into null
+    data = {"a": float("nan"), "b": [float("inf")]}
+    for indent in [None, 1]:
+        assert dumps_json(data, indent=indent) == \
+            json.dumps(data, indent=indent, ensure_ascii=False)
+
+
+def test_json_file_nan():
+    import math
+
+    tm = _get_sir_model()
+    tm.parameters["beta"].value = float("nan")
+    with tempfile.NamedTemporaryFile(suffix=".json") as temp_file:
+        for indent in [None, 1]:
+            model_to_json_file(tm, temp_file.name, indent=indent)
+            tm2 = model_from_json_file(temp_file.name)
+            assert math.isnan(tm2.parameters["beta"].value)
+            assert tm2.parameters["gamma"].value == \
+                tm.parameters["gamma"].value
+
+
+def sympy_symbol_names(expr):
+    return {symbol.name for symbol in expr.free_symbols}
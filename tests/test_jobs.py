@@ -0,0 +1,97 @@
+"""Tests for running modeling jobs in worker processes."""
+
+import os
+import time
+import unittest
+
+from mira.dkg.jobs import JobManager
+
+
+def _add(x, y):
+    return {"sum": x + y, "pid": os.getpid()}
+
+
+def _fail():
+    raise ValueError("bad input")
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return {}
+
+
+class _SlowToPickle:
+    def __reduce__(self):
+        time.sleep(1)
+        return _SlowToPickle, ()
+
+
+def _wait(manager, job, timeout=20):
+    start = time.time()
+    while not job.done and time.time() - start < timeout:
+        time.sleep(0.02)
+    return job
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = JobManager(max_workers=1, timeout=10)
+
+    def test_success(self):
+        job = _wait(self.manager, self.manager.submit("add", _add, 1, 2))
+        self.assertEqual("succeeded", job.status)
+        self.assertEqual(3, job.result["sum"])
+        # The job ran in another process
+        self.assertNotEqual(os.getpid(), job.result["pid"])
+        self.assertIs(job, self.manager.get(job.job_id))
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failure(self):
+        job = _wait(self.manager, self.manager.submit("fail", _fail))
+        self.assertEqual("failed", job.status)
+        self.assertEqual("ValueError: bad input", job.error)
+
+    def test_timeout(self):
+        job = self.manager.submit("sleep", _sleep, 5, timeout=0.5)
+        _wait(self.manager, job)
+        self.assertEqual("timed_out", job.status)
+        self.assertLess(job.finished_at - job.started_at, 4)
+
+    def test_cancel_and_queue_depth(self):
+        running = self.manager.submit("sleep", _sleep, 5)
+        queued = self.manager.submit("add", _add, 1, 2)
+        start = time.time()
+        while running.status != "running" and time.time() - start < 10:
+            time.sleep(0.02)
+        metrics = self.manager.get_metrics()
+        self.assertEqual(1, metrics["queue_depth"])
+        self.assertEqual(1, metrics["running"])
+
+        self.manager.cancel(queued.job_id)
+        self.manager.cancel(running.job_id)
+        self.assertEqual("cancelled", queued.status)
+        self.assertEqual("cancelled", running.status)
+        # Cancelling stops the running job, so the worker is free again
+        job = _wait(self.manager, self.manager.submit("add", _add, 2, 2),
+                    timeout=4)
+        self.assertEqual("succeeded", job.status)
+        self.assertEqual(2, self.manager.get_metrics()["jobs"]["cancelled"])
+        self.assertIsNone(self.manager.cancel("unknown"))
+
+    def test_start_does_not_block(self):
+        # The job's arguments are pickled while its process is started
+        job = self.manager.submit("sleep", _sleep, _SlowToPickle())
+        start = time.time()
+        while job.status != "running" and time.time() - start < 10:
+            time.sleep(0.02)
+        start = time.time()
+        self.assertEqual(1, self.manager.get_metrics()["running"])
+        self.assertLess(time.time() - start, 0.5)
+
+        # Cancelling the job while its process is starting stops it
+        self.manager.cancel(job.job_id)
+        self.assertEqual("cancelled", job.status)
+        job = _wait(self.manager, self.manager.submit("add", _add, 2, 2),
+                    timeout=6)
+        self.assertEqual("succeeded", job.status)
@@ -0,0 +1,69 @@
+"""Benchmarks of the memory used by template models."""
+
+import gc
+import tracemalloc
+
+import sympy
+
+from mira.metamodel import *
+from mira.metamodel import templates as _templates
+from mira.metamodel.ops import stratify
+
+
+def _get_allocated(func):
+    """Return the result of a function and the bytes it allocated."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, allocated
+
+
+def _get_sir():
+    S, I, R = [Concept(name=name, identifiers={'ido': curie})
+               for name, curie in [('S', '0000514'), ('I', '0000511'),
+                                   ('R', '0000592')]]
+    beta, gamma = sympy.symbols('beta gamma')
+    return TemplateModel(
+        templates=[
+            ControlledConversion(subject=S, outcome=I, controller=I,
+                                 rate_law=beta * sympy.Symbol('S')
+                                 * sympy.Symbol('I')),
+            NaturalConversion(subject=I, outcome=R,
+                              rate_law=gamma * sympy.Symbol('I')),
+        ],
+        parameters={'beta': Parameter(name='beta', value=0.1),
+                    'gamma': Parameter(name='gamma', value=0.2)},
+        initials={name: Initial(concept=concept, expression=1)
+                  for name, concept in zip('SIR', [S, I, R])},
+    )
+
+
+def test_no_instance_dict():
+    classes = [Concept, Parameter, Observable, Initial] + [
+        cls for cls in vars(_templates).values()
+        if isinstance(cls, type) and issubclass(cls, Template)
+    ]
+    for cls in classes:
+        assert not hasattr(object.__new__(cls), '__dict__'), cls
+
+
+def test_stratified_model_memory():
+    sir = _get_sir()
+    strata = [f'a{i}' for i in range(10)]
+    tm, allocated = _get_allocated(
+        lambda: stratify(sir, key='age', strata=strata,
+                         cartesian_control=True, structure=[]))
+    assert len(tm.templates) == 110
+    # Reloading the model from JSON creates a separate concept for each
+    # template, while stratified models share interned concepts
+    tm_json = tm.to_json()
+    _, allocated_json = _get_allocated(
+        lambda: TemplateModel.from_json(tm_json))
+    assert allocated < allocated_json
+    concepts = {id(c) for t in tm.templates for c in t.get_concepts()}
+    assert len(concepts) == 30
@@ -251,6 +251,28 @@ def test_safe_parse_curly_braces():
     assert safe_parse_expr(var, local_dict={var: var_sym}) == var_sym
 
 
+def test_safe_parse_mass_action():
+    local_dict = {name: sympy.Symbol(name)
+                  for name in ['beta', 'S', 'I', 'N', 'lambda', 'gamma']}
+    for expr_str in ['beta*S*I/N', 'beta * S', 'S/N/I', 'lambda*S',
+                     'gamma*I', 'S*S', 'beta*S*I/N + gamma*I']:
+        expr = safe_parse_expr(expr_str, local_dict=local_dict)
+        ref = sympy.parse_expr(
+            expr_str.replace('lambda', 'XXlambdaXX'),
+            local_dict={k.replace('lambda', 'XXlambdaXX'): v
+                        for k, v in local_dict.items()},
+            evaluate=False,
+        )
+        assert sympy.srepr(expr) == sympy.srepr(ref), expr_str
+    # Names that sympy resolves specially are not taken as symbols
+    assert safe_parse_expr('E*S', local_dict=local_dict) == \
+        sympy.E * sympy.Symbol('S')
+    # Parsing the same expression with different symbols isn't conflated
+    x_real = sympy.Symbol('x', real=True)
+    assert safe_parse_expr('x*y', local_dict={'x': x_real}).has(x_real)
+    assert not safe_parse_expr('x*y', local_dict={}).has(x_real)
+
+
 def test_initial_expression_float():
     init = Initial(concept=Concept(name='x'), expression=1.0)
     assert isinstance(init.expression, sympy.Expr)
@@ -0,0 +1,88 @@
+import time
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mira.dkg.api import api_blueprint
+from mira.dkg.utils import MiraState
+
+
+class TestMiraState(unittest.TestCase):
+    def test_lazy_loading(self):
+        calls = []
+
+        def load_lexical():
+            calls.append("lexical_dump")
+            return []
+
+        state = MiraState(vectors={}, loaders={"lexical_dump": load_lexical})
+        self.assertTrue(state.is_loaded("vectors"))
+        self.assertFalse(state.is_loaded("lexical_dump"))
+        self.assertEqual([], state.lexical_dump)
+        self.assertEqual([], state.lexical_dump)
+        self.assertEqual(["lexical_dump"], calls)
+        status = state.get_status()["lexical_dump"]
+        self.assertTrue(status.loaded)
+        self.assertIsNotNone(status.seconds)
+        with self.assertRaises(AttributeError):
+            state.grounder
+
+    def test_ready_endpoint(self):
+        def load_grounder():
+            time.sleep(0.1)
+            return object()
+
+        app = FastAPI()
+        app.state = MiraState(vectors={}, loaders={"grounder": load_grounder})
+        app.include_router(api_blueprint, prefix="/api")
+        client = TestClient(app)
+
+        response = client.get("/api/ready", params={"components": ["vectors"]})
+        self.assertEqual(200, response.status_code)
+        response = client.get("/api/ready", params={"components": ["grounder"]})
+        self.assertEqual(503, response.status_code)
+        self.assertFalse(response.json()["components"]["grounder"]["loaded"])
+
+        for thread in app.state.warm():
+            thread.join()
+        response = client.get("/api/ready", params={"components": ["grounder"]})
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.json()["ready"])
+        self.assertGreater(
+            response.json()["components"]["grounder"]["seconds"], 0
+        )
+
+    def test_memory_of_overlapping_loads(self):
+        import threading
+
+        started = threading.Barrier(2)
+
+        def load():
+            started.wait(timeout=5)
+            return {}
+
+        state = MiraState(loaders={"vectors": load, "lexical_dump": load})
+        for thread in state.warm():
+            thread.join()
+        # The peak memory usage is that of the process, so it can't be
+        # attributed to either of the concurrently loaded components
+        for name in ["vectors", "lexical_dump"]:
+            status = state.get_status()[name]
+            self.assertTrue(status.loaded)
+            self.assertIsNone(status.memory_mb)
+
+        state = MiraState(loaders={"vectors": dict})
+        state.vectors
+        self.assertIsNotNone(state.get_status()["vectors"].memory_mb)
+
+    def test_eq_and_repr(self):
+        self.assertEqual(MiraState(vectors={"a": 1}),
+                         MiraState(vectors={"a": 1}))
+        self.assertNotEqual(MiraState(vectors={"a": 1}),
+                            MiraState(vectors={"a": 2}))
+        self.assertIn("vectors={'a': 1}", repr(MiraState(vectors={"a": 1})))
+
+        # Representing a state doesn't load its components
+        state = MiraState(loaders={"grounder": self.fail})
+        self.assertIn("grounder=<not loaded>", repr(state))
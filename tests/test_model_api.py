@@ -2,10 +2,12 @@ import copy
 import json
 import os
 import tempfile
+import time
 import unittest
 import uuid
 from pathlib import Path
 from typing import List, Union
+from unittest import mock
 
 import sympy
 from fastapi import FastAPI
@@ -13,6 +15,7 @@ from fastapi.testclient import TestClient
 
 from mira.examples.sir import sir_parameterized, sir, \
     sir_parameterized_init, sir_init_val_norm
+from mira.dkg.jobs import JobManager
 from mira.dkg.model import model_blueprint, ModelComparisonResponse
 from mira.dkg.api import RelationQuery
 from mira.dkg.web_client import is_ontological_child_web, get_relations_web, \
@@ -689,6 +692,32 @@ class TestModelApi(unittest.TestCase):
         for initial in tm_dimless.initials.values():
             assert initial.concept.units.expression.equals(1)
 
+    def test_amr_edit(self):
+        amr_json = AMRPetriNetModel(Model(sir_parameterized_init)).to_json()
+        response = self.client.post(
+            "/api/amr_edit",
+            json={
+                "model": amr_json,
+                "ops": [
+                    {"op": "replace_parameter_id", "old_id": "beta",
+                     "new_id": "b"},
+                    {"op": "add_parameter", "parameter_id": "delta",
+                     "value": 0.01},
+                ],
+            },
+        )
+        self.assertEqual(200, response.status_code)
+        tm = template_model_from_amr_json(response.json())
+        self.assertIn("b", tm.parameters)
+        self.assertNotIn("beta", tm.parameters)
+        self.assertEqual(0.01, tm.parameters["delta"].value)
+
+        response = self.client.post(
+            "/api/amr_edit",
+            json={"model": amr_json, "ops": [{"op": "not_an_op"}]},
+        )
+        self.assertEqual(400, response.status_code)
+
     def test_reconstruct_ode_semantics_endpoint(self):
         # Load test file
         from mira.sources.amr.flux_span import test_file_path, \
@@ -710,6 +739,96 @@ class TestModelApi(unittest.TestCase):
         assert len(flux_span_tm.parameters) == 11
         assert all(t.rate_law for t in flux_span_tm.templates)
 
+    def _wait_for_job(self, job_id: str, timeout: float = 60):
+        start = time.time()
+        while time.time() - start < timeout:
+            response = self.client.get(f"/api/jobs/{job_id}")
+            self.assertEqual(200, response.status_code)
+            status = response.json()
+            if status["status"] not in {"queued", "running"}:
+                return status
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish in {timeout}s")
+
+    def test_stratify_job(self):
+        sir_templ_model = _get_sir_templatemodel()
+        query_json = {
+            "template_model": sir_templ_model.to_json(),
+            "key": "city",
+            "strata": ["geonames:5128581", "geonames:4930956"],
+        }
+        response = self.client.post("/api/jobs/stratify", json=query_json)
+        self.assertEqual(202, response.status_code)
+        job_id = response.json()["job_id"]
+        self.assertEqual("succeeded", self._wait_for_job(job_id)["status"])
+
+        # The result is the same as that of the synchronous endpoint
+        response = self.client.get(f"/api/jobs/{job_id}/result")
+        self.assertEqual(200, response.status_code)
+        expected = self.client.post("/api/stratify", json=query_json)
+        self.assertEqual(sorted_json_str(expected.json()),
+                         sorted_json_str(response.json()))
+        self.assertIn(
+            "succeeded",
+            self.client.get("/api/jobs/metrics").json()["jobs"],
+        )
+
+    def test_job_not_found(self):
+        self.assertEqual(404, self.client.get("/api/jobs/unknown").status_code)
+        self.assertEqual(
+            404, self.client.get("/api/jobs/unknown/result").status_code
+        )
+        self.assertEqual(
+            404, self.client.delete("/api/jobs/unknown").status_code
+        )
+
+    def test_cancel_job(self):
+        manager = JobManager(max_workers=1, timeout=60)
+        query_json = {
+            "template_models": [_get_sir_templatemodel().to_json()] * 2
+        }
+        with mock.patch("mira.dkg.model.job_manager", manager), \
+                mock.patch.object(manager, "submit",
+                                  wraps=manager.submit) as submit:
+            response = self.client.post("/api/jobs/model_comparison",
+                                        json=query_json)
+            self.assertEqual(202, response.status_code)
+            job_id = response.json()["job_id"]
+            # The refinement closure is loaded in the job's process instead
+            # of being passed to it
+            _, _, *args = submit.call_args.args
+            self.assertEqual([query_json["template_models"]], args)
+            response = self.client.delete(f"/api/jobs/{job_id}")
+            self.assertEqual(200, response.status_code)
+            self.assertEqual("cancelled", response.json()["status"])
+            # There is no result for a cancelled job
+            response = self.client.get(f"/api/jobs/{job_id}/result")
+            self.assertEqual(409, response.status_code)
+            self.assertEqual("cancelled", response.json()["detail"]["status"])
+
+    def test_job_timeout(self):
+        # Starting the job's process alone takes longer than the timeout
+        manager = JobManager(max_workers=1, timeout=0.001)
+        query_json = {
+            "template_model": _get_sir_templatemodel().to_json(),
+            "key": "city",
+            "strata": ["geonames:5128581", "geonames:4930956"],
+        }
+        with mock.patch("mira.dkg.model.job_manager", manager):
+            response = self.client.post("/api/jobs/stratify", json=query_json)
+            self.assertEqual(202, response.status_code)
+            status = self._wait_for_job(response.json()["job_id"])
+        self.assertEqual("timed_out", status["status"])
+        self.assertIsNotNone(status["error"])
+
+
+def _get_attribute_names(obj):
+    # Metamodel classes keep their attributes in slots instead of a __dict__
+    if hasattr(obj, '__dict__'):
+        return list(vars(obj))
+    return [slot for cls in type(obj).__mro__
+            for slot in getattr(cls, '__slots__', ()) if hasattr(obj, slot)]
+
 
 def _assert_values_equal(val_0, val_1):
     """Compare two values, using is_equal_to for Concepts
@@ -728,9 +847,9 @@ def _assert_values_equal(val_0, val_1):
         assert set(val_0.keys()) == set(val_1.keys())
         for k in val_0:
             _assert_values_equal(val_0[k], val_1[k])
-    elif hasattr(val_0, '__dict__') and \
+    elif (hasattr(val_0, '__dict__') or hasattr(val_0, '__slots__')) and \
             not isinstance(val_0, type):
-        for attr in vars(val_0):
+        for attr in _get_attribute_names(val_0):
             if not attr.startswith('_'):
                 _assert_values_equal(
                     getattr(val_0, attr),
@@ -750,7 +869,7 @@ def assert_template_model_equality(tm_0, tm_1):
         tm_1_val = getattr(tm_1, attr)
         if attr == "templates":
             for t0, t1 in zip(tm_0_val, tm_1_val):
-                for t_attr in vars(t0):
+                for t_attr in _get_attribute_names(t0):
                     if t_attr.startswith('_'):
                         continue
                     _assert_values_equal(
@@ -0,0 +1,84 @@
+"""Tests for the cache of modeling API results."""
+
+import tempfile
+import unittest
+
+from mira.dkg.model_cache import ConversionCache
+
+
+class TestConversionCache(unittest.TestCase):
+    def test_key_is_canonical(self):
+        key = ConversionCache.get_key("to_petrinet", {"a": 1, "b": [1, 2]})
+        self.assertEqual(
+            key, ConversionCache.get_key("to_petrinet", {"b": [1, 2], "a": 1})
+        )
+        self.assertNotEqual(
+            key, ConversionCache.get_key("from_petrinet", {"a": 1, "b": [1, 2]})
+        )
+        self.assertNotEqual(
+            key, ConversionCache.get_key("to_petrinet", {"a": 1, "b": [2, 1]})
+        )
+
+    def test_memory_tier(self):
+        cache = ConversionCache(maxsize=2)
+        calls = []
+
+        def compute(value):
+            calls.append(value)
+            return {"value": value}
+
+        for value in [1, 1, 2, 1, 3, 2]:
+            result = cache.get_or_compute("op", value, lambda: compute(value))
+            self.assertEqual({"value": value}, result)
+        # 2 is evicted when 3 is added since 1 was used more recently
+        self.assertEqual([1, 2, 3, 2], calls)
+
+        metrics = cache.get_metrics()
+        self.assertEqual(2, metrics["size"])
+        self.assertEqual(2, metrics["memory_hits"])
+        self.assertEqual(4, metrics["misses"])
+        self.assertEqual(2, metrics["namespaces"]["op"]["memory_hits"])
+        self.assertAlmostEqual(2 / 6, metrics["hit_rate"])
+
+        cache.clear()
+        self.assertEqual(0, cache.get_metrics()["size"])
+        self.assertIsNone(cache.get_metrics()["hit_rate"])
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ConversionCache(maxsize=0, cache_dir=directory)
+            cache.get_or_compute("op", {"x": 1}, lambda: {"y": 2})
+            # A new cache, e.g., in another worker, finds the entry on disk
+            cache = ConversionCache(maxsize=10, cache_dir=directory)
+            result = cache.get_or_compute("op", {"x": 1}, self.fail)
+            self.assertEqual({"y": 2}, result)
+            # After loading from disk, the entry is also kept in memory
+            cache.get_or_compute("op", {"x": 1}, self.fail)
+            metrics = cache.get_metrics()
+            self.assertEqual(1, metrics["disk_hits"])
+            self.assertEqual(1, metrics["memory_hits"])
+            self.assertEqual(0, metrics["misses"])
+
+    def test_disk_tier_version(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ConversionCache(cache_dir=directory, version="1")
+            cache.get_or_compute("op", {"x": 1}, lambda: {"y": 2})
+            # Entries written by another version aren't reused
+            cache = ConversionCache(cache_dir=directory, version="2")
+            result = cache.get_or_compute("op", {"x": 1}, lambda: {"y": 3})
+            self.assertEqual({"y": 3}, result)
+
+    def test_memory_only(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ConversionCache(cache_dir=directory)
+            cache.get_or_compute("op", {"x": 1}, lambda: {"y": 2}, disk=False)
+            self.assertEqual(
+                {"y": 2},
+                cache.get_or_compute("op", {"x": 1}, self.fail, disk=False),
+            )
+            # Results that depend on the server's state aren't kept on disk
+            cache = ConversionCache(cache_dir=directory)
+            result = cache.get_or_compute(
+                "op", {"x": 1}, lambda: {"y": 3}, disk=False
+            )
+            self.assertEqual({"y": 3}, result)
@@ -786,3 +786,38 @@ class TestAskenetOperations(unittest.TestCase):
         self.assertIsInstance(amr, dict)
         self.assertIsInstance(new_amr, dict)
 
+    def test_apply_ops(self):
+        amr = _d(self.sir_amr)
+        ops = [
+            {'op': 'replace_state_id', 'old_id': 'S', 'new_id': 'X'},
+            {'op': 'replace_parameter_id', 'old_id': 'beta', 'new_id': 'b'},
+            {'op': 'add_parameter', 'parameter_id': 'delta', 'value': 0.1},
+            {'op': 'remove_transition', 'transition_id': 'rec'},
+        ]
+        new_amr = apply_ops(amr, ops)
+        self.assertEqual(amr, self.sir_amr)
+
+        # The result is the same as applying the edits one by one
+        expected_amr = amr
+        for op in ops:
+            kwargs = dict(op)
+            expected_amr = globals()[kwargs.pop('op')](expected_amr, **kwargs)
+        self.assertEqual(expected_amr['model'], new_amr['model'])
+        self.assertEqual(expected_amr['semantics'], new_amr['semantics'])
+
+        session = AmrEditSession(amr)
+        session.apply('replace_state_id', 'S', 'X').apply_ops(ops[1:])
+        self.assertEqual(new_amr['model'], session.to_amr()['model'])
+
+    def test_apply_ops_transaction(self):
+        session = AmrEditSession(_d(self.sir_amr))
+        with self.assertRaises(ValueError):
+            session.apply_ops([
+                {'op': 'replace_state_id', 'old_id': 'S', 'new_id': 'X'},
+                {'op': 'replace_state_id', 'old_id': 'missing',
+                 'new_id': 'Y'},
+            ])
+        # None of the edits were applied
+        self.assertIn('S', session.template_model.get_concepts_name_map())
+        with self.assertRaises(ValueError):
+            session.apply_ops([{'op': 'not_an_op'}])
@@ -0,0 +1,109 @@
+"""Tests for steady states and sensitivities of ODE models."""
+
+import unittest
+
+import numpy
+import sympy
+
+from mira.metamodel import *
+from mira.modeling import Model
+from mira.modeling.analysis import (
+    finite_difference_sensitivities,
+    find_steady_state,
+    get_conservation_laws,
+    simulate_sensitivities,
+)
+from mira.modeling.ode import IncrementalOdeModel, OdeModel
+
+
+def get_template_model():
+    # A <-> B and X -> with X(0) = x0
+    a, b, x = Concept(name='A'), Concept(name='B'), Concept(name='X')
+    kf, kr, k, x0 = sympy.symbols('kf kr k x0')
+    return TemplateModel(
+        templates=[
+            NaturalConversion(subject=a, outcome=b,
+                              rate_law=kf * sympy.Symbol('A')),
+            NaturalConversion(subject=b, outcome=a,
+                              rate_law=kr * sympy.Symbol('B')),
+            NaturalDegradation(subject=x, rate_law=k * sympy.Symbol('X')),
+        ],
+        parameters={
+            'kf': Parameter(name='kf', value=2.0),
+            'kr': Parameter(name='kr', value=1.0),
+            'k': Parameter(name='k', value=0.5),
+            'x0': Parameter(name='x0', value=3.0),
+        },
+        initials={
+            'A': Initial(concept=a, expression=10),
+            'B': Initial(concept=b, expression=0),
+            'X': Initial(concept=x, expression=x0),
+        },
+    )
+
+
+class TestAnalysis(unittest.TestCase):
+    """Test case for the analysis of ODE models."""
+
+    def get_ode_models(self):
+        """Yield the ODE models of the template model with the indices of
+        their variables by name."""
+        template_model = get_template_model()
+        ode_model = OdeModel(Model(template_model), initialized=True)
+        yield ode_model, {name: idx for idx, name
+                          in ode_model.vname_map.items()}
+        incremental_model = IncrementalOdeModel(template_model)
+        yield incremental_model, incremental_model.vmap
+
+    def test_steady_state(self):
+        for ode_model, vmap in self.get_ode_models():
+            conservation_laws = get_conservation_laws(ode_model)
+            self.assertEqual((1, 3), conservation_laws.shape)
+            self.assertEqual(0, conservation_laws[0, vmap['X']])
+
+            steady_state = find_steady_state(ode_model)
+            # The total of A and B is conserved
+            self.assertAlmostEqual(10 / 3, steady_state[vmap['A']])
+            self.assertAlmostEqual(20 / 3, steady_state[vmap['B']])
+            self.assertAlmostEqual(0, steady_state[vmap['X']])
+
+            steady_state = find_steady_state(
+                ode_model, parameters={'kf': 1.0},
+                initial_guess=[4, 4, 4])
+            self.assertAlmostEqual(4, steady_state[vmap['A']])
+            self.assertAlmostEqual(4, steady_state[vmap['B']])
+
+    def test_sensitivities(self):
+        times = numpy.linspace(0, 4, 9)
+        for ode_model, vmap in self.get_ode_models():
+            parameter_names = list(ode_model.pmap)
+            res, sensitivities = simulate_sensitivities(ode_model, times)
+            self.assertEqual((9, 3), res.shape)
+            self.assertEqual((9, 3, 4), sensitivities.shape)
+
+            # X = x0 exp(-k t)
+            x_idx = vmap['X']
+            k_idx = parameter_names.index('k')
+            x0_idx = parameter_names.index('x0')
+            numpy.testing.assert_allclose(
+                res[:, x_idx], 3 * numpy.exp(-0.5 * times), rtol=1e-6)
+            numpy.testing.assert_allclose(
+                sensitivities[:, x_idx, k_idx],
+                -3 * times * numpy.exp(-0.5 * times), rtol=1e-6, atol=1e-9)
+            numpy.testing.assert_allclose(
+                sensitivities[:, x_idx, x0_idx],
+                numpy.exp(-0.5 * times), rtol=1e-6)
+
+            fd_res, fd_sensitivities = finite_difference_sensitivities(
+                ode_model, times, sensitivity_parameters=['kf', 'k'])
+            numpy.testing.assert_allclose(fd_res, res, rtol=1e-6, atol=1e-9)
+            numpy.testing.assert_allclose(
+                fd_sensitivities,
+                sensitivities[:, :, [parameter_names.index('kf'), k_idx]],
+                rtol=1e-4, atol=1e-5)
+
+    def test_simulated_ode_model(self):
+        ode_model = OdeModel(Model(get_template_model()), initialized=True)
+        ode_model.simulate_model(numpy.linspace(0, 1, 3))
+        with self.assertRaises(ValueError):
+            simulate_sensitivities(ode_model, numpy.linspace(0, 1, 3))
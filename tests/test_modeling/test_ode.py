@@ -7,7 +7,11 @@ import sympy
 
 from mira.metamodel import *
 from mira.modeling import Model
-from mira.modeling.ode import OdeModel, simulate_ode_model
+from mira.modeling.ode import (
+    IncrementalOdeModel,
+    OdeModel,
+    simulate_ode_model,
+)
 
 
 class TestODE(unittest.TestCase):
@@ -159,3 +163,76 @@ class TestODE(unittest.TestCase):
         # Check that the results have 3 variables for the 3 concepts
         # and the same number of rows as number of time points
         self.assertEqual((times.shape[0], 3), res.shape)
+
+    def test_incremental_ode(self):
+        """Test that an incremental ODE model matches the OdeModel after
+        edits of the template model, compiling only the changed templates."""
+        infected = Concept(name='infected')
+        recovered = Concept(name='recovered')
+        susceptible = Concept(name='susceptible')
+        template_model = TemplateModel(
+            templates=[
+                ControlledConversion(
+                    subject=susceptible,
+                    outcome=infected,
+                    controller=infected,
+                    name='infection').with_mass_action_rate_law('beta'),
+                NaturalConversion(subject=infected, outcome=recovered,
+                                  name='recovery').with_mass_action_rate_law('gamma'),
+            ],
+            parameters={
+                'beta': Parameter(name='beta', value=0.5),
+                'gamma': Parameter(name='gamma', value=0.1),
+                'delta': Parameter(name='delta', value=0.05),
+            },
+            initials={
+                'susceptible': Initial(concept=susceptible, expression=0.99),
+                'infected': Initial(concept=infected, expression=0.01),
+                'recovered': Initial(concept=recovered, expression=0),
+            },
+            observables={
+                'total': Observable(name='total', expression=sympy.Symbol(
+                    'susceptible') + sympy.Symbol('infected')),
+            },
+        )
+        times = numpy.linspace(0, 25, 100)
+        incremental_model = IncrementalOdeModel(template_model)
+
+        def assert_same_results(template_model):
+            ode_model = OdeModel(Model(template_model), initialized=True)
+            ode_res = ode_model.simulate_model(times, with_observables=True)
+            res = incremental_model.simulate_model(times,
+                                                   with_observables=True)
+            order = [incremental_model.vmap[ode_model.vname_map[idx]]
+                     for idx in range(len(ode_model.vmap))]
+            order.append(len(order))
+            numpy.testing.assert_allclose(res[:, order], ode_res,
+                                          rtol=1e-5, atol=1e-8)
+
+        assert_same_results(template_model)
+        compiled_functions = dict(incremental_model._compiled)
+
+        # Editing a rate law in place only compiles that template
+        template_model.set_rate_law(
+            'recovery', sympy.Symbol('gamma') * sympy.Symbol('infected') ** 2)
+        self.assertEqual([1], incremental_model.update())
+        assert_same_results(template_model)
+        rate_law = template_model.templates[0].rate_law
+        self.assertIs(compiled_functions[rate_law],
+                      incremental_model._compiled[rate_law])
+
+        # Adding a template, which introduces a new variable
+        dead = Concept(name='dead')
+        template_model = template_model.add_template(
+            NaturalConversion(subject=infected, outcome=dead)
+            .with_mass_action_rate_law('delta'))
+        template_model.initials['dead'] = Initial(concept=dead, expression=0)
+        self.assertEqual([2], incremental_model.update(template_model))
+        self.assertEqual(4, len(incremental_model.vmap))
+        assert_same_results(template_model)
+
+        # Parameter values are passed at simulation time
+        self.assertEqual([], incremental_model.update())
+        res = incremental_model.simulate_model(times,
+                                               parameters={'delta': 0})
+        self.assertEqual(0, res[-1, incremental_model.vmap['dead']])
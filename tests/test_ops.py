@@ -5,6 +5,7 @@ from collections import Counter
 from copy import deepcopy as _d
 from fractions import Fraction
 
+import pytest
 import sympy
 
 from mira.metamodel import *
@@ -460,6 +461,41 @@ def test_counts_to_dimensionless():
         assert initial.concept.units.expression.equals(1)
 
 
+
+def test_counts_to_dimensionless_stratified():
+    """Test that counts are converted to dimensionless in a stratified model
+    where concepts are shared between templates and initials."""
+    person = Unit(expression=sympy.Symbol('person'))
+    concepts = {name: Concept(name=name, units=person) for name in 'SIR'}
+    tm = TemplateModel(
+        templates=[
+            ControlledConversion(
+                subject=concepts['S'], outcome=concepts['I'],
+                controller=concepts['I'],
+                rate_law=_s('b') * _s('S') * _s('I')),
+            NaturalConversion(subject=concepts['I'], outcome=concepts['R'],
+                              rate_law=_s('g') * _s('I')),
+        ],
+        parameters={'b': Parameter(name='b', value=0.1),
+                    'g': Parameter(name='g', value=0.1)},
+        initials={name: Initial(concept=concept, expression=100)
+                  for name, concept in concepts.items()},
+    )
+    tm = stratify(tm, key='age', strata=['old', 'young'])
+    for interned in (False, True):
+        model = _d(tm)
+        if interned:
+            model.intern_concepts()
+        model = counts_to_dimensionless(model, 'person', 1000.)
+        assert len(model.initials) == 6
+        for initial in model.initials.values():
+            assert initial.expression.equals(0.05), initial
+            assert initial.concept.units.expression.equals(1)
+        for template in model.templates:
+            for concept in template.get_concepts_flat():
+                assert concept.units.expression.equals(1), concept
+
+
 def test_stratify_observable():
     tm = _d(sir_parameterized)
     symbols = set(tm.get_concepts_name_map().keys())
@@ -758,3 +794,86 @@ def test_stratify_unused_param():
     assert len(tm_strat.parameters) == 2
     assert tm_strat.parameters['beta_0'].value == 2
     assert tm_strat.parameters['beta_1'].value == 2
+
+
+def test_stratify_rate_law_rewrite():
+    from mira.metamodel.ops import _compile_rate_law_rewrite, rewrite_rate_law
+    S, I, E, beta, gamma = sympy.symbols('S I E beta gamma')
+    templates = [
+        GroupedControlledConversion(
+            subject=Concept(name='S'),
+            outcome=Concept(name='I'),
+            controllers=[Concept(name='I'), Concept(name='E')],
+            rate_law=beta * S * I * E + gamma * E,
+        ),
+        # The subject is also a controller
+        ControlledDegradation(
+            subject=Concept(name='I'),
+            controller=Concept(name='I'),
+            rate_law=gamma * I * I,
+        ),
+    ]
+    tm = TemplateModel(
+        templates=templates,
+        parameters={'beta': Parameter(name='beta', value=1),
+                    'gamma': Parameter(name='gamma', value=1)},
+    )
+    for template in templates:
+        rewrite = _compile_rate_law_rewrite(tm, template,
+                                            params_to_preserve={'gamma'})
+        new_template = _d(template)
+        for concept, stratum in zip(new_template.get_concepts(),
+                                    ['x', 'y', 'z']):
+            concept.with_context(inplace=True, age=stratum)
+        expected = _d(new_template)
+        expected_mappings = rewrite_rate_law(tm, template, expected, [0, 1],
+                                             params_to_preserve={'gamma'})
+        assert rewrite(new_template, [0, 1]) == expected_mappings
+        assert new_template.rate_law == expected.rate_law
+        assert 'gamma' not in expected_mappings
+
+    tm_strat = stratify(tm, key='age', strata=['young', 'old'], structure=[],
+                        cartesian_control=True)
+    rate_laws = {t.name: t.rate_law for t in tm_strat.templates}
+    assert rate_laws['t_young_old_young'] == (
+        _s('beta_0_1_0') * _s('S_young') * _s('I_old') * _s('E_young')
+        + _s('gamma_0_1_0') * _s('E_young')
+    )
+
+
+def test_stratify_shares_concepts():
+    tm = stratify(sir_parameterized, key='age', strata=['young', 'old'],
+                  cartesian_control=True)
+    concepts = {}
+    for template in tm.templates:
+        for concept in template.get_concepts():
+            assert concepts.setdefault(concept.name, concept) is concept
+    for initial in tm.initials.values():
+        assert concepts[initial.concept.name].is_equal_to(initial.concept)
+    # The concepts of the original model are unchanged
+    assert {c.name for c in sir_parameterized.get_concepts_map().values()} \
+        == {'susceptible_population', 'infected_population',
+            'immune_population'}
+
+
+def test_stratify_interned_concepts_read_only():
+    tm = stratify(sir_parameterized, key='age', strata=['young', 'old'],
+                  cartesian_control=True)
+    infected_young = tm.templates[0].outcome
+    shared_by = [t for t in tm.templates
+                 if any(c is infected_young for c in t.get_concepts_flat())]
+    assert len(shared_by) > 1
+    units = infected_young.units
+    person = Unit(expression=sympy.Symbol('person'))
+    # Shared concepts can't be modified in place
+    with pytest.raises(AttributeError):
+        infected_young.units = person
+    # Copies of them can, without affecting other templates
+    for concept in shared_by[0].get_concepts_flat(refresh=True):
+        concept.units = person
+    assert infected_young.units is units
+    assert all(c is not infected_young
+               for c in shared_by[0].get_concepts_flat())
+    model = _d(tm)
+    model.templates[1].get_concepts_flat()[0].name = 'x'
+    assert tm.templates[1].get_concepts_flat()[0].name != 'x'
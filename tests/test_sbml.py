@@ -1,8 +1,12 @@
 import os
+
+import libsbml
 import sympy
 
+from mira.metamodel.utils import safe_parse_expr
 from mira.sources.sbml.processor import parse_assignment_rule, \
-    process_unit_definition
+    process_unit_definition, sympy_from_ast, get_assignment_rule_map, \
+    remove_factor
 from mira.sources.sbml import template_model_from_sbml_file, template_model_from_sbml_string
 from mira.modeling.sbml import template_model_to_sbml_string
 
@@ -19,6 +23,48 @@ def test_parse_expr():
     assert rule is None
 
 
+def test_sympy_from_ast():
+    local_dict = {name: sympy.Symbol(name)
+                  for name in ["cell", "k", "S", "I", "Km", "beta"]}
+    local_dict["mm"] = sympy.Lambda(
+        sympy.symbols("v x"), sympy.Symbol("v") * sympy.Symbol("x"))
+    formulas = [
+        "cell * k * S * I",
+        "cell * (k * S * I - 2.0 * I)",
+        "k * S / (Km + S) / cell",
+        "-(k * S) + 0.5 * exp(-beta * I)",
+        "ln(1 + S) * mm(k, I)",
+        # Converted by parsing the formula string
+        "k * S^2",
+        "piecewise(k, gt(S, 1), 0)",
+    ]
+    for formula in formulas:
+        ast_node = libsbml.parseL3Formula(formula)
+        expected = safe_parse_expr(libsbml.formulaToString(ast_node),
+                                   local_dict=local_dict)
+        assert sympy_from_ast(ast_node, local_dict) == expected, formula
+
+
+def test_assignment_rule_map():
+    S, I, N, M, beta = sympy.symbols("S I N M beta")
+    rules = {"N": S + I, "M": 2 * N, "beta": 0.1 / M}
+    rule_map = get_assignment_rule_map(rules)
+    for expr in [beta * S * I, M * I / N, beta * M]:
+        # Substituting one rule at a time can simplify in between
+        expected = expr.subs({sympy.Symbol(k): v for k, v in rules.items()})
+        assert sympy.simplify(expr.xreplace(rule_map) - expected) == 0
+    assert rule_map[M] == 2 * (S + I)
+
+
+def test_remove_factor():
+    cell, k, S, I = sympy.symbols("cell k S I")
+    assert remove_factor(cell * k * S, cell) == k * S
+    assert remove_factor(cell * k * S - cell * I, cell) == k * S - I
+    assert remove_factor(k * S - cell * I, cell) is None
+    assert remove_factor(k * S / cell, cell) is None
+    assert remove_factor(cell, cell) == 1
+
+
 def test_unit_processing():
     class MockUnit:
         def __init__(self, kind, multiplier, exponent, scale):
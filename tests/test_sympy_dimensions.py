@@ -140,7 +140,7 @@ def _get_test_df():
     return df
 
 
-def test_json_serialization():
+def test_json_serialization(tmp_path):
     df = _get_test_df()
     document_version = "0.1"
     date_str = "1/1/2020"
@@ -148,12 +148,12 @@ def test_json_serialization():
     # Dump to json
     dump_df_json(
         data_frame=df,
-        path="test.json",
+        path=tmp_path / "test.json",
         document_version=document_version,
         date_str=date_str,
         default_handler=str,
     )
-    loaded_df = load_df_json("test.json")
+    loaded_df = load_df_json(tmp_path / "test.json")
     assert loaded_df is not None
     assert VERSION_KEY in loaded_df.attrs
     assert DATE_KEY in loaded_df.attrs
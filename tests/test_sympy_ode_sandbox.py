@@ -0,0 +1,131 @@
+import pytest
+
+from mira.sources.sympy_ode.llm_util import test_execution as run_test_execution
+from mira.sources.sympy_ode.sandbox import SandboxPool, execute_code
+
+SIR_CODE = """
+t = sympy.symbols("t")
+S, I, R = sympy.symbols("S I R", cls=sympy.Function)
+b, g = sympy.symbols("b g")
+odes = [
+    sympy.Eq(S(t).diff(t), -b * S(t) * I(t)),
+    sympy.Eq(I(t).diff(t), b * S(t) * I(t) - g * I(t)),
+    sympy.Eq(R(t).diff(t), g * I(t)),
+]
+"""
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with SandboxPool(processes=2, timeout=5, memory_limit=512) as pool:
+        yield pool
+
+
+def test_execute_code():
+    result = execute_code(SIR_CODE, test_model=True)
+    assert result.success
+    assert len(result.odes) == 3
+    assert result.model_success
+
+    result = execute_code("x = 1")
+    assert not result.success
+    assert result.error == "Code executed but 'odes' was not defined"
+
+    result = execute_code("odes = []", test_model=True)
+    assert result.success
+    assert not result.model_success
+    assert result.model_error == "Empty ODE list"
+
+
+def test_sandbox_run(pool):
+    result = pool.run(SIR_CODE, test_model=True)
+    assert result.success, result.error
+    assert [str(ode.lhs) for ode in result.odes] == [
+        "Derivative(S(t), t)", "Derivative(I(t), t)", "Derivative(R(t), t)"
+    ]
+    assert result.model_success
+
+    result = pool.run("odes = [undefined]")
+    assert not result.success
+    assert result.error.startswith("NameError")
+
+    # Exiting the interpreter doesn't take down the worker
+    result = pool.run("raise SystemExit(1)")
+    assert not result.success
+    assert pool.run(SIR_CODE).success
+
+
+def test_sandbox_timeout():
+    with SandboxPool(processes=1, timeout=1) as pool:
+        result = pool.run("while True:\n    pass")
+        assert not result.success
+        assert result.error.startswith("TimeoutError")
+        # The stuck worker was replaced
+        assert pool.run(SIR_CODE).success
+
+
+def test_sandbox_map(pool):
+    codes = [SIR_CODE, "odes = 1 / 0", SIR_CODE]
+    results = pool.map(codes)
+    assert [result.success for result in results] == [True, False, True]
+    assert results[1].error.startswith("ZeroDivisionError")
+
+
+def test_test_execution(pool):
+    assert run_test_execution(SIR_CODE, pool=pool) == (True, "")
+    success, error = run_test_execution("x = 1", pool=pool)
+    assert not success
+    assert error == "Code executed but 'odes' was not defined"
+
+
+class _CountingPool:
+    def __init__(self, pool):
+        self.pool = pool
+        self.codes = []
+
+    def run(self, code, test_model=False):
+        self.codes.append(code)
+        return self.pool.run(code, test_model=test_model)
+
+
+class _FakeClient:
+    """Answers every chat completion with the same code snippet"""
+
+    def __init__(self, code):
+        self.code = code
+
+    def run_chat_completion(self, prompt):
+        from types import SimpleNamespace
+
+        return SimpleNamespace(message=SimpleNamespace(content=self.code))
+
+
+def test_execute_template_model_runs_once(pool, monkeypatch):
+    from mira.sources.sympy_ode import agent_pipeline
+
+    counting_pool = _CountingPool(pool)
+    monkeypatch.setattr(agent_pipeline, "get_default_pool",
+                        lambda: counting_pool)
+    tm = agent_pipeline.execute_template_model_from_sympy_odes(
+        SIR_CODE, attempt_grounding=False, client=_FakeClient(None))
+    assert len(tm.templates) == 2
+    assert counting_pool.codes == [SIR_CODE]
+
+    # The corrected code's result is reused
+    bad_code = "odes = [sympy.Eq(sympy.Symbol('x'), 1)]"
+    counting_pool.codes = []
+    tm = agent_pipeline.execute_template_model_from_sympy_odes(
+        bad_code, attempt_grounding=False, client=_FakeClient(SIR_CODE))
+    assert len(tm.templates) == 2
+    assert counting_pool.codes == [bad_code, SIR_CODE.strip()]
+
+
+def test_execute_template_model_failed_correction(pool, monkeypatch):
+    from mira.sources.sympy_ode import agent_pipeline
+    from mira.sources.sympy_ode.llm_util import CodeExecutionError
+
+    monkeypatch.setattr(agent_pipeline, "get_default_pool", lambda: pool)
+    with pytest.raises(CodeExecutionError):
+        agent_pipeline.execute_template_model_from_sympy_odes(
+            "odes = 1 / 0", attempt_grounding=False,
+            client=_FakeClient("odes = 1 / 0"))
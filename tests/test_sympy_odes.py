@@ -317,3 +317,23 @@ def test_sympy_named_functions():
     ]
 
     model = template_model_from_sympy_odes(odes)
+
+
+def test_multiple_branching():
+    t = sympy.symbols("t")
+    S, I, R, D, H = sympy.symbols("S I R D H", cls=sympy.Function)
+    b, g, k, h, q = sympy.symbols("b g k h q")
+
+    # Two branching flows, each found as a triple of terms
+    sympy_equations = [
+        sympy.Eq(S(t).diff(t), -b * S(t) * I(t)),
+        sympy.Eq(I(t).diff(t), b * S(t) * I(t) - g * I(t)),
+        sympy.Eq(H(t).diff(t), k * g * I(t) - h * H(t)),
+        sympy.Eq(R(t).diff(t), (1 - k) * g * I(t) + q * h * H(t)),
+        sympy.Eq(D(t).diff(t), (1 - q) * h * H(t)),
+    ]
+    tm = template_model_from_sympy_odes(sympy_equations)
+    conversions = {(t.subject.name, t.outcome.name)
+                   for t in tm.templates if t.type == 'NaturalConversion'}
+    assert conversions == {('I', 'H'), ('I', 'R'), ('H', 'R'), ('H', 'D')}
+    assert len(tm.templates) == 5
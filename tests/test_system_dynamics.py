@@ -304,3 +304,45 @@ def test_with_lookup_to_piecewise():
     val = with_lookup_to_piecewise(data)
     rv = safe_parse_expr(val)
     assert isinstance(rv, sympy.Expr)
+
+
+def test_vensim_auxiliary_inlining(tmp_path):
+    # Auxiliaries depending on other auxiliaries are inlined into the flows
+    equations = {
+        "Susceptible": "INTEG (-Infection, 990)",
+        "Infected": "INTEG (Infection - Recovery, 10)",
+        "Recovered": "INTEG (Recovery, 0)",
+        "Total Population": "Susceptible + Infected + Recovered",
+        "Prevalence": "Infected / Total Population",
+        "Force of Infection": "Contact Rate * Prevalence",
+        "Infection": "Susceptible * Force of Infection",
+        "Recovery": "Recovery Rate * Infected",
+        "Contact Rate": "0.3",
+        "Recovery Rate": "0.1",
+        "INITIAL TIME": "0",
+        "FINAL TIME": "100",
+        "TIME STEP": "1",
+        "SAVEPER": "TIME STEP",
+    }
+    model_text = "{UTF-8}\n" + "".join(
+        f"{name}=\n\t{expr}\n\t~\tPerson\n\t~\t\t|\n\n"
+        for name, expr in equations.items()
+    ) + "\\\\\\---/// Sketch information - do not modify anything except names\n"
+    path = tmp_path / "sir.mdl"
+    path.write_text(model_text)
+
+    tm = template_model_from_mdl_file(path)
+    S, I, R, beta, gamma = sympy.symbols(
+        "susceptible infected recovered contact_rate recovery_rate"
+    )
+    rate_laws = {
+        template.display_name: template.rate_law
+        for template in tm.templates
+    }
+    expected = {
+        "infection": S * beta * I / (S + I + R),
+        "recovery": gamma * I,
+    }
+    for name, rate_law in expected.items():
+        assert sympy.simplify(rate_laws[name] - rate_law) == 0
+    assert {"contact_rate", "recovery_rate"} <= set(tm.parameters)
@@ -1,3 +1,6 @@
+import json
+
+import pytest
 import sympy
 from mira.metamodel import *
 from mira.metamodel.templates import Config
@@ -305,6 +308,79 @@ def test_rate_json():
     assert t3.rate_law.args[1].name == 'y'
 
 
+def test_from_json_does_not_modify_input():
+    tm = TemplateModel(
+        templates=[
+            ControlledConversion(
+                subject=Concept(name='S', identifiers={'ido': '0000514'},
+                                context={'city': 'geonames:5128581'}),
+                outcome=Concept(name='I', identifiers={'ido': '0000511'}),
+                controller=Concept(name='I', identifiers={'ido': '0000511'}),
+                rate_law=sympy.Symbol('beta') * sympy.Symbol('S') *
+                sympy.Symbol('I'),
+            )
+        ],
+        parameters={'beta': Parameter(name='beta', value=0.1)},
+        initials={'S': Initial(concept=Concept(name='S'),
+                               expression=sympy.Symbol('beta') * 10)},
+    )
+    tm_json = tm.to_json()
+    tm_json_before = json.dumps(tm_json, sort_keys=True)
+    tm2 = TemplateModel.from_json(tm_json)
+    assert json.dumps(tm_json, sort_keys=True) == tm_json_before
+    # Changing the loaded model doesn't change the input
+    tm2.templates[0].subject.context['city'] = 'geonames:4930956'
+    tm2.templates[0].subject.identifiers['ncit'] = 'C171133'
+    assert tm_json['templates'][0]['subject']['context'] == \
+        {'city': 'geonames:5128581'}
+    assert 'ncit' not in tm_json['templates'][0]['subject']['identifiers']
+    assert 'expression' in tm_json['initials']['S']
+
+
+def test_from_json_lazy():
+    import pickle
+
+    parameters = {f'p{i}': Parameter(name=f'p{i}', value=i)
+                  for i in range(1000)}
+    parameters['k'] = Parameter(name='k', value=0.1)
+    tm = TemplateModel(
+        templates=[
+            NaturalDegradation(subject=Concept(name='x'),
+                               rate_law=sympy.Symbol('k') *
+                               sympy.Symbol('x'),
+                               provenance=[{'pmid': ['123']}]),
+        ],
+        parameters=parameters,
+    )
+    tm_json = tm.to_json()
+    tm_lazy = TemplateModel.from_json(tm_json, lazy=True)
+    tm_eager = TemplateModel.from_json(tm_json)
+    template = tm_lazy.templates[0]
+    assert template.subject.name == 'x'
+    # The template only references the symbols its rate law needs, so
+    # copying it doesn't copy the symbols of the whole model
+    assert len(pickle.dumps(template)) < \
+        2 * len(pickle.dumps(tm_eager.templates[0]))
+    assert template.rate_law == sympy.Symbol('k') * sympy.Symbol('x')
+    assert tm_lazy.to_json() == tm_eager.to_json() == tm_json
+    # Changing the loaded provenance doesn't change the input
+    template.provenance[0]['pmid'].append('456')
+    assert tm_json['templates'][0]['provenance'] == [{'pmid': ['123']}]
+
+    # Setting the rate law overrides the unparsed one
+    template = Template.from_json(tm_json['templates'][0], lazy=True)
+    template.rate_law = sympy.Symbol('x')
+    assert template.rate_law == sympy.Symbol('x')
+    assert template.to_json()['rate_law'] == 'x'
+
+    # Errors in the rate law are only raised when it is accessed
+    template_json = dict(tm_json['templates'][0], rate_law='k *')
+    template = Template.from_json(template_json, lazy=True)
+    assert template.subject.name == 'x'
+    with pytest.raises(Exception):
+        template.rate_law
+
+
 def test_different_class_refinement():
     s = Concept(name='s')
     o = Concept(name='o')
@@ -381,3 +457,36 @@ def test_set_rate_law():
     assert isinstance(tm.templates[0].rate_law, sympy.Expr)
     assert sorted(tm.templates[0].rate_law.
                   free_symbols, key=str)[0].name == 'beta'
+
+
+def test_concept_store():
+    store = ConceptStore()
+    s1 = Concept(name='S', identifiers={'ido': '0000514'}, context={'a': 'b'})
+    s2 = Concept(name='S', identifiers={'ido': '0000514'}, context={'a': 'b'})
+    assert store.intern(s1) is s1
+    assert store.intern(s2) is s1
+    assert store.intern(Concept(name='S')) is not s1
+    assert len(store) == 2
+
+    s_young = store.with_context(s2, do_rename=True, age='young')
+    assert s_young.name == 'S_young'
+    assert s_young.context == {'a': 'b', 'age': 'young'}
+    assert store.with_context(s1, do_rename=True, age='young') is s_young
+    assert store.intern(
+        s1.with_context(do_rename=True, inplace=False, age='young')
+    ) is s_young
+    assert s1.context == {'a': 'b'}
+
+    tm = TemplateModel(
+        templates=[
+            NaturalConversion(subject=Concept(name='S'),
+                              outcome=Concept(name='I')),
+            NaturalDegradation(subject=Concept(name='I')),
+        ],
+        initials={'I': Initial(concept=Concept(name='I'),
+                               expression=sympy.Integer(1))},
+    )
+    tm.intern_concepts()
+    infected = tm.templates[0].outcome
+    assert tm.templates[1].subject is infected
+    assert tm.initials['I'].concept is infected
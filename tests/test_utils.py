@@ -0,0 +1,17 @@
+import pytest
+
+from mira.utils import write_atomic
+
+
+def test_write_atomic(tmp_path):
+    path = tmp_path / "a" / "b.json"
+    write_atomic(path, "{}")
+    assert path.read_text() == "{}"
+    write_atomic(path, b"\x00\x01")
+    assert path.read_bytes() == b"\x00\x01"
+
+    # A failed write leaves neither a partial file nor a temporary file
+    with pytest.raises(TypeError):
+        write_atomic(path, 1)
+    assert path.read_bytes() == b"\x00\x01"
+    assert [p.name for p in path.parent.iterdir()] == ["b.json"]
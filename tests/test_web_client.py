@@ -121,3 +121,59 @@ def test_lexical():
     assert isinstance(res, list)
     assert isinstance(res[0], dict)
     assert {"id", "name"}.issubset(res[0].keys())
+
+
+def test_web_client_cache(tmp_path):
+    client = DkgWebClient(api_url="http://localhost:8771", cache_dir=tmp_path,
+                          ttl=60)
+    cache = client.cache
+    key = cache.get_key("get", "http://localhost:8771/api/entity/ido:0000511",
+                        None)
+    assert cache.get(key) == (False, None)
+    cache.set(key, {"id": "ido:0000511", "name": "infected population",
+                    "type": "class", "obsolete": False})
+    hit, data = cache.get(key)
+    assert hit
+    assert data["name"] == "infected population"
+
+    # The entity is served from the cache without any request being made
+    entity = client.get_entity("ido:0000511")
+    assert entity.name == "infected population"
+    assert client.get_entities_batch(["ido:0000511", "ido:0000511"]) == \
+        [entity, entity]
+
+    # Stale entries are ignored
+    cache.ttl = 0
+    assert cache.get(key) == (False, None)
+
+    client.clear_cache()
+    cache.ttl = None
+    assert cache.get(key) == (False, None)
+
+
+def test_web_cache_concurrent_writes(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = WebCache(tmp_path, ttl=None)
+    key = cache.get_key("get", "http://localhost:8771/api/entity/x", None)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: cache.set(key, {"i": i}), range(64)))
+    hit, data = cache.get(key)
+    assert hit
+    assert 0 <= data["i"] < 64
+    # No temporary files are left behind
+    assert [p.name for p in tmp_path.glob("*/*")] == [f"{key}.json"]
+
+
+def test_is_ontological_child_is_thin():
+    import subprocess
+    import sys
+
+    # Checking refinement from the metamodel doesn't require the
+    # dependencies of the DKG service
+    code = (
+        "import sys\n"
+        "from mira.metamodel.utils import is_ontological_child\n"
+        "assert not [m for m in sys.modules if m.startswith('mira.dkg')]\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)